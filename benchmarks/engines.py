@@ -0,0 +1,46 @@
+""" Benchmark of the arithmetic and lookup-table engines on batches of increasing size. """
+
+import argparse
+import functools
+import sys
+
+import numpy as np
+
+from adnex.batch import predict_batch
+from benchmarks.parallel_scaling import best_time, make_cohort
+
+
+def main() -> int:
+    """
+    Time `predict_batch` with both engines and check that they agree.
+
+    Returns
+    -------
+    int
+        0 if the engines agree to within 1e-12 relative tolerance, 1 otherwise.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 100_000, 1_000_000, 10_000_000])
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs per configuration.')
+    args = parser.parse_args()
+
+    agree = True
+    print(f'{"rows":>10} {"arithmetic":>12} {"lookup":>12} {"speedup":>8}')
+    for n_rows in args.rows:
+        cohort = make_cohort(n_rows)
+        timings = {
+            engine: best_time(functools.partial(predict_batch, cohort, engine=engine), args.repeat)
+            for engine in ('arithmetic', 'lookup')
+        }
+        agree = agree and np.allclose(
+            predict_batch(cohort, engine='lookup').probabilities, predict_batch(cohort).probabilities, rtol=1e-12
+        )
+        speedup = timings['arithmetic'] / timings['lookup']
+        print(f'{n_rows:>10} {timings["arithmetic"]:>11.4f}s {timings["lookup"]:>11.4f}s {speedup:>7.2f}x')
+
+    print('engines agree:', agree)
+    return 0 if agree else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
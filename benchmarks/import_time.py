@@ -0,0 +1,95 @@
+""" Benchmark of the time it takes to import the package, checked against a budget. """
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+BUDGET_FILE = Path(__file__).with_name('import_time_budget.json')
+
+
+def measure_import_time(statement: str, module: str, repeat: int = 7) -> Dict[str, object]:
+    """
+    Measure the cumulative import time of a module with `python -X importtime` in fresh interpreters.
+
+    Parameters
+    ----------
+    statement : str
+        The Python statement to run, e.g. 'import adnex'.
+    module : str
+        The module whose cumulative import time is measured.
+    repeat : int
+        Number of fresh interpreters to run (default is 7). The median is reported.
+
+    Returns
+    -------
+    Dict[str, object]
+        The median cumulative import time in microseconds and whether pandas was imported.
+    """
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join([str(ROOT / 'src'), os.environ.get('PYTHONPATH', '')])}
+    code = f"{statement}; import sys; print('pandas' in sys.modules)"
+
+    timings: List[int] = []
+    pandas_imported = False
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True, env=env, check=True
+        )
+        pandas_imported = pandas_imported or result.stdout.strip() == 'True'
+        timings.append(_cumulative_time(result.stderr, module))
+
+    return {'cumulative_us': int(statistics.median(timings)), 'pandas_imported': pandas_imported}
+
+
+def _cumulative_time(importtime_output: str, module: str) -> int:
+    # Lines look like "import time:       self [us] |  cumulative |   imported package"
+    for line in importtime_output.splitlines():
+        parts = [part.strip() for part in line.replace('import time:', '', 1).split('|')]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+    raise ValueError(f'No import time found for {module!r}.')
+
+
+def main() -> int:
+    """
+    Measure the import times listed in the budget file and compare them with their budgets.
+
+    Returns
+    -------
+    int
+        0 if all measurements are within budget, 1 otherwise.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--update', action='store_true', help='Store the measurements in the budget file.')
+    args = parser.parse_args()
+
+    budgets = json.loads(BUDGET_FILE.read_text(encoding='utf-8'))
+    failed = False
+
+    for name, budget in budgets.items():
+        measurement = measure_import_time(budget['statement'], budget['module'])
+        over_budget = measurement['cumulative_us'] > budget['budget_us']
+        pandas_violation = measurement['pandas_imported'] and not budget['allow_pandas']
+        failed = failed or over_budget or pandas_violation
+
+        status = 'FAIL' if over_budget or pandas_violation else 'ok'
+        print(
+            f"{status:4} {name}: {measurement['cumulative_us'] / 1000:.1f} ms "
+            f"(budget {budget['budget_us'] / 1000:.1f} ms, pandas imported: {measurement['pandas_imported']})"
+        )
+        if args.update:
+            budget['measured_us'] = measurement['cumulative_us']
+
+    if args.update:
+        BUDGET_FILE.write_text(json.dumps(budgets, indent=4) + '\n', encoding='utf-8')
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,199 @@
+""" Load generator for the `adnex serve` HTTP server, reporting requests per second and latency percentiles. """
+
+import argparse
+import contextlib
+import http.client
+import json
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from benchmarks.parallel_scaling import make_cohort
+
+
+def make_bodies(n_bodies: int, rows_per_request: int) -> List[bytes]:
+    """
+    Generate request bodies of random valid patients.
+
+    Parameters
+    ----------
+    n_bodies : int
+        Number of distinct bodies.
+    rows_per_request : int
+        Number of patients per body. A single patient is sent as a JSON object, several as JSON Lines.
+
+    Returns
+    -------
+    List[bytes]
+        The encoded bodies.
+    """
+    cohort = make_cohort(n_bodies * rows_per_request)
+    rows = [
+        {name: None if np.isnan(column[i]) else int(column[i]) for name, column in cohort.items()}
+        for i in range(n_bodies * rows_per_request)
+    ]
+    chunks = [rows[start : start + rows_per_request] for start in range(0, len(rows), rows_per_request)]
+    return [''.join(json.dumps(row) + '\n' for row in chunk).encode() for chunk in chunks]
+
+
+def run_client(
+    url: str, bodies: List[bytes], content_type: str, stop_at: float, results: List[Tuple[float, int]]
+) -> None:
+    """
+    Send requests over one keep-alive connection until `stop_at`, recording the latency and status of each.
+
+    Parameters
+    ----------
+    url : str
+        The base URL of the server.
+    bodies : List[bytes]
+        The request bodies, sent in turn.
+    content_type : str
+        The Content-Type of the bodies.
+    stop_at : float
+        The `time.perf_counter` value at which to stop.
+    results : List[Tuple[float, int]]
+        The list to append the latency in seconds and the status code of every request to.
+    """
+    parsed = urllib.parse.urlsplit(url)
+    connection = http.client.HTTPConnection(parsed.hostname, parsed.port)
+    headers = {'Content-Type': content_type}
+    try:
+        for i in range(sys.maxsize):
+            start = time.perf_counter()
+            if start >= stop_at:
+                break
+            connection.request('POST', '/predict', body=bodies[i % len(bodies)], headers=headers)
+            response = connection.getresponse()
+            response.read()
+            results.append((time.perf_counter() - start, response.status))
+    finally:
+        connection.close()
+
+
+def run_load(
+    url: str, bodies: List[bytes], content_type: str, n_clients: int, duration: float
+) -> List[Tuple[float, int]]:
+    """
+    Send requests from concurrent clients for a fixed duration.
+
+    Parameters
+    ----------
+    url : str
+        The base URL of the server.
+    bodies : List[bytes]
+        The request bodies, sent in turn by every client.
+    content_type : str
+        The Content-Type of the bodies.
+    n_clients : int
+        Number of clients, each with its own thread and keep-alive connection.
+    duration : float
+        Seconds to send requests for.
+
+    Returns
+    -------
+    List[Tuple[float, int]]
+        The latency in seconds and the status code of every request.
+    """
+    results: List[Tuple[float, int]] = []
+    stop_at = time.perf_counter() + duration
+    clients = [
+        threading.Thread(target=run_client, args=(url, bodies, content_type, stop_at, results))
+        for _ in range(n_clients)
+    ]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    return results
+
+
+@contextlib.contextmanager
+def local_server(workers: int, max_batch_size: int) -> Iterator[str]:
+    """
+    Run `python -m adnex serve` on a free local port.
+
+    Parameters
+    ----------
+    workers : int
+        Number of micro-batches scored at the same time.
+    max_batch_size : int
+        Maximum number of rows per micro-batch.
+
+    Yields
+    ------
+    str
+        The base URL of the server, once it answers on /health.
+    """
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+
+    command = [sys.executable, '-m', 'adnex', 'serve', '--port', str(port), '--workers', str(workers)]
+    command += ['--max-batch-size', str(max_batch_size)]
+    url = f'http://127.0.0.1:{port}'
+    with subprocess.Popen(command) as process:
+        try:
+            for _ in range(100):
+                with contextlib.suppress(OSError):
+                    with urllib.request.urlopen(f'{url}/health', timeout=1):
+                        break
+                time.sleep(0.1)
+            yield url
+        finally:
+            process.terminate()
+            process.wait()
+
+
+def main() -> int:
+    """
+    Load the server with concurrent clients and report the throughput and latency.
+
+    Returns
+    -------
+    int
+        0 if every request succeeded, 1 otherwise.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--url', help='Base URL of a running server (default: start a local one).')
+    parser.add_argument('--clients', type=int, default=32, help='Number of concurrent connections.')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run for.')
+    parser.add_argument('--rows-per-request', type=int, default=1, help='Rows per request; >1 sends JSON Lines.')
+    parser.add_argument('--workers', type=int, default=1, help='Workers of the local server.')
+    parser.add_argument('--max-batch-size', type=int, default=512, help='Maximum batch size of the local server.')
+    args = parser.parse_args()
+
+    bodies = make_bodies(1_000, args.rows_per_request)
+    content_type = 'application/json' if args.rows_per_request == 1 else 'application/x-ndjson'
+
+    server: contextlib.AbstractContextManager[Optional[str]]
+    server = local_server(args.workers, args.max_batch_size) if args.url is None else contextlib.nullcontext(args.url)
+    with server as url:
+        results = run_load(url, bodies, content_type, args.clients, args.duration)
+        with urllib.request.urlopen(f'{url}/metrics') as response:
+            batch_lines = [line for line in response.read().decode().splitlines() if 'adnex_batch_size_' in line]
+
+    latencies = np.array([latency for latency, _ in results])
+    n_failed = sum(status != 200 for _, status in results)
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000 if latencies.size else (np.nan, np.nan)
+
+    print(f'{len(results)} requests from {args.clients} clients in {args.duration:.1f} s ({n_failed} failed)')
+    print(f'requests/s {len(results) / args.duration:10.1f}')
+    print(f'rows/s     {len(results) * args.rows_per_request / args.duration:10.1f}')
+    print(f'p50        {p50:10.2f} ms')
+    print(f'p99        {p99:10.2f} ms')
+    print(
+        '\n'.join(line for line in batch_lines if line.startswith(('adnex_batch_size_sum', 'adnex_batch_size_count')))
+    )
+    return 0 if n_failed == 0 and results else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+""" Benchmark of the scaling of `ParallelScorer` with the number of worker processes (run with `make benchmarks`). """
+
+import argparse
+import functools
+import os
+import sys
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from adnex.batch import predict_batch
+from adnex.parallel import ParallelScorer
+
+
+def make_cohort(n_rows: int, seed: int = 0) -> Dict[str, np.ndarray]:
+    """
+    Generate a random cohort of valid patients, about a third of them without CA-125.
+
+    Parameters
+    ----------
+    n_rows : int
+        Number of patients.
+    seed : int
+        Seed of the random number generator (default is 0).
+
+    Returns
+    -------
+    Dict[str, np.ndarray]
+        The ADNEX variables as columns.
+    """
+    rng = np.random.default_rng(seed)
+    lesion = rng.integers(1, 300, n_rows)
+    return {
+        'age': rng.integers(18, 90, n_rows),
+        's_ca_125': np.where(rng.random(n_rows) < 0.3, np.nan, rng.integers(1, 1000, n_rows)),
+        'max_lesion_diameter': lesion,
+        'max_solid_component': rng.integers(0, lesion + 1),
+        'more_than_10_locules': rng.integers(0, 2, n_rows),
+        'number_of_papillary_projections': rng.integers(0, 5, n_rows),
+        'acoustic_shadows_present': rng.integers(0, 2, n_rows),
+        'ascites_present': rng.integers(0, 2, n_rows),
+        'is_oncology_center': rng.integers(0, 2, n_rows),
+    }
+
+
+def best_time(function: Callable[[], object], repeat: int) -> float:
+    """
+    Return the fastest of several timed calls, in seconds.
+
+    Parameters
+    ----------
+    function : Callable[[], object]
+        The function to time.
+    repeat : int
+        Number of calls.
+
+    Returns
+    -------
+    float
+        The shortest duration.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> int:
+    """
+    Time the serial batch path and `ParallelScorer` with an increasing number of workers.
+
+    Returns
+    -------
+    int
+        0 if the parallel results are identical to the serial results, 1 otherwise.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=5_000_000, help='Number of rows to score.')
+    parser.add_argument('--max-jobs', type=int, default=os.cpu_count(), help='Largest number of workers to time.')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs per configuration.')
+    args = parser.parse_args()
+
+    cohort = make_cohort(args.rows)
+    expected = predict_batch(cohort)
+    serial = best_time(functools.partial(predict_batch, cohort), args.repeat)
+    print(f'{args.rows} rows, {os.cpu_count()} CPUs')
+    print(f'serial      {serial:8.3f} s')
+
+    n_jobs_values: List[int] = sorted({2**power for power in range(16) if 2**power < args.max_jobs} | {args.max_jobs})
+    identical = True
+    for n_jobs in n_jobs_values:
+        with ParallelScorer(n_jobs=n_jobs, min_shard_size=1) as scorer:
+            prediction = scorer.predict_batch(cohort)  # Also starts the workers before timing
+            identical = identical and np.array_equal(prediction.probabilities, expected.probabilities)
+            duration = best_time(functools.partial(scorer.predict_batch, cohort), args.repeat)
+        speedup = serial / duration
+        print(f'n_jobs={n_jobs:<4} {duration:8.3f} s  speedup {speedup:5.2f}  efficiency {speedup / n_jobs:5.0%}')
+
+    print('results identical to serial:', identical)
+    return 0 if identical else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,49 @@
+""" Benchmark of deduplicated batch scoring on cohorts with an increasing share of repeated rows. """
+
+import argparse
+import functools
+import sys
+
+import numpy as np
+
+from adnex.batch import predict_batch
+from adnex.dedup import take_rows
+from benchmarks.parallel_scaling import best_time, make_cohort
+
+
+def main() -> int:
+    """
+    Time `predict_batch` with and without deduplication and check that the results agree.
+
+    Returns
+    -------
+    int
+        0 if the results agree to within 1e-12 relative tolerance, 1 otherwise.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--unique', type=int, nargs='+', default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs per configuration.')
+    args = parser.parse_args()
+
+    agree = True
+    print(f'{"unique":>10} {"plain":>10} {"dedup":>10} {"speedup":>8}')
+    for n_unique in args.unique:
+        positions = np.random.default_rng(1).integers(0, n_unique, args.rows)
+        cohort = take_rows(make_cohort(n_unique), positions)
+        timings = {
+            deduplicate: best_time(functools.partial(predict_batch, cohort, deduplicate=deduplicate), args.repeat)
+            for deduplicate in (False, True)
+        }
+        agree = agree and np.allclose(
+            predict_batch(cohort, deduplicate=True).probabilities, predict_batch(cohort).probabilities, rtol=1e-12
+        )
+        speedup = timings[False] / timings[True]
+        print(f'{n_unique:>10} {timings[False]:>9.4f}s {timings[True]:>9.4f}s {speedup:>7.2f}x')
+
+    print('results agree:', agree)
+    return 0 if agree else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,412 @@
+""" Benchmark suite of the scalar, batch, validation, parallel and import-time performance, with JSON results. """
+
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+import adnex
+from adnex.batch import predict_batch
+from adnex.computation import compute_probabilities_from_z_values
+from adnex.evaluation import EvaluationAccumulator, discrimination
+from adnex.explain import explain_contributions, marginal_effects
+from adnex.inverse import solve_risk_threshold
+from adnex.uncertainty import GaussianNoise, LogNormalNoise, propagate_measurement_error
+from adnex.validation.core import validate_input, validate_input_frame
+from adnex.workspace import Workspace
+from benchmarks.import_time import ROOT, measure_import_time
+from benchmarks.parallel_scaling import make_cohort
+
+DEFAULT_SIZES = (1, 1_000, 100_000, 1_000_000)
+DEFAULT_THRESHOLD = 0.1
+
+# Minimum time of one timed run; fast functions are called repeatedly within a run to reach it
+_MIN_RUN_TIME = 0.2
+
+# Peak memory below which changes are not flagged, as small allocations vary between runs
+_MIN_COMPARED_MEMORY = 2**20
+
+
+class Benchmark(NamedTuple):
+    """
+    A benchmark case.
+
+    Attributes
+    ----------
+    name : str
+        Unique name, e.g. 'batch/predict_risks_frame/100000'.
+    setup : Callable[[], Callable[[], object]]
+        Prepares the input, outside of the timing, and returns the function to time.
+    rows : int
+        Number of rows processed per call, used for the throughput.
+    memory : bool
+        Whether to measure the peak memory of a call with tracemalloc.
+    """
+
+    name: str
+    setup: Callable[[], Callable[[], object]]
+    rows: int = 1
+    memory: bool = False
+
+
+def collect_benchmarks(sizes: Sequence[int], n_jobs: int) -> List[Benchmark]:
+    """
+    List the benchmark cases.
+
+    Parameters
+    ----------
+    sizes : Sequence[int]
+        Numbers of rows of the synthetic cohorts of the batch cases.
+    n_jobs : int
+        Number of workers of the parallel cases, which run for the largest size only.
+
+    Returns
+    -------
+    List[Benchmark]
+        The benchmark cases, with the timed function of every case created lazily by its setup.
+    """
+    row = pd.DataFrame(make_cohort(1)).iloc[0].fillna(68.0)
+    values = {name: int(value) for name, value in row.items()}
+
+    benchmarks = [
+        Benchmark('scalar/predict_risks', lambda: lambda: adnex.predict_risks(row)),
+        Benchmark('scalar/predict_cancer_risk', lambda: lambda: adnex.predict_cancer_risk(row)),
+        Benchmark('scalar/predict_patient', lambda: lambda: adnex.predict_patient(values)),
+        Benchmark('validation/validate_input', lambda: lambda: validate_input(row)),
+    ]
+
+    for n_rows in sizes:
+        benchmarks += [
+            Benchmark(
+                f'batch/predict_risks_frame/{n_rows}', _frame_case(adnex.predict_risks_frame, n_rows), n_rows, True
+            ),
+            Benchmark(f'batch/predict_risks_frame_validated/{n_rows}', _validated_case(n_rows), n_rows, True),
+            Benchmark(f'batch/predict_batch/{n_rows}', _columns_case(predict_batch, n_rows), n_rows, True),
+            Benchmark(f'batch/predict_batch_workspace/{n_rows}', _workspace_case(n_rows), n_rows, True),
+            Benchmark(
+                f'batch/explain_contributions/{n_rows}', _columns_case(explain_contributions, n_rows), n_rows, True
+            ),
+            Benchmark(f'batch/marginal_effects/{n_rows}', _columns_case(marginal_effects, n_rows), n_rows, True),
+            Benchmark(f'batch/solve_risk_threshold/{n_rows}', _columns_case(_solve_ca125, n_rows), n_rows, True),
+            Benchmark(f'evaluation/discrimination/{n_rows}', _evaluation_case(discrimination, n_rows), n_rows, True),
+            Benchmark(f'evaluation/accumulator/{n_rows}', _evaluation_case(_accumulate, n_rows), n_rows, True),
+            Benchmark(f'validation/validate_input_frame/{n_rows}', _frame_case(_validate, n_rows), n_rows, True),
+        ]
+        benchmarks += [
+            Benchmark(f'kernel/softmax/{dtype}/{n_rows}', _z_values_case(dtype, n_rows), n_rows, True)
+            for dtype in ('float64', 'float32')
+        ]
+
+    # The draws per patient multiply the work, so the Monte Carlo case uses the smallest cohort
+    smallest = min(sizes)
+    benchmarks.append(
+        Benchmark(f'batch/propagate_measurement_error/{smallest}', _columns_case(_propagate, smallest), smallest, True)
+    )
+
+    largest = max(sizes)
+    benchmarks.append(
+        Benchmark(
+            f'parallel/predict_risks_frame/{largest}/n_jobs={n_jobs}',
+            _frame_case(lambda frame: adnex.predict_risks_frame(frame, n_jobs=n_jobs), largest),
+            largest,
+        )
+    )
+    return benchmarks
+
+
+def run_benchmark(benchmark: Benchmark, repeat: int) -> Dict[str, Any]:
+    """
+    Time a benchmark case and measure its peak memory.
+
+    Parameters
+    ----------
+    benchmark : Benchmark
+        The case to run.
+    repeat : int
+        Number of timed runs. Every run calls the function enough times to take at least 0.2 seconds.
+
+    Returns
+    -------
+    Dict[str, Any]
+        The median and minimum time per call in seconds, the rows per second and, if measured, the peak memory
+        in bytes allocated during one call.
+    """
+    function = benchmark.setup()
+    function()  # Warm up, e.g. build cached models and tables
+
+    start = time.perf_counter()
+    function()
+    number = max(1, int(_MIN_RUN_TIME / max(time.perf_counter() - start, 1e-9)))
+
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter() - start) / number)
+
+    median = statistics.median(timings)
+    result: Dict[str, Any] = {
+        'seconds_per_call': median,
+        'min_seconds_per_call': min(timings),
+        'rows': benchmark.rows,
+        'rows_per_second': benchmark.rows / median,
+    }
+
+    if benchmark.memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            function()
+            result['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return result
+
+
+def run_suite(sizes: Sequence[int], repeat: int, n_jobs: int, pattern: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Run the benchmark suite.
+
+    Parameters
+    ----------
+    sizes : Sequence[int]
+        Numbers of rows of the synthetic cohorts.
+    repeat : int
+        Number of timed runs per case.
+    n_jobs : int
+        Number of workers of the parallel cases.
+    pattern : str, optional
+        Only run the cases whose name contains this string.
+
+    Returns
+    -------
+    Dict[str, Any]
+        The environment under 'metadata' and the result of every case under 'results', keyed by name.
+    """
+    results: Dict[str, Any] = {}
+    for benchmark in collect_benchmarks(sizes, n_jobs):
+        if pattern is None or pattern in benchmark.name:
+            results[benchmark.name] = run_benchmark(benchmark, repeat)
+            _print_result(benchmark.name, results[benchmark.name])
+
+    if pattern is None or pattern in 'import/adnex':
+        measurement = measure_import_time('import adnex', 'adnex')
+        results['import/adnex'] = {'seconds_per_call': measurement['cumulative_us'] / 1e6, 'rows': 1}
+        _print_result('import/adnex', results['import/adnex'])
+
+    return {'metadata': _metadata(), 'results': results}
+
+
+def compare_results(
+    baseline: Dict[str, Any], candidate: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD
+) -> List[Dict[str, Any]]:
+    """
+    Compare two result files case by case.
+
+    Parameters
+    ----------
+    baseline : Dict[str, Any]
+        The results to compare against, as written by `run_suite`.
+    candidate : Dict[str, Any]
+        The new results.
+    threshold : float
+        Relative slowdown or memory increase above which a case is a regression (default is 0.1, i.e. 10%). Peak
+        memory is only compared for cases that allocate at least 1 MiB.
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+        For every case in both files, its name, the ratios of the candidate to the baseline time and peak memory
+        (None if not measured), and whether it regressed.
+    """
+    comparisons = []
+    for name, old in baseline['results'].items():
+        new = candidate['results'].get(name)
+        if new is None:
+            continue
+        time_ratio = new['seconds_per_call'] / old['seconds_per_call']
+        memory_ratio = None
+        if old.get('peak_memory_bytes', 0) >= _MIN_COMPARED_MEMORY and 'peak_memory_bytes' in new:
+            memory_ratio = new['peak_memory_bytes'] / old['peak_memory_bytes']
+        regressed = time_ratio > 1 + threshold or (memory_ratio is not None and memory_ratio > 1 + threshold)
+        comparisons.append(
+            {'name': name, 'time_ratio': time_ratio, 'memory_ratio': memory_ratio, 'regressed': regressed}
+        )
+    return comparisons
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Run the suite (`run`) or compare two result files (`compare`).
+
+    Parameters
+    ----------
+    argv : Sequence[str], optional
+        The command line arguments. Defaults to `sys.argv[1:]`.
+
+    Returns
+    -------
+    int
+        0 on success, and 1 if `compare` found a regression.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run = subparsers.add_parser('run', help='Run the benchmarks and write the results as JSON.')
+    run.add_argument('-o', '--output', type=Path, help='The JSON file to write (default: print only).')
+    run.add_argument(
+        '--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help='Cohort sizes, e.g. 1 10000000.'
+    )
+    run.add_argument('--repeat', type=int, default=5, help='Number of timed runs per case.')
+    run.add_argument('--n-jobs', type=int, default=-1, help='Workers of the parallel case.')
+    run.add_argument('-k', '--filter', help='Only run the cases whose name contains this string.')
+
+    compare = subparsers.add_parser('compare', help='Flag the cases of a result file that regressed.')
+    compare.add_argument('baseline', type=Path, help='The result file to compare against.')
+    compare.add_argument('candidate', type=Path, help='The new result file.')
+    compare.add_argument(
+        '--threshold', type=float, default=DEFAULT_THRESHOLD, help='Relative slowdown that fails (default: 0.1).'
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        report = run_suite(args.sizes, args.repeat, args.n_jobs, args.filter)
+        if args.output is not None:
+            args.output.parent.mkdir(parents=True, exist_ok=True)
+            args.output.write_text(json.dumps(report, indent=2) + '\n', encoding='utf-8')
+        return 0
+
+    baseline, candidate = (json.loads(path.read_text(encoding='utf-8')) for path in (args.baseline, args.candidate))
+    comparisons = compare_results(baseline, candidate, args.threshold)
+    for comparison in comparisons:
+        memory = f"{comparison['memory_ratio']:6.2f}x" if comparison['memory_ratio'] is not None else '      -'
+        status = 'REGRESSION' if comparison['regressed'] else 'ok'
+        print(f"{status:10} {comparison['name']:60} time {comparison['time_ratio']:6.2f}x  memory {memory}")
+
+    n_regressed = sum(comparison['regressed'] for comparison in comparisons)
+    print(f'{n_regressed} of {len(comparisons)} cases regressed by more than {args.threshold:.0%}.')
+    return 1 if n_regressed else 0
+
+
+def _frame_case(function: Callable[[pd.DataFrame], object], n_rows: int) -> Callable[[], Callable[[], object]]:
+    def setup() -> Callable[[], object]:
+        frame = pd.DataFrame(make_cohort(n_rows))
+        return lambda: function(frame)
+
+    return setup
+
+
+def _columns_case(
+    function: Callable[[Dict[str, np.ndarray]], object], n_rows: int
+) -> Callable[[], Callable[[], object]]:
+    def setup() -> Callable[[], object]:
+        columns = make_cohort(n_rows)
+        return lambda: function(columns)
+
+    return setup
+
+
+def _validated_case(n_rows: int) -> Callable[[], Callable[[], object]]:
+    def setup() -> Callable[[], object]:
+        validated = adnex.ValidatedAdnexFrame.validate(make_cohort(n_rows))
+        return lambda: adnex.predict_risks_frame(validated)
+
+    return setup
+
+
+def _workspace_case(n_rows: int) -> Callable[[], Callable[[], object]]:
+    def setup() -> Callable[[], object]:
+        columns = make_cohort(n_rows)
+        out, workspace = np.empty((n_rows, 5)), Workspace(n_rows)
+        return lambda: predict_batch(columns, out=out, workspace=workspace)
+
+    return setup
+
+
+def _z_values_case(dtype: str, n_rows: int) -> Callable[[], Callable[[], object]]:
+    def setup() -> Callable[[], object]:
+        z_values = np.random.default_rng(0).normal(scale=3.0, size=(n_rows, 4))
+        return lambda: compute_probabilities_from_z_values(z_values, dtype=dtype)
+
+    return setup
+
+
+def _evaluation_case(
+    function: Callable[[np.ndarray, np.ndarray], object], n_rows: int
+) -> Callable[[], Callable[[], object]]:
+    # The predictions of the cohort, with outcomes drawn from them
+    def setup() -> Callable[[], object]:
+        probabilities = predict_batch(make_cohort(n_rows)).probabilities
+        rng = np.random.default_rng(0)
+        outcomes = (rng.random((n_rows, 1)) > np.cumsum(probabilities, axis=1)).sum(axis=1).clip(max=4)
+        return lambda: function(probabilities, outcomes)
+
+    return setup
+
+
+def _accumulate(probabilities: np.ndarray, outcomes: np.ndarray) -> object:
+    accumulator = EvaluationAccumulator()
+    accumulator.update(probabilities, outcomes)
+    return accumulator.discrimination()
+
+
+def _validate(frame: pd.DataFrame) -> object:
+    return validate_input_frame(frame, errors='mask')
+
+
+def _solve_ca125(columns: Dict[str, np.ndarray]) -> object:
+    return solve_risk_threshold(columns, 's_ca_125', 0.1)
+
+
+def _propagate(columns: Dict[str, np.ndarray]) -> object:
+    noise = {'max_lesion_diameter': GaussianNoise(2.0), 's_ca_125': LogNormalNoise(0.1)}
+    return propagate_measurement_error(columns, noise, n_samples=1000, seed=0)
+
+
+def _print_result(name: str, result: Dict[str, Any]) -> None:
+    line = f"{name:60} {result['seconds_per_call'] * 1e6:14.1f} us/call"
+    if result['rows'] > 1:
+        line += f" {result['rows_per_second']:14.0f} rows/s"
+    if 'peak_memory_bytes' in result:
+        line += f" {result['peak_memory_bytes'] / 2**20:10.1f} MiB peak"
+    print(line, flush=True)
+
+
+def _metadata() -> Dict[str, Any]:
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,37 @@
 """ Package for the ADNEX model. """
 
-from adnex.model import predict_cancer_risk, predict_risks
+import importlib
+from typing import TYPE_CHECKING, Any, List
 
-__all__ = ['predict_risks', 'predict_cancer_risk']
+if TYPE_CHECKING:
+    from adnex.aio import AsyncAdnexScorer
+    from adnex.model import predict_cancer_risk, predict_cancer_risk_frame, predict_risks, predict_risks_frame
+    from adnex.scalar import AdnexResult, predict_patient
+    from adnex.validation.trusted import ValidatedAdnexFrame
+
+# Public names and the modules that define them. The modules are imported on first access, so that `import adnex`
+# stays cheap and pandas is only imported when a pandas-facing function is used.
+_LAZY_ATTRIBUTES = {
+    'predict_risks': 'adnex.model',
+    'predict_cancer_risk': 'adnex.model',
+    'predict_risks_frame': 'adnex.model',
+    'predict_cancer_risk_frame': 'adnex.model',
+    'predict_patient': 'adnex.scalar',
+    'AdnexResult': 'adnex.scalar',
+    'AsyncAdnexScorer': 'adnex.aio',
+    'ValidatedAdnexFrame': 'adnex.validation.trusted',
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+        globals()[name] = value  # Cache, so that __getattr__ is not called again
+        return value
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
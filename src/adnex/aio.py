@@ -0,0 +1,388 @@
+""" Asyncio scorer that coalesces concurrent single-patient requests into micro-batches. """
+
+import asyncio
+import collections
+import math
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Counter, Deque, Dict, List, NamedTuple, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from adnex.batch import _ENGINES, predict_batch
+from adnex.exceptions import ADNEXModelError, ScorerOverloadedError
+from adnex.scalar import AdnexResult, _collect_variables
+from adnex.validation.variables import _is_missing, validate_input_values
+from adnex.variables import ADNEX_MODEL_VARIABLES
+from utils.exceptions import MissingVariableError, ValidationError
+
+DEFAULT_MAX_BATCH_SIZE = 512
+DEFAULT_MAX_WAIT = 0.002
+DEFAULT_MAX_PENDING = 10_000
+
+# Number of most recent request latencies kept for the latency percentiles
+_LATENCY_WINDOW = 10_000
+
+_VARIABLE_NAMES = tuple(ADNEX_MODEL_VARIABLES.values())
+
+# A queued request: the input values, the future of the caller and the time the request was made
+_Request = Tuple[Dict[str, Any], 'asyncio.Future[AdnexResult]', float]
+
+
+class ScorerStats(NamedTuple):
+    """
+    Throughput and latency statistics of an `AsyncAdnexScorer`.
+
+    Attributes
+    ----------
+    n_requests : int
+        Number of requests answered, with a result or an error.
+    n_errors : int
+        Number of requests answered with an error, e.g. a validation error.
+    n_rejected : int
+        Number of requests rejected because the queue was full.
+    n_batches : int
+        Number of micro-batches scored.
+    pending : int
+        Number of requests waiting in the queue.
+    mean_batch_size : float
+        Mean number of requests per micro-batch.
+    throughput : float
+        Requests answered per second since the scorer was started.
+    latency_p50 : float
+        Median time in seconds from a request to its answer, over the 10 000 most recent requests.
+    latency_p99 : float
+        99th percentile of the same latencies.
+    """
+
+    n_requests: int
+    n_errors: int
+    n_rejected: int
+    n_batches: int
+    pending: int
+    mean_batch_size: float
+    throughput: float
+    latency_p50: float
+    latency_p99: float
+
+
+class AsyncAdnexScorer:  # pylint: disable=too-many-instance-attributes
+    """
+    Asyncio scorer that coalesces concurrent single-patient requests into micro-batches.
+
+    Every call to `predict` queues its input and waits for the result. A background task collects queued requests
+    until `max_batch_size` requests are waiting or `max_wait` seconds have passed since the first one, validates them,
+    and scores the valid ones with `adnex.batch.predict_batch` on a worker thread, so the event loop is never blocked
+    by the computation. While a batch is being scored, new requests queue up and form the next batch, so the batches
+    grow with the load.
+
+    Every caller gets its own result, or its own `MissingVariableError` or `ValidationError`, with the same messages
+    as `adnex.predict_patient`. The probabilities are the same as those of `predict_patient` up to floating-point
+    rounding.
+
+    The scorer is bound to the event loop it is first used in. Use it as an async context manager, or call `close`
+    to answer the queued requests and stop the background task.
+
+    Parameters
+    ----------
+    max_batch_size : int
+        Maximum number of requests per micro-batch (default is 512).
+    max_wait : float
+        Maximum time in seconds that the first request of a batch waits for more requests (default is 0.002).
+    max_pending : int
+        Maximum number of queued requests (default is 10 000).
+    overflow : str
+        What to do when the queue is full (default is 'wait'):
+        - 'wait': wait in `predict` until there is room in the queue.
+        - 'reject': raise a `ScorerOverloadedError` from `predict`.
+    engine : str
+        The engine of `predict_batch`, 'arithmetic' or 'lookup' (default is 'arithmetic').
+    max_concurrent_batches : int
+        Maximum number of batches scored at the same time (default is 1). The next batch is collected while the
+        others are being scored.
+    executor : Executor, optional
+        The executor to score the batches in. A pool of `max_concurrent_batches` worker threads owned by the scorer
+        is used if not given.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait: float = DEFAULT_MAX_WAIT,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        *,
+        overflow: str = 'wait',
+        engine: str = 'arithmetic',
+        max_concurrent_batches: int = 1,
+        executor: Optional[Executor] = None,
+    ) -> None:
+        if max_batch_size < 1:
+            raise ValueError(f'max_batch_size must be positive, got {max_batch_size}.')
+        if max_wait < 0:
+            raise ValueError(f'max_wait must be non-negative, got {max_wait}.')
+        if max_pending < 1:
+            raise ValueError(f'max_pending must be positive, got {max_pending}.')
+        if overflow not in ('wait', 'reject'):
+            raise ValueError(f"overflow must be 'wait' or 'reject', got {overflow!r}.")
+        if engine not in _ENGINES:
+            raise ValueError(f"engine must be 'arithmetic' or 'lookup', got {engine!r}.")
+        if max_concurrent_batches < 1:
+            raise ValueError(f'max_concurrent_batches must be positive, got {max_concurrent_batches}.')
+
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_pending = max_pending
+        self.overflow = overflow
+        self.engine = engine
+        self.max_concurrent_batches = max_concurrent_batches
+
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._queue: Optional['asyncio.Queue[_Request]'] = None
+        self._task: Optional['asyncio.Task[None]'] = None
+        self._closed = False
+
+        self._started_at = 0.0
+        self._counts = collections.Counter({'requests': 0, 'errors': 0, 'rejected': 0, 'batches': 0})
+        self._latencies: Deque[float] = collections.deque(maxlen=_LATENCY_WINDOW)
+        self._batch_sizes: Counter[int] = collections.Counter()
+
+    async def __aenter__(self) -> 'AsyncAdnexScorer':
+        self._start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    def __repr__(self) -> str:
+        return (
+            f'{type(self).__name__}(max_batch_size={self.max_batch_size}, max_wait={self.max_wait}, '
+            f'max_pending={self.max_pending}, overflow={self.overflow!r}, engine={self.engine!r})'
+        )
+
+    async def predict(self, data: Optional[Any] = None, /, **variables: Any) -> AdnexResult:
+        """
+        Apply the ADNEX model to a single patient as part of a micro-batch.
+
+        Parameters
+        ----------
+        data : Mapping or NamedTuple, optional
+            The predictors as a dict (or other mapping, e.g. a pd.Series) or as a NamedTuple with the expected
+            variable names.
+        **variables : Any
+            The predictors as keyword arguments. These take precedence over the values in `data`.
+
+        Raises
+        ------
+        MissingVariableError
+            If required variables are missing.
+        ValidationError
+            If input validation fails.
+        ScorerOverloadedError
+            If `overflow` is 'reject' and the queue is full.
+        ADNEXModelError
+            If an unexpected error occurs during model computation.
+        RuntimeError
+            If the scorer is closed.
+
+        Returns
+        -------
+        AdnexResult
+            The probabilities for each outcome category.
+        """
+        if self._closed:
+            raise RuntimeError(f'{type(self).__name__} is closed.')
+        queue = self._start()
+
+        values = _collect_variables(data, variables)
+        if _is_missing(values.get('s_ca_125')):
+            values.pop('s_ca_125', None)
+
+        loop = asyncio.get_running_loop()
+        request = (values, loop.create_future(), loop.time())
+
+        if self.overflow == 'reject':
+            try:
+                queue.put_nowait(request)
+            except asyncio.QueueFull:
+                self._counts['rejected'] += 1
+                raise ScorerOverloadedError(f'{self.max_pending} requests are already waiting.') from None
+        else:
+            await queue.put(request)
+
+        return await request[1]
+
+    async def predict_cancer_risk(self, data: Optional[Any] = None, /, **variables: Any) -> float:
+        """
+        Compute the risk of cancer of a single patient as part of a micro-batch.
+
+        Parameters
+        ----------
+        data : Mapping or NamedTuple, optional
+            The predictors, see `predict`.
+        **variables : Any
+            The predictors as keyword arguments, see `predict`.
+
+        Returns
+        -------
+        float
+            The risk of cancer as a float value between 0 and 1.
+        """
+        result = await self.predict(data, **variables)
+        return result.cancer_risk
+
+    def stats(self) -> ScorerStats:
+        """
+        Get the throughput and latency statistics of the scorer.
+
+        Returns
+        -------
+        ScorerStats
+            The statistics since the scorer was started.
+        """
+        counts = self._counts
+        elapsed = time.monotonic() - self._started_at if self._task is not None else 0.0
+        latencies = np.fromiter(self._latencies, dtype=np.float64, count=len(self._latencies))
+        p50, p99 = np.percentile(latencies, [50, 99]).tolist() if latencies.size else (math.nan, math.nan)
+
+        return ScorerStats(
+            n_requests=counts['requests'],
+            n_errors=counts['errors'],
+            n_rejected=counts['rejected'],
+            n_batches=counts['batches'],
+            pending=self._queue.qsize() if self._queue is not None else 0,
+            mean_batch_size=counts['requests'] / counts['batches'] if counts['batches'] else 0.0,
+            throughput=counts['requests'] / elapsed if elapsed > 0 else 0.0,
+            latency_p50=p50,
+            latency_p99=p99,
+        )
+
+    def batch_size_counts(self) -> Dict[int, int]:
+        """
+        Count the micro-batches of each size.
+
+        Returns
+        -------
+        Dict[int, int]
+            The number of batches scored, keyed by the number of requests in the batch.
+        """
+        return dict(sorted(self._batch_sizes.items()))
+
+    async def close(self) -> None:
+        """Stop accepting requests, answer the queued ones and stop the background task."""
+        self._closed = True
+        if self._task is not None and self._queue is not None:
+            # Requests waiting for room in a full queue are put as the queue drains, so wait until it stays empty
+            while True:
+                await self._queue.join()
+                await asyncio.sleep(0)
+                if self._queue.empty():
+                    break
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _start(self) -> 'asyncio.Queue[_Request]':
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+        if self._task is None:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_concurrent_batches, thread_name_prefix='adnex-scorer'
+                )
+            self._started_at = time.monotonic()
+            self._task = asyncio.get_running_loop().create_task(self._run(self._queue))
+        return self._queue
+
+    async def _run(self, queue: 'asyncio.Queue[_Request]') -> None:
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.max_concurrent_batches)
+        in_flight: Set['asyncio.Task[None]'] = set()  # Strong references to the running batches
+
+        while True:
+            await slots.acquire()
+            batch = await self._collect(loop, queue)
+            task = loop.create_task(self._answer(loop, batch))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+            task.add_done_callback(lambda _, n_requests=len(batch): _release(queue, slots, n_requests))
+
+    async def _collect(self, loop: asyncio.AbstractEventLoop, queue: 'asyncio.Queue[_Request]') -> List[_Request]:
+        batch = [await queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            if queue.empty():
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            else:
+                batch.append(queue.get_nowait())
+
+        return batch
+
+    async def _answer(self, loop: asyncio.AbstractEventLoop, batch: List[_Request]) -> None:
+        try:
+            outcomes = await loop.run_in_executor(self._executor, _score_requests, [r[0] for r in batch], self.engine)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            error = ADNEXModelError('An unexpected error occurred while processing the ADNEX model.')
+            error.__cause__ = e
+            outcomes = [error] * len(batch)
+
+        now = loop.time()
+        self._counts['batches'] += 1
+        self._batch_sizes[len(batch)] += 1
+        for (_, future, requested_at), outcome in zip(batch, outcomes):
+            self._counts['requests'] += 1
+            self._latencies.append(now - requested_at)
+            if isinstance(outcome, Exception):
+                self._counts['errors'] += 1
+            if future.done():
+                continue  # The caller was cancelled
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+
+def _release(queue: 'asyncio.Queue[_Request]', slots: asyncio.Semaphore, n_requests: int) -> None:
+    # Mark the requests of a finished batch as done and free its slot
+    for _ in range(n_requests):
+        queue.task_done()
+    slots.release()
+
+
+def _score_requests(rows: List[Dict[str, Any]], engine: str) -> List[Union[AdnexResult, Exception]]:
+    # Validate every row on its own, so that every caller gets its own error, and score the valid rows as one batch
+    outcomes: List[Union[AdnexResult, Exception]] = []
+    valid_rows = []
+    for values in rows:
+        try:
+            validate_input_values(values)
+        except (MissingVariableError, ValidationError) as e:
+            outcomes.append(e)
+        else:
+            outcomes.append(None)  # type: ignore[arg-type]
+            valid_rows.append(values)
+
+    if not valid_rows:
+        return outcomes
+
+    columns = {
+        name: np.array([float(values.get(name, math.nan)) for values in valid_rows]) for name in _VARIABLE_NAMES
+    }
+    prediction = predict_batch(columns, engine=engine)
+    results = (
+        AdnexResult(tuple(probabilities), with_ca125)
+        for probabilities, with_ca125 in zip(prediction.probabilities.tolist(), prediction.with_ca125.tolist())
+    )
+
+    return [outcome if outcome is not None else next(results) for outcome in outcomes]
@@ -0,0 +1,187 @@
+""" Scoring of Apache Arrow tables and record batches. Requires pyarrow (`pip install adnex[arrow]`). """
+
+from typing import Dict, Iterable, Iterator, Union
+
+import numpy as np
+
+from adnex.columnar import _valid_rows
+from adnex.computation import compute_probabilities_from_z_values
+from adnex.engine import get_compiled_model
+from adnex.variables import ADNEX_MODEL_OUTPUT_CATEGORIES, ADNEX_MODEL_VARIABLES, REQUIRED_VARIABLES
+from utils.exceptions import MissingVariableError
+
+try:
+    import pyarrow as pa
+except ImportError as e:
+    raise ImportError('adnex.arrow requires pyarrow: pip install adnex[arrow]') from e
+
+_VARIABLE_NAMES = tuple(ADNEX_MODEL_VARIABLES.values())
+
+ArrowData = Union[pa.Table, pa.RecordBatch]
+
+
+def predict_arrow(
+    data: ArrowData, append: bool = True, include_variant: bool = False, errors: str = 'raise'
+) -> ArrowData:
+    """
+    Apply the ADNEX model to an Arrow table or record batch.
+
+    The ADNEX columns of every record batch are read as NumPy views of the Arrow buffers where possible (numeric
+    columns without nulls). Nulls in 's_ca_125' select the model without CA-125, like NaN does in the other scoring
+    functions. A table is scored one record batch at a time, and the result columns have the same chunks as the
+    input.
+
+    Parameters
+    ----------
+    data : pa.Table or pa.RecordBatch
+        The ADNEX variables as columns.
+    append : bool
+        Whether to append the result columns to the columns of `data` (default is True). If False, only the result
+        columns are returned.
+    include_variant : bool
+        Whether to add a boolean 'with_ca125' column indicating which model variant was used for each row
+        (default is False).
+    errors : str
+        How to handle invalid rows (default is 'raise'):
+        - 'raise': raise a ValidationError for the first invalid row.
+        - 'mask': skip invalid rows and return null probabilities for them.
+
+    Raises
+    ------
+    MissingVariableError
+        If required columns are missing.
+    ValidationError
+        If `errors` is 'raise' and input validation fails for at least one row.
+    ValueError
+        If `errors` is not one of 'raise' or 'mask'.
+
+    Returns
+    -------
+    pa.Table or pa.RecordBatch
+        The same type as `data`, with one float64 column of probabilities for each outcome category:
+        ['Benign', 'Borderline', 'Stage I cancer', 'Stage II-IV cancer', 'Metastatic cancer'].
+    """
+    if errors not in ('raise', 'mask'):
+        raise ValueError(f"errors must be 'raise' or 'mask', got {errors!r}.")
+
+    if isinstance(data, pa.RecordBatch):
+        return _predict_record_batch(data, 0, append, include_variant, errors)
+
+    missing_columns = REQUIRED_VARIABLES - set(data.column_names)
+    if missing_columns:
+        raise MissingVariableError(missing_columns)
+
+    batches = list(predict_record_batches(data.to_batches(), append, include_variant, errors))
+    if not batches:
+        # An empty table has no batches; score an empty batch to get the schema of the result
+        batches = [_predict_record_batch(_empty_batch(data.schema), 0, append, include_variant, errors)]
+    return pa.Table.from_batches(batches)
+
+
+def predict_record_batches(
+    batches: Iterable[pa.RecordBatch], append: bool = True, include_variant: bool = False, errors: str = 'raise'
+) -> Iterator[pa.RecordBatch]:
+    """
+    Apply the ADNEX model to a stream of Arrow record batches, one batch at a time.
+
+    Only one batch is held in memory at a time, so scoring a stream read from an Arrow IPC file or socket (e.g.
+    `pa.ipc.open_stream(source)`) keeps memory flat.
+
+    Parameters
+    ----------
+    batches : Iterable[pa.RecordBatch]
+        The record batches to score, e.g. a `pa.ipc.RecordBatchStreamReader`.
+    append : bool
+        Whether to append the result columns to the input columns, see `predict_arrow` (default is True).
+    include_variant : bool
+        Whether to add a boolean 'with_ca125' column, see `predict_arrow` (default is False).
+    errors : str
+        How to handle invalid rows, see `predict_arrow` (default is 'raise'). Row numbers in validation errors count
+        from the start of the stream.
+
+    Yields
+    ------
+    pa.RecordBatch
+        The scored batches, in the input order.
+    """
+    if errors not in ('raise', 'mask'):
+        raise ValueError(f"errors must be 'raise' or 'mask', got {errors!r}.")
+
+    offset = 0
+    for batch in batches:
+        yield _predict_record_batch(batch, offset, append, include_variant, errors)
+        offset += batch.num_rows
+
+
+def arrow_columns(batch: pa.RecordBatch) -> Dict[str, np.ndarray]:
+    """
+    Get the ADNEX variables of a record batch as NumPy arrays.
+
+    Numeric columns without nulls are returned as zero-copy views of the Arrow buffers. Columns with nulls are
+    copied, with nulls converted to NaN (or None for non-numeric columns), which the validation treats as missing.
+
+    Parameters
+    ----------
+    batch : pa.RecordBatch
+        The record batch.
+
+    Raises
+    ------
+    MissingVariableError
+        If required columns are missing.
+
+    Returns
+    -------
+    Dict[str, np.ndarray]
+        The ADNEX variables that are present, keyed by name.
+    """
+    missing_columns = REQUIRED_VARIABLES - set(batch.schema.names)
+    if missing_columns:
+        raise MissingVariableError(missing_columns)
+
+    return {name: _to_numpy(batch.column(name)) for name in _VARIABLE_NAMES if name in batch.schema.names}
+
+
+def _to_numpy(array: pa.Array) -> np.ndarray:
+    if array.null_count == 0:
+        try:
+            return array.to_numpy(zero_copy_only=True)
+        except pa.ArrowInvalid:
+            pass  # E.g. boolean columns, which Arrow stores as bits
+    return array.to_numpy(zero_copy_only=False)
+
+
+def _predict_record_batch(
+    batch: pa.RecordBatch, offset: int, append: bool, include_variant: bool, errors: str
+) -> pa.RecordBatch:
+    columns = arrow_columns(batch)
+    valid = _valid_rows(columns, offset, errors)
+
+    if valid.all():
+        z_values, with_ca125 = get_compiled_model().score_columns(columns)
+    else:
+        z_values, with_ca125 = get_compiled_model().score_columns({name: col[valid] for name, col in columns.items()})
+
+    # Transposed, so that every category is a contiguous array that Arrow can wrap
+    probabilities = np.empty((len(ADNEX_MODEL_OUTPUT_CATEGORIES), batch.num_rows))
+    probabilities[:, valid] = compute_probabilities_from_z_values(z_values).T
+    mask = None if valid.all() else ~valid
+
+    names = list(ADNEX_MODEL_OUTPUT_CATEGORIES)
+    arrays = [pa.array(values, type=pa.float64(), mask=mask) for values in probabilities]
+
+    if include_variant:
+        variant = np.zeros(batch.num_rows, dtype=bool)
+        variant[valid] = with_ca125
+        names.append('with_ca125')
+        arrays.append(pa.array(variant, mask=mask))
+
+    if append:
+        names = [*batch.schema.names, *names]
+        arrays = [*batch.columns, *arrays]
+
+    return pa.RecordBatch.from_arrays(arrays, names=names)
+
+
+def _empty_batch(schema: pa.Schema) -> pa.RecordBatch:
+    return pa.RecordBatch.from_arrays([pa.array([], type=field.type) for field in schema], schema=schema)
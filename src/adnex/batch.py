@@ -0,0 +1,112 @@
+""" Batch engine for applying the ADNEX model to many patients at once. """
+
+from typing import Any, Mapping, NamedTuple, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from adnex.computation import compute_probabilities_from_z_values
+from adnex.dedup import take_rows, unique_rows
+from adnex.engine import get_compiled_model
+from adnex.instrumentation import stage
+from adnex.lookup import get_lookup_model
+from adnex.workspace import Workspace
+
+# Functions returning the shared model of each engine
+_ENGINES = {'arithmetic': get_compiled_model, 'lookup': get_lookup_model}
+
+
+class BatchPrediction(NamedTuple):
+    """
+    Result of applying the ADNEX model to a batch of patients.
+
+    Attributes
+    ----------
+    probabilities : np.ndarray
+        Array of shape (n_rows, 5) with the probabilities for each outcome class, in the order of
+        `ADNEX_MODEL_OUTPUT_CATEGORIES`, of the requested dtype.
+    with_ca125 : np.ndarray
+        Boolean array of shape (n_rows,) that is True where the model with CA-125 was used.
+    """
+
+    probabilities: np.ndarray
+    with_ca125: np.ndarray
+
+
+def predict_batch(  # pylint: disable=too-many-arguments
+    columns: Union[pd.DataFrame, Mapping[str, np.ndarray]],
+    engine: str = 'arithmetic',
+    deduplicate: bool = False,
+    dtype: Any = np.float64,
+    *,
+    out: Optional[np.ndarray] = None,
+    workspace: Optional[Workspace] = None,
+) -> BatchPrediction:
+    """
+    Apply the ADNEX model to a batch of validated input rows.
+
+    The predictors shared by both model variants are transformed once for all rows. A mask of the rows with
+    CA-125 then selects which coefficient set is applied to each row, and the z-values of both subsets are
+    scattered into one preallocated array in the original row order. The cost per row is therefore the same
+    regardless of how many rows have CA-125. See `adnex.engine.AdnexModel.score_columns`.
+
+    The input is not validated; use `adnex.validation.core.validate_input_frame` first if needed.
+
+    Parameters
+    ----------
+    columns : pd.DataFrame or Mapping[str, np.ndarray]
+        A DataFrame or a mapping of column names to one-dimensional arrays of equal length.
+    engine : str
+        How the z-values are computed (default is 'arithmetic'):
+        - 'arithmetic': transform the predictors and multiply them with the coefficients, see
+          `adnex.engine.AdnexModel`.
+        - 'lookup': sum precomputed contributions looked up by input value, see `adnex.lookup.LookupTableModel`.
+          This is faster on large batches and agrees with 'arithmetic' up to floating-point rounding.
+    deduplicate : bool
+        Whether to score only the unique rows and copy their results to the duplicates (default is False). The rows
+        are packed into integer keys and deduplicated with `np.unique`, see `adnex.dedup`. This is faster when many
+        rows are identical, e.g. repeated exports of the same patients.
+    dtype : data-type
+        The dtype of the probabilities (default is float64). float32 halves the memory of the result, see
+        `adnex.computation.compute_probabilities_from_z_values`. Ignored if `out` is given.
+    out : np.ndarray, optional
+        A writable floating-point array of shape (n_rows, 5) to write the probabilities to. A new array is allocated
+        if not given.
+    workspace : Workspace, optional
+        Buffers for the intermediate arrays, see `adnex.workspace.Workspace`. With `out` and a workspace, repeated
+        calls with float or integer NumPy columns and the arithmetic engine allocate no new arrays. The lookup engine
+        and deduplication still allocate their indices.
+
+    Raises
+    ------
+    ValueError
+        If `engine` is not one of 'arithmetic' or 'lookup', if `deduplicate` is True and a value is outside the
+        valid range of its variable, if `out` has the wrong shape or if the batch has more rows than `workspace`.
+
+    Returns
+    -------
+    BatchPrediction
+        The probabilities for each row, in `out` if given, and the model variant that was used for each row. With a
+        workspace, `with_ca125` is a view of its buffers that is overwritten by the next call.
+    """
+    if engine not in _ENGINES:
+        raise ValueError(f"engine must be 'arithmetic' or 'lookup', got {engine!r}.")
+
+    if deduplicate:
+        first, inverse = unique_rows(columns)
+        unique = predict_batch(take_rows(columns, first), engine=engine, dtype=dtype, workspace=workspace)
+        if out is None:
+            return BatchPrediction(unique.probabilities[inverse], unique.with_ca125[inverse])
+        return BatchPrediction(np.take(unique.probabilities, inverse, axis=0, out=out), unique.with_ca125[inverse])
+
+    n_rows = len(columns['age'])
+    with stage('predict_batch.score_columns', rows=n_rows):
+        if engine == 'arithmetic':
+            z_values, with_ca125 = get_compiled_model().score_columns(columns, workspace=workspace)
+        else:
+            z_values, with_ca125 = _ENGINES[engine]().score_columns(columns)
+
+    with stage('predict_batch.compute_probabilities_from_z_values', rows=n_rows):
+        probabilities = compute_probabilities_from_z_values(z_values, out=out, dtype=dtype, workspace=workspace)
+
+    return BatchPrediction(probabilities, with_ca125)
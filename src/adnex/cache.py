@@ -0,0 +1,162 @@
+""" Opt-in LRU cache of the results of `predict_risks` and `predict_cancer_risk` for repeated inputs. """
+
+import threading
+from functools import lru_cache
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+from adnex.computation import compute_probabilities
+from adnex.transformation import transform_input_variables
+from adnex.validation.core import validate_input
+from adnex.variables import ADNEX_MODEL_VARIABLES
+
+# A cache key holds the name, type and value of every variable, so that e.g. 1, 1.0 and True, which compare equal
+# but may not be equally valid, are cached separately.
+CacheKey = Tuple[Tuple[str, type, Any], ...]
+
+_VARIABLE_NAMES = tuple(ADNEX_MODEL_VARIABLES.values())
+
+_lock = threading.Lock()
+_state: Dict[str, Callable[[CacheKey], Tuple[float, ...]]] = {}
+
+
+class CacheInfo(NamedTuple):
+    """
+    Statistics of the risk cache.
+
+    Attributes
+    ----------
+    hits : int
+        Number of calls answered from the cache.
+    misses : int
+        Number of calls that computed and stored a new result.
+    maxsize : int
+        Maximum number of cached results.
+    currsize : int
+        Current number of cached results.
+    """
+
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Fraction of calls answered from the cache.
+
+        Returns
+        -------
+        float
+            The hit rate, or 0.0 if the cache was not used.
+        """
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.0
+
+
+def enable_risk_cache(maxsize: int = 4096) -> None:
+    """
+    Cache the results of `predict_risks` and `predict_cancer_risk` for repeated inputs.
+
+    The results of the most recently used `maxsize` distinct inputs are kept. Only valid inputs are cached, so
+    invalid inputs always raise. Enabling the cache again replaces it with an empty cache of the new size.
+
+    Parameters
+    ----------
+    maxsize : int
+        Maximum number of cached results (default is 4096).
+
+    Raises
+    ------
+    ValueError
+        If `maxsize` is not positive.
+    """
+    if maxsize < 1:
+        raise ValueError(f'maxsize must be positive, got {maxsize}.')
+
+    with _lock:
+        _state['risks'] = lru_cache(maxsize=maxsize)(_compute_risks_for_key)
+
+
+def disable_risk_cache() -> None:
+    """Disable the risk cache and discard the cached results."""
+    with _lock:
+        _state.pop('risks', None)
+
+
+def clear_risk_cache() -> None:
+    """Discard the cached results and reset the statistics, keeping the cache enabled."""
+    cached = get_risk_cache()
+    if cached is not None:
+        cached.cache_clear()
+
+
+def risk_cache_info() -> Optional[CacheInfo]:
+    """
+    Get the statistics of the risk cache.
+
+    Returns
+    -------
+    CacheInfo, optional
+        The hits, misses, maximum size and current size of the cache, or None if it is not enabled.
+    """
+    cached = get_risk_cache()
+    if cached is None:
+        return None
+    return CacheInfo(*cached.cache_info())
+
+
+def get_risk_cache() -> Optional[Callable[[CacheKey], Tuple[float, ...]]]:
+    """
+    Get the cached function computing the probabilities for a cache key.
+
+    Returns
+    -------
+    Callable, optional
+        The cached function, or None if the cache is not enabled.
+    """
+    return _state.get('risks')
+
+
+def make_cache_key(row: Any, with_ca125: bool) -> Optional[CacheKey]:
+    """
+    Build the cache key of an input row.
+
+    Parameters
+    ----------
+    row : pd.Series
+        The input row.
+    with_ca125 : bool
+        Whether the row has a CA-125 value. A missing CA-125 is left out of the key, so that a NaN value and an
+        absent column share a key.
+
+    Returns
+    -------
+    CacheKey, optional
+        The key, or None if a required variable is missing or a value is not hashable, in which case the row is
+        not cached.
+    """
+    key = []
+    for name in _VARIABLE_NAMES:
+        if name == 's_ca_125' and not with_ca125:
+            continue
+        if name not in row.index:
+            return None
+        value = row[name]
+        key.append((name, type(value), value))
+
+    try:
+        hash(tuple(key))
+    except TypeError:
+        return None
+    return tuple(key)
+
+
+def _compute_risks_for_key(key: CacheKey) -> Tuple[float, ...]:
+    # Uncached computation behind the cache. Invalid rows raise, so their keys are never stored.
+    row = pd.Series({name: value for name, _, value in key})
+    validate_input(row)
+    with_ca125 = 's_ca_125' in row.index
+    return tuple(compute_probabilities(transform_input_variables(row), with_ca125=with_ca125).tolist())
@@ -0,0 +1,178 @@
+""" Command line interface of the ADNEX package. """
+
+import argparse
+import sys
+from typing import Dict, List, Optional, Sequence
+
+from adnex.exceptions import ADNEXModelError
+from adnex.file_formats import DEFAULT_CHUNK_SIZE, DEFAULT_OUTPUT_COLUMNS, FILE_FORMATS, OUTPUT_COLUMNS
+from utils.exceptions import MissingVariableError, ValidationError
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Run the `adnex` command line interface.
+
+    Parameters
+    ----------
+    argv : Sequence[str], optional
+        The command line arguments, excluding the program name. Defaults to `sys.argv[1:]`.
+
+    Returns
+    -------
+    int
+        The exit status: 0 on success and 1 if the command failed.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        return args.handler(args)
+    except (ADNEXModelError, MissingVariableError, ValidationError, ImportError, OSError, ValueError) as e:
+        print(f'{parser.prog}: error: {e}', file=sys.stderr)
+        return 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the argument parser of the command line interface.
+
+    Returns
+    -------
+    argparse.ArgumentParser
+        The parser, with one subparser per command.
+    """
+    parser = argparse.ArgumentParser(prog='adnex', description='ADNEX model for adnexal masses.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    score = subparsers.add_parser(
+        'score',
+        help='Score a CSV, TSV or Parquet file.',
+        description='Apply the ADNEX model to every row of a file, streaming it in chunks with bounded memory.',
+    )
+    score.add_argument('input', help='The file to score (.csv, .tsv or .parquet).')
+    score.add_argument('-o', '--output', required=True, help='The file to write the results to.')
+    score.add_argument(
+        '--chunk-size',
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f'Number of rows scored at a time (default: {DEFAULT_CHUNK_SIZE}).',
+    )
+    score.add_argument(
+        '--id-columns', nargs='+', default=[], metavar='COLUMN', help='Input columns to copy to the output.'
+    )
+    score.add_argument(
+        '--rename',
+        nargs='+',
+        default=[],
+        metavar='COLUMN=VARIABLE',
+        help='Read an ADNEX variable from an input column with another name, e.g. ca125=s_ca_125.',
+    )
+    score.add_argument(
+        '--outputs',
+        nargs='+',
+        default=list(DEFAULT_OUTPUT_COLUMNS),
+        choices=OUTPUT_COLUMNS,
+        metavar='COLUMN',
+        help=f'Result columns to write, from {list(OUTPUT_COLUMNS)} (default: probabilities and cancer_risk).',
+    )
+    score.add_argument(
+        '--quarantine',
+        metavar='PATH',
+        help='Write rows that fail validation to this file instead of aborting.',
+    )
+    score.add_argument('--input-format', choices=FILE_FORMATS, help='Format of the input (default: from suffix).')
+    score.add_argument('--output-format', choices=FILE_FORMATS, help='Format of the output (default: from suffix).')
+    score.set_defaults(handler=_score)
+
+    serve = subparsers.add_parser(
+        'serve',
+        help='Serve the ADNEX model over HTTP.',
+        description=(
+            'Score JSON and JSON Lines requests on POST /predict, pooling concurrent requests into micro-batches, '
+            'and report metrics on GET /metrics.'
+        ),
+    )
+    serve.add_argument('--host', default='127.0.0.1', help='The address to listen on (default: 127.0.0.1).')
+    serve.add_argument('--port', type=int, default=8000, help='The port to listen on (default: 8000).')
+    serve.add_argument(
+        '--workers', type=int, default=1, help='Number of micro-batches scored at the same time (default: 1).'
+    )
+    serve.add_argument(
+        '--max-batch-size', type=int, default=512, help='Maximum number of rows per micro-batch (default: 512).'
+    )
+    serve.add_argument(
+        '--max-wait-ms',
+        type=float,
+        default=2.0,
+        help='Maximum time a row waits for more rows to batch with, in milliseconds (default: 2).',
+    )
+    serve.add_argument(
+        '--max-pending',
+        type=int,
+        default=10_000,
+        help='Maximum number of rows waiting to be batched before requests are rejected (default: 10000).',
+    )
+    serve.add_argument('--engine', choices=('arithmetic', 'lookup'), default='arithmetic', help='The scoring engine.')
+    serve.add_argument(
+        '--instrument', action='store_true', help='Record the time of every pipeline stage and report it on /metrics.'
+    )
+    serve.set_defaults(handler=_serve)
+
+    return parser
+
+
+def _score(args: argparse.Namespace) -> int:
+    from adnex.streaming import score_file  # pylint: disable=import-outside-toplevel
+
+    summary = score_file(
+        args.input,
+        args.output,
+        chunk_size=args.chunk_size,
+        id_columns=args.id_columns,
+        rename=_parse_rename(args.rename),
+        output_columns=args.outputs,
+        quarantine_path=args.quarantine,
+        input_format=args.input_format,
+        output_format=args.output_format,
+    )
+
+    print(
+        f'Scored {summary.n_scored} of {summary.n_rows} rows in {summary.n_chunks} chunks'
+        f' ({summary.n_quarantined} quarantined).',
+        file=sys.stderr,
+    )
+    return 0
+
+
+def _serve(args: argparse.Namespace) -> int:
+    from adnex.instrumentation import enable_instrumentation  # pylint: disable=import-outside-toplevel
+    from adnex.server import AdnexServer  # pylint: disable=import-outside-toplevel
+
+    if args.instrument:
+        enable_instrumentation()
+    server = AdnexServer(
+        args.host,
+        args.port,
+        workers=args.workers,
+        max_batch_size=args.max_batch_size,
+        max_wait=args.max_wait_ms / 1000,
+        max_pending=args.max_pending,
+        engine=args.engine,
+    )
+    print(f'Serving the ADNEX model on {server.url} (press Ctrl+C to stop).', file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def _parse_rename(pairs: List[str]) -> Dict[str, str]:
+    rename = {}
+    for pair in pairs:
+        column, separator, variable = pair.partition('=')
+        if not separator or not column or not variable:
+            raise ValueError(f'Expected COLUMN=VARIABLE, got {pair!r}.')
+        rename[column] = variable
+    return rename
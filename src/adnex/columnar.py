@@ -0,0 +1,200 @@
+""" Blockwise scoring of NumPy and memory-mapped columns without pandas DataFrames. """
+
+from pathlib import Path
+from typing import Dict, Mapping, Optional, Union
+
+import numpy as np
+
+from adnex.computation import compute_probabilities_from_z_values
+from adnex.engine import get_compiled_model
+from adnex.validation.core import _raise_for_row, validate_input_columns
+from adnex.validation.trusted import ValidatedAdnexFrame
+from adnex.variables import ADNEX_MODEL_OUTPUT_CATEGORIES, ADNEX_MODEL_VARIABLES, REQUIRED_VARIABLES
+from adnex.workspace import Workspace
+from utils.exceptions import MissingVariableError
+
+DEFAULT_BLOCK_SIZE = 65_536
+
+_VARIABLE_NAMES = tuple(ADNEX_MODEL_VARIABLES.values())
+_N_CATEGORIES = len(ADNEX_MODEL_OUTPUT_CATEGORIES)
+
+
+def predict_arrays(  # pylint: disable=too-many-arguments
+    data: Union[Mapping[str, np.ndarray], np.ndarray],
+    out: Optional[np.ndarray] = None,
+    output: str = 'probabilities',
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    errors: str = 'raise',
+    *,
+    validate: bool = True,
+) -> np.ndarray:
+    """
+    Apply the ADNEX model to NumPy columns, one block of rows at a time.
+
+    The input columns are only sliced, never converted as a whole, so memory-mapped columns (`np.load(...,
+    mmap_mode='r')` or `np.memmap`) are read block by block, and the results are written to `out` block by block.
+    Passing a memory-mapped `out` (e.g. from `np.lib.format.open_memmap`) therefore scores cohorts that are larger
+    than the available memory; apart from `out`, memory use depends only on `block_size`.
+
+    Parameters
+    ----------
+    data : Mapping[str, np.ndarray] or np.ndarray
+        The ADNEX variables as a mapping of the names in `ADNEX_MODEL_VARIABLES` to one-dimensional arrays of equal
+        length, as a structured array with fields of those names, or as a two-dimensional array with the columns
+        ordered as `ADNEX_MODEL_VARIABLES`. 's_ca_125' may be absent or NaN for rows without CA-125. A
+        `ValidatedAdnexFrame` is scored without validating it again.
+    out : np.ndarray, optional
+        A writable array to write the results to, of shape (n_rows, 5) for probabilities or (n_rows,) for the
+        cancer risk. A new float64 array is allocated if not given.
+    output : str
+        What to compute (default is 'probabilities'):
+        - 'probabilities': the probabilities of each category, ordered as `ADNEX_MODEL_OUTPUT_CATEGORIES`.
+        - 'cancer_risk': the sum of the probabilities of the non-benign categories.
+    block_size : int
+        Number of rows validated and scored at a time (default is 65 536).
+    errors : str
+        How to handle invalid rows (default is 'raise'):
+        - 'raise': raise a ValidationError for the first invalid row.
+        - 'mask': skip invalid rows and write NaN results for them.
+    validate : bool
+        Whether to validate the input (default is True). Pass False only for data that is known to be valid, e.g.
+        validated at ingest; `errors` is then ignored.
+
+    Raises
+    ------
+    MissingVariableError
+        If required columns are missing.
+    ValidationError
+        If `errors` is 'raise' and input validation fails for at least one row.
+    ValueError
+        If an argument is invalid, or the columns or `out` have the wrong shape.
+
+    Returns
+    -------
+    np.ndarray
+        `out`, or the newly allocated result array.
+    """
+    if output not in ('probabilities', 'cancer_risk'):
+        raise ValueError(f"output must be 'probabilities' or 'cancer_risk', got {output!r}.")
+    if errors not in ('raise', 'mask'):
+        raise ValueError(f"errors must be 'raise' or 'mask', got {errors!r}.")
+    if block_size < 1:
+        raise ValueError(f'block_size must be positive, got {block_size}.')
+
+    validate = validate and not isinstance(data, ValidatedAdnexFrame)
+    columns = as_column_arrays(data)
+    n_rows = len(next(iter(columns.values())))
+
+    shape = (n_rows, _N_CATEGORIES) if output == 'probabilities' else (n_rows,)
+    if out is None:
+        out = np.empty(shape)
+    elif out.shape != shape:
+        raise ValueError(f'out must have shape {shape}, got {out.shape}.')
+
+    # The intermediate arrays of every block are computed in the same buffers
+    workspace = Workspace(min(block_size, n_rows))
+    write_directly = output == 'probabilities' and np.issubdtype(out.dtype, np.floating)
+
+    for start in range(0, n_rows, block_size):
+        stop = min(start + block_size, n_rows)
+        block = {name: column[start:stop] for name, column in columns.items()}
+
+        valid = _valid_rows(block, start, errors) if validate else np.ones(stop - start, dtype=bool)
+        if not valid.all():
+            out[start:stop] = np.nan
+            block = {name: column[valid] for name, column in block.items()}
+
+        if valid.all() and write_directly:
+            _score_block(block, output, workspace, out=out[start:stop])
+        elif valid.all():
+            out[start:stop] = _score_block(block, output, workspace)
+        else:
+            out[start:stop][valid] = _score_block(block, output, workspace)
+
+    return out
+
+
+def as_column_arrays(data: Union[Mapping[str, np.ndarray], np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Get the ADNEX variables of columnar input as one-dimensional arrays, without copying them.
+
+    Parameters
+    ----------
+    data : Mapping[str, np.ndarray] or np.ndarray
+        A mapping of column names to arrays, a structured array, or a two-dimensional array with the columns
+        ordered as `ADNEX_MODEL_VARIABLES`.
+
+    Raises
+    ------
+    MissingVariableError
+        If required columns are missing.
+    ValueError
+        If the columns are not one-dimensional arrays of equal length.
+
+    Returns
+    -------
+    Dict[str, np.ndarray]
+        The ADNEX variables that are present, as views of the input where possible.
+    """
+    if isinstance(data, np.ndarray) and data.dtype.names is not None:
+        columns = {name: data[name] for name in _VARIABLE_NAMES if name in data.dtype.names}
+    elif isinstance(data, np.ndarray):
+        if data.ndim != 2 or data.shape[1] != len(_VARIABLE_NAMES):
+            raise ValueError(
+                f'Expected an array with {len(_VARIABLE_NAMES)} columns ordered as {list(_VARIABLE_NAMES)}, '
+                f'got shape {data.shape}.'
+            )
+        columns = dict(zip(_VARIABLE_NAMES, data.T))
+    else:
+        columns = {name: np.asarray(data[name]) for name in _VARIABLE_NAMES if name in data}
+
+    missing_columns = REQUIRED_VARIABLES - set(columns)
+    if missing_columns:
+        raise MissingVariableError(missing_columns)
+
+    lengths = {len(column) if column.ndim == 1 else None for column in columns.values()}
+    if len(lengths) != 1 or None in lengths:
+        raise ValueError('All columns must be one-dimensional arrays of equal length.')
+
+    return columns
+
+
+def load_columns(directory: Union[str, Path], mmap_mode: Optional[str] = 'r') -> Dict[str, np.ndarray]:
+    """
+    Load ADNEX variables stored as one `.npy` file per variable, e.g. `age.npy` and `s_ca_125.npy`.
+
+    Parameters
+    ----------
+    directory : str or Path
+        The directory with the `.npy` files. Files of variables that are not ADNEX variables are ignored, and
+        's_ca_125.npy' may be absent.
+    mmap_mode : str, optional
+        Memory-map mode passed to `np.load` (default is 'r'). Use None to read the columns into memory.
+
+    Returns
+    -------
+    Dict[str, np.ndarray]
+        The columns that were found, keyed by variable name.
+    """
+    directory = Path(directory)
+    paths = {name: directory / f'{name}.npy' for name in _VARIABLE_NAMES}
+    return {name: np.load(path, mmap_mode=mmap_mode) for name, path in paths.items() if path.exists()}
+
+
+def _score_block(
+    block: Mapping[str, np.ndarray], output: str, workspace: Workspace, out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    # Score a block with the intermediate arrays in the workspace, writing the probabilities to `out` if given
+    z_values, _ = get_compiled_model().score_columns(block, workspace=workspace)
+    probabilities = compute_probabilities_from_z_values(z_values, out=out, workspace=workspace)
+    return probabilities if output == 'probabilities' else probabilities[:, 1:].sum(axis=1)
+
+
+def _valid_rows(block: Mapping[str, np.ndarray], offset: int, errors: str) -> np.ndarray:
+    # Validity mask of a block of rows. With errors='raise', the first invalid row raises with its row number in the
+    # whole input, i.e. offset by the start of the block.
+    report = validate_input_columns(block, errors='report')
+    if errors == 'raise' and not report.valid.all():
+        position = int(np.argmin(report.valid))
+        _raise_for_row(block, report, position, offset + position)
+    return report.valid
@@ -1,9 +1,17 @@
 """ Module for computing probabilities of different types of neoplasias using the ADNEX model. """
 
+from typing import Any, Optional, Tuple
+
 import numpy as np
 import pandas as pd
 
-from adnex.variables import ADNEX_MODEL_OUTPUT_CATEGORIES, get_adnex_model_constants
+from adnex.variables import (
+    ADNEX_MODEL_OUTPUT_CATEGORIES,
+    ADNEX_MODEL_PREDICTORS_WITH_CA125,
+    ADNEX_MODEL_PREDICTORS_WITHOUT_CA125,
+    get_adnex_model_coefficients,
+)
+from adnex.workspace import Workspace
 
 
 def compute_probabilities(transformed_vars: pd.Series, with_ca125: bool) -> pd.Series:
@@ -22,24 +30,125 @@ def compute_probabilities(transformed_vars: pd.Series, with_ca125: bool) -> pd.S
     pd.Series
         Probabilities for each outcome class.
     """
-    # Retrieve model constants
-    constants = get_adnex_model_constants(with_ca125)
-
     # Ensure ordering
-    transformed_vars = transformed_vars.reindex(constants.index)
+    predictors = ADNEX_MODEL_PREDICTORS_WITH_CA125 if with_ca125 else ADNEX_MODEL_PREDICTORS_WITHOUT_CA125
+    values = transformed_vars.reindex(predictors).to_numpy(dtype=np.float64)
+
+    probabilities = compute_probabilities_array(values[np.newaxis, :], with_ca125=with_ca125)[0]
+
+    return pd.Series(probabilities, index=ADNEX_MODEL_OUTPUT_CATEGORIES)
+
+
+def compute_probabilities_array(
+    transformed_vars: np.ndarray, with_ca125: bool, out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Compute the outcome probabilities for a matrix of transformed predictors.
+
+    Parameters
+    ----------
+    transformed_vars : np.ndarray
+        Array of shape (n_rows, n_predictors) as returned by `transform_input_columns`.
+    with_ca125 : bool
+        Whether CA-125 was included in the model.
+    out : np.ndarray, optional
+        A writable floating-point array of shape (n_rows, 5) to write the probabilities to. A new float64 array is
+        allocated if not given.
+
+    Returns
+    -------
+    np.ndarray
+        `out`, or a new array of shape (n_rows, 5), with the probabilities for each outcome class, in the order of
+        `ADNEX_MODEL_OUTPUT_CATEGORIES`.
+    """
+    return compute_probabilities_from_z_values(transformed_vars @ get_adnex_model_coefficients(with_ca125), out=out)
+
+
+def compute_probabilities_from_z_values(
+    z_values: np.ndarray,
+    out: Optional[np.ndarray] = None,
+    dtype: Any = np.float64,
+    log: bool = False,
+    workspace: Optional[Workspace] = None,
+) -> np.ndarray:
+    """
+    Compute the outcome probabilities from the z-values of the non-benign categories.
+
+    The softmax is computed with the log-sum-exp trick: every row is shifted by its largest logit, including the
+    benign logit of 0, before exponentiating, so extreme z-values neither overflow nor underflow to 0/0. The shifted
+    logits are written straight into the output array and exponentiated and normalized in place; the only
+    temporaries are arrays of shape (n_rows,).
+
+    Parameters
+    ----------
+    z_values : np.ndarray
+        Array of shape (n_rows, 4) with the z-values of the non-benign categories. The benign category is the
+        reference category with a z-value of 0.
+    out : np.ndarray, optional
+        A writable floating-point array of shape (n_rows, 5) to write the result to. A new array is allocated if not
+        given.
+    dtype : data-type
+        The dtype of the new array if `out` is not given (default is float64). float32 halves the memory of the
+        result at a relative precision of about 1e-7; the shift is still computed in float64.
+    log : bool
+        Whether to return the natural logarithms of the probabilities, e.g. for a log-loss, instead of the
+        probabilities (default is False). They are computed directly from the shifted logits and stay finite where
+        the probabilities underflow to 0.
+    workspace : Workspace, optional
+        Buffers for the temporaries, so that the kernel allocates nothing when `out` is also given, see
+        `adnex.workspace.Workspace`.
+
+    Raises
+    ------
+    ValueError
+        If `out` does not have shape (n_rows, 5) or is not a floating-point array, or if the batch has more rows
+        than the workspace.
+
+    Returns
+    -------
+    np.ndarray
+        `out`, or a new array of shape (n_rows, 5), with the probabilities (or log-probabilities) for each outcome
+        class in the order of `ADNEX_MODEL_OUTPUT_CATEGORIES`.
+    """
+    z_values = np.asarray(z_values, dtype=np.float64)
+    shape = (z_values.shape[0], len(ADNEX_MODEL_OUTPUT_CATEGORIES))
+
+    if out is None:
+        out = np.empty(shape, dtype=dtype)
+    elif out.shape != shape or not np.issubdtype(out.dtype, np.floating):
+        raise ValueError(f'out must be a floating-point array of shape {shape}, got {out.dtype} {out.shape}.')
+
+    shift, denominator, scratch = _temporaries(shape[0], workspace)
 
-    # Calculate z-values for each non-benign category
-    z_values = constants.T @ transformed_vars
+    # Shift every row by its largest logit; the benign category is the reference with a logit of 0. The rows are
+    # short, so the reductions loop over the columns, which is faster than reducing along axis 1.
+    np.maximum(z_values[:, 0], 0.0, out=shift)
+    for column in z_values.T[1:]:
+        np.maximum(shift, column, out=shift)
 
-    # Compute exp(z) for each category
-    exp_z_values = np.exp(z_values)
+    np.subtract(0.0, shift, out=out[:, 0], casting='same_kind')
+    for category, column in enumerate(z_values.T, start=1):
+        np.subtract(column, shift, out=out[:, category], casting='same_kind')
 
-    # Prepend 1 for the benign category
-    exp_z_values = np.insert(exp_z_values, 0, 1)
+    if log:
+        # log p = shifted logit - log(sum(exp(shifted logits))), without exponentiating the output in place
+        np.exp(out[:, 0], out=denominator, casting='same_kind')
+        for category in range(1, shape[1]):
+            denominator += np.exp(out[:, category], out=scratch, casting='same_kind')
+        out -= np.log(denominator, out=denominator)[:, np.newaxis]
+    else:
+        np.exp(out, out=out)
+        np.copyto(denominator, out[:, 0])
+        for category in range(1, shape[1]):
+            denominator += out[:, category]
+        out *= np.reciprocal(denominator, out=denominator)[:, np.newaxis]
 
-    # Compute probabilities
-    probabilities = exp_z_values / exp_z_values.sum()
+    return out
 
-    probabilities_series = pd.Series(probabilities, index=ADNEX_MODEL_OUTPUT_CATEGORIES)
 
-    return probabilities_series
+def _temporaries(n_rows: int, workspace: Optional[Workspace]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Arrays of shape (n_rows,) for the shift, the denominator and a scratch column of the softmax
+    if workspace is None:
+        return np.empty(n_rows), np.empty(n_rows), np.empty(n_rows)
+    workspace.check_size(n_rows)
+    return workspace.shift[:n_rows], workspace.denominator[:n_rows], workspace.scratch[:n_rows]
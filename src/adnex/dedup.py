@@ -0,0 +1,105 @@
+""" Deduplication of input rows by packing the integer-valued ADNEX variables into one integer key. """
+
+from typing import Any, Dict, Mapping, Tuple
+
+import numpy as np
+
+from adnex.constraints import MAX_AGE, MAX_CA_125, MAXIMAL_LESION_DIAMETER, VALID_PAPILLARY_PROJECTIONS
+from adnex.engine import _float_column
+from adnex.lookup import _index_column
+from adnex.variables import ADNEX_MODEL_VARIABLES
+
+# Number of possible values of each variable, in packing order. A missing CA-125 is packed as MAX_CA_125 + 1.
+PACKING_RADICES: Tuple[Tuple[str, int], ...] = (
+    ('age', MAX_AGE + 1),
+    ('s_ca_125', MAX_CA_125 + 2),
+    ('max_lesion_diameter', MAXIMAL_LESION_DIAMETER + 1),
+    ('max_solid_component', MAXIMAL_LESION_DIAMETER + 1),
+    ('number_of_papillary_projections', max(VALID_PAPILLARY_PROJECTIONS) + 1),
+    ('more_than_10_locules', 2),
+    ('acoustic_shadows_present', 2),
+    ('ascites_present', 2),
+    ('is_oncology_center', 2),
+)
+
+_VARIABLE_NAMES = tuple(ADNEX_MODEL_VARIABLES.values())
+
+
+def pack_rows(columns: Mapping[str, Any]) -> np.ndarray:
+    """
+    Pack the nine ADNEX variables of every row into one int64 key.
+
+    The key is the mixed-radix number with the digits in the order of `PACKING_RADICES`, so two rows have the same
+    key if and only if they have the same values. This needs about 46 bits.
+
+    Parameters
+    ----------
+    columns : pd.DataFrame or Mapping[str, np.ndarray]
+        A DataFrame or a mapping of column names to one-dimensional arrays of equal length, with validated values.
+        's_ca_125' may be absent or NaN.
+
+    Raises
+    ------
+    ValueError
+        If a value is outside the valid range of its variable, so that keys could collide.
+
+    Returns
+    -------
+    np.ndarray
+        The int64 keys, of shape (n_rows,).
+    """
+    n_rows = len(columns['age'])
+    keys = np.zeros(n_rows, dtype=np.int64)
+
+    for name, radix in PACKING_RADICES:
+        if name == 's_ca_125':
+            s_ca_125 = _float_column(columns[name]) if name in columns else np.full(n_rows, np.nan)
+            digits = np.where(np.isnan(s_ca_125), radix - 1, s_ca_125).astype(np.int64)
+        else:
+            digits = _index_column(columns[name])
+
+        if n_rows and (digits.min() < 0 or digits.max() >= radix):
+            raise ValueError(f'{name} has values outside [0, {radix - 1}]; validate the input before packing it.')
+
+        keys *= radix
+        keys += digits
+
+    return keys
+
+
+def unique_rows(columns: Mapping[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the unique rows of input columns.
+
+    Parameters
+    ----------
+    columns : pd.DataFrame or Mapping[str, np.ndarray]
+        A DataFrame or a mapping of column names to one-dimensional arrays of equal length, with validated values.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        The position of the first occurrence of every unique row, and for every row the index of its unique row,
+        so that `rows[first][inverse]` equals `rows`.
+    """
+    _, first, inverse = np.unique(pack_rows(columns), return_index=True, return_inverse=True)
+    return first, inverse.ravel()
+
+
+def take_rows(columns: Mapping[str, Any], positions: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Select rows of the ADNEX variables by position.
+
+    Parameters
+    ----------
+    columns : pd.DataFrame or Mapping[str, np.ndarray]
+        A DataFrame or a mapping of column names to one-dimensional arrays of equal length.
+    positions : np.ndarray
+        Integer positions of the rows to select.
+
+    Returns
+    -------
+    Dict[str, np.ndarray]
+        The selected rows of the ADNEX variables that are present.
+    """
+    return {name: np.asarray(columns[name])[positions] for name in _VARIABLE_NAMES if name in columns}
@@ -0,0 +1,320 @@
+""" Compiled representation of the ADNEX model shared by the batch and single-patient paths. """
+
+from functools import lru_cache
+from typing import Any, Dict, Mapping, NoReturn, Optional, Tuple, Union
+
+import numpy as np
+
+from adnex.computation import compute_probabilities_from_z_values
+from adnex.transformation import transform_input_columns
+from adnex.validation.core import validate_input_columns
+from adnex.validation.trusted import ValidatedAdnexFrame
+from adnex.validation.variables import _is_missing
+from adnex.variables import (
+    ADNEX_MODEL_PREDICTORS_WITH_CA125,
+    ADNEX_MODEL_PREDICTORS_WITHOUT_CA125,
+    ADNEX_MODEL_VARIABLES,
+    get_adnex_model_coefficients,
+)
+from adnex.workspace import Workspace
+
+_VARIABLE_NAMES = tuple(ADNEX_MODEL_VARIABLES.values())
+
+
+class _ImmutableModel:
+    # Base class of the compiled models: attributes are set once in __init__, and pickling rebuilds the model
+
+    __slots__ = ()
+
+    def _set_attributes(self, attributes: Dict[str, Any]) -> None:
+        for name, value in attributes.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name: str, value: Any) -> NoReturn:
+        raise AttributeError(f'{type(self).__name__} is immutable.')
+
+    def __delattr__(self, name: str) -> NoReturn:
+        raise AttributeError(f'{type(self).__name__} is immutable.')
+
+    def __reduce__(self) -> Tuple[type, Tuple[()]]:
+        return (type(self), ())
+
+
+class AdnexModel(_ImmutableModel):
+    """
+    Immutable, precompiled ADNEX model.
+
+    The coefficients of both model variants are held as read-only, C-contiguous float64 arrays with a fixed predictor
+    ordering, so that scoring never re-derives the ordering or builds intermediate DataFrames. Instances hold no
+    mutable state and can be shared between threads. Use `get_compiled_model` to get the shared instance.
+
+    The scoring methods accept a single patient (a mapping, pandas Series, NamedTuple or one-dimensional array) or a
+    batch of patients (a DataFrame, a `ValidatedAdnexFrame`, a mapping of column arrays, a structured array, or a
+    two-dimensional array with the columns ordered as `ADNEX_MODEL_VARIABLES`). Rows with a missing (NaN) CA-125 value
+    are scored with the model without CA-125.
+
+    Attributes
+    ----------
+    predictors_with_ca125 : Tuple[str, ...]
+        Predictor ordering of the model with CA-125.
+    predictors_without_ca125 : Tuple[str, ...]
+        Predictor ordering of the model without CA-125, which is also the ordering of the shared predictors.
+    coefficients_with_ca125 : np.ndarray
+        Coefficients of the model with CA-125, of shape (11, 4).
+    coefficients_without_ca125 : np.ndarray
+        Coefficients of the model without CA-125, of shape (10, 4).
+    shared_coefficients_with_ca125 : np.ndarray
+        Coefficients of the model with CA-125 for the shared predictors, of shape (10, 4).
+    ca125_coefficients : np.ndarray
+        Coefficients of the model with CA-125 for the Log2(B) predictor, of shape (4,).
+    """
+
+    __slots__ = (
+        'predictors_with_ca125',
+        'predictors_without_ca125',
+        'coefficients_with_ca125',
+        'coefficients_without_ca125',
+        'shared_coefficients_with_ca125',
+        'ca125_coefficients',
+    )
+
+    predictors_with_ca125: Tuple[str, ...]
+    predictors_without_ca125: Tuple[str, ...]
+    coefficients_with_ca125: np.ndarray
+    coefficients_without_ca125: np.ndarray
+    shared_coefficients_with_ca125: np.ndarray
+    ca125_coefficients: np.ndarray
+
+    def __init__(self) -> None:
+        coefficients_with_ca125 = get_adnex_model_coefficients(with_ca125=True)
+        shared_rows = [ADNEX_MODEL_PREDICTORS_WITH_CA125.index(name) for name in ADNEX_MODEL_PREDICTORS_WITHOUT_CA125]
+        ca125_row = ADNEX_MODEL_PREDICTORS_WITH_CA125.index('Log2(B)')
+
+        self._set_attributes(
+            {
+                'predictors_with_ca125': ADNEX_MODEL_PREDICTORS_WITH_CA125,
+                'predictors_without_ca125': ADNEX_MODEL_PREDICTORS_WITHOUT_CA125,
+                'coefficients_with_ca125': coefficients_with_ca125,
+                'coefficients_without_ca125': get_adnex_model_coefficients(with_ca125=False),
+                'shared_coefficients_with_ca125': _read_only(coefficients_with_ca125[shared_rows]),
+                'ca125_coefficients': _read_only(coefficients_with_ca125[ca125_row]),
+            }
+        )
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}(predictors={self.predictors_with_ca125})'
+
+    def score_columns(
+        self, columns: Mapping[str, Any], workspace: Optional[Workspace] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Compute the z-values of validated input columns.
+
+        The shared predictors are transformed once for all rows and multiplied with the coefficients of each model
+        variant; the CA-125 term is added column by column, and the rows without CA-125 are then overwritten with the
+        z-values of the model without CA-125. A batch with a single variant is multiplied only once.
+
+        Parameters
+        ----------
+        columns : pd.DataFrame or Mapping[str, np.ndarray]
+            A DataFrame or a mapping of column names to one-dimensional arrays of equal length. The input is not
+            validated.
+        workspace : Workspace, optional
+            Buffers to compute the z-values in instead of allocating new arrays, see `adnex.workspace.Workspace`.
+
+        Raises
+        ------
+        ValueError
+            If the batch has more rows than the workspace.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            The z-values of the non-benign categories, of shape (n_rows, 4), and a boolean array of shape (n_rows,)
+            that is True where the model with CA-125 was used. With a workspace, both are views of its buffers.
+        """
+        n_rows = len(columns['age'])
+        if workspace is None:
+            workspace = Workspace(n_rows)
+        workspace.check_size(n_rows)
+
+        transformed = transform_input_columns(columns, with_ca125=False, out=workspace.transformed[:n_rows])
+        z_values = workspace.z_values[:n_rows]
+        with_ca125, without_ca125 = workspace.with_ca125[:n_rows], workspace.without_ca125[:n_rows]
+
+        log2_ca125 = workspace.log2_ca125[:n_rows]
+        if 's_ca_125' in columns:
+            s_ca_125 = columns['s_ca_125']
+            log2_ca125[:] = _float_column(s_ca_125) if getattr(s_ca_125, 'dtype', object) == object else s_ca_125
+        else:
+            log2_ca125.fill(np.nan)
+        np.isnan(log2_ca125, out=without_ca125)
+        np.logical_not(without_ca125, out=with_ca125)
+
+        if not with_ca125.any():
+            np.matmul(transformed, self.coefficients_without_ca125, out=z_values)
+            return z_values, with_ca125
+
+        np.log2(log2_ca125, out=log2_ca125)
+        np.copyto(log2_ca125, 0.0, where=without_ca125)
+        np.matmul(transformed, self.shared_coefficients_with_ca125, out=z_values)
+        scratch = workspace.scratch[:n_rows]
+        for category, coefficient in enumerate(self.ca125_coefficients):
+            z_values[:, category] += np.multiply(log2_ca125, coefficient, out=scratch)
+
+        if without_ca125.any():
+            z_values_without_ca125 = workspace.z_values_without_ca125[:n_rows]
+            np.matmul(transformed, self.coefficients_without_ca125, out=z_values_without_ca125)
+            np.copyto(z_values, z_values_without_ca125, where=without_ca125[:, np.newaxis])
+
+        return z_values, with_ca125
+
+    def decision_scores(self, data: Any, validate: bool = True) -> np.ndarray:
+        """
+        Compute the z-values (logits relative to the benign category) of the non-benign categories.
+
+        Parameters
+        ----------
+        data : Any
+            A single patient or a batch of patients, see the class documentation.
+        validate : bool
+            Whether to validate the input (default is True). Pass False only for input that is known to be valid. A
+            `ValidatedAdnexFrame` is never validated again.
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape (4,) for a single patient, or (n_rows, 4) for a batch.
+        """
+        columns, single = _checked_columns(data, validate)
+        z_values, _ = self.score_columns(columns)
+        return z_values[0] if single else z_values
+
+    def predict_proba(self, data: Any, validate: bool = True) -> np.ndarray:
+        """
+        Compute the probabilities of each outcome category.
+
+        Parameters
+        ----------
+        data : Any
+            A single patient or a batch of patients, see the class documentation.
+        validate : bool
+            Whether to validate the input (default is True). Pass False only for input that is known to be valid. A
+            `ValidatedAdnexFrame` is never validated again.
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape (5,) for a single patient, or (n_rows, 5) for a batch, with the categories ordered as
+            `ADNEX_MODEL_OUTPUT_CATEGORIES`.
+        """
+        columns, single = _checked_columns(data, validate)
+        z_values, _ = self.score_columns(columns)
+        probabilities = compute_probabilities_from_z_values(z_values)
+        return probabilities[0] if single else probabilities
+
+    def predict_log_proba(self, data: Any, validate: bool = True) -> np.ndarray:
+        """
+        Compute the natural logarithms of the probabilities of each outcome category.
+
+        The logarithms are computed from the z-values with the log-sum-exp trick, so they stay finite where the
+        probabilities underflow to 0.
+
+        Parameters
+        ----------
+        data : Any
+            A single patient or a batch of patients, see the class documentation.
+        validate : bool
+            Whether to validate the input (default is True). Pass False only for input that is known to be valid. A
+            `ValidatedAdnexFrame` is never validated again.
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape (5,) for a single patient, or (n_rows, 5) for a batch, with the categories ordered as
+            `ADNEX_MODEL_OUTPUT_CATEGORIES`.
+        """
+        columns, single = _checked_columns(data, validate)
+        z_values, _ = self.score_columns(columns)
+        log_probabilities = compute_probabilities_from_z_values(z_values, log=True)
+        return log_probabilities[0] if single else log_probabilities
+
+    def predict_risk(self, data: Any, validate: bool = True) -> Union[float, np.ndarray]:
+        """
+        Compute the risk of cancer, i.e. the sum of the probabilities of the non-benign categories.
+
+        Parameters
+        ----------
+        data : Any
+            A single patient or a batch of patients, see the class documentation.
+        validate : bool
+            Whether to validate the input (default is True). Pass False only for input that is known to be valid. A
+            `ValidatedAdnexFrame` is never validated again.
+
+        Returns
+        -------
+        float or np.ndarray
+            The risk of cancer as a float for a single patient, or an array of shape (n_rows,) for a batch.
+        """
+        probabilities = self.predict_proba(data, validate=validate)
+        risks = probabilities[..., 1:].sum(axis=-1)
+        return float(risks) if probabilities.ndim == 1 else risks
+
+
+@lru_cache(maxsize=None)
+def get_compiled_model() -> AdnexModel:
+    """
+    Retrieve the shared compiled ADNEX model, building it on first use.
+
+    Returns
+    -------
+    AdnexModel
+        The compiled model.
+    """
+    return AdnexModel()
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array = np.ascontiguousarray(array)
+    array.flags.writeable = False
+    return array
+
+
+def _float_column(values: Any) -> np.ndarray:
+    if getattr(values, 'dtype', None) == object or isinstance(values, (list, tuple)):
+        # Object columns may hold None or pd.NA for missing values
+        return np.array([np.nan if _is_missing(value) else float(value) for value in values], dtype=np.float64)
+    return np.asarray(values, dtype=np.float64)
+
+
+def _checked_columns(data: Any, validate: bool) -> Tuple[Mapping[str, Any], bool]:
+    # Input as columns, validated unless validation is disabled or the input was validated before
+    columns, single = _as_columns(data)
+    if validate and not isinstance(data, ValidatedAdnexFrame):
+        validate_input_columns(columns)
+    return columns, single
+
+
+def _as_columns(data: Any) -> Tuple[Mapping[str, Any], bool]:
+    # Return a mapping of column arrays and whether the input was a single patient
+    if isinstance(data, np.ndarray):
+        if data.dtype.names is not None:
+            return {name: np.atleast_1d(data[name]) for name in data.dtype.names}, data.ndim == 0
+        array = np.atleast_2d(data)
+        if array.ndim != 2 or array.shape[1] != len(_VARIABLE_NAMES):
+            raise ValueError(
+                f'Expected an array with {len(_VARIABLE_NAMES)} columns ordered as {list(_VARIABLE_NAMES)}, '
+                f'got shape {data.shape}.'
+            )
+        return dict(zip(_VARIABLE_NAMES, array.T)), data.ndim == 1
+
+    if hasattr(data, 'columns'):
+        # DataFrame-like
+        return data, False
+
+    values: Mapping[str, Any] = data._asdict() if hasattr(data, '_asdict') else data
+    if all(np.ndim(values[name]) == 0 for name in _VARIABLE_NAMES if name in values):
+        single: Dict[str, Any] = {name: np.asarray([values[name]]) for name in _VARIABLE_NAMES if name in values}
+        return single, True
+
+    return values, False
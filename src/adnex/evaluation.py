@@ -0,0 +1,605 @@
+""" Evaluation of the predictions on a cohort with observed outcomes: discrimination, calibration and net benefit. """
+
+from typing import Any, Iterable, NamedTuple, Sequence, Tuple, Union
+
+import numpy as np
+
+from adnex.variables import ADNEX_MODEL_OUTPUT_CATEGORIES
+
+# Number of bins of the scores kept by `EvaluationAccumulator`, which bounds the error of the metrics computed from it
+DEFAULT_N_BINS = 2**14
+
+# Default decision thresholds of the net benefit, and evaluation points and bandwidth (on the logit scale) of the
+# smoothed calibration curve
+DEFAULT_THRESHOLDS = np.round(np.arange(0.01, 1.0, 0.01), 2)
+DEFAULT_CALIBRATION_POINTS = np.round(np.arange(0.01, 1.0, 0.01), 2)
+DEFAULT_BANDWIDTH = 0.3
+
+_N_CATEGORIES = len(ADNEX_MODEL_OUTPUT_CATEGORIES)
+
+# Gauss-Legendre nodes and weights on [0, 1], exact for the polynomials of degree n_categories - 1 of the PDI
+_NODES, _WEIGHTS = np.polynomial.legendre.leggauss(_N_CATEGORIES // 2 + 1)
+_NODES, _WEIGHTS = (_NODES + 1) / 2, _WEIGHTS / 2
+
+
+class Discrimination(NamedTuple):
+    """
+    Discrimination between the outcome categories.
+
+    Attributes
+    ----------
+    cancer_auc : float
+        The area under the ROC curve of the risk of cancer, for benign against all other outcomes.
+    one_vs_rest_auc : np.ndarray
+        The AUC of the probability of each category against all other outcomes, of shape (5,) and ordered as
+        `ADNEX_MODEL_OUTPUT_CATEGORIES`.
+    pdi : float
+        The polytomous discrimination index (PDI), the mean of `pdi_per_category`. A random model has a PDI of 0.2.
+    pdi_per_category : np.ndarray
+        For each category, the probability that, in a set of one random patient of every category, the patient of the
+        category has the highest probability of that category, of shape (5,).
+    """
+
+    cancer_auc: float
+    one_vs_rest_auc: np.ndarray
+    pdi: float
+    pdi_per_category: np.ndarray
+
+
+class CalibrationCurve(NamedTuple):
+    """
+    Observed against predicted risks.
+
+    Attributes
+    ----------
+    predicted : np.ndarray
+        The mean predicted risk of each bin, or the points of a smoothed curve.
+    observed : np.ndarray
+        The observed proportion of events in each bin, or the smoothed proportion at each point.
+    counts : np.ndarray
+        The number of rows in each bin, or the effective number of rows (the sum of the kernel weights) at each point.
+    """
+
+    predicted: np.ndarray
+    observed: np.ndarray
+    counts: np.ndarray
+
+
+class NetBenefit(NamedTuple):
+    """
+    Decision curve.
+
+    Attributes
+    ----------
+    thresholds : np.ndarray
+        The risk thresholds, above which patients are treated.
+    model : np.ndarray
+        The net benefit of treating the patients whose risk is at least the threshold.
+    treat_all : np.ndarray
+        The net benefit of treating all patients. The net benefit of treating none is 0.
+    """
+
+    thresholds: np.ndarray
+    model: np.ndarray
+    treat_all: np.ndarray
+
+
+class _RankedCounts(NamedTuple):
+    # The distinct values (or bins) of a score in increasing order, the number of rows of each outcome at every value,
+    # of shape (n_outcomes, n_values) so that the counts of every outcome are contiguous, and the sum of the scores at
+    # every value
+    values: np.ndarray
+    counts: np.ndarray
+    sums: np.ndarray
+
+
+def binary_auc(risks: Any, events: Any) -> float:
+    """
+    Compute the area under the ROC curve, with ties counted as one half, in O(n log n).
+
+    Parameters
+    ----------
+    risks : array-like
+        The predicted risks, of shape (n_rows,). Rows with a NaN risk are skipped.
+    events : array-like
+        Whether the event occurred in each row, e.g. whether the tumour was malignant, of shape (n_rows,).
+
+    Returns
+    -------
+    float
+        The AUC, or NaN if there are no rows with or without the event.
+    """
+    ranked = _exact_counts(*_binary_input(risks, events), 2)
+    return _auc(ranked.counts[1], ranked.counts[0])
+
+
+def discrimination(probabilities: Any, outcomes: Any) -> Discrimination:
+    """
+    Compute the AUC of the risk of cancer, the one-vs-rest AUCs and the polytomous discrimination index, exactly.
+
+    Parameters
+    ----------
+    probabilities : array-like
+        The predicted probabilities of shape (n_rows, 5), e.g. the output of `predict_risks_frame`, with the columns
+        ordered as `ADNEX_MODEL_OUTPUT_CATEGORIES`. Rows with a NaN probability are skipped.
+    outcomes : array-like
+        The observed outcome of each row, as a category of `ADNEX_MODEL_OUTPUT_CATEGORIES` or its index.
+
+    Raises
+    ------
+    ValueError
+        If the probabilities are not of shape (n_rows, 5), or an outcome is not a category.
+
+    Returns
+    -------
+    Discrimination
+        The AUCs and the PDI. Metrics that involve a category without any rows are NaN.
+    """
+    scores, outcomes = _polytomous_input(probabilities, outcomes)
+    return _discrimination(_exact_counts(column, outcomes, _N_CATEGORIES) for column in scores)
+
+
+def calibration_curve(risks: Any, events: Any, n_bins: int = 10, strategy: str = 'quantile') -> CalibrationCurve:
+    """
+    Compute a binned calibration curve.
+
+    Parameters
+    ----------
+    risks : array-like
+        The predicted risks, of shape (n_rows,). Rows with a NaN risk are skipped.
+    events : array-like
+        Whether the event occurred in each row, of shape (n_rows,).
+    n_bins : int
+        Number of bins (default is 10).
+    strategy : str
+        How the bins are formed (default is 'quantile'):
+        - 'quantile': bins of about the same number of rows. Rows with the same risk are in the same bin.
+        - 'uniform': bins of the same width between 0 and 1.
+
+    Raises
+    ------
+    ValueError
+        If `n_bins` or `strategy` is invalid.
+
+    Returns
+    -------
+    CalibrationCurve
+        The mean predicted risk, the observed proportion of events and the number of rows of each non-empty bin.
+    """
+    return _calibration_curve(_exact_counts(*_binary_input(risks, events), 2), n_bins, strategy)
+
+
+def smoothed_calibration_curve(
+    risks: Any,
+    events: Any,
+    points: Sequence[float] = DEFAULT_CALIBRATION_POINTS,
+    bandwidth: float = DEFAULT_BANDWIDTH,
+) -> CalibrationCurve:
+    """
+    Compute a calibration curve smoothed with a Gaussian kernel on the logit scale of the predicted risks.
+
+    The rows are first summarized in `DEFAULT_N_BINS` bins of the risk, so the cost of the smoothing does not grow with
+    the number of rows.
+
+    Parameters
+    ----------
+    risks : array-like
+        The predicted risks, of shape (n_rows,). Rows with a NaN risk are skipped.
+    events : array-like
+        Whether the event occurred in each row, of shape (n_rows,).
+    points : Sequence[float]
+        The predicted risks at which to evaluate the curve (default is 0.01, 0.02, ..., 0.99).
+    bandwidth : float
+        The standard deviation of the kernel on the logit scale (default is 0.3).
+
+    Raises
+    ------
+    ValueError
+        If `points` are not strictly between 0 and 1 or `bandwidth` is not positive.
+
+    Returns
+    -------
+    CalibrationCurve
+        The points, the smoothed observed proportion of events and the effective number of rows at each point.
+    """
+    risks, events = _binary_input(risks, events)
+    return _smoothed_calibration_curve(_binned_counts(risks, events, 2, DEFAULT_N_BINS), points, bandwidth)
+
+
+def net_benefit(risks: Any, events: Any, thresholds: Sequence[float] = DEFAULT_THRESHOLDS) -> NetBenefit:
+    """
+    Compute the decision curve, the net benefit of treating the rows whose risk is at least each threshold.
+
+    The net benefit at threshold t is TP / n - FP / n * t / (1 - t). The rows are sorted once and the true and false
+    positives at all thresholds are read from cumulative counts.
+
+    Parameters
+    ----------
+    risks : array-like
+        The predicted risks, of shape (n_rows,). Rows with a NaN risk are skipped.
+    events : array-like
+        Whether the event occurred in each row, of shape (n_rows,).
+    thresholds : Sequence[float]
+        The risk thresholds, at least 0 and less than 1 (default is 0.01, 0.02, ..., 0.99).
+
+    Raises
+    ------
+    ValueError
+        If a threshold is not at least 0 and less than 1.
+
+    Returns
+    -------
+    NetBenefit
+        The net benefit of the model and of treating all rows at each threshold.
+    """
+    return _net_benefit(_exact_counts(*_binary_input(risks, events), 2), thresholds)
+
+
+class EvaluationAccumulator:
+    """
+    Mergeable summary of predictions and outcomes, for evaluating cohorts that are scored in chunks.
+
+    Every update adds the predicted probabilities and the risk of cancer of a chunk of rows to histograms of
+    `n_bins` bins per outcome, in O(n) and with memory independent of the number of rows. Accumulators of different
+    chunks, files or processes can be merged. The metrics are computed from the histograms: rows in the same bin count
+    as ties, so the AUCs and the PDI differ from the exact values of `discrimination` by at most the fraction of pairs
+    within a bin, and the thresholds of the net benefit are rounded up to a multiple of 1 / n_bins.
+
+    Parameters
+    ----------
+    n_bins : int
+        Number of bins between 0 and 1 (default is 2**14).
+    """
+
+    def __init__(self, n_bins: int = DEFAULT_N_BINS) -> None:
+        if n_bins < 1:
+            raise ValueError(f'n_bins must be positive, got {n_bins}.')
+        self.n_bins = n_bins
+        # Histograms of the probability of every category and of the risk of cancer (the last), per outcome
+        self._counts = np.zeros((_N_CATEGORIES + 1, _N_CATEGORIES, n_bins), dtype=np.int64)
+        self._sums = np.zeros((_N_CATEGORIES + 1, n_bins))
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}(n_bins={self.n_bins}, n_rows={self.n_rows})'
+
+    @property
+    def n_rows(self) -> int:
+        """Number of rows added."""
+        return int(self._counts[-1].sum())
+
+    def update(self, probabilities: Any, outcomes: Any) -> None:
+        """
+        Add a chunk of rows.
+
+        Parameters
+        ----------
+        probabilities : array-like
+            The predicted probabilities of shape (n_rows, 5), ordered as `ADNEX_MODEL_OUTPUT_CATEGORIES`. Rows with a
+            NaN probability are skipped.
+        outcomes : array-like
+            The observed outcome of each row, as a category of `ADNEX_MODEL_OUTPUT_CATEGORIES` or its index.
+
+        Raises
+        ------
+        ValueError
+            If the probabilities are not of shape (n_rows, 5), or an outcome is not a category.
+        """
+        scores, outcomes = _polytomous_input(probabilities, outcomes)
+        for column, column_scores in enumerate(scores):
+            ranked = _binned_counts(column_scores, outcomes, _N_CATEGORIES, self.n_bins)
+            self._counts[column] += ranked.counts
+            self._sums[column] += ranked.sums
+
+    def merge(self, other: 'EvaluationAccumulator') -> 'EvaluationAccumulator':
+        """
+        Add the rows of another accumulator with the same number of bins, in place.
+
+        Parameters
+        ----------
+        other : EvaluationAccumulator
+            The accumulator to add.
+
+        Raises
+        ------
+        ValueError
+            If the accumulators have different numbers of bins.
+
+        Returns
+        -------
+        EvaluationAccumulator
+            This accumulator.
+        """
+        if other.n_bins != self.n_bins:
+            raise ValueError(f'Cannot merge accumulators with {self.n_bins} and {other.n_bins} bins.')
+        self._counts += other._counts  # pylint: disable=protected-access
+        self._sums += other._sums  # pylint: disable=protected-access
+        return self
+
+    def discrimination(self) -> Discrimination:
+        """
+        Compute the AUC of the risk of cancer, the one-vs-rest AUCs and the polytomous discrimination index.
+
+        Returns
+        -------
+        Discrimination
+            The AUCs and the PDI. Metrics that involve a category without any rows are NaN.
+        """
+        return _discrimination(self._ranked(column) for column in range(_N_CATEGORIES + 1))
+
+    def calibration_curve(
+        self, category: Union[None, int, str] = None, n_bins: int = 10, strategy: str = 'quantile'
+    ) -> CalibrationCurve:
+        """
+        Compute a binned calibration curve of the risk of cancer or of the probability of one category.
+
+        Parameters
+        ----------
+        category : None, int or str
+            The category, or its index in `ADNEX_MODEL_OUTPUT_CATEGORIES`, whose probability is calibrated against its
+            occurrence (default is None, for the risk of cancer against a non-benign outcome).
+        n_bins : int
+            Number of bins of the curve (default is 10).
+        strategy : str
+            'quantile' for bins of about the same number of rows or 'uniform' for bins of the same width (default is
+            'quantile').
+
+        Raises
+        ------
+        ValueError
+            If `category`, `n_bins` or `strategy` is invalid.
+
+        Returns
+        -------
+        CalibrationCurve
+            The mean predicted risk, the observed proportion of events and the number of rows of each non-empty bin.
+        """
+        return _calibration_curve(self._binary_ranked(category), n_bins, strategy)
+
+    def smoothed_calibration_curve(
+        self,
+        category: Union[None, int, str] = None,
+        points: Sequence[float] = DEFAULT_CALIBRATION_POINTS,
+        bandwidth: float = DEFAULT_BANDWIDTH,
+    ) -> CalibrationCurve:
+        """
+        Compute a calibration curve smoothed with a Gaussian kernel on the logit scale of the predicted risks.
+
+        Parameters
+        ----------
+        category : None, int or str
+            The category whose probability is calibrated (default is None, for the risk of cancer).
+        points : Sequence[float]
+            The predicted risks at which to evaluate the curve (default is 0.01, 0.02, ..., 0.99).
+        bandwidth : float
+            The standard deviation of the kernel on the logit scale (default is 0.3).
+
+        Raises
+        ------
+        ValueError
+            If `category`, `points` or `bandwidth` is invalid.
+
+        Returns
+        -------
+        CalibrationCurve
+            The points, the smoothed observed proportion of events and the effective number of rows at each point.
+        """
+        return _smoothed_calibration_curve(self._binary_ranked(category), points, bandwidth)
+
+    def net_benefit(self, thresholds: Sequence[float] = DEFAULT_THRESHOLDS) -> NetBenefit:
+        """
+        Compute the decision curve of the risk of cancer.
+
+        Parameters
+        ----------
+        thresholds : Sequence[float]
+            The risk thresholds, at least 0 and less than 1 (default is 0.01, 0.02, ..., 0.99).
+
+        Raises
+        ------
+        ValueError
+            If a threshold is not at least 0 and less than 1.
+
+        Returns
+        -------
+        NetBenefit
+            The net benefit of the model and of treating all rows at each threshold.
+        """
+        return _net_benefit(self._binary_ranked(None), thresholds)
+
+    def _ranked(self, column: int) -> _RankedCounts:
+        return _RankedCounts(np.arange(self.n_bins) / self.n_bins, self._counts[column], self._sums[column])
+
+    def _binary_ranked(self, category: Union[None, int, str]) -> _RankedCounts:
+        # The histogram of the risk of cancer or of the probability of a category, with and without the event
+        column = _N_CATEGORIES if category is None else _category_index(category)
+        ranked = self._ranked(column)
+        events = ranked.counts[1:].sum(axis=0) if category is None else ranked.counts[column]
+        return ranked._replace(counts=np.stack([ranked.counts.sum(axis=0) - events, events]))
+
+
+def _binary_input(risks: Any, events: Any) -> Tuple[np.ndarray, np.ndarray]:
+    # The risks and the events as integers (0 or 1), without the rows with a NaN risk
+    risks = np.asarray(risks, dtype=float).ravel()
+    events = np.asarray(events).ravel()
+    if len(risks) != len(events):
+        raise ValueError(f'risks and events must have the same length, got {len(risks)} and {len(events)}.')
+    observed = ~np.isnan(risks)
+    return risks[observed], events[observed].astype(bool).astype(np.intp)
+
+
+def _polytomous_input(probabilities: Any, outcomes: Any) -> Tuple[np.ndarray, np.ndarray]:
+    # The probabilities of every category and the risk of cancer, of shape (6, n_rows), and the outcomes as indices,
+    # without the rows with a NaN probability
+    probabilities = np.asarray(probabilities, dtype=float)
+    if probabilities.ndim != 2 or probabilities.shape[1] != _N_CATEGORIES:
+        raise ValueError(f'probabilities must be of shape (n_rows, {_N_CATEGORIES}), got {probabilities.shape}.')
+    codes = _outcome_codes(outcomes)
+    if len(codes) != len(probabilities):
+        raise ValueError(f'outcomes must have one value per row, got {len(codes)} for {len(probabilities)} rows.')
+
+    scores = np.empty((_N_CATEGORIES + 1, len(probabilities)))
+    scores[:_N_CATEGORIES] = probabilities.T
+    np.sum(scores[1:_N_CATEGORIES], axis=0, out=scores[-1])
+
+    # The risk of cancer is NaN if any probability but the benign one is
+    observed = ~(np.isnan(scores[0]) | np.isnan(scores[-1]))
+    if observed.all():
+        return scores, codes
+    return scores[:, observed], codes[observed]
+
+
+def _outcome_codes(outcomes: Any) -> np.ndarray:
+    # The index in ADNEX_MODEL_OUTPUT_CATEGORIES of every outcome
+    outcomes = np.asarray(outcomes).ravel()
+    if outcomes.dtype.kind in 'iu':
+        codes = outcomes.astype(np.intp)
+    elif outcomes.dtype.kind in 'OUS':
+        lookup = {category: code for code, category in enumerate(ADNEX_MODEL_OUTPUT_CATEGORIES)}
+        codes = np.array([lookup.get(outcome, -1) for outcome in outcomes.tolist()], dtype=np.intp)
+    else:
+        raise ValueError(f'outcomes must be categories or their indices, got an array of {outcomes.dtype}.')
+
+    invalid = (codes < 0) | (codes >= _N_CATEGORIES)
+    if invalid.any():
+        raise ValueError(f'Unknown outcome {outcomes[invalid][0]!r}, expected one of {ADNEX_MODEL_OUTPUT_CATEGORIES}.')
+    return codes
+
+
+def _category_index(category: Union[int, str]) -> int:
+    if isinstance(category, str) and category in ADNEX_MODEL_OUTPUT_CATEGORIES:
+        return ADNEX_MODEL_OUTPUT_CATEGORIES.index(category)
+    if isinstance(category, (int, np.integer)) and 0 <= category < _N_CATEGORIES:
+        return int(category)
+    raise ValueError(f'category must be one of {ADNEX_MODEL_OUTPUT_CATEGORIES} or its index, got {category!r}.')
+
+
+def _exact_counts(scores: np.ndarray, outcomes: np.ndarray, n_outcomes: int) -> _RankedCounts:
+    # Count the rows of every outcome at every distinct score, by sorting the scores once
+    order = np.argsort(scores)
+    sorted_scores = scores[order]
+    distinct = np.empty(len(scores), dtype=bool)
+    distinct[:1] = True
+    np.not_equal(sorted_scores[1:], sorted_scores[:-1], out=distinct[1:])
+    ranks = np.cumsum(distinct) - 1
+
+    values = sorted_scores[distinct]
+    counts = np.bincount(outcomes[order] * len(values) + ranks, minlength=n_outcomes * len(values))
+    counts = counts.reshape(n_outcomes, len(values))
+    return _RankedCounts(values, counts, values * counts.sum(axis=0))
+
+
+def _binned_counts(scores: np.ndarray, outcomes: np.ndarray, n_outcomes: int, n_bins: int) -> _RankedCounts:
+    # Count the rows of every outcome in every bin of the scores, in O(n)
+    bins = np.clip((scores * n_bins).astype(np.intp), 0, n_bins - 1)
+    counts = np.bincount(outcomes * n_bins + bins, minlength=n_outcomes * n_bins).reshape(n_outcomes, n_bins)
+    return _RankedCounts(np.arange(n_bins) / n_bins, counts, np.bincount(bins, weights=scores, minlength=n_bins))
+
+
+def _auc(positives: np.ndarray, negatives: np.ndarray) -> float:
+    # The probability that a random positive scores higher than a random negative, with ties counted as one half, from
+    # the counts at increasing scores
+    negatives = negatives.astype(float)
+    below = np.cumsum(negatives)
+    below -= 0.5 * negatives
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return float(np.dot(positives, below) / (positives.sum() * negatives.sum()))
+
+
+def _discrimination(ranked: Iterable[_RankedCounts]) -> Discrimination:
+    # The discrimination metrics from the counts of the probability of every category and then of the risk of cancer,
+    # which are consumed one at a time
+    one_vs_rest, pdi, cancer_auc = np.empty(_N_CATEGORIES), np.empty(_N_CATEGORIES), np.nan
+    for column, (_, counts, _) in enumerate(ranked):
+        if column == _N_CATEGORIES:
+            cancer_auc = _auc(counts[1:].sum(axis=0), counts[0])
+        else:
+            one_vs_rest[column] = _auc(counts[column], counts.sum(axis=0) - counts[column])
+            pdi[column] = _pdi(counts, column)
+    return Discrimination(cancer_auc, one_vs_rest, float(pdi.mean()), pdi)
+
+
+def _pdi(counts: np.ndarray, category: int) -> float:
+    # The probability that a patient of the category has the highest probability of the category in a set of one
+    # random patient of every category, from the counts of every outcome at increasing probabilities of the category.
+    # When the patient ties with t others for the highest probability, it counts as 1 / (t + 1) = the integral of u^t
+    # over [0, 1]. By independence of the other patients, the expected count at a probability is the integral of the
+    # product over the other categories of (P(lower) + P(equal) * u), a polynomial that Gauss-Legendre quadrature
+    # integrates exactly. Only the probabilities of patients of the category contribute.
+    cases = np.flatnonzero(counts[category])
+    totals = counts.sum(axis=1).astype(float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        terms = []
+        for other_counts, total in zip(counts, totals):
+            equal = other_counts.take(cases)
+            terms.append(((np.cumsum(other_counts).take(cases) - equal) / total, equal / total))
+
+        wins = np.zeros(len(cases))
+        for node, weight in zip(_NODES, _WEIGHTS):
+            product = weight * terms[category][1]
+            for other, (lower, equal) in enumerate(terms):
+                if other != category:
+                    product *= lower + node * equal
+            wins += product
+    return float(wins.sum())
+
+
+def _calibration_curve(ranked: _RankedCounts, n_bins: int, strategy: str) -> CalibrationCurve:
+    # Group the distinct scores (or fine bins) into the bins of the curve
+    if n_bins < 1:
+        raise ValueError(f'n_bins must be positive, got {n_bins}.')
+    totals = ranked.counts.sum(axis=0)
+    if strategy == 'quantile':
+        cuts = totals.sum() * np.arange(1, n_bins) / n_bins
+        groups = np.searchsorted(cuts, np.cumsum(totals) - totals, side='right')
+    elif strategy == 'uniform':
+        groups = np.clip((ranked.values * n_bins).astype(np.intp), 0, n_bins - 1)
+    else:
+        raise ValueError(f"strategy must be 'quantile' or 'uniform', got {strategy!r}.")
+
+    counts = np.bincount(groups, weights=totals, minlength=n_bins)
+    predicted = np.bincount(groups, weights=ranked.sums, minlength=n_bins)
+    observed = np.bincount(groups, weights=ranked.counts[1], minlength=n_bins)
+    filled = counts > 0
+    return CalibrationCurve(
+        predicted[filled] / counts[filled], observed[filled] / counts[filled], counts[filled].astype(np.int64)
+    )
+
+
+def _smoothed_calibration_curve(ranked: _RankedCounts, points: Sequence[float], bandwidth: float) -> CalibrationCurve:
+    # Nadaraya-Watson smoothing of the events over the logit of the mean score of every non-empty bin
+    points = np.asarray(points, dtype=float)
+    if not np.all((points > 0) & (points < 1)) or bandwidth <= 0:
+        raise ValueError('points must be strictly between 0 and 1 and bandwidth positive.')
+
+    totals = ranked.counts.sum(axis=0)
+    filled = totals > 0
+    locations = np.clip(ranked.sums[filled] / totals[filled], 1e-12, 1 - 1e-12)
+    distances = (_logit(points)[:, np.newaxis] - _logit(locations)) / bandwidth
+    weights = np.exp(-0.5 * distances**2)
+
+    counts = weights @ totals[filled]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        observed = weights @ ranked.counts[1, filled] / counts
+    return CalibrationCurve(points, observed, counts)
+
+
+def _logit(values: np.ndarray) -> np.ndarray:
+    return np.log(values / (1 - values))
+
+
+def _net_benefit(ranked: _RankedCounts, thresholds: Sequence[float]) -> NetBenefit:
+    # The true and false positives at every threshold, from the counts at or above every distinct score
+    thresholds = np.asarray(thresholds, dtype=float)
+    if not np.all((thresholds >= 0) & (thresholds < 1)):
+        raise ValueError('thresholds must be at least 0 and less than 1.')
+
+    at_or_above = np.zeros((2, len(ranked.values) + 1), dtype=np.int64)
+    np.cumsum(ranked.counts[:, ::-1], axis=1, out=at_or_above[:, -2::-1])
+    negatives, positives = at_or_above[:, np.searchsorted(ranked.values, thresholds, side='left')]
+
+    n_rows = at_or_above[:, 0].sum()
+    odds = thresholds / (1 - thresholds)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        prevalence = at_or_above[1, 0] / n_rows
+        model = (positives - negatives * odds) / n_rows
+    return NetBenefit(thresholds, model, prevalence - (1 - prevalence) * odds)
@@ -3,3 +3,7 @@
 
 class ADNEXModelError(Exception):
     """Base exception for ADNEX model errors."""
+
+
+class ScorerOverloadedError(ADNEXModelError):
+    """Exception raised when a scorer rejects a request because too many requests are waiting."""
@@ -0,0 +1,343 @@
+""" Contributions of the predictors to the ADNEX z-values and derivatives of the risks, for explanations at scale. """
+
+from typing import Any, Dict, Iterator, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from adnex.computation import compute_probabilities_from_z_values
+from adnex.engine import _checked_columns, _float_column, get_compiled_model
+from adnex.variables import (
+    ADNEX_MODEL_PREDICTORS_WITH_CA125,
+    ADNEX_MODEL_PREDICTORS_WITHOUT_CA125,
+    ADNEX_MODEL_VARIABLES,
+    get_adnex_model_coefficients,
+)
+from adnex.workspace import Workspace
+
+DEFAULT_CHUNK_SIZE = 65_536
+
+# The continuous input variables, which the risks are differentiated with respect to
+DIFFERENTIABLE_VARIABLES: Tuple[str, ...] = ('age', 's_ca_125', 'max_lesion_diameter', 'max_solid_component')
+
+# Position of every shared predictor, and of Log2(B), in the ordering of the model with CA-125
+_SHARED_POSITIONS = tuple(
+    ADNEX_MODEL_PREDICTORS_WITH_CA125.index(name) for name in ADNEX_MODEL_PREDICTORS_WITHOUT_CA125
+)
+_CA125_POSITION = ADNEX_MODEL_PREDICTORS_WITH_CA125.index('Log2(B)')
+
+# Coefficients of the model without CA-125 in the ordering of the model with CA-125, with 0 for Log2(B)
+_COEFFICIENTS_WITHOUT_CA125 = np.zeros((len(ADNEX_MODEL_PREDICTORS_WITH_CA125), 4))
+_COEFFICIENTS_WITHOUT_CA125[list(_SHARED_POSITIONS)] = get_adnex_model_coefficients(with_ca125=False)
+
+
+class Contributions(NamedTuple):
+    """
+    Decomposition of the z-values of a batch of patients.
+
+    The z-value of every non-benign category is the sum of the contributions of the predictors, so
+    `contributions.sum(axis=1)` equals `z_values` up to floating-point rounding.
+
+    Attributes
+    ----------
+    contributions : np.ndarray
+        Array of shape (n_rows, 11, 4) with the coefficient times the transformed value of every predictor, ordered
+        as `predictors`, for every non-benign category. Each row uses the coefficients of its model variant; the
+        Log2(B) contribution of rows without CA-125 is 0. The array is Fortran-ordered, so that the contributions of a
+        predictor to a category are contiguous.
+    z_values : np.ndarray
+        Array of shape (n_rows, 4) with the z-values (logits relative to the benign category).
+    probabilities : np.ndarray
+        Array of shape (n_rows, 5) with the probabilities, ordered as `ADNEX_MODEL_OUTPUT_CATEGORIES`.
+    with_ca125 : np.ndarray
+        Boolean array of shape (n_rows,) that is True where the model with CA-125 was used.
+    predictors : Tuple[str, ...]
+        The predictor names along the second axis of `contributions`, i.e. `ADNEX_MODEL_PREDICTORS_WITH_CA125`, the
+        index of `ADNEX_MODEL_CONSTANTS_WITH_CA125`.
+    """
+
+    contributions: np.ndarray
+    z_values: np.ndarray
+    probabilities: np.ndarray
+    with_ca125: np.ndarray
+    predictors: Tuple[str, ...] = ADNEX_MODEL_PREDICTORS_WITH_CA125
+
+
+class MarginalEffects(NamedTuple):
+    """
+    Derivatives of the risks of a batch of patients with respect to the continuous input variables.
+
+    Attributes
+    ----------
+    probabilities : np.ndarray
+        Array of shape (n_rows, 5) with the probabilities, ordered as `ADNEX_MODEL_OUTPUT_CATEGORIES`.
+    jacobian : np.ndarray
+        Array of shape (n_rows, 5, 4) with the derivative of every probability with respect to every variable of
+        `variables`, per unit of the variable (years, U/mL or mm).
+    cancer_risk : np.ndarray
+        Array of shape (n_rows,) with the risk of cancer, the sum of the probabilities of the non-benign categories.
+    cancer_risk_gradient : np.ndarray
+        Array of shape (n_rows, 4) with the derivative of the risk of cancer with respect to every variable.
+    with_ca125 : np.ndarray
+        Boolean array of shape (n_rows,) that is True where the model with CA-125 was used. The derivatives with
+        respect to CA-125 are NaN where it is False, as the model without CA-125 does not depend on it.
+    variables : Tuple[str, ...]
+        The variables along the last axis of `jacobian` and `cancer_risk_gradient`, i.e. `DIFFERENTIABLE_VARIABLES`.
+    """
+
+    probabilities: np.ndarray
+    jacobian: np.ndarray
+    cancer_risk: np.ndarray
+    cancer_risk_gradient: np.ndarray
+    with_ca125: np.ndarray
+    variables: Tuple[str, ...] = DIFFERENTIABLE_VARIABLES
+
+
+def explain_contributions(
+    data: Any, dtype: Any = np.float64, chunk_size: int = DEFAULT_CHUNK_SIZE, validate: bool = True
+) -> Contributions:
+    """
+    Decompose the z-values of every patient into the contributions of the predictors.
+
+    The model is linear in the transformed predictors, so the contribution of a predictor to a category is its
+    coefficient times its transformed value. The contributions, z-values and probabilities all come from the same
+    pass as `predict_batch`, without scoring a patient more than once.
+
+    Parameters
+    ----------
+    data : Any
+        A single patient (scored as a batch of one row) or a batch of patients, in any form accepted by
+        `adnex.engine.AdnexModel`.
+    dtype : data-type
+        The dtype of the results (default is float64). float32 halves their memory; the computation is still done
+        in float64.
+    chunk_size : int
+        Number of rows computed at a time (default is 65 536), which bounds the temporary memory.
+    validate : bool
+        Whether to validate the input (default is True). A `ValidatedAdnexFrame` is not validated again.
+
+    Raises
+    ------
+    MissingVariableError
+        If required columns are missing.
+    ValidationError
+        If `validate` is True and input validation fails for at least one row.
+    ValueError
+        If `chunk_size` is not positive.
+
+    Returns
+    -------
+    Contributions
+        The contributions, z-values, probabilities and model variant of every row.
+    """
+    arrays = _input_arrays(data, validate)
+    result = _empty_contributions(len(arrays['age']), dtype)
+    for _ in _contribution_chunks(arrays, dtype, chunk_size, out=result):
+        pass
+    return result
+
+
+def iter_contributions(
+    data: Any, dtype: Any = np.float64, chunk_size: int = DEFAULT_CHUNK_SIZE, validate: bool = True
+) -> Iterator[Contributions]:
+    """
+    Decompose the z-values chunk by chunk, so that millions of rows can be explained with bounded memory.
+
+    Parameters
+    ----------
+    data : Any
+        A single patient (scored as a batch of one row) or a batch of patients, in any form accepted by
+        `adnex.engine.AdnexModel`.
+    dtype : data-type
+        The dtype of the results (default is float64).
+    chunk_size : int
+        Number of rows per chunk (default is 65 536).
+    validate : bool
+        Whether to validate the input (default is True). The whole input is validated before the first chunk.
+
+    Raises
+    ------
+    MissingVariableError
+        If required columns are missing.
+    ValidationError
+        If `validate` is True and input validation fails for at least one row.
+    ValueError
+        If `chunk_size` is not positive.
+
+    Yields
+    ------
+    Contributions
+        The decomposition of the next `chunk_size` rows (fewer for the last chunk), in row order. An empty input
+        yields one empty chunk.
+    """
+    yield from _contribution_chunks(_input_arrays(data, validate), dtype, chunk_size)
+
+
+def marginal_effects(data: Any, validate: bool = True) -> MarginalEffects:
+    """
+    Compute the exact derivatives of the probabilities and of the risk of cancer with respect to the continuous inputs.
+
+    The derivatives of the z-values follow from the chain rule through the transformations of the inputs: A is the
+    age, Log2(B) = log2(CA-125), Log2(C) = log2(lesion diameter), and D/C and D/C^2 depend on both the solid component
+    D and the lesion diameter C. The softmax then gives dp_i/dv = p_i * (dz_i/dv - sum_k p_k * dz_k/dv), with z = 0
+    for the benign category. Everything is computed in one vectorized pass, instead of perturbing each input.
+
+    Parameters
+    ----------
+    data : Any
+        A single patient (scored as a batch of one row) or a batch of patients, in any form accepted by
+        `adnex.engine.AdnexModel`.
+    validate : bool
+        Whether to validate the input (default is True). A `ValidatedAdnexFrame` is not validated again.
+
+    Raises
+    ------
+    MissingVariableError
+        If required columns are missing.
+    ValidationError
+        If `validate` is True and input validation fails for at least one row.
+
+    Returns
+    -------
+    MarginalEffects
+        The probabilities, the risk of cancer and their derivatives for every row.
+    """
+    arrays = _input_arrays(data, validate)
+    z_values, with_ca125 = get_compiled_model().score_columns(arrays)
+    probabilities = compute_probabilities_from_z_values(z_values)
+
+    # Softmax: dp_i/dv = p_i * (dz_i/dv - sum_k p_k * dz_k/dv), where the benign category has dz_0/dv = 0
+    jacobian = _z_value_derivatives(arrays, with_ca125)
+    jacobian -= np.einsum('nk,nkv->nv', probabilities, jacobian)[:, np.newaxis, :]
+    jacobian *= probabilities[:, :, np.newaxis]
+
+    return MarginalEffects(
+        probabilities,
+        jacobian,
+        1.0 - probabilities[:, 0],
+        -jacobian[:, 0],
+        with_ca125.copy(),
+    )
+
+
+def _z_value_derivatives(arrays: Dict[str, np.ndarray], with_ca125: np.ndarray) -> np.ndarray:
+    # Derivatives of the z-values, as a Fortran-ordered array of shape (n_rows, 5 categories, 4 variables) with 0 for
+    # the benign category, accumulated column by column over the predictors that depend on each variable. Each
+    # derivative is masked to the rows of a model variant rather than selecting the coefficients row by row, which
+    # keeps every operation contiguous and exact.
+    n_rows = len(with_ca125)
+    variants = [
+        (mask, coefficients)
+        for mask, coefficients in (
+            (with_ca125, get_compiled_model().coefficients_with_ca125),
+            (~with_ca125, _COEFFICIENTS_WITHOUT_CA125),
+        )
+        if mask.any()
+    ]
+
+    z_derivatives = np.zeros((n_rows, 5, len(DIFFERENTIABLE_VARIABLES)), order='F')
+    scratch = np.empty(n_rows)
+    for variable, predictor, derivative in _predictor_derivatives(arrays, n_rows):
+        derivatives = z_derivatives[:, :, DIFFERENTIABLE_VARIABLES.index(variable)]
+        for mask, coefficients in variants:
+            # Rows of the other variant are 0; rows without CA-125 have no Log2(B) term
+            masked = derivative if len(variants) == 1 else np.where(mask, derivative, 0.0)
+            for category, coefficient in enumerate(coefficients[ADNEX_MODEL_PREDICTORS_WITH_CA125.index(predictor)]):
+                if coefficient:
+                    derivatives[:, category + 1] += np.multiply(masked, coefficient, out=scratch)
+
+    # The model without CA-125 does not depend on CA-125
+    z_derivatives[~with_ca125, :, DIFFERENTIABLE_VARIABLES.index('s_ca_125')] = np.nan
+    return z_derivatives
+
+
+def _predictor_derivatives(arrays: Dict[str, np.ndarray], n_rows: int) -> Tuple[Tuple[str, str, np.ndarray], ...]:
+    # The nonzero derivatives of the predictors with respect to the variables, using d(D/C)/dC = -(D/C) / C,
+    # d(D/C^2)/dC = -2 (D/C)^2 / C, d(D/C)/dD = 1 / C and d(D/C^2)/dD = 2 (D/C) / C
+    missing = np.full(n_rows, np.nan)
+    s_ca_125, diameter, solid = (_float_column(arrays.get(name, missing)) for name in DIFFERENTIABLE_VARIABLES[1:])
+    ratio = solid / diameter
+
+    return (
+        ('age', 'A', np.ones(n_rows)),
+        ('s_ca_125', 'Log2(B)', 1.0 / (s_ca_125 * np.log(2))),
+        ('max_lesion_diameter', 'Log2(C)', 1.0 / (diameter * np.log(2))),
+        ('max_lesion_diameter', 'D/C', -ratio / diameter),
+        ('max_lesion_diameter', 'D/C^2', -2 * ratio**2 / diameter),
+        ('max_solid_component', 'D/C', 1.0 / diameter),
+        ('max_solid_component', 'D/C^2', 2 * ratio / diameter),
+    )
+
+
+def _input_arrays(data: Any, validate: bool) -> Dict[str, np.ndarray]:
+    # The input variables as arrays, validated unless validation is disabled or the input was validated before
+    columns, _ = _checked_columns(data, validate)
+    return {name: np.asarray(columns[name]) for name in ADNEX_MODEL_VARIABLES.values() if name in columns}
+
+
+def _empty_contributions(n_rows: int, dtype: Any) -> Contributions:
+    return Contributions(
+        np.empty((n_rows, len(ADNEX_MODEL_PREDICTORS_WITH_CA125), 4), dtype=dtype, order='F'),
+        np.empty((n_rows, 4), dtype=dtype),
+        np.empty((n_rows, 5), dtype=dtype),
+        np.empty(n_rows, dtype=bool),
+    )
+
+
+def _contribution_chunks(
+    arrays: Dict[str, np.ndarray], dtype: Any, chunk_size: int, out: Optional[Contributions] = None
+) -> Iterator[Contributions]:
+    # The decomposition of every chunk, written into the rows of `out` if given, with one workspace reused from chunk
+    # to chunk
+    if chunk_size < 1:
+        raise ValueError(f'chunk_size must be positive, got {chunk_size}.')
+
+    n_rows = len(arrays['age'])
+    model = get_compiled_model()
+    workspace = Workspace(min(chunk_size, n_rows))
+    shape = (workspace.max_rows, len(ADNEX_MODEL_PREDICTORS_WITH_CA125))
+    buffers = tuple(np.empty(buffer_shape, order='F') for buffer_shape in (shape, shape, shape + (4,), shape + (4,)))
+
+    for start in range(0, max(n_rows, 1), chunk_size):
+        rows = slice(start, min(start + chunk_size, n_rows))
+        z_values, with_ca125 = model.score_columns({name: array[rows] for name, array in arrays.items()}, workspace)
+        chunk = _empty_contributions(len(with_ca125), dtype) if out is None else Contributions(*(a[rows] for a in out))
+
+        _write_contributions(workspace, with_ca125, model.coefficients_with_ca125, chunk.contributions, buffers)
+        chunk.z_values[:] = z_values
+        compute_probabilities_from_z_values(z_values, out=chunk.probabilities, workspace=workspace)
+        chunk.with_ca125[:] = with_ca125
+        yield chunk
+
+
+def _write_contributions(
+    workspace: Workspace,
+    with_ca125: np.ndarray,
+    coefficients_with_ca125: np.ndarray,
+    out: np.ndarray,
+    buffers: Tuple[np.ndarray, ...],
+) -> None:
+    # Write the transformed predictors of the rows scored in the workspace times the coefficients of the model variant
+    # of every row into `out`. Masking the predictors rather than selecting the coefficients row by row keeps both
+    # products contiguous, and one of the two terms of every row is exactly 0, so that the sum is exact. The products
+    # are computed in float64 in the Fortran-ordered buffers and cast once.
+    predictors, masked, products, target = (buffer[: len(with_ca125)] for buffer in buffers)
+    if out.dtype == np.float64:
+        target = out
+
+    # The transformed predictors in the ordering of the model with CA-125; the workspace holds log2(CA-125), with 0
+    # for rows without CA-125, unless no row has CA-125
+    for column, position in enumerate(_SHARED_POSITIONS):
+        predictors[:, position] = workspace.transformed[: len(with_ca125), column]
+    predictors[:, _CA125_POSITION] = workspace.log2_ca125[: len(with_ca125)] if with_ca125.any() else 0.0
+
+    if with_ca125.all() or not with_ca125.any():
+        coefficients = coefficients_with_ca125 if with_ca125.all() else _COEFFICIENTS_WITHOUT_CA125
+        np.multiply(predictors[:, :, np.newaxis], coefficients, out=target)
+    else:
+        np.multiply(predictors, with_ca125[:, np.newaxis], out=masked)
+        np.multiply(masked[:, :, np.newaxis], coefficients_with_ca125, out=target)
+        np.multiply(predictors, ~with_ca125[:, np.newaxis], out=masked)
+        target += np.multiply(masked[:, :, np.newaxis], _COEFFICIENTS_WITHOUT_CA125, out=products)
+
+    if target is not out:
+        out[...] = target
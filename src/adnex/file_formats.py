@@ -0,0 +1,8 @@
+""" File formats and result columns of chunked file scoring, importable without pandas (e.g. by the CLI parser). """
+
+from adnex.variables import ADNEX_MODEL_OUTPUT_CATEGORIES
+
+FILE_FORMATS = ('csv', 'tsv', 'parquet')
+OUTPUT_COLUMNS = (*ADNEX_MODEL_OUTPUT_CATEGORIES, 'cancer_risk', 'with_ca125')
+DEFAULT_OUTPUT_COLUMNS = (*ADNEX_MODEL_OUTPUT_CATEGORIES, 'cancer_risk')
+DEFAULT_CHUNK_SIZE = 100_000
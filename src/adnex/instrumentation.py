@@ -0,0 +1,313 @@
+""" Opt-in timing of the stages of the prediction pipeline, with a dict, Prometheus and cProfile export. """
+
+import contextlib
+import threading
+import time
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+# Called with the stage name, wall time in seconds, number of rows and whether the stage raised
+StageCallback = Callable[[str, float, int, bool], None]
+
+_DISABLED = contextlib.nullcontext()
+
+# The active instrumentation under 'active', shared by all threads and absent when disabled
+_state: Dict[str, 'Instrumentation'] = {}
+
+
+class StageStats(NamedTuple):
+    """
+    Accumulated measurements of one pipeline stage.
+
+    Attributes
+    ----------
+    calls : int
+        Number of times the stage ran.
+    failures : int
+        Number of times the stage raised an exception, e.g. a validation error.
+    rows : int
+        Number of rows processed by the stage.
+    seconds : float
+        Total wall time spent in the stage.
+    max_seconds : float
+        Longest wall time of a single call.
+    """
+
+    calls: int
+    failures: int
+    rows: int
+    seconds: float
+    max_seconds: float
+
+
+class Instrumentation:
+    """
+    Collector of per-stage wall time, call counts, rows processed and failures.
+
+    The scalar path records the stages 'predict_risks', 'predict_risks.filter', 'predict_risks.validate_input',
+    'predict_risks.transform_input_variables' and 'predict_risks.compute_probabilities'. The batch path records
+    'predict_risks_frame', 'predict_risks_frame.validate_input_frame', 'predict_risks_frame.score',
+    'predict_risks_frame.assemble', 'predict_batch.score_columns' and
+    'predict_batch.compute_probabilities_from_z_values'. Nested stages are included in the time of the enclosing
+    stage.
+
+    Parameters
+    ----------
+    callbacks : Sequence[StageCallback]
+        Functions called after every stage with its name, wall time in seconds, number of rows and whether it raised
+        (default is none). They run in the thread that ran the stage and should be fast.
+    profiler : cProfile.Profile, optional
+        A profiler that is enabled only while an instrumented stage runs, so that its statistics cover the hot paths
+        of the pipeline and not the surrounding application. Profilers are per thread; only stages run in the
+        thread that enabled the instrumentation are profiled.
+    """
+
+    def __init__(self, callbacks: Sequence[StageCallback] = (), profiler: Optional[Any] = None) -> None:
+        self.callbacks: List[StageCallback] = list(callbacks)
+        self.profiler = profiler
+        self._stats: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self._profiled_thread = threading.get_ident()
+        self._depth = 0
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}(stages={sorted(self._stats)})'
+
+    def stage(self, name: str, rows: int = 1) -> ContextManager[None]:
+        """
+        Time a block of code as a pipeline stage.
+
+        Parameters
+        ----------
+        name : str
+            The name of the stage.
+        rows : int
+            Number of rows processed by the block (default is 1).
+
+        Returns
+        -------
+        ContextManager[None]
+            A context manager that records the stage when the block exits.
+        """
+        return _Stage(self, name, rows)
+
+    def record(self, name: str, seconds: float, rows: int = 1, failed: bool = False) -> None:
+        """
+        Record one run of a stage.
+
+        Parameters
+        ----------
+        name : str
+            The name of the stage.
+        seconds : float
+            The wall time of the run.
+        rows : int
+            Number of rows processed (default is 1).
+        failed : bool
+            Whether the run raised an exception (default is False).
+        """
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = [0, 0, 0, 0.0, 0.0]
+            stats[0] += 1
+            stats[1] += failed
+            stats[2] += rows
+            stats[3] += seconds
+            stats[4] = max(stats[4], seconds)
+
+        for callback in self.callbacks:
+            callback(name, seconds, rows, failed)
+
+    def stats(self) -> Dict[str, StageStats]:
+        """
+        Get the measurements of every stage that ran.
+
+        Returns
+        -------
+        Dict[str, StageStats]
+            The measurements, keyed by stage name in alphabetical order.
+        """
+        with self._lock:
+            return {name: StageStats(*values) for name, values in sorted(self._stats.items())}
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        """
+        Export the measurements as plain dicts, e.g. for JSON logging.
+
+        Returns
+        -------
+        Dict[str, Dict[str, float]]
+            For every stage, its calls, failures, rows, seconds and max_seconds, and the mean seconds per call.
+        """
+        return {
+            name: {**stats._asdict(), 'mean_seconds': stats.seconds / stats.calls}
+            for name, stats in self.stats().items()
+        }
+
+    def to_prometheus(self, prefix: str = 'adnex') -> str:
+        """
+        Export the measurements in the Prometheus text exposition format.
+
+        Parameters
+        ----------
+        prefix : str
+            Prefix of the metric names (default is 'adnex').
+
+        Returns
+        -------
+        str
+            Counters of the seconds, calls, rows and failures of every stage, labelled by stage.
+        """
+        stats = self.stats()
+        metrics = (
+            ('seconds', 'Wall time spent in the stage.'),
+            ('calls', 'Number of runs of the stage.'),
+            ('rows', 'Number of rows processed by the stage.'),
+            ('failures', 'Number of runs of the stage that raised.'),
+        )
+
+        lines = []
+        for field, description in metrics:
+            metric = f'{prefix}_stage_{field}_total'
+            lines.append(f'# HELP {metric} {description}')
+            lines.append(f'# TYPE {metric} counter')
+            lines.extend(
+                f'{metric}{{stage="{_escape_label_value(name)}"}} {getattr(values, field):.9g}'
+                for name, values in stats.items()
+            )
+
+        return '\n'.join(lines) + '\n'
+
+    def reset(self) -> None:
+        """Discard the measurements."""
+        with self._lock:
+            self._stats.clear()
+
+    def _enter(self) -> None:
+        # Enable the profiler when the outermost stage of the profiled thread starts
+        if self.profiler is not None and threading.get_ident() == self._profiled_thread:
+            if self._depth == 0:
+                self.profiler.enable()
+            self._depth += 1
+
+    def _exit(self) -> None:
+        if self.profiler is not None and threading.get_ident() == self._profiled_thread:
+            self._depth -= 1
+            if self._depth == 0:
+                self.profiler.disable()
+
+
+class _Stage:
+    __slots__ = ('instrumentation', 'name', 'rows', 'start')
+
+    def __init__(self, instrumentation: Instrumentation, name: str, rows: int) -> None:
+        self.instrumentation = instrumentation
+        self.name = name
+        self.rows = rows
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        self.instrumentation._enter()  # pylint: disable=protected-access
+        self.start = time.perf_counter()
+
+    def __exit__(self, exc_type: Any, *_: Any) -> None:
+        seconds = time.perf_counter() - self.start
+        self.instrumentation._exit()  # pylint: disable=protected-access
+        self.instrumentation.record(self.name, seconds, self.rows, exc_type is not None)
+
+
+def stage(name: str, rows: int = 1) -> ContextManager[None]:
+    """
+    Time a block of code as a pipeline stage, if instrumentation is enabled.
+
+    When instrumentation is disabled, this returns a shared no-op context manager, so an instrumented block costs one
+    function call and a global lookup.
+
+    Parameters
+    ----------
+    name : str
+        The name of the stage.
+    rows : int
+        Number of rows processed by the block (default is 1).
+
+    Returns
+    -------
+    ContextManager[None]
+        A context manager that records the stage in the active `Instrumentation`.
+    """
+    active = _state.get('active')
+    if active is None:
+        return _DISABLED
+    return active.stage(name, rows)
+
+
+def enable_instrumentation(callbacks: Sequence[StageCallback] = (), profiler: Optional[Any] = None) -> Instrumentation:
+    """
+    Start recording the stages of the prediction pipeline in all threads.
+
+    Parameters
+    ----------
+    callbacks : Sequence[StageCallback]
+        Functions called after every stage, see `Instrumentation` (default is none).
+    profiler : cProfile.Profile, optional
+        A profiler enabled only while a stage runs, see `Instrumentation`.
+
+    Returns
+    -------
+    Instrumentation
+        The new active instrumentation, replacing any previous one.
+    """
+    _state['active'] = Instrumentation(callbacks, profiler)
+    return _state['active']
+
+
+def disable_instrumentation() -> None:
+    """Stop recording the stages of the prediction pipeline."""
+    _state.pop('active', None)
+
+
+def get_instrumentation() -> Optional[Instrumentation]:
+    """
+    Get the active instrumentation.
+
+    Returns
+    -------
+    Instrumentation, optional
+        The active instrumentation, or None if instrumentation is disabled.
+    """
+    return _state.get('active')
+
+
+@contextlib.contextmanager
+def instrument(callbacks: Sequence[StageCallback] = (), profiler: Optional[Any] = None) -> Iterator[Instrumentation]:
+    """
+    Record the stages of the prediction pipeline within a `with` block.
+
+    The previous instrumentation, if any, is restored when the block exits.
+
+    Parameters
+    ----------
+    callbacks : Sequence[StageCallback]
+        Functions called after every stage, see `Instrumentation` (default is none).
+    profiler : cProfile.Profile, optional
+        A profiler enabled only while a stage runs, see `Instrumentation`.
+
+    Yields
+    ------
+    Instrumentation
+        The instrumentation recording the stages run in the block.
+    """
+    previous = _state.get('active')
+    instrumentation = _state['active'] = Instrumentation(callbacks, profiler)
+    try:
+        yield instrumentation
+    finally:
+        if previous is None:
+            _state.pop('active', None)
+        else:
+            _state['active'] = previous
+
+
+def _escape_label_value(value: str) -> str:
+    # Escape a label value for the Prometheus text exposition format
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
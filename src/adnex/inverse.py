@@ -0,0 +1,261 @@
+""" Inverse queries: the value of an input variable at which the risk of cancer crosses a threshold. """
+
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from adnex.constraints import MAX_AGE, MAX_CA_125, MAXIMAL_LESION_DIAMETER, MIN_AGE
+from adnex.engine import _as_columns
+from adnex.sweep import _PREDICTORS_OF_VARIABLE, _base_columns, _predictors, _split_z_values
+from adnex.validation.trusted import ValidatedAdnexFrame
+
+# Variables that can be solved for, with their default search bounds. CA-125 and the lesion diameter enter the model
+# through their logarithm, so they are searched from 1 and on a log scale. The solid component is searched up to the
+# lesion diameter of each row, and the lesion diameter from the solid component of each row.
+SOLVABLE_VARIABLES: Dict[str, Tuple[float, float]] = {
+    'age': (MIN_AGE, MAX_AGE),
+    's_ca_125': (1.0, MAX_CA_125),
+    'max_lesion_diameter': (1.0, MAXIMAL_LESION_DIAMETER),
+    'max_solid_component': (0.0, MAXIMAL_LESION_DIAMETER),
+}
+
+_LOG_SCALE_VARIABLES = ('s_ca_125', 'max_lesion_diameter')
+
+# Number of (patient, value) pairs evaluated at a time, and the largest number of root-finding iterations
+DEFAULT_CHUNK_SIZE = 2**18
+MAX_ITERATIONS = 100
+
+
+class ThresholdCrossing(NamedTuple):
+    """
+    Result of `solve_risk_threshold`.
+
+    Attributes
+    ----------
+    values : np.ndarray
+        Array of shape (n_rows,) with the smallest value of the variable within the bounds at which the risk of cancer
+        equals the threshold, or NaN where the risk does not cross the threshold within the bounds.
+    reachable : np.ndarray
+        Boolean array of shape (n_rows,) that is True where the threshold is crossed within the bounds.
+    direction : np.ndarray
+        Integer array of shape (n_rows,): 1 where the risk rises above the threshold as the variable increases through
+        the crossing, -1 where it falls below it, and 0 where the threshold is not reachable.
+    risk_at_bounds : np.ndarray
+        Array of shape (n_rows, 2) with the risk of cancer at the lower and upper search bound of every row, or NaN
+        where the bounds of the row are empty.
+    """
+
+    values: np.ndarray
+    reachable: np.ndarray
+    direction: np.ndarray
+    risk_at_bounds: np.ndarray
+
+
+def solve_risk_threshold(  # pylint: disable=too-many-arguments,too-many-locals
+    data: Any,
+    variable: str,
+    threshold: Union[float, np.ndarray],
+    *,
+    bounds: Optional[Tuple[float, float]] = None,
+    grid_size: int = 16,
+    tolerance: float = 1e-6,
+    validate: bool = True,
+) -> ThresholdCrossing:
+    """
+    Find, for every patient, the value of one input variable at which the risk of cancer equals a threshold.
+
+    The risk is first evaluated on a grid of `grid_size` points between the bounds of every row, which brackets the
+    first crossing of the threshold, and the bracket is then narrowed by vectorized regula falsi (Illinois) iterations,
+    for all rows at once.
+    The risk need not be monotonic in the variable (e.g. in the solid component); the smallest crossing is returned.
+    Crossings between two grid points that the risk crosses back over are not detected, so a finer grid finds more
+    of them.
+
+    Parameters
+    ----------
+    data : Any
+        A single patient or a batch of patients, in any form accepted by `adnex.engine.AdnexModel`. The solved
+        variable may be absent.
+    variable : str
+        The variable to solve for, one of `SOLVABLE_VARIABLES`. Solving for CA-125 scores every row with the model
+        with CA-125.
+    threshold : float or np.ndarray
+        The risk of cancer to reach, strictly between 0 and 1, for all rows or per row.
+    bounds : Tuple[float, float], optional
+        The search bounds (default is `SOLVABLE_VARIABLES[variable]`). The bounds of the solid component and of the
+        lesion diameter are further limited per row by the lesion diameter and the solid component, respectively;
+        rows whose bounds are then empty are not reachable.
+    grid_size : int
+        Number of points of the bracketing grid (default is 16, at least 2).
+    tolerance : float
+        The largest width of the final bracket (default is 1e-6), in units of the variable or, for CA-125 and the
+        lesion diameter, of its base-2 logarithm.
+    validate : bool
+        Whether to validate the other variables of `data` (default is True). A `ValidatedAdnexFrame` is not validated
+        again.
+
+    Raises
+    ------
+    MissingVariableError
+        If required variables other than `variable` are missing.
+    ValidationError
+        If `validate` is True and a variable other than `variable` is invalid in a row.
+    ValueError
+        If `variable`, `threshold`, `bounds`, `grid_size` or `tolerance` is invalid.
+
+    Returns
+    -------
+    ThresholdCrossing
+        The crossing values, whether they are reachable, the direction of the crossing and the risks at the bounds.
+    """
+    if variable not in SOLVABLE_VARIABLES:
+        raise ValueError(f'variable must be one of {list(SOLVABLE_VARIABLES)}, got {variable!r}.')
+    if grid_size < 2 or tolerance <= 0:
+        raise ValueError(f'grid_size must be at least 2 and tolerance positive, got {grid_size} and {tolerance}.')
+    if not np.all((np.asarray(threshold) > 0) & (np.asarray(threshold) < 1)):
+        raise ValueError('threshold must be strictly between 0 and 1.')
+
+    columns, _ = _as_columns(data)
+    base = _base_columns(columns, {variable: None}, validate and not isinstance(data, ValidatedAdnexFrame))
+    lower, upper = _search_bounds(base, variable, bounds)
+
+    # The limits of the solid component rule can leave rows without any value within the bounds, which are not
+    # reachable: their bracket is collapsed to a point, which has no crossing
+    empty = upper < lower
+    upper[empty] = lower[empty]
+
+    # The log-odds of cancer minus the log-odds of the threshold, as a function of the variable in its search scale
+    threshold_log_odds = np.broadcast_to(np.log(np.divide(threshold, np.subtract(1.0, threshold))), len(base['age']))
+    evaluate = _log_odds_function(base, variable, threshold_log_odds)
+    reachable, rising, values, bound_differences = _solve_brackets(evaluate, (lower, upper), grid_size, tolerance)
+
+    with np.errstate(over='ignore'):
+        risk_at_bounds = 1.0 / (1.0 + np.exp(-(bound_differences + threshold_log_odds[:, np.newaxis])))
+    risk_at_bounds[empty] = np.nan
+    return ThresholdCrossing(
+        np.where(reachable, _from_search_scale(variable, values), np.nan),
+        reachable,
+        np.where(reachable, np.where(rising, 1, -1), 0).astype(np.int8),
+        risk_at_bounds,
+    )
+
+
+def _solve_brackets(
+    evaluate: Callable[[np.ndarray], np.ndarray],
+    search_bounds: Tuple[np.ndarray, np.ndarray],
+    grid_size: int,
+    tolerance: float,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # Evaluate the differences on a grid between the bounds of every row, and solve for the first crossing of the
+    # threshold. Return whether each row crosses it, whether the crossing is rising, the crossing value and the
+    # differences at the bounds.
+    lower, upper = search_bounds
+    grid = lower[:, np.newaxis] + (upper - lower)[:, np.newaxis] * np.linspace(0.0, 1.0, grid_size)
+    differences = evaluate(grid)
+    above = differences >= 0
+    changes = above[:, 1:] != above[:, :-1]
+    reachable = changes.any(axis=1)
+    rows, cell = np.arange(len(grid)), np.argmax(changes, axis=1)
+
+    # Unreachable rows get an empty bracket, so that they are not iterated
+    cell_end = np.where(reachable, cell + 1, cell)
+    values = _illinois(
+        evaluate,
+        (grid[rows, cell], grid[rows, cell_end]),
+        (differences[rows, cell], differences[rows, cell_end]),
+        tolerance,
+    )
+    return reachable, above[rows, cell + 1], values, differences[:, [0, -1]]
+
+
+def _search_bounds(
+    base: Dict[str, np.ndarray], variable: str, bounds: Optional[Tuple[float, float]]
+) -> Tuple[np.ndarray, np.ndarray]:
+    # The bounds of every row in the search scale, limited by the other variable of the solid component rule
+    low, high = SOLVABLE_VARIABLES[variable] if bounds is None else bounds
+    if not low < high:
+        raise ValueError(f'bounds must be increasing, got {(low, high)}.')
+
+    n_rows = len(base['age'])
+    lower, upper = np.full(n_rows, float(low)), np.full(n_rows, float(high))
+    if variable == 'max_solid_component':
+        upper = np.minimum(upper, base['max_lesion_diameter'])
+    elif variable == 'max_lesion_diameter':
+        lower = np.maximum(lower, base['max_solid_component'])
+
+    if variable in _LOG_SCALE_VARIABLES:
+        if low <= 0:
+            raise ValueError(f'The bounds of {variable} must be positive, got {(low, high)}.')
+        return np.log2(lower), np.log2(upper)
+    return lower, upper
+
+
+def _from_search_scale(variable: str, values: np.ndarray) -> np.ndarray:
+    return np.exp2(values) if variable in _LOG_SCALE_VARIABLES else values
+
+
+def _log_odds_function(
+    base: Dict[str, np.ndarray], variable: str, threshold_log_odds: np.ndarray
+) -> Callable[[np.ndarray], np.ndarray]:
+    # The log-odds of cancer of every row minus the log-odds of its threshold, as a function of values of the variable
+    # of shape (n_rows, n_values) in the search scale. The risk of cancer is 1 - p_benign and the z-values are the
+    # log-odds against the benign category, so the log-odds of cancer is log(sum(exp(z))), without a softmax. The
+    # z-values of the predictors that do not depend on the variable are computed once.
+    swept_predictors = _PREDICTORS_OF_VARIABLE[variable]
+    fixed_z_values, _, coefficients = _split_z_values(base, base, {variable: np.empty(0)})
+
+    # Only the variables that share a predictor with the solved variable are needed to compute its predictors
+    values: Dict[str, np.ndarray] = {
+        name: column[:, np.newaxis] if set(_PREDICTORS_OF_VARIABLE[name]) & set(swept_predictors) else np.ones((1, 1))
+        for name, column in base.items()
+    }
+
+    def evaluate(search_values: np.ndarray) -> np.ndarray:
+        values[variable] = _from_search_scale(variable, search_values)
+        differences = np.empty(search_values.shape)
+        chunk = max(1, DEFAULT_CHUNK_SIZE // search_values.shape[1])
+
+        with np.errstate(divide='ignore', over='ignore', invalid='ignore'):
+            swept = {name: value for name, value in _predictors(values).items() if name in swept_predictors}
+            for start in range(0, len(search_values), chunk):
+                rows = slice(start, start + chunk)
+                z_values = fixed_z_values[rows, np.newaxis, :]
+                for predictor, predictor_values in swept.items():
+                    z_values = z_values + predictor_values[rows] * coefficients[predictor][rows, np.newaxis, :]
+                np.exp(z_values, out=z_values)
+                differences[rows] = np.log(z_values.sum(axis=-1)) - threshold_log_odds[rows, np.newaxis]
+
+        return differences
+
+    return evaluate
+
+
+def _illinois(
+    evaluate: Callable[[np.ndarray], np.ndarray],
+    brackets: Tuple[np.ndarray, np.ndarray],
+    differences: Tuple[np.ndarray, np.ndarray],
+    tolerance: float,
+) -> np.ndarray:
+    # Narrow the brackets, whose end points have differences of opposite signs, with the Illinois variant of regula
+    # falsi, which converges superlinearly for smooth functions and keeps the root bracketed. Rows whose bracket is
+    # narrower than the tolerance are no longer updated.
+    low, high = (bracket.copy() for bracket in brackets)
+    f_low, f_high = (difference.copy() for difference in differences)
+
+    for _ in range(MAX_ITERATIONS):
+        active = (np.abs(high - low) > tolerance) & (f_high != 0)
+        if not active.any():
+            break
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            estimate = high - f_high * (high - low) / (f_high - f_low)
+        f_estimate = evaluate(estimate[:, np.newaxis])[:, 0]
+
+        # Keep the end point on the other side of the root; halve its difference if it is kept twice in a row
+        flip = (f_estimate >= 0) != (f_high >= 0)
+        low = np.where(active & flip, high, low)
+        f_low = np.where(active, np.where(flip, f_high, 0.5 * f_low), f_low)
+        high = np.where(active, estimate, high)
+        f_high = np.where(active, f_estimate, f_high)
+
+    return high
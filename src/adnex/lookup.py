@@ -0,0 +1,170 @@
+""" Table-driven ADNEX engine exploiting the discrete domain of the input variables. """
+
+from functools import lru_cache
+from typing import Any, Dict, Mapping, Tuple
+
+import numpy as np
+
+from adnex.constraints import MAX_AGE, MAX_CA_125, MAXIMAL_LESION_DIAMETER, VALID_PAPILLARY_PROJECTIONS
+from adnex.engine import _float_column, _ImmutableModel, _read_only
+from adnex.variables import (
+    ADNEX_MODEL_PREDICTORS_WITH_CA125,
+    ADNEX_MODEL_PREDICTORS_WITHOUT_CA125,
+    get_adnex_model_coefficients,
+)
+
+# Sizes of the index ranges of the tables
+_N_AGES = MAX_AGE + 1
+_N_CA_125 = MAX_CA_125 + 1
+_N_DIAMETERS = MAXIMAL_LESION_DIAMETER + 1
+_N_PAPILLARY = max(VALID_PAPILLARY_PROJECTIONS) + 1
+
+
+class LookupTableModel(_ImmutableModel):
+    """
+    Immutable ADNEX model that scores by table lookups instead of arithmetic.
+
+    All input variables are integers within small ranges, so the contribution of every predictor to the four
+    z-values can be precomputed for every possible input value. Scoring then reduces to four gathers and three sums
+    per row, without `log2` or divisions. The tables are computed from the same coefficients as `AdnexModel`, so
+    the z-values agree with the arithmetic path up to floating-point rounding (about 1e-15 relative).
+
+    The tables, indexed by model variant (0 without CA-125, 1 with CA-125) and input value, are:
+
+    - the constant plus the age term, indexed by age;
+    - the Log2(C), D/C and D/C^2 terms, indexed by the (solid component, lesion diameter) pair;
+    - the terms of the binary variables and the papillary projections, indexed by their combination;
+    - the Log2(B) term of the model with CA-125, indexed by CA-125, with a row of zeros for rows without CA-125.
+
+    The tables take about 6 MB and are built on first use; use `get_lookup_model` to get the shared instance.
+
+    Attributes
+    ----------
+    age_table : np.ndarray
+        Array of shape (2, 111, 4).
+    diameter_table : np.ndarray
+        Array of shape (2 * 301 * 301, 4), indexed by `(variant * 301 + solid) * 301 + lesion`.
+    categorical_table : np.ndarray
+        Array of shape (2, 80, 4), indexed by `(((E * 5 + F) * 2 + G) * 2 + H) * 2 + I`.
+    ca125_table : np.ndarray
+        Array of shape (10 002, 4), where the last row is zero.
+    """
+
+    __slots__ = ('age_table', 'diameter_table', 'categorical_table', 'ca125_table')
+
+    age_table: np.ndarray
+    diameter_table: np.ndarray
+    categorical_table: np.ndarray
+    ca125_table: np.ndarray
+
+    def __init__(self) -> None:
+        rows = [_coefficient_rows(with_ca125=False), _coefficient_rows(with_ca125=True)]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            tables = {
+                'age_table': np.stack([_age_table(row) for row in rows]),
+                'diameter_table': np.concatenate([_diameter_table(row) for row in rows]),
+                'categorical_table': np.stack([_categorical_table(row) for row in rows]),
+                'ca125_table': np.vstack(
+                    [np.outer(np.log2(np.arange(_N_CA_125)), rows[1]['Log2(B)']), np.zeros((1, 4))]
+                ),
+            }
+
+        self._set_attributes({name: _read_only(table) for name, table in tables.items()})
+
+    def __repr__(self) -> str:
+        n_bytes = sum(getattr(self, name).nbytes for name in self.__slots__)
+        return f'{type(self).__name__}(table_size={n_bytes / 2**20:.1f} MiB)'
+
+    def score_columns(self, columns: Mapping[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Compute the z-values of validated input columns by table lookups.
+
+        This is a drop-in replacement for `adnex.engine.AdnexModel.score_columns`. The input must be validated, as
+        values outside the valid ranges raise an IndexError or index the wrong table entries.
+
+        Parameters
+        ----------
+        columns : pd.DataFrame or Mapping[str, np.ndarray]
+            A DataFrame or a mapping of column names to one-dimensional arrays of equal length, with integer values.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            The z-values of the non-benign categories, of shape (n_rows, 4), and a boolean array of shape (n_rows,)
+            that is True where the model with CA-125 was used.
+        """
+        age = _index_column(columns['age'])
+        n_rows = len(age)
+
+        s_ca_125 = _float_column(columns['s_ca_125']) if 's_ca_125' in columns else np.full(n_rows, np.nan)
+        with_ca125 = ~np.isnan(s_ca_125)
+        variant = with_ca125.astype(np.intp)
+        ca125_index = np.where(with_ca125, s_ca_125, _N_CA_125).astype(np.intp)
+
+        diameter_index = (variant * _N_DIAMETERS + _index_column(columns['max_solid_component'])) * _N_DIAMETERS
+        diameter_index += _index_column(columns['max_lesion_diameter'])
+
+        categorical_index = _index_column(columns['more_than_10_locules']) * _N_PAPILLARY
+        categorical_index += _index_column(columns['number_of_papillary_projections'])
+        for name in ('acoustic_shadows_present', 'ascites_present', 'is_oncology_center'):
+            categorical_index *= 2
+            categorical_index += _index_column(columns[name])
+
+        z_values = self.age_table[variant, age]
+        z_values += np.take(self.diameter_table, diameter_index, axis=0)
+        z_values += self.categorical_table[variant, categorical_index]
+        z_values += np.take(self.ca125_table, ca125_index, axis=0)
+
+        return z_values, with_ca125
+
+
+@lru_cache(maxsize=None)
+def get_lookup_model() -> LookupTableModel:
+    """
+    Retrieve the shared lookup-table ADNEX model, building its tables on first use.
+
+    Returns
+    -------
+    LookupTableModel
+        The lookup-table model.
+    """
+    return LookupTableModel()
+
+
+def _coefficient_rows(with_ca125: bool) -> Dict[str, np.ndarray]:
+    # Coefficients of each predictor for the four non-benign categories
+    predictors = ADNEX_MODEL_PREDICTORS_WITH_CA125 if with_ca125 else ADNEX_MODEL_PREDICTORS_WITHOUT_CA125
+    return dict(zip(predictors, get_adnex_model_coefficients(with_ca125)))
+
+
+def _age_table(row: Dict[str, np.ndarray]) -> np.ndarray:
+    # Constant plus age term, indexed by age
+    return row['constant'] + np.outer(np.arange(_N_AGES), row['A'])
+
+
+def _diameter_table(row: Dict[str, np.ndarray]) -> np.ndarray:
+    # Log2(C), D/C and D/C^2 terms, indexed by solid * _N_DIAMETERS + lesion
+    solid, lesion = (values.ravel() for values in np.indices((_N_DIAMETERS, _N_DIAMETERS), dtype=np.float64))
+    ratio = solid / lesion
+    return np.outer(np.log2(lesion), row['Log2(C)']) + np.outer(ratio, row['D/C']) + np.outer(ratio**2, row['D/C^2'])
+
+
+def _categorical_table(row: Dict[str, np.ndarray]) -> np.ndarray:
+    # Terms of the binary variables and the papillary projections, indexed by their combination
+    e, f, g, h, i = (values.ravel() for values in np.indices((2, _N_PAPILLARY, 2, 2, 2), dtype=np.float64))
+    return (
+        np.outer(e, row['E'])
+        + np.outer(f, row['F'])
+        + np.outer(g, row['G'])
+        + np.outer(h, row['H'])
+        + np.outer(i, row['I'])
+    )
+
+
+def _index_column(values: Any) -> np.ndarray:
+    # Integer-valued column as table indices, without a float round trip for integer and boolean columns
+    array = np.asarray(values)
+    if array.dtype.kind in 'biu':
+        return array.astype(np.intp, copy=False)
+    return _float_column(values).astype(np.intp)
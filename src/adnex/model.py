@@ -1,24 +1,39 @@
-""" This module contains the main function to apply the ADNEX model to a patient data row. """
+""" This module contains the main functions to apply the ADNEX model to patient data. """
 
+import functools
+from typing import Optional, Union
+
+import numpy as np
 import pandas as pd
 
+from adnex.batch import predict_batch
+from adnex.cache import get_risk_cache, make_cache_key
 from adnex.computation import compute_probabilities
 from adnex.exceptions import ADNEXModelError
+from adnex.instrumentation import stage
+from adnex.parallel import predict_batch_parallel, resolve_n_jobs
 from adnex.transformation import transform_input_variables
-from adnex.validation.core import validate_input
+from adnex.validation.core import validate_input, validate_input_frame
+from adnex.validation.trusted import ValidatedAdnexFrame
 from adnex.validation.utils import has_ca125
-from adnex.variables import ADNEX_MODEL_VARIABLES
+from adnex.variables import ADNEX_MODEL_OUTPUT_CATEGORIES, ADNEX_MODEL_VARIABLES
 from utils.exceptions import MissingVariableError, ValidationError
 
 
-def predict_risks(row: pd.Series) -> pd.Series:
+def predict_risks(row: pd.Series, validate: bool = True) -> pd.Series:
     """
     Apply the ADNEX model to a single patient data row.
 
+    If the risk cache is enabled (see `adnex.cache.enable_risk_cache`), the result for a previously seen row is
+    returned from the cache.
+
     Parameters
     ----------
     row : pd.Series
         A pandas Series containing the necessary predictors with the expected column names.
+    validate : bool
+        Whether to validate the input (default is True). Pass False only for rows that are known to be valid, e.g.
+        validated at ingest; invalid rows then give meaningless probabilities instead of an error.
 
     Raises
     ------
@@ -35,34 +50,25 @@ def predict_risks(row: pd.Series) -> pd.Series:
         A pandas Series with probabilities for each outcome category:
         ['Benign', 'Borderline', 'Stage I cancer', 'Stage II-IV cancer', 'Metastatic cancer'].
     """
-    try:
-        with_ca125 = has_ca125(row)
+    with stage('predict_risks'):
+        try:
+            with_ca125 = has_ca125(row)
 
-        # Keep only necessary columns
-        variables_to_use = list(ADNEX_MODEL_VARIABLES.values())
-        filtered_row = row.drop(index=row.index.difference(variables_to_use))
+            cached = get_risk_cache()
+            key = make_cache_key(row, with_ca125) if cached is not None else None
+            if key is not None:
+                return pd.Series(cached(key), index=ADNEX_MODEL_OUTPUT_CATEGORIES)
 
-        # Adjust the variables to use based on the presence of CA-125
-        if not with_ca125 and 's_ca_125' in filtered_row:
-            filtered_row = filtered_row.drop('s_ca_125')
+            return _compute_risks(row, with_ca125, validate)
 
-        # Validate the input data
-        validate_input(filtered_row)
+        except (MissingVariableError, ValidationError):
+            raise  # Re-raise the same exception to preserve specificity
 
-        # Transform the input variables
-        transformed_vars = transform_input_variables(filtered_row)
-
-        # Compute the probabilities
-        return compute_probabilities(transformed_vars, with_ca125=with_ca125)
-
-    except (MissingVariableError, ValidationError):
-        raise  # Re-raise the same exception to preserve specificity
+        except Exception as e:
+            raise ADNEXModelError('An unexpected error occurred while processing the ADNEX model.') from e
 
-    except Exception as e:
-        raise ADNEXModelError('An unexpected error occurred while processing the ADNEX model.') from e
 
-
-def predict_cancer_risk(row: pd.Series) -> float:
+def predict_cancer_risk(row: pd.Series, validate: bool = True) -> float:
     """
     Apply the ADNEX model to a single patient data row and return the risk of cancer.
 
@@ -74,12 +80,167 @@ def predict_cancer_risk(row: pd.Series) -> float:
     ----------
     row : pd.Series
         A pandas Series containing the necessary predictors with the expected column names.
+    validate : bool
+        Whether to validate the input, see `predict_risks` (default is True).
 
     Returns
     -------
     float
         The risk of cancer as a float value between 0 and 1.
     """
-    probabilities = predict_risks(row)
+    probabilities = predict_risks(row, validate=validate)
 
     return probabilities.sum() - probabilities['Benign']
+
+
+def predict_risks_frame(
+    data: Union[pd.DataFrame, ValidatedAdnexFrame],
+    include_variant: bool = False,
+    errors: str = 'raise',
+    n_jobs: Optional[int] = None,
+    validate: bool = True,
+) -> pd.DataFrame:
+    """
+    Apply the ADNEX model to every row of a DataFrame in one vectorized pass.
+
+    This is the batch counterpart of `predict_risks` and gives the same probabilities up to floating-point
+    tolerance. Rows with a missing (NaN) CA-125 value are scored with the model without CA-125.
+
+    Parameters
+    ----------
+    data : pd.DataFrame or ValidatedAdnexFrame
+        A pandas DataFrame with one row per patient and the necessary predictors as columns, or rows validated
+        before with `ValidatedAdnexFrame.validate`, which are not validated again.
+    include_variant : bool
+        Whether to add a boolean 'with_ca125' column indicating which model variant was used for each row
+        (default is False).
+    errors : str
+        How to handle invalid rows (default is 'raise'):
+        - 'raise': raise a ValidationError for the first invalid row.
+        - 'mask': skip invalid rows and return NaN probabilities for them.
+    n_jobs : int, optional
+        Number of worker processes to score large frames with, see `adnex.parallel.ParallelScorer`. -1 uses all
+        CPUs. The frame is scored in the calling process if not given (default is None). Validation always runs
+        in the calling process.
+    validate : bool
+        Whether to validate the input (default is True). Pass False only for data that is known to be valid, e.g.
+        validated at ingest; `errors` is then ignored and invalid rows give meaningless probabilities.
+
+    Raises
+    ------
+    MissingVariableError
+        If required columns are missing.
+    ValidationError
+        If `errors` is 'raise' and input validation fails for at least one row.
+    ValueError
+        If `errors` is not one of 'raise' or 'mask', or `n_jobs` is zero.
+    ADNEXModelError
+        If an unexpected error occurs during model computation.
+
+    Returns
+    -------
+    pd.DataFrame
+        A pandas DataFrame with the same index as `data` and one column of probabilities for each outcome category:
+        ['Benign', 'Borderline', 'Stage I cancer', 'Stage II-IV cancer', 'Metastatic cancer'].
+    """
+    if errors not in ('raise', 'mask'):
+        raise ValueError(f"errors must be 'raise' or 'mask', got {errors!r}.")
+    if n_jobs is not None:
+        n_jobs = resolve_n_jobs(n_jobs)
+
+    trusted = isinstance(data, ValidatedAdnexFrame)
+    index = data.index
+    n_rows = len(index)
+    with stage('predict_risks_frame', rows=n_rows):
+        try:
+            # Validate the input data, unless it is trusted
+            valid = None
+            if validate and not trusted:
+                with stage('predict_risks_frame.validate_input_frame', rows=n_rows):
+                    valid = validate_input_frame(data, errors=errors)
+
+            score = predict_batch if n_jobs is None else functools.partial(predict_batch_parallel, n_jobs=n_jobs)
+
+            if valid is None or valid.all():
+                with stage('predict_risks_frame.score', rows=n_rows):
+                    prediction = score(data)
+                probabilities, with_ca125 = prediction.probabilities, prediction.with_ca125
+            else:
+                # Score only the valid rows and leave the invalid rows as NaN
+                with stage('predict_risks_frame.score', rows=int(valid.sum())):
+                    prediction = score(data[valid])
+                probabilities = np.full((n_rows, len(ADNEX_MODEL_OUTPUT_CATEGORIES)), np.nan)
+                probabilities[valid] = prediction.probabilities
+                with_ca125 = np.zeros(n_rows, dtype=bool)
+                with_ca125[valid] = prediction.with_ca125
+
+            with stage('predict_risks_frame.assemble', rows=n_rows):
+                result = pd.DataFrame(probabilities, index=index, columns=ADNEX_MODEL_OUTPUT_CATEGORIES)
+                if include_variant:
+                    result['with_ca125'] = with_ca125
+
+            return result
+
+        except (MissingVariableError, ValidationError):
+            raise  # Re-raise the same exception to preserve specificity
+
+        except Exception as e:
+            raise ADNEXModelError('An unexpected error occurred while processing the ADNEX model.') from e
+
+
+def predict_cancer_risk_frame(
+    data: Union[pd.DataFrame, ValidatedAdnexFrame],
+    errors: str = 'raise',
+    n_jobs: Optional[int] = None,
+    validate: bool = True,
+) -> pd.Series:
+    """
+    Apply the ADNEX model to every row of a DataFrame and return the risk of cancer for each row.
+
+    The risk of cancer is defined as the sum of the probabilities of the non-benign categories:
+    'Borderline', 'Stage I cancer', 'Stage II-IV cancer', 'Metastatic cancer'.
+
+    Parameters
+    ----------
+    data : pd.DataFrame or ValidatedAdnexFrame
+        A pandas DataFrame with one row per patient and the necessary predictors as columns, or validated rows, see
+        `predict_risks_frame`.
+    errors : str
+        How to handle invalid rows, see `predict_risks_frame` (default is 'raise').
+    n_jobs : int, optional
+        Number of worker processes, see `predict_risks_frame` (default is None).
+    validate : bool
+        Whether to validate the input, see `predict_risks_frame` (default is True).
+
+    Returns
+    -------
+    pd.Series
+        The risk of cancer for each row, indexed as `data`. Rows skipped with `errors='mask'` are NaN.
+    """
+    probabilities = predict_risks_frame(data, errors=errors, n_jobs=n_jobs, validate=validate)
+
+    return probabilities.drop(columns='Benign').sum(axis=1, skipna=False)
+
+
+def _compute_risks(row: pd.Series, with_ca125: bool, validate: bool = True) -> pd.Series:
+    with stage('predict_risks.filter'):
+        # Keep only necessary columns
+        variables_to_use = list(ADNEX_MODEL_VARIABLES.values())
+        filtered_row = row.drop(index=row.index.difference(variables_to_use))
+
+        # Adjust the variables to use based on the presence of CA-125
+        if not with_ca125 and 's_ca_125' in filtered_row:
+            filtered_row = filtered_row.drop('s_ca_125')
+
+    # Validate the input data
+    if validate:
+        with stage('predict_risks.validate_input'):
+            validate_input(filtered_row)
+
+    # Transform the input variables
+    with stage('predict_risks.transform_input_variables'):
+        transformed_vars = transform_input_variables(filtered_row)
+
+    # Compute the probabilities
+    with stage('predict_risks.compute_probabilities'):
+        return compute_probabilities(transformed_vars, with_ca125=with_ca125)
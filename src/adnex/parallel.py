@@ -0,0 +1,224 @@
+""" Multi-core scoring of large batches with a process pool and shared-memory buffers. """
+
+import contextlib
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from adnex.batch import BatchPrediction, predict_batch
+from adnex.computation import compute_probabilities_from_z_values
+from adnex.engine import _float_column, get_compiled_model
+from adnex.variables import ADNEX_MODEL_OUTPUT_CATEGORIES, ADNEX_MODEL_VARIABLES
+
+DEFAULT_MIN_SHARD_SIZE = 50_000
+
+_VARIABLE_NAMES = tuple(ADNEX_MODEL_VARIABLES.values())
+_N_CATEGORIES = len(ADNEX_MODEL_OUTPUT_CATEGORIES)
+
+
+class ParallelScorer:
+    """
+    Process pool that scores large batches on several cores.
+
+    The input is split into one contiguous shard per worker. The input columns and the output probabilities are
+    passed through `multiprocessing.shared_memory` buffers, so only buffer names and row ranges are pickled. Every
+    shard is scored with the same code as `adnex.batch.predict_batch`, and every row is written to its original
+    position, so the results are identical to the serial path and do not depend on the number of workers.
+
+    The pool is started on first use and reused until `close` is called; use the scorer as a context manager to
+    shut it down automatically.
+
+    Parameters
+    ----------
+    n_jobs : int
+        Number of worker processes (default is -1). Negative values count back from the number of CPUs, so -1 uses
+        all CPUs and -2 all but one.
+    min_shard_size : int
+        Minimum number of rows per shard (default is 50 000). Batches too small to give every worker a shard of
+        this size use fewer workers, and batches smaller than two shards are scored in the calling process.
+    """
+
+    def __init__(self, n_jobs: int = -1, min_shard_size: int = DEFAULT_MIN_SHARD_SIZE) -> None:
+        if min_shard_size < 1:
+            raise ValueError(f'min_shard_size must be positive, got {min_shard_size}.')
+        self.n_jobs = resolve_n_jobs(n_jobs)
+        self.min_shard_size = min_shard_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self) -> 'ParallelScorer':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}(n_jobs={self.n_jobs}, min_shard_size={self.min_shard_size})'
+
+    def close(self) -> None:
+        """Shut down the worker processes, if they were started."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def shards(self, n_rows: int) -> List[Tuple[int, int]]:
+        """
+        Split a number of rows into contiguous shards, one per worker.
+
+        Parameters
+        ----------
+        n_rows : int
+            Number of rows to score.
+
+        Returns
+        -------
+        List[Tuple[int, int]]
+            The start and stop row of each shard.
+        """
+        n_shards = max(1, min(self.n_jobs, n_rows // self.min_shard_size))
+        bounds = np.linspace(0, n_rows, n_shards + 1).astype(int)
+        return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+    def predict_batch(self, columns: Union[pd.DataFrame, Mapping[str, np.ndarray]]) -> BatchPrediction:
+        """
+        Apply the ADNEX model to a batch of validated input rows on several cores.
+
+        This is the parallel counterpart of `adnex.batch.predict_batch` and gives identical results. The input is not
+        validated.
+
+        Parameters
+        ----------
+        columns : pd.DataFrame or Mapping[str, np.ndarray]
+            A DataFrame or a mapping of column names to one-dimensional arrays of equal length.
+
+        Returns
+        -------
+        BatchPrediction
+            The probabilities for each row and the model variant that was used for each row.
+        """
+        n_rows = len(columns.index) if isinstance(columns, pd.DataFrame) else len(next(iter(columns.values()), ()))
+        shards = self.shards(n_rows)
+        if len(shards) == 1:
+            return predict_batch(columns)
+
+        blocks = []
+        try:
+            inputs = _shared_array(blocks, (len(_VARIABLE_NAMES), n_rows), np.float64)
+            probabilities = _shared_array(blocks, (n_rows, _N_CATEGORIES), np.float64)
+            with_ca125 = _shared_array(blocks, (n_rows,), np.bool_)
+
+            for position, name in enumerate(_VARIABLE_NAMES):
+                inputs[position] = _float_column(columns[name]) if name in columns else np.nan
+
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.n_jobs)
+
+            names = tuple(block.name for block in blocks)
+            futures = [self._executor.submit(_score_shard, names, n_rows, start, stop) for start, stop in shards]
+            for future in futures:
+                future.result()
+
+            result = BatchPrediction(probabilities.copy(), with_ca125.copy())
+            del inputs, probabilities, with_ca125  # Release the buffer views before closing the blocks
+            return result
+
+        finally:
+            for block in blocks:
+                block.unlink()
+                _close(block)
+
+
+def predict_batch_parallel(
+    columns: Union[pd.DataFrame, Mapping[str, np.ndarray]],
+    n_jobs: int = -1,
+    min_shard_size: int = DEFAULT_MIN_SHARD_SIZE,
+) -> BatchPrediction:
+    """
+    Apply the ADNEX model to a batch of validated input rows with a temporary `ParallelScorer`.
+
+    Starting the worker processes takes time, so reuse a `ParallelScorer` when scoring many batches.
+
+    Parameters
+    ----------
+    columns : pd.DataFrame or Mapping[str, np.ndarray]
+        A DataFrame or a mapping of column names to one-dimensional arrays of equal length.
+    n_jobs : int
+        Number of worker processes, see `ParallelScorer` (default is -1).
+    min_shard_size : int
+        Minimum number of rows per shard, see `ParallelScorer` (default is 50 000).
+
+    Returns
+    -------
+    BatchPrediction
+        The probabilities for each row and the model variant that was used for each row.
+    """
+    with ParallelScorer(n_jobs=n_jobs, min_shard_size=min_shard_size) as scorer:
+        return scorer.predict_batch(columns)
+
+
+def resolve_n_jobs(n_jobs: int) -> int:
+    """
+    Resolve a number of jobs to a number of worker processes.
+
+    Parameters
+    ----------
+    n_jobs : int
+        A positive number of workers, or a negative number counting back from the number of CPUs (-1 is all CPUs).
+
+    Raises
+    ------
+    ValueError
+        If `n_jobs` is zero.
+
+    Returns
+    -------
+    int
+        The number of worker processes, at least 1.
+    """
+    if n_jobs == 0:
+        raise ValueError('n_jobs must not be zero.')
+    if n_jobs > 0:
+        return n_jobs
+    return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+
+
+def _shared_array(blocks: List[shared_memory.SharedMemory], shape: Tuple[int, ...], dtype: type) -> np.ndarray:
+    # Allocate a shared-memory block, register it for cleanup and return an array view of it
+    block = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize))
+    blocks.append(block)
+    return np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # The parent owns the blocks; from Python 3.13, workers can attach without registering them for cleanup
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)  # pylint: disable=unexpected-keyword-arg
+    return shared_memory.SharedMemory(name=name)
+
+
+def _score_shard(names: Tuple[str, str, str], n_rows: int, start: int, stop: int) -> None:
+    # Worker: score rows start:stop of the shared input and write them to the shared outputs
+    blocks = [_attach(name) for name in names]
+    try:
+        inputs = np.ndarray((len(_VARIABLE_NAMES), n_rows), dtype=np.float64, buffer=blocks[0].buf)
+        probabilities = np.ndarray((n_rows, _N_CATEGORIES), dtype=np.float64, buffer=blocks[1].buf)
+        with_ca125 = np.ndarray((n_rows,), dtype=np.bool_, buffer=blocks[2].buf)
+
+        columns = {name: inputs[position, start:stop] for position, name in enumerate(_VARIABLE_NAMES)}
+        z_values, with_ca125[start:stop] = get_compiled_model().score_columns(columns)
+        compute_probabilities_from_z_values(z_values, out=probabilities[start:stop])
+
+        del inputs, probabilities, with_ca125, columns  # Release the buffer views before closing the blocks
+    finally:
+        for block in blocks:
+            _close(block)
+
+
+def _close(block: shared_memory.SharedMemory) -> None:
+    # If an error left array views of the block alive, the mapping is released when they are garbage collected
+    with contextlib.suppress(BufferError):
+        block.close()
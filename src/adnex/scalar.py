@@ -0,0 +1,180 @@
+""" Pandas-free fast path for applying the ADNEX model to a single patient. """
+
+import math
+import operator
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple
+
+from adnex.exceptions import ADNEXModelError
+from adnex.validation.variables import _is_missing, validate_input_values
+from adnex.variables import (
+    ADNEX_MODEL_COEFFICIENTS_WITH_CA125,
+    ADNEX_MODEL_COEFFICIENTS_WITHOUT_CA125,
+    ADNEX_MODEL_OUTPUT_CATEGORIES,
+    ADNEX_MODEL_VARIABLES,
+)
+
+
+def _coefficient_tuples(coefficients: Dict[str, Tuple[float, ...]]) -> Tuple[Tuple[float, ...], ...]:
+    # Plain-float coefficients for each non-benign category, in the order of the model predictors
+    return tuple(tuple(float(value) for value in values) for values in coefficients.values())
+
+
+# `_compute_probabilities` builds the predictors in the order of ADNEX_MODEL_PREDICTORS_WITH(OUT)_CA125
+_COEFFICIENTS_WITH_CA125 = _coefficient_tuples(ADNEX_MODEL_COEFFICIENTS_WITH_CA125)
+_COEFFICIENTS_WITHOUT_CA125 = _coefficient_tuples(ADNEX_MODEL_COEFFICIENTS_WITHOUT_CA125)
+
+_VARIABLE_NAMES = tuple(ADNEX_MODEL_VARIABLES.values())
+
+
+class AdnexResult:
+    """
+    Lightweight result of applying the ADNEX model to a single patient.
+
+    Attributes
+    ----------
+    benign : float
+        Probability of a benign tumour.
+    borderline : float
+        Probability of a borderline tumour.
+    stage_i : float
+        Probability of a stage I cancer.
+    stage_ii_iv : float
+        Probability of a stage II-IV cancer.
+    metastatic : float
+        Probability of a metastatic cancer.
+    with_ca125 : bool
+        Whether the model with CA-125 was used.
+    """
+
+    __slots__ = ('benign', 'borderline', 'stage_i', 'stage_ii_iv', 'metastatic', 'with_ca125')
+
+    def __init__(self, probabilities: Tuple[float, float, float, float, float], with_ca125: bool) -> None:
+        self.benign, self.borderline, self.stage_i, self.stage_ii_iv, self.metastatic = probabilities
+        self.with_ca125 = with_ca125
+
+    @property
+    def cancer_risk(self) -> float:
+        """
+        Risk of cancer, i.e. the sum of the probabilities of the non-benign categories.
+
+        Returns
+        -------
+        float
+            The risk of cancer as a float value between 0 and 1.
+        """
+        return self.borderline + self.stage_i + self.stage_ii_iv + self.metastatic
+
+    def __iter__(self) -> Iterator[float]:
+        return iter((self.benign, self.borderline, self.stage_i, self.stage_ii_iv, self.metastatic))
+
+    def __repr__(self) -> str:
+        probabilities = ', '.join(f'{value:.6f}' for value in self)
+        return f'AdnexResult(({probabilities}), with_ca125={self.with_ca125})'
+
+    def as_dict(self) -> Dict[str, float]:
+        """
+        Return the probabilities keyed by the outcome categories.
+
+        Returns
+        -------
+        Dict[str, float]
+            Probabilities for each outcome category, in the order of `ADNEX_MODEL_OUTPUT_CATEGORIES`.
+        """
+        return dict(zip(ADNEX_MODEL_OUTPUT_CATEGORIES, self))
+
+
+def predict_patient(data: Optional[Any] = None, /, *, validate: bool = True, **variables: Any) -> AdnexResult:
+    """
+    Apply the ADNEX model to a single patient without pandas.
+
+    This gives the same probabilities as `predict_risks` and applies the same validation rules, but works on plain
+    Python values and precomputed float coefficients for low per-call latency.
+
+    Parameters
+    ----------
+    data : Mapping or NamedTuple, optional
+        The predictors as a dict (or other mapping) or as a NamedTuple with the expected variable names.
+    validate : bool
+        Whether to validate the input (default is True). Pass False only for values that are known to be valid, e.g.
+        validated at ingest; invalid values then give meaningless probabilities or an ADNEXModelError.
+    **variables : Any
+        The predictors as keyword arguments. These take precedence over the values in `data`.
+
+    Raises
+    ------
+    MissingVariableError
+        If required variables are missing.
+    ValidationError
+        If input validation fails.
+    ADNEXModelError
+        If an unexpected error occurs during model computation.
+
+    Returns
+    -------
+    AdnexResult
+        The probabilities for each outcome category.
+    """
+    values = _collect_variables(data, variables)
+
+    with_ca125 = not _is_missing(values.get('s_ca_125'))
+    if not with_ca125:
+        values.pop('s_ca_125', None)
+
+    if validate:
+        validate_input_values(values)
+
+    try:
+        return AdnexResult(_compute_probabilities(values, with_ca125), with_ca125)
+    except Exception as e:
+        raise ADNEXModelError('An unexpected error occurred while processing the ADNEX model.') from e
+
+
+def _collect_variables(data: Optional[Any], variables: Dict[str, Any]) -> Dict[str, Any]:
+    if data is None:
+        source: Mapping[str, Any] = variables
+    else:
+        source = data._asdict() if hasattr(data, '_asdict') else data
+        if variables:
+            source = {**source, **variables}
+
+    return {name: source[name] for name in _VARIABLE_NAMES if name in source}
+
+
+def _log2(value: float) -> float:
+    # Match np.log2, which returns -inf for zero
+    return math.log2(value) if value > 0 else -math.inf
+
+
+def _compute_probabilities(values: Dict[str, Any], with_ca125: bool) -> Tuple[float, float, float, float, float]:
+    max_lesion_diameter = float(values['max_lesion_diameter'])
+    max_solid_component = float(values['max_solid_component'])
+    ratio = max_solid_component / max_lesion_diameter if max_lesion_diameter else math.nan
+
+    if with_ca125:
+        coefficients = _COEFFICIENTS_WITH_CA125
+        predictors: Tuple[float, ...] = (1.0, float(values['age']), _log2(float(values['s_ca_125'])))
+    else:
+        coefficients = _COEFFICIENTS_WITHOUT_CA125
+        predictors = (1.0, float(values['age']))
+
+    predictors += (
+        _log2(max_lesion_diameter),
+        ratio,
+        ratio * ratio,
+        float(values['more_than_10_locules']),
+        float(values['number_of_papillary_projections']),
+        float(values['acoustic_shadows_present']),
+        float(values['ascites_present']),
+        float(values['is_oncology_center']),
+    )
+
+    exp_z_values = [math.exp(sum(map(operator.mul, category, predictors))) for category in coefficients]
+    denominator = 1.0 + sum(exp_z_values)
+
+    return (
+        1.0 / denominator,
+        exp_z_values[0] / denominator,
+        exp_z_values[1] / denominator,
+        exp_z_values[2] / denominator,
+        exp_z_values[3] / denominator,
+    )
@@ -0,0 +1,449 @@
+""" Local HTTP scoring server with micro-batching and a Prometheus metrics endpoint, built on the standard library. """
+
+import asyncio
+import bisect
+import collections
+import json
+import math
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Counter, Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from adnex.aio import DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_PENDING, DEFAULT_MAX_WAIT, AsyncAdnexScorer, ScorerStats
+from adnex.exceptions import ADNEXModelError, ScorerOverloadedError
+from adnex.instrumentation import _escape_label_value, get_instrumentation
+from adnex.scalar import AdnexResult
+from adnex.validation.schema import validate_columns
+from adnex.variables import ADNEX_MODEL_VARIABLES
+from utils.exceptions import MissingVariableError, ValidationError
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8000
+
+# Upper bounds of the batch-size histogram buckets, and the quantiles of the request latency summary
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+LATENCY_QUANTILES = (0.5, 0.9, 0.99)
+
+# Number of most recent request latencies kept for the latency quantiles
+_LATENCY_WINDOW = 10_000
+
+# The paths recorded as request labels; any other path is recorded as 'other', so that clients cannot create
+# unbounded label series
+ROUTES = ('/predict', '/metrics', '/health')
+
+_JSON_LINES_TYPES = ('application/x-ndjson', 'application/jsonl', 'application/json-lines')
+_VARIABLE_NAMES = tuple(ADNEX_MODEL_VARIABLES.values())
+
+
+class ServerMetrics:
+    """
+    Thread-safe counters of an `AdnexServer`, rendered in the Prometheus text format.
+
+    Attributes
+    ----------
+    requests : Counter[Tuple[str, int]]
+        Number of HTTP requests, keyed by path (one of `ROUTES`, or 'other') and status code.
+    rows : Counter[str]
+        Number of scored rows, keyed by outcome: 'scored', 'invalid', 'rejected' or 'failed'.
+    validation_failures : Counter[str]
+        Number of invalid rows, keyed by the variable that failed validation. A row failing several variables is
+        counted once for each, and rows that are not JSON objects are counted as '<row>'.
+    """
+
+    def __init__(self) -> None:
+        self.requests: Counter[Tuple[str, int]] = collections.Counter()
+        self.rows: Counter[str] = collections.Counter()
+        self.validation_failures: Counter[str] = collections.Counter()
+        self._latencies: Deque[float] = collections.deque(maxlen=_LATENCY_WINDOW)
+        self._latency_sum = 0.0
+        self._lock = threading.Lock()
+
+    def record_request(self, path: str, status: int, latency: float) -> None:
+        """
+        Record an HTTP request.
+
+        Parameters
+        ----------
+        path : str
+            The path of the request. Paths other than `ROUTES`, including known paths with a query string, are
+            recorded as 'other'.
+        status : int
+            The status code of the response.
+        latency : float
+            Time in seconds from receiving the request to sending the response.
+        """
+        with self._lock:
+            self.requests[path if path in ROUTES else 'other', status] += 1
+            self._latencies.append(latency)
+            self._latency_sum += latency
+
+    def record_rows(self, outcomes: Sequence[Any], rows: Sequence[Any]) -> None:
+        """
+        Record the outcomes of scored rows.
+
+        Parameters
+        ----------
+        outcomes : Sequence[AdnexResult or Exception]
+            The result or the error of every row.
+        rows : Sequence[Any]
+            The input rows, used to find the variables of invalid rows.
+        """
+        counts: Counter[str] = collections.Counter()
+        failures: Counter[str] = collections.Counter()
+        for outcome, row in zip(outcomes, rows):
+            if isinstance(outcome, (MissingVariableError, ValidationError)):
+                counts['invalid'] += 1
+                failures.update(_failed_variables(row))
+            elif isinstance(outcome, ScorerOverloadedError):
+                counts['rejected'] += 1
+            elif isinstance(outcome, Exception):
+                counts['failed'] += 1
+            else:
+                counts['scored'] += 1
+
+        with self._lock:
+            self.rows.update(counts)
+            self.validation_failures.update(failures)
+
+    def render(self, stats: ScorerStats, batch_sizes: Dict[int, int]) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+
+        Parameters
+        ----------
+        stats : ScorerStats
+            The statistics of the scorer of the server.
+        batch_sizes : Dict[int, int]
+            Number of micro-batches of each size, see `AsyncAdnexScorer.batch_size_counts`.
+
+        Returns
+        -------
+        str
+            The metrics, one sample per line.
+        """
+        with self._lock:
+            requests = sorted(self.requests.items())
+            rows = sorted(self.rows.items())
+            failures = sorted(self.validation_failures.items())
+            latencies = np.fromiter(self._latencies, dtype=np.float64, count=len(self._latencies))
+            latency_count, latency_sum = sum(self.requests.values()), self._latency_sum
+
+        lines = ['# HELP adnex_http_requests_total HTTP requests by path and status code.']
+        lines.append('# TYPE adnex_http_requests_total counter')
+        lines.extend(
+            f'adnex_http_requests_total{{path="{_escape_label_value(path)}",status="{status}"}} {n}'
+            for (path, status), n in requests
+        )
+
+        lines.append('# HELP adnex_rows_total Input rows by outcome.')
+        lines.append('# TYPE adnex_rows_total counter')
+        lines.extend(f'adnex_rows_total{{outcome="{_escape_label_value(outcome)}"}} {n}' for outcome, n in rows)
+
+        lines.append('# HELP adnex_validation_failures_total Invalid input rows by failing variable.')
+        lines.append('# TYPE adnex_validation_failures_total counter')
+        lines.extend(
+            f'adnex_validation_failures_total{{variable="{_escape_label_value(name)}"}} {n}' for name, n in failures
+        )
+
+        lines.extend(_batch_size_lines(batch_sizes))
+        lines.extend(_latency_lines(latencies, latency_sum, latency_count))
+
+        lines.append('# HELP adnex_queue_pending Requests waiting to be batched.')
+        lines.append('# TYPE adnex_queue_pending gauge')
+        lines.append(f'adnex_queue_pending {stats.pending}')
+
+        return '\n'.join(lines) + '\n'
+
+
+class AdnexServer:
+    """
+    HTTP server that scores JSON requests with an `AsyncAdnexScorer`.
+
+    Every connection is handled on its own thread. The rows of all concurrent requests are passed to one
+    `AsyncAdnexScorer`, running on an event loop in a background thread, which scores them in micro-batches on
+    `workers` threads.
+
+    Endpoints:
+
+    - `POST /predict` with a JSON object scores one patient and returns an object with the five probabilities,
+      'cancer_risk' and 'with_ca125'. Invalid input gives status 422 and an object with 'error' and 'error_type'.
+    - `POST /predict` with a JSON array of objects, or with JSON Lines (Content-Type `application/x-ndjson`), scores
+      every row and returns an array or JSON Lines in the same order, with an error object for every invalid row.
+    - `GET /metrics` returns request, row, validation-failure, batch-size and latency metrics in the Prometheus text
+      format, and the stage timings of `adnex.instrumentation` if it is enabled.
+    - `GET /health` returns `{"status": "ok"}`.
+
+    When `max_pending` rows are already waiting, requests are rejected with status 503.
+
+    Parameters
+    ----------
+    host : str
+        The address to listen on (default is '127.0.0.1').
+    port : int
+        The port to listen on (default is 8000). Use 0 to pick a free port, see `url`.
+    workers : int
+        Number of micro-batches scored at the same time, each on its own thread (default is 1).
+    max_batch_size : int
+        Maximum number of rows per micro-batch (default is 512).
+    max_wait : float
+        Maximum time in seconds that a row waits for more rows to batch with (default is 0.002).
+    max_pending : int
+        Maximum number of rows waiting to be batched (default is 10 000).
+    engine : str
+        The engine of `predict_batch`, 'arithmetic' or 'lookup' (default is 'arithmetic').
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        *,
+        workers: int = 1,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait: float = DEFAULT_MAX_WAIT,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        engine: str = 'arithmetic',
+    ) -> None:
+        self.scorer = AsyncAdnexScorer(
+            max_batch_size,
+            max_wait,
+            max_pending,
+            overflow='reject',
+            engine=engine,
+            max_concurrent_batches=workers,
+        )
+        self.metrics = ServerMetrics()
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._loop.run_forever, name='adnex-batcher', daemon=True)
+        self._serve_thread: Optional[threading.Thread] = None
+
+        self.httpd = ThreadingHTTPServer((host, port), _RequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.adnex_server = self  # type: ignore[attr-defined]
+
+    def __enter__(self) -> 'AdnexServer':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    @property
+    def url(self) -> str:
+        """
+        The base URL of the server.
+
+        Returns
+        -------
+        str
+            E.g. 'http://127.0.0.1:8000'.
+        """
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> None:
+        """Start serving in a background thread."""
+        self._start_loop()
+        if self._serve_thread is None:
+            self._serve_thread = threading.Thread(target=self.httpd.serve_forever, name='adnex-server', daemon=True)
+            self._serve_thread.start()
+
+    def serve_forever(self) -> None:
+        """Serve in the calling thread until `close` is called from another thread or the process is interrupted."""
+        self._start_loop()
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Stop serving, answer the rows that are waiting and release the port."""
+        if self._serve_thread is not None:
+            self.httpd.shutdown()
+            self._serve_thread.join()
+            self._serve_thread = None
+        self.httpd.server_close()
+
+        if self._loop_thread.is_alive():
+            asyncio.run_coroutine_threadsafe(self.scorer.close(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop_thread.join()
+            self._loop.close()
+
+    def score_rows(self, rows: Sequence[Any]) -> List[Any]:
+        """
+        Score rows with the scorer of the server and record their outcomes in the metrics.
+
+        Parameters
+        ----------
+        rows : Sequence[Any]
+            The input rows, as mappings of variable names to values.
+
+        Returns
+        -------
+        List[AdnexResult or Exception]
+            The result or the error of every row.
+        """
+        outcomes = asyncio.run_coroutine_threadsafe(self._predict_all(rows), self._loop).result()
+        self.metrics.record_rows(outcomes, rows)
+        return outcomes
+
+    def render_metrics(self) -> str:
+        """
+        Render the metrics of the server in the Prometheus text format.
+
+        Returns
+        -------
+        str
+            The metrics, see `ServerMetrics.render`, followed by the stage timings if instrumentation is enabled
+            (see `adnex.instrumentation`).
+        """
+        stats, batch_sizes = asyncio.run_coroutine_threadsafe(self._scorer_stats(), self._loop).result()
+        metrics = self.metrics.render(stats, batch_sizes)
+
+        instrumentation = get_instrumentation()
+        if instrumentation is not None:
+            metrics += instrumentation.to_prometheus()
+        return metrics
+
+    def _start_loop(self) -> None:
+        if not self._loop_thread.is_alive():
+            self._loop_thread.start()
+
+    async def _predict_all(self, rows: Sequence[Any]) -> List[Any]:
+        return await asyncio.gather(*(self._predict_row(row) for row in rows), return_exceptions=True)
+
+    async def _predict_row(self, row: Any) -> AdnexResult:
+        if not isinstance(row, dict):
+            raise ValidationError(f'Expected a JSON object with the ADNEX variables, got {type(row).__name__}.')
+        return await self.scorer.predict(row)
+
+    async def _scorer_stats(self) -> Tuple[ScorerStats, Dict[int, int]]:
+        # Read on the event loop, where the scorer updates its statistics
+        return self.scorer.stats(), self.scorer.batch_size_counts()
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep connections alive between requests
+    server_version = 'adnex'
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name,missing-function-docstring
+        started_at = time.perf_counter()
+        if self.path == '/metrics':
+            body = self._server().render_metrics()
+            status = self._send(HTTPStatus.OK, body.encode(), 'text/plain; version=0.0.4; charset=utf-8')
+        elif self.path == '/health':
+            status = self._send_json(HTTPStatus.OK, {'status': 'ok'})
+        else:
+            status = self._send_json(HTTPStatus.NOT_FOUND, {'error': f'Unknown path {self.path!r}.'})
+        self._server().metrics.record_request(self.path, status, time.perf_counter() - started_at)
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name,missing-function-docstring
+        started_at = time.perf_counter()
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+        if self.path != '/predict':
+            status = self._send_json(HTTPStatus.NOT_FOUND, {'error': f'Unknown path {self.path!r}.'})
+        else:
+            status = self._predict(body)
+        self._server().metrics.record_request(self.path, status, time.perf_counter() - started_at)
+
+    def log_message(self, format: str, *args: Any) -> None:  # pylint: disable=redefined-builtin
+        pass  # Per-request logging to stderr would dominate the cost of a request; see /metrics instead
+
+    def _predict(self, body: bytes) -> int:
+        json_lines = self.headers.get_content_type() in _JSON_LINES_TYPES
+        try:
+            if json_lines:
+                data: Any = [json.loads(line) for line in body.splitlines() if line.strip()]
+            else:
+                data = json.loads(body)
+        except ValueError as e:
+            return self._send_json(HTTPStatus.BAD_REQUEST, {'error': f'Invalid JSON: {e}'})
+
+        outcomes = self._server().score_rows(data if isinstance(data, list) else [data])
+        results = [_as_json(outcome) for outcome in outcomes]
+
+        if json_lines:
+            body = ''.join(json.dumps(result) + '\n' for result in results).encode()
+            return self._send(HTTPStatus.OK, body, 'application/x-ndjson')
+        if isinstance(data, list):
+            return self._send_json(HTTPStatus.OK, results)
+        return self._send_json(_status(outcomes[0]), results[0])
+
+    def _server(self) -> AdnexServer:
+        return self.server.adnex_server  # type: ignore[attr-defined]
+
+    def _send_json(self, status: HTTPStatus, data: Any) -> int:
+        return self._send(status, json.dumps(data).encode(), 'application/json')
+
+    def _send(self, status: HTTPStatus, body: bytes, content_type: str) -> int:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if status == HTTPStatus.SERVICE_UNAVAILABLE:
+            self.send_header('Retry-After', '1')
+        self.end_headers()
+        self.wfile.write(body)
+        return int(status)
+
+
+def _batch_size_lines(batch_sizes: Dict[int, int]) -> List[str]:
+    # Cumulative histogram of the batch sizes
+    cumulative = np.zeros(len(BATCH_SIZE_BUCKETS) + 1, dtype=np.int64)
+    for size, n in batch_sizes.items():
+        cumulative[bisect.bisect_left(BATCH_SIZE_BUCKETS, size) :] += n
+
+    lines = ['# HELP adnex_batch_size Number of rows per micro-batch.', '# TYPE adnex_batch_size histogram']
+    for bound, n in zip((*map(str, BATCH_SIZE_BUCKETS), '+Inf'), cumulative.tolist()):
+        lines.append(f'adnex_batch_size_bucket{{le="{bound}"}} {n}')
+    lines.append(f'adnex_batch_size_sum {sum(size * n for size, n in batch_sizes.items())}')
+    lines.append(f'adnex_batch_size_count {sum(batch_sizes.values())}')
+    return lines
+
+
+def _latency_lines(latencies: np.ndarray, latency_sum: float, latency_count: int) -> List[str]:
+    # Summary of the request latencies, with the quantiles over the most recent requests
+    quantiles = np.quantile(latencies, LATENCY_QUANTILES) if latencies.size else [math.nan] * len(LATENCY_QUANTILES)
+
+    lines = ['# HELP adnex_request_latency_seconds HTTP request latency.']
+    lines.append('# TYPE adnex_request_latency_seconds summary')
+    for quantile, value in zip(LATENCY_QUANTILES, quantiles):
+        lines.append(f'adnex_request_latency_seconds{{quantile="{quantile}"}} {value:.6g}')
+    lines.append(f'adnex_request_latency_seconds_sum {latency_sum:.6g}')
+    lines.append(f'adnex_request_latency_seconds_count {latency_count}')
+    return lines
+
+
+def _as_json(outcome: Any) -> Dict[str, Any]:
+    # The result of a row as a JSON object, or its error
+    if isinstance(outcome, AdnexResult):
+        return {**outcome.as_dict(), 'cancer_risk': outcome.cancer_risk, 'with_ca125': outcome.with_ca125}
+    if not isinstance(outcome, (MissingVariableError, ValidationError, ScorerOverloadedError)):
+        outcome = ADNEXModelError('An unexpected error occurred while processing the ADNEX model.')
+    return {'error': str(outcome), 'error_type': type(outcome).__name__}
+
+
+def _status(outcome: Any) -> HTTPStatus:
+    if isinstance(outcome, (MissingVariableError, ValidationError)):
+        return HTTPStatus.UNPROCESSABLE_ENTITY
+    if isinstance(outcome, ScorerOverloadedError):
+        return HTTPStatus.SERVICE_UNAVAILABLE
+    if isinstance(outcome, Exception):
+        return HTTPStatus.INTERNAL_SERVER_ERROR
+    return HTTPStatus.OK
+
+
+def _failed_variables(row: Any) -> List[str]:
+    # The variables of an invalid row that fail validation
+    if not isinstance(row, dict):
+        return ['<row>']
+    columns = {name: np.array([row[name]], dtype=object) for name in _VARIABLE_NAMES if name in row}
+    try:
+        return list(validate_columns(columns).error_counts())
+    except (TypeError, ValueError):
+        return ['<unknown>']
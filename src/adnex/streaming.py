@@ -0,0 +1,362 @@
+""" Chunked scoring of CSV, TSV and Parquet files with bounded memory. """
+
+from pathlib import Path
+from typing import Any, Dict, Iterator, Mapping, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from adnex.batch import predict_batch
+from adnex.file_formats import DEFAULT_CHUNK_SIZE, DEFAULT_OUTPUT_COLUMNS, FILE_FORMATS, OUTPUT_COLUMNS
+from adnex.validation.core import _raise_for_row, validate_input_columns
+from adnex.validation.schema import ErrorCode, ValidationReport
+from adnex.variables import ADNEX_MODEL_OUTPUT_CATEGORIES, ADNEX_MODEL_VARIABLES
+
+_SEPARATORS = {'csv': ',', 'tsv': '\t'}
+_SUFFIXES = {'.csv': 'csv', '.tsv': 'tsv', '.tab': 'tsv', '.parquet': 'parquet', '.pq': 'parquet'}
+_VARIABLE_NAMES = tuple(ADNEX_MODEL_VARIABLES.values())
+
+
+class ScoreSummary(NamedTuple):
+    """
+    Summary of scoring a file.
+
+    Attributes
+    ----------
+    n_rows : int
+        Number of input rows.
+    n_scored : int
+        Number of rows written to the output file.
+    n_quarantined : int
+        Number of rows that failed validation and were written to the quarantine file.
+    n_chunks : int
+        Number of chunks the input was read in.
+    """
+
+    n_rows: int
+    n_scored: int
+    n_quarantined: int
+    n_chunks: int
+
+
+def score_file(  # pylint: disable=too-many-arguments,too-many-locals
+    input_path: Union[str, Path],
+    output_path: Union[str, Path],
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    id_columns: Sequence[str] = (),
+    rename: Optional[Mapping[str, str]] = None,
+    output_columns: Sequence[str] = DEFAULT_OUTPUT_COLUMNS,
+    quarantine_path: Optional[Union[str, Path]] = None,
+    input_format: Optional[str] = None,
+    output_format: Optional[str] = None,
+) -> ScoreSummary:
+    """
+    Apply the ADNEX model to every row of a CSV, TSV or Parquet file, one chunk at a time.
+
+    Only the predictor and ID columns are read, each chunk is validated and scored with `predict_batch`, and the
+    results are appended to the output file before the next chunk is read. Memory use therefore depends on
+    `chunk_size`, not on the size of the file. A cell of a model variable that is not a number fails validation
+    as NOT_INTEGER for its row only.
+
+    Parameters
+    ----------
+    input_path : str or Path
+        The file to score.
+    output_path : str or Path
+        The file to write the results to. It is overwritten if it exists.
+    chunk_size : int
+        Number of rows read and scored at a time (default is 100 000).
+    id_columns : Sequence[str]
+        Input columns that are copied unchanged to the output and quarantine files, e.g. patient identifiers.
+    rename : Mapping[str, str], optional
+        Mapping of input column names to ADNEX variable names, for files that use other column names.
+    output_columns : Sequence[str]
+        The result columns to write, from `OUTPUT_COLUMNS` (default is the probabilities and the cancer risk).
+    quarantine_path : str or Path, optional
+        File to write rows that fail validation to, together with their error codes. If not given, the first
+        invalid row raises a `ValidationError`.
+    input_format : str, optional
+        One of 'csv', 'tsv' or 'parquet'. Inferred from the file suffix if not given.
+    output_format : str, optional
+        One of 'csv', 'tsv' or 'parquet'. Inferred from the file suffix if not given.
+
+    Raises
+    ------
+    MissingVariableError
+        If required columns are missing.
+    ValidationError
+        If a row fails validation and no quarantine file is given.
+    ValueError
+        If `chunk_size`, `output_columns` or a file format is invalid.
+    ImportError
+        If a Parquet file is read or written and pyarrow is not installed.
+
+    Returns
+    -------
+    ScoreSummary
+        The number of rows read, scored and quarantined.
+    """
+    if chunk_size < 1:
+        raise ValueError(f'chunk_size must be positive, got {chunk_size}.')
+    unknown_outputs = [name for name in output_columns if name not in OUTPUT_COLUMNS]
+    if unknown_outputs:
+        raise ValueError(f'Unknown output columns {unknown_outputs}, expected any of {list(OUTPUT_COLUMNS)}.')
+
+    rename = dict(rename or {})
+    input_format = input_format or infer_file_format(input_path)
+    output_format = output_format or infer_file_format(output_path)
+    quarantine_format = infer_file_format(quarantine_path) if quarantine_path is not None else None
+
+    source_names = {variable: column for column, variable in rename.items()}
+    wanted = set(id_columns) | {source_names.get(name, name) for name in _VARIABLE_NAMES}
+
+    n_rows = n_scored = n_chunks = 0
+
+    output_types = {name: 'bool' if name == 'with_ca125' else 'float64' for name in output_columns}
+    quarantine_types = {**{name: 'float64' for name in _VARIABLE_NAMES}, 'errors': 'string'}
+
+    with _ChunkWriter(output_path, output_format, id_columns, output_types) as writer, _ChunkWriter(
+        quarantine_path, quarantine_format, id_columns, quarantine_types
+    ) as quarantine:
+        for chunk in read_chunks(input_path, input_format, chunk_size, wanted):
+            chunk.index = pd.RangeIndex(n_rows, n_rows + len(chunk))
+            n_rows += len(chunk)
+            n_chunks += 1
+            chunk = chunk.rename(columns=rename)
+            values, not_numeric = _coerce_numeric(chunk)
+            report = _validate_chunk(values, not_numeric)
+
+            if not report.valid.all():
+                if quarantine_path is None:
+                    # Report the row with its raw values, so that a cell that is not a number is named as such
+                    raw = {name: chunk[name].where(mask, values[name]) for name, mask in not_numeric.items()}
+                    position = int(np.argmin(report.valid))
+                    _raise_for_row({**values, **raw}, report, position, int(report.index[position]))
+                quarantine.write(_quarantine_frame(chunk, report, id_columns))
+                values = values[report.valid]
+
+            writer.write(_result_frame(values, id_columns, output_columns))
+            n_scored += len(values)
+
+    return ScoreSummary(n_rows=n_rows, n_scored=n_scored, n_quarantined=n_rows - n_scored, n_chunks=n_chunks)
+
+
+def infer_file_format(path: Union[str, Path]) -> str:
+    """
+    Infer the file format from the suffix of a path.
+
+    Parameters
+    ----------
+    path : str or Path
+        The file path.
+
+    Raises
+    ------
+    ValueError
+        If the suffix is not recognized.
+
+    Returns
+    -------
+    str
+        One of 'csv', 'tsv' or 'parquet'.
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix not in _SUFFIXES:
+        raise ValueError(f'Cannot infer the file format of {str(path)!r}, expected one of {sorted(_SUFFIXES)}.')
+    return _SUFFIXES[suffix]
+
+
+def read_chunks(
+    path: Union[str, Path], file_format: str, chunk_size: int, columns: Optional[set] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Read a CSV, TSV or Parquet file in chunks.
+
+    Parameters
+    ----------
+    path : str or Path
+        The file to read.
+    file_format : str
+        One of 'csv', 'tsv' or 'parquet'.
+    chunk_size : int
+        Maximum number of rows per chunk.
+    columns : set, optional
+        Names of the columns to read. Names that are not in the file are ignored. All columns are read if not
+        given.
+
+    Yields
+    ------
+    pd.DataFrame
+        The next chunk of rows.
+    """
+    _check_file_format(file_format)
+
+    if file_format == 'parquet':
+        parquet = _import_parquet()
+        parquet_file = parquet.ParquetFile(path)
+        names = [name for name in parquet_file.schema_arrow.names if columns is None or name in columns]
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=names):
+            yield batch.to_pandas()
+        return
+
+    usecols = None if columns is None else columns.__contains__
+    with pd.read_csv(path, sep=_SEPARATORS[file_format], chunksize=chunk_size, usecols=usecols) as reader:
+        yield from reader
+
+
+class _ChunkWriter:
+    # Appends frames to a CSV, TSV or Parquet file. A disabled writer (no path) ignores all writes. The file is
+    # always created, with the given columns if nothing was written. Empty frames are only written then, so that they
+    # do not fix the Parquet schema.
+    #
+    # Parquet files have one schema for all chunks, whereas the dtypes that pandas infers may differ between chunks
+    # (e.g. an integer column with a missing value in one chunk only). The schema is therefore built from the declared
+    # types of the result columns, with the identifier columns typed by the first chunk, and every chunk is converted
+    # to it. Values of the declared float columns that are not numbers, which only the quarantine file can contain,
+    # are written as nulls; their error is in the 'errors' column.
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]],
+        file_format: Optional[str],
+        id_columns: Sequence[str],
+        types: Mapping[str, str],
+    ) -> None:
+        if file_format is not None:
+            _check_file_format(file_format)
+        self.path = path
+        self.file_format = file_format
+        self.columns = [*id_columns, *types]
+        self.types = types
+        self._handle: Any = None
+        self._parquet_writer: Any = None
+        self._written = False
+
+    def __enter__(self) -> '_ChunkWriter':
+        if self.path is not None and self.file_format != 'parquet':
+            self._handle = open(self.path, 'w', encoding='utf-8', newline='')  # pylint: disable=consider-using-with
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        try:
+            if self.path is not None and not self._written and exc_info[0] is None:
+                self._write(pd.DataFrame(columns=self.columns))
+        finally:
+            if self._handle is not None:
+                self._handle.close()
+            if self._parquet_writer is not None:
+                self._parquet_writer.close()
+
+    def write(self, frame: pd.DataFrame) -> None:
+        """Append a frame to the file."""
+        if self.path is not None and not frame.empty:
+            self._write(frame)
+
+    def _write(self, frame: pd.DataFrame) -> None:
+        if self.file_format == 'parquet':
+            arrow = _import_arrow()
+            if self._parquet_writer is None:
+                self._parquet_writer = _import_parquet().ParquetWriter(self.path, self._arrow_schema(arrow, frame))
+            frame = frame.assign(
+                **{
+                    name: pd.to_numeric(frame[name], errors='coerce').astype('float64')
+                    for name, dtype in self.types.items()
+                    if dtype == 'float64'
+                }
+            )
+            self._parquet_writer.write_table(
+                arrow.Table.from_pandas(frame, schema=self._parquet_writer.schema, preserve_index=False)
+            )
+        else:
+            frame.to_csv(self._handle, sep=_SEPARATORS[self.file_format], header=not self._written, index=False)
+
+        self._written = True
+
+    def _arrow_schema(self, arrow: Any, frame: pd.DataFrame) -> Any:
+        # The declared types of the result columns, and the types of the identifier columns in the first frame
+        declared = {'float64': arrow.float64(), 'bool': arrow.bool_(), 'string': arrow.string()}
+        inferred = arrow.Schema.from_pandas(
+            frame[[name for name in self.columns if name not in self.types]], preserve_index=False
+        )
+        return arrow.schema(
+            [
+                (name, declared[self.types[name]] if name in self.types else inferred.field(name).type)
+                for name in self.columns
+            ]
+        )
+
+
+def _result_frame(chunk: pd.DataFrame, id_columns: Sequence[str], output_columns: Sequence[str]) -> pd.DataFrame:
+    prediction = predict_batch(chunk)
+    probabilities = prediction.probabilities
+
+    results: Dict[str, Any] = {name: chunk[name].to_numpy() for name in id_columns}
+    for name in output_columns:
+        if name == 'cancer_risk':
+            results[name] = probabilities[:, 1:].sum(axis=1)
+        elif name == 'with_ca125':
+            results[name] = prediction.with_ca125
+        else:
+            results[name] = probabilities[:, ADNEX_MODEL_OUTPUT_CATEGORIES.index(name)]
+
+    return pd.DataFrame(results, columns=[*id_columns, *output_columns])
+
+
+def _coerce_numeric(chunk: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, np.ndarray]]:
+    # CSV and TSV columns with a cell that is not a number are read as strings, which the vectorized validation would
+    # reject for every row of the chunk. Convert the model variables to numbers, and return the cells that are not
+    # numbers (non-empty in the input but NaN after conversion) for each converted column.
+    coerced: Dict[str, pd.Series] = {}
+    not_numeric: Dict[str, np.ndarray] = {}
+    for name in _VARIABLE_NAMES:
+        if name in chunk and not pd.api.types.is_numeric_dtype(chunk[name]):
+            coerced[name] = pd.to_numeric(chunk[name], errors='coerce')
+            not_numeric[name] = (coerced[name].isna() & chunk[name].notna()).to_numpy()
+    return chunk.assign(**coerced), not_numeric
+
+
+def _validate_chunk(values: pd.DataFrame, not_numeric: Mapping[str, np.ndarray]) -> ValidationReport:
+    # Validate the converted chunk, with the cells that are not numbers marked as NOT_INTEGER
+    report = validate_input_columns(values, errors='report')
+    if not any(mask.any() for mask in not_numeric.values()):
+        return report
+
+    error_codes = report.error_codes.copy()
+    valid = report.valid.copy()
+    for name, mask in not_numeric.items():
+        error_codes[mask, report.variables.index(name)] = ErrorCode.NOT_INTEGER
+        valid &= ~mask
+    return report._replace(valid=valid, error_codes=error_codes)
+
+
+def _quarantine_frame(chunk: pd.DataFrame, report: ValidationReport, id_columns: Sequence[str]) -> pd.DataFrame:
+    invalid = ~report.valid
+    frame = chunk.loc[invalid].reindex(columns=[*id_columns, *_VARIABLE_NAMES])
+
+    # Invalid rows are expected to be rare, so the error descriptions are built row by row
+    frame['errors'] = [
+        '; '.join(f'{variable}: {ErrorCode(code).name}' for variable, code in zip(report.variables, codes) if code)
+        for codes in report.error_codes[invalid]
+    ]
+    return frame
+
+
+def _check_file_format(file_format: str) -> None:
+    if file_format not in FILE_FORMATS:
+        raise ValueError(f'file format must be one of {list(FILE_FORMATS)}, got {file_format!r}.')
+
+
+def _import_arrow() -> Any:
+    try:
+        import pyarrow  # pylint: disable=import-outside-toplevel,import-error
+    except ImportError as e:
+        raise ImportError('Reading and writing Parquet files requires pyarrow: pip install adnex[arrow]') from e
+    return pyarrow
+
+
+def _import_parquet() -> Any:
+    _import_arrow()
+    import pyarrow.parquet  # pylint: disable=import-outside-toplevel,import-error
+
+    return pyarrow.parquet
@@ -0,0 +1,301 @@
+""" Risk curves over a grid of values of one or two input variables, for many patients at once. """
+
+from typing import Any, Dict, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from adnex.computation import compute_probabilities_from_z_values
+from adnex.engine import _as_columns, _float_column
+from adnex.validation.core import _raise_for_row
+from adnex.validation.schema import ADNEX_INPUT_SCHEMA, VariableRule, validate_columns
+from adnex.validation.trusted import ValidatedAdnexFrame
+from adnex.variables import (
+    ADNEX_MODEL_PREDICTORS_WITH_CA125,
+    ADNEX_MODEL_PREDICTORS_WITHOUT_CA125,
+    ADNEX_MODEL_VARIABLES,
+    get_adnex_model_coefficients,
+)
+from utils.exceptions import MissingVariableError
+
+# Number of (patient, grid point) pairs scored at a time, which bounds the size of the temporary arrays
+DEFAULT_CHUNK_SIZE = 2**18
+
+# Predictors computed from each input variable
+_PREDICTORS_OF_VARIABLE = {
+    'age': ('A',),
+    's_ca_125': ('Log2(B)',),
+    'max_lesion_diameter': ('Log2(C)', 'D/C', 'D/C^2'),
+    'max_solid_component': ('D/C', 'D/C^2'),
+    'more_than_10_locules': ('E',),
+    'number_of_papillary_projections': ('F',),
+    'acoustic_shadows_present': ('G',),
+    'ascites_present': ('H',),
+    'is_oncology_center': ('I',),
+}
+
+_RULES = {rule.name: rule for rule in ADNEX_INPUT_SCHEMA}
+
+
+class RiskSweep(NamedTuple):
+    """
+    Result of `sweep_risks`.
+
+    Attributes
+    ----------
+    risks : np.ndarray
+        The risk of cancer, of shape (n_rows, len(grid values 1)[, len(grid values 2)]), or the probabilities of each
+        outcome category with an additional last axis of length 5. NaN where the grid point is invalid for the row.
+    grid : Dict[str, np.ndarray]
+        The swept variables and their grid values, in the order of the grid axes of `risks`.
+    valid : np.ndarray
+        Boolean array of shape (n_rows, ...) that is True where the grid point passes validation for the row, e.g.
+        where a swept solid component does not exceed the lesion diameter of the row.
+    """
+
+    risks: np.ndarray
+    grid: Dict[str, np.ndarray]
+    valid: np.ndarray
+
+
+def sweep_risks(
+    data: Any, grid: Mapping[str, Sequence[float]], output: str = 'cancer_risk', validate: bool = True
+) -> RiskSweep:
+    """
+    Compute the risk of every patient for every value of a grid over one or two input variables.
+
+    The z-values are split into the contributions of the predictors that do not depend on the swept variables, which
+    are computed once per patient, and of the predictors that do (e.g. Log2(C), D/C and D/C^2 for the lesion
+    diameter), which are computed for the whole (patients x grid) tensor by broadcasting. Sweeping CA-125 scores
+    every patient with the model with CA-125; otherwise each patient keeps the model variant of their own row.
+
+    Grid points are checked against the same bounds as `validate_input`, including the rule that the solid component
+    does not exceed the lesion diameter, and are NaN in the result where they fail.
+
+    Parameters
+    ----------
+    data : Any
+        A single patient or a batch of patients, in any form accepted by `adnex.engine.AdnexModel`. The swept
+        variables may be absent.
+    grid : Mapping[str, Sequence[float]]
+        One or two variable names, each mapped to the one-dimensional grid of values to sweep it over.
+    output : str
+        What to compute (default is 'cancer_risk'):
+        - 'cancer_risk': the sum of the probabilities of the non-benign categories.
+        - 'probabilities': the probabilities of each category, ordered as `ADNEX_MODEL_OUTPUT_CATEGORIES`.
+    validate : bool
+        Whether to validate the variables of `data` that are not swept (default is True). A `ValidatedAdnexFrame` is
+        not validated again.
+
+    Raises
+    ------
+    MissingVariableError
+        If required variables that are not swept are missing.
+    ValidationError
+        If `validate` is True and a variable that is not swept is invalid in a row.
+    ValueError
+        If `grid` does not have one or two known variables with one-dimensional values, or `output` is invalid.
+
+    Returns
+    -------
+    RiskSweep
+        The risks, the grid and the validity of every (patient, grid point) pair.
+    """
+    if output not in ('cancer_risk', 'probabilities'):
+        raise ValueError(f"output must be 'cancer_risk' or 'probabilities', got {output!r}.")
+    if not 1 <= len(grid) <= 2 or not set(grid) <= set(_PREDICTORS_OF_VARIABLE):
+        raise ValueError(f'grid must map one or two of {list(_PREDICTORS_OF_VARIABLE)} to values, got {list(grid)}.')
+
+    grid_values = {name: np.asarray(values, dtype=np.float64) for name, values in grid.items()}
+    if any(values.ndim != 1 for values in grid_values.values()):
+        raise ValueError('The grid values must be one-dimensional.')
+
+    columns, _ = _as_columns(data)
+    base = _base_columns(columns, grid_values, validate and not isinstance(data, ValidatedAdnexFrame))
+    shape = (len(base['age']),) + tuple(len(values) for values in grid_values.values())
+
+    values = _broadcast_values(base, grid_values)
+
+    valid = _valid_grid_points(values, grid_values, shape)
+    risks = _score_chunks(*_split_z_values(base, values, grid_values), shape, output)
+    risks[~valid] = np.nan
+
+    return RiskSweep(risks, grid_values, valid)
+
+
+def _broadcast_values(base: Dict[str, np.ndarray], grid: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    # The input variables as arrays broadcastable to (n_rows, *grid_shape): swept variables vary along their grid
+    # axis, the other variables along the row axis
+    n_axes = 1 + len(grid)
+    values = {name: column.reshape((-1,) + (1,) * len(grid)) for name, column in base.items()}
+    for axis, (name, grid_axis_values) in enumerate(grid.items(), start=1):
+        values[name] = grid_axis_values.reshape(tuple(-1 if i == axis else 1 for i in range(n_axes)))
+    return values
+
+
+def _split_z_values(
+    base: Dict[str, np.ndarray],
+    values: Dict[str, np.ndarray],
+    grid: Mapping[str, Any],
+    with_ca125: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+    # The z-values without the swept predictors, of shape (n_rows, 4), the swept predictors, broadcast over the rows
+    # and grid axes, and the coefficients of every predictor for each row. Unless given, the model with CA-125 is used
+    # for every row when CA-125 is swept, and for the rows with CA-125 otherwise.
+    if with_ca125 is None:
+        with_ca125 = np.full(len(base['age']), True) if 's_ca_125' in grid else ~np.isnan(base['s_ca_125'])
+    coefficients = _row_coefficients(with_ca125)
+    swept_predictors = {predictor for name in grid for predictor in _PREDICTORS_OF_VARIABLE[name]}
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fixed_z_values = np.zeros((len(with_ca125), 4))
+        for predictor, predictor_values in _predictors(base).items():
+            if predictor not in swept_predictors:
+                fixed_z_values += predictor_values * coefficients[predictor]
+
+        swept = {
+            predictor: predictor_values
+            for predictor, predictor_values in _predictors(values).items()
+            if predictor in swept_predictors
+        }
+
+    return fixed_z_values, swept, coefficients
+
+
+def _base_columns(columns: Mapping[str, Any], grid: Dict[str, np.ndarray], validate: bool) -> Dict[str, np.ndarray]:
+    # The variables that are not swept as float columns, validated against the rules that do not involve a swept
+    # variable. Swept variables that are absent are filled with NaN, as their values come from the grid.
+    missing_columns = {rule.name for rule in ADNEX_INPUT_SCHEMA if rule.required} - set(columns) - set(grid)
+    if missing_columns:
+        raise MissingVariableError(missing_columns)
+
+    n_rows = len(columns[next(iter(columns))])
+    base = {
+        name: _float_column(columns[name]) if name in columns and name not in grid else np.full(n_rows, np.nan)
+        for name in ADNEX_MODEL_VARIABLES.values()
+    }
+
+    if validate:
+        schema = tuple(
+            rule._replace(max_variable=None) if rule.max_variable in grid else rule
+            for rule in ADNEX_INPUT_SCHEMA
+            if rule.name not in grid
+        )
+        report = validate_columns(base, schema)
+        if not report.valid.all():
+            # Raise with the messages of the scalar validation, with valid values in place of the swept variables
+            row = int(np.argmin(report.valid))
+            placeholders = {rule.name: np.full(n_rows, _valid_placeholder(rule)) for rule in ADNEX_INPUT_SCHEMA}
+            _raise_for_row({**base, **{name: placeholders[name] for name in grid}}, report, row, row)
+
+    return base
+
+
+def _valid_placeholder(rule: VariableRule) -> float:
+    # A value that passes the rule and the rules that bound another variable by it, whatever the other values
+    if not rule.required:
+        return np.nan
+    if rule.allowed_values is not None:
+        return min(rule.allowed_values)
+    if any(other.max_variable == rule.name for other in ADNEX_INPUT_SCHEMA):
+        return rule.max_value
+    return rule.min_value or 0
+
+
+def _predictors(values: Mapping[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    # The predictors of the model with CA-125, computed from broadcastable arrays of the input variables
+    ratio = values['max_solid_component'] / values['max_lesion_diameter']
+    predictors = {
+        'constant': np.ones(1),
+        'A': values['age'],
+        'Log2(B)': np.log2(np.nan_to_num(values['s_ca_125'], nan=1.0)),  # 0 for rows without CA-125
+        'Log2(C)': np.log2(values['max_lesion_diameter']),
+        'D/C': ratio,
+        'D/C^2': ratio**2,
+        'E': values['more_than_10_locules'],
+        'F': values['number_of_papillary_projections'],
+        'G': values['acoustic_shadows_present'],
+        'H': values['ascites_present'],
+        'I': values['is_oncology_center'],
+    }
+    return {name: value[..., np.newaxis] for name, value in predictors.items()}
+
+
+def _row_coefficients(with_ca125: np.ndarray) -> Dict[str, np.ndarray]:
+    # The coefficients of every predictor for the model variant of each row, of shape (n_rows, 4). The Log2(B)
+    # coefficients of rows without CA-125 are 0, so that their missing CA-125 value does not contribute.
+    with_ca125_coefficients = dict(zip(ADNEX_MODEL_PREDICTORS_WITH_CA125, get_adnex_model_coefficients(True)))
+    without_ca125_coefficients = dict(zip(ADNEX_MODEL_PREDICTORS_WITHOUT_CA125, get_adnex_model_coefficients(False)))
+    without_ca125_coefficients['Log2(B)'] = np.zeros(4)
+
+    mask = with_ca125[:, np.newaxis]
+    return {
+        name: np.where(mask, coefficients, without_ca125_coefficients[name])
+        for name, coefficients in with_ca125_coefficients.items()
+    }
+
+
+def _valid_grid_points(
+    values: Mapping[str, np.ndarray], grid: Dict[str, np.ndarray], shape: Tuple[int, ...]
+) -> np.ndarray:
+    # Every swept value must pass the rule of its variable, and a swept solid component or lesion diameter must
+    # satisfy the solid component <= lesion diameter rule with the value of the other variable
+    valid = np.ones(shape, dtype=bool)
+    for name, grid_axis_values in grid.items():
+        rule = _RULES[name]._replace(max_variable=None, required=True)
+        valid &= validate_columns({name: grid_axis_values}, (rule,)).valid.reshape(values[name].shape)
+
+    if 'max_solid_component' in grid or 'max_lesion_diameter' in grid:
+        valid &= ~(values['max_solid_component'] > values['max_lesion_diameter'])
+
+    return valid
+
+
+def _score_chunks(  # pylint: disable=too-many-locals
+    fixed_z_values: np.ndarray,
+    swept: Dict[str, np.ndarray],
+    coefficients: Dict[str, np.ndarray],
+    shape: Tuple[int, ...],
+    output: str,
+) -> np.ndarray:
+    # Add the contributions of the swept predictors to the fixed z-values and apply the softmax, for a block of rows
+    # at a time
+    risks = np.empty(shape + ((5,) if output == 'probabilities' else ()))
+    chunk = max(1, DEFAULT_CHUNK_SIZE // max(int(np.prod(shape[1:])), 1))
+    expand = (slice(None),) + (np.newaxis,) * (len(shape) - 1)
+
+    for start in range(0, shape[0], chunk):
+        rows = slice(start, min(start + chunk, shape[0]))
+        block = {
+            predictor: predictor_values[rows if len(predictor_values) > 1 else slice(None), ..., 0]
+            for predictor, predictor_values in swept.items()
+        }
+
+        # The z-values with the categories along the first axis, so that every operation is contiguous
+        z_values = np.empty((4, rows.stop - rows.start) + shape[1:])
+        with np.errstate(invalid='ignore'):
+            for category, category_z_values in enumerate(z_values):
+                category_z_values[...] = fixed_z_values[rows, category][expand]
+                for predictor, predictor_values in block.items():
+                    category_z_values += predictor_values * coefficients[predictor][rows, category][expand]
+        z_values = np.moveaxis(z_values, 0, -1)
+
+        if output == 'probabilities':
+            probabilities = compute_probabilities_from_z_values(z_values.reshape(-1, 4))
+            risks[rows] = probabilities.reshape(z_values.shape[:-1] + (5,))
+        else:
+            risks[rows] = _cancer_risk(z_values)
+
+    return risks
+
+
+def _cancer_risk(z_values: np.ndarray) -> np.ndarray:
+    # The risk of cancer, 1 - p_benign = odds / (1 + odds) with the odds sum(exp(z)), without the full softmax. The
+    # z-values are overwritten.
+    with np.errstate(over='ignore', invalid='ignore'):
+        np.exp(z_values, out=z_values)
+        odds = z_values[..., 0] + z_values[..., 1]
+        odds += z_values[..., 2]
+        odds += z_values[..., 3]
+        risks = odds / (1.0 + odds)
+    risks[np.isinf(odds)] = 1.0
+    return risks
@@ -1,8 +1,31 @@
 """ Module for transforming input variables to the ADNEX model predictors. """
 
+from typing import Mapping, Optional, Union
+
 import numpy as np
 import pandas as pd
 
+from adnex.variables import ADNEX_MODEL_PREDICTORS_WITH_CA125, ADNEX_MODEL_PREDICTORS_WITHOUT_CA125
+
+# Column of every predictor in the output of `transform_input_columns`, by whether CA-125 is included
+_PREDICTOR_POSITIONS = {
+    with_ca125: {name: position for position, name in enumerate(predictors)}
+    for with_ca125, predictors in (
+        (True, ADNEX_MODEL_PREDICTORS_WITH_CA125),
+        (False, ADNEX_MODEL_PREDICTORS_WITHOUT_CA125),
+    )
+}
+
+# Predictors that are input variables used as they are
+_COPIED_PREDICTORS = (
+    ('A', 'age'),
+    ('E', 'more_than_10_locules'),
+    ('F', 'number_of_papillary_projections'),
+    ('G', 'acoustic_shadows_present'),
+    ('H', 'ascites_present'),
+    ('I', 'is_oncology_center'),
+)
+
 
 def transform_input_variables(row: pd.Series) -> pd.Series:
     """
@@ -37,3 +60,62 @@ def transform_input_variables(row: pd.Series) -> pd.Series:
         transformed['Log2(B)'] = np.log2(row['s_ca_125'])
 
     return pd.Series(transformed)
+
+
+def transform_input_columns(
+    columns: Union[pd.DataFrame, Mapping[str, np.ndarray]], with_ca125: bool, out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Transform columns of input variables to a matrix of ADNEX model predictors.
+
+    This is the columnar counterpart of `transform_input_variables`: every row is transformed in one pass. The
+    predictors are computed column by column directly in the output array, without intermediate arrays for float and
+    integer NumPy columns.
+
+    Parameters
+    ----------
+    columns : pd.DataFrame or Mapping[str, np.ndarray]
+        A DataFrame or a mapping of column names to one-dimensional arrays of equal length.
+    with_ca125 : bool
+        Whether to include the CA-125 predictor. If True, `columns` must contain 's_ca_125' without missing values.
+    out : np.ndarray, optional
+        A writable float64 array of shape (n_rows, n_predictors) to write the predictors to, preferably
+        Fortran-ordered. A new array is allocated if not given.
+
+    Raises
+    ------
+    ValueError
+        If `out` does not have shape (n_rows, n_predictors) or is not a float64 array.
+
+    Returns
+    -------
+    np.ndarray
+        `out`, or a new float64 array of shape (n_rows, n_predictors), with the predictors ordered as
+        `ADNEX_MODEL_PREDICTORS_WITH_CA125` or `ADNEX_MODEL_PREDICTORS_WITHOUT_CA125`.
+    """
+    positions = _PREDICTOR_POSITIONS[with_ca125]
+    shape = (len(columns['age']), len(positions))
+
+    if out is None:
+        out = np.empty(shape, order='F')
+    elif out.shape != shape or out.dtype != np.float64:
+        raise ValueError(f'out must be a float64 array of shape {shape}, got {out.dtype} {out.shape}.')
+
+    out[:, positions['constant']] = 1.0
+    for name, variable in _COPIED_PREDICTORS:
+        out[:, positions[name]] = columns[variable]
+
+    # The ratio needs the untransformed diameter, so the logarithm is taken in place afterwards
+    diameter, ratio = out[:, positions['Log2(C)']], out[:, positions['D/C']]
+    diameter[:] = columns['max_lesion_diameter']
+    ratio[:] = columns['max_solid_component']
+    np.divide(ratio, diameter, out=ratio)
+    np.square(ratio, out=out[:, positions['D/C^2']])
+    np.log2(diameter, out=diameter)
+
+    if with_ca125:
+        log2_ca125 = out[:, positions['Log2(B)']]
+        log2_ca125[:] = columns['s_ca_125']
+        np.log2(log2_ca125, out=log2_ca125)
+
+    return out
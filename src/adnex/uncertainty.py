@@ -0,0 +1,248 @@
+""" Propagation of measurement error in the inputs to uncertainty intervals of the risks, by Monte Carlo sampling. """
+
+from typing import Any, Dict, List, Mapping, NamedTuple, Sequence, Tuple, Union
+
+import numpy as np
+
+from adnex.constraints import MAX_AGE, MAX_CA_125, MAXIMAL_LESION_DIAMETER, MIN_AGE
+from adnex.engine import _as_columns
+from adnex.sweep import _base_columns, _score_chunks, _split_z_values
+from adnex.validation.trusted import ValidatedAdnexFrame
+
+# Number of (patient, draw) pairs scored at a time, which bounds the memory of the risks held for the quantiles
+DEFAULT_CHUNK_SIZE = 2**20
+
+# The valid integer domain of the variables with measurement error. CA-125 and the lesion diameter enter the model
+# through their logarithm and the lesion diameter is a divisor, so their draws are at least 1. The solid component of
+# every draw is at most the lesion diameter of the same draw.
+_DOMAINS: Dict[str, Tuple[float, float]] = {
+    'age': (MIN_AGE, MAX_AGE),
+    's_ca_125': (1, MAX_CA_125),
+    'max_lesion_diameter': (1, MAXIMAL_LESION_DIAMETER),
+    'max_solid_component': (0, MAXIMAL_LESION_DIAMETER),
+}
+
+
+class GaussianNoise(NamedTuple):
+    """
+    Additive Gaussian measurement error, e.g. of an ultrasound diameter.
+
+    Attributes
+    ----------
+    sd : float
+        The standard deviation of the error, in units of the variable, or as a fraction of the measured value (the
+        coefficient of variation) if `relative` is True.
+    relative : bool
+        Whether `sd` is relative to the measured value (default is False).
+    """
+
+    sd: float
+    relative: bool = False
+
+    def sample(self, values: np.ndarray, n_samples: int, generator: np.random.Generator) -> np.ndarray:
+        """
+        Draw perturbed values around the measured values.
+
+        Parameters
+        ----------
+        values : np.ndarray
+            The measured values, of shape (n_rows,).
+        n_samples : int
+            Number of draws per value.
+        generator : np.random.Generator
+            The random number generator.
+
+        Returns
+        -------
+        np.ndarray
+            The draws, of shape (n_rows, n_samples).
+        """
+        sd = self.sd * np.abs(values[:, np.newaxis]) if self.relative else self.sd
+        return values[:, np.newaxis] + sd * generator.standard_normal((len(values), n_samples))
+
+
+class LogNormalNoise(NamedTuple):
+    """
+    Multiplicative log-normal measurement error, e.g. of a CA-125 assay: the measured value times exp(N(0, sigma^2)).
+
+    Attributes
+    ----------
+    sigma : float
+        The standard deviation of the logarithm of the error.
+    """
+
+    sigma: float
+
+    def sample(self, values: np.ndarray, n_samples: int, generator: np.random.Generator) -> np.ndarray:
+        """
+        Draw perturbed values around the measured values.
+
+        Parameters
+        ----------
+        values : np.ndarray
+            The measured values, of shape (n_rows,).
+        n_samples : int
+            Number of draws per value.
+        generator : np.random.Generator
+            The random number generator.
+
+        Returns
+        -------
+        np.ndarray
+            The draws, of shape (n_rows, n_samples).
+        """
+        return values[:, np.newaxis] * np.exp(self.sigma * generator.standard_normal((len(values), n_samples)))
+
+
+NoiseModel = Union[GaussianNoise, LogNormalNoise]
+
+
+class RiskUncertainty(NamedTuple):
+    """
+    Result of `propagate_measurement_error`.
+
+    Attributes
+    ----------
+    quantiles : np.ndarray
+        The quantiles of the risk of cancer over the draws, of shape (n_rows, len(levels)), or of the probabilities of
+        each outcome category with an additional last axis of length 5.
+    mean : np.ndarray
+        The mean over the draws, of shape (n_rows,) or (n_rows, 5).
+    std : np.ndarray
+        The standard deviation over the draws, of shape (n_rows,) or (n_rows, 5).
+    levels : Tuple[float, ...]
+        The quantile levels along the second axis of `quantiles`.
+    n_samples : int
+        Number of draws per patient.
+    """
+
+    quantiles: np.ndarray
+    mean: np.ndarray
+    std: np.ndarray
+    levels: Tuple[float, ...]
+    n_samples: int
+
+
+def propagate_measurement_error(  # pylint: disable=too-many-arguments,too-many-locals
+    data: Any,
+    noise: Mapping[str, NoiseModel],
+    n_samples: int = 1000,
+    levels: Sequence[float] = (0.025, 0.5, 0.975),
+    *,
+    seed: Union[None, int, np.random.Generator] = None,
+    output: str = 'cancer_risk',
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    validate: bool = True,
+) -> RiskUncertainty:
+    """
+    Compute uncertainty intervals of the risks of every patient under measurement error of the inputs.
+
+    For every patient, `n_samples` perturbed values of each variable in `noise` are drawn around the measured value,
+    rounded and clipped to the valid integer domain of the variable (`adnex.constraints`; CA-125 and the lesion
+    diameter at least 1, and the solid component at most the lesion diameter of the same draw), and scored. The
+    predictors of the variables without error are computed once per patient, and only those of the perturbed
+    variables are broadcast over the draws. Each row keeps the model variant of its measured CA-125.
+
+    The draws are scored for blocks of patients at a time, so that at most about `chunk_size` (patient, draw) pairs
+    are held in memory, rather than the whole (n_rows x n_samples) tensor. Each variable draws from its own stream of
+    the seeded generator, so the results do not depend on `chunk_size`.
+
+    Parameters
+    ----------
+    data : Any
+        A single patient or a batch of patients, in any form accepted by `adnex.engine.AdnexModel`.
+    noise : Mapping[str, NoiseModel]
+        The measurement error of each perturbed variable, any of 'age', 's_ca_125', 'max_lesion_diameter' and
+        'max_solid_component', e.g. `{'max_lesion_diameter': GaussianNoise(2.0), 's_ca_125': LogNormalNoise(0.1)}`.
+    n_samples : int
+        Number of draws per patient (default is 1000).
+    levels : Sequence[float]
+        The quantile levels to compute (default is (0.025, 0.5, 0.975), the median and a 95% interval).
+    seed : None, int or np.random.Generator
+        Seed of the random number generator, or the generator itself (default is None, for a fresh seed).
+    output : str
+        What to compute the uncertainty of (default is 'cancer_risk'):
+        - 'cancer_risk': the sum of the probabilities of the non-benign categories.
+        - 'probabilities': the probabilities of each category, ordered as `ADNEX_MODEL_OUTPUT_CATEGORIES`.
+    chunk_size : int
+        Approximate number of (patient, draw) pairs scored at a time (default is 2**20).
+    validate : bool
+        Whether to validate the measured input (default is True). A `ValidatedAdnexFrame` is not validated again.
+
+    Raises
+    ------
+    MissingVariableError
+        If required columns are missing.
+    ValidationError
+        If `validate` is True and input validation fails for at least one row.
+    ValueError
+        If `noise` has an unsupported variable, or `n_samples`, `levels`, `output` or `chunk_size` is invalid.
+
+    Returns
+    -------
+    RiskUncertainty
+        The quantiles, mean and standard deviation of the risks over the draws.
+    """
+    if not noise or not set(noise) <= set(_DOMAINS):
+        raise ValueError(f'noise must map some of {list(_DOMAINS)} to noise models, got {list(noise)}.')
+    if output not in ('cancer_risk', 'probabilities'):
+        raise ValueError(f"output must be 'cancer_risk' or 'probabilities', got {output!r}.")
+    if n_samples < 1 or chunk_size < 1 or not all(0 <= level <= 1 for level in levels):
+        raise ValueError('n_samples and chunk_size must be positive and the levels between 0 and 1.')
+
+    columns, _ = _as_columns(data)
+    base = _base_columns(columns, {}, validate and not isinstance(data, ValidatedAdnexFrame))
+    n_rows = len(base['age'])
+    generators = _variable_generators(seed, noise)
+    with_ca125 = ~np.isnan(base['s_ca_125'])
+
+    shape = (n_rows, len(levels)) + ((5,) if output == 'probabilities' else ())
+    quantiles, mean, std = np.empty(shape), np.empty((n_rows,) + shape[2:]), np.empty((n_rows,) + shape[2:])
+    rows_per_chunk = max(1, chunk_size // n_samples)
+
+    for start in range(0, n_rows, rows_per_chunk):
+        rows = slice(start, min(start + rows_per_chunk, n_rows))
+        chunk = {name: column[rows] for name, column in base.items()}
+        values = {name: column[:, np.newaxis] for name, column in chunk.items()}
+        values.update(_draw(chunk, noise, generators, n_samples))
+
+        risks = _score_chunks(
+            *_split_z_values(chunk, values, noise, with_ca125[rows]), (rows.stop - rows.start, n_samples), output
+        )
+        quantiles[rows] = np.moveaxis(np.quantile(risks, levels, axis=1), 0, 1)
+        mean[rows], std[rows] = risks.mean(axis=1), risks.std(axis=1)
+
+    return RiskUncertainty(quantiles, mean, std, tuple(levels), n_samples)
+
+
+def _variable_generators(
+    seed: Union[None, int, np.random.Generator], noise: Mapping[str, NoiseModel]
+) -> Dict[str, np.random.Generator]:
+    # An independent generator for every perturbed variable, derived from the seed
+    generator = np.random.default_rng(seed)
+    child_seeds: List[int] = generator.integers(2**63, size=len(noise)).tolist()
+    return {name: np.random.default_rng(child_seed) for name, child_seed in zip(sorted(noise), child_seeds)}
+
+
+def _draw(
+    chunk: Dict[str, np.ndarray],
+    noise: Mapping[str, NoiseModel],
+    generators: Dict[str, np.random.Generator],
+    n_samples: int,
+) -> Dict[str, np.ndarray]:
+    # Perturbed values of shape (n_rows, n_samples), rounded and clipped to the valid integer domain. The lesion
+    # diameter is drawn first, so that the solid component can be clipped to the diameter of the same draw.
+    draws: Dict[str, np.ndarray] = {}
+    for name in sorted(noise, key=lambda name: name == 'max_solid_component'):
+        low, high = _DOMAINS[name]
+        draw = np.rint(noise[name].sample(chunk[name], n_samples, generators[name]))
+        if name == 'max_solid_component':
+            high = draws.get('max_lesion_diameter', chunk['max_lesion_diameter'][:, np.newaxis])
+        draws[name] = np.clip(draw, low, high)
+
+    if 'max_lesion_diameter' in draws and 'max_solid_component' not in draws:
+        # A measured solid component larger than a drawn diameter is limited to that diameter
+        draws['max_solid_component'] = np.minimum(
+            chunk['max_solid_component'][:, np.newaxis], draws['max_lesion_diameter']
+        )
+    return draws
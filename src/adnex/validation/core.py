@@ -1,7 +1,11 @@
 """ Functions for filtering and validating input data. """
 
+from typing import Mapping, Union
+
+import numpy as np
 import pandas as pd
 
+from adnex.validation.schema import ErrorCode, ValidationReport, validate_columns
 from adnex.validation.variables import (
     _validate_age,
     _validate_binary_predictors,
@@ -9,8 +13,9 @@ from adnex.validation.variables import (
     _validate_max_solid_component,
     _validate_number_of_papillary_projections,
     _validate_s_ca_125,
+    validate_input_values,
 )
-from adnex.variables import REQUIRED_VARIABLES
+from adnex.variables import ADNEX_MODEL_VARIABLES, REQUIRED_VARIABLES
 from utils.exceptions import MissingVariableError, ValidationError
 
 
@@ -54,3 +59,109 @@ def validate_input(row: pd.Series) -> None:
     _validate_binary_predictors(row)
     if 's_ca_125' in row.index:
         _validate_s_ca_125(row['s_ca_125'])
+
+
+def validate_input_frame(data: pd.DataFrame, errors: str = 'raise') -> Union[None, np.ndarray, ValidationReport]:
+    """
+    Validate a DataFrame of input rows for the ADNEX model.
+
+    The checks are the same as in `validate_input` and are evaluated column-wise for all rows at once by
+    `adnex.validation.schema.validate_columns`. Rows with a missing (NaN) CA-125 value are validated as rows without
+    CA-125, and columns that are not model variables are ignored.
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        Input data with one row per patient.
+    errors : str
+        How to handle invalid rows (default is 'raise'):
+        - 'raise': raise a ValidationError for the first invalid row, with the same message as `validate_input`.
+        - 'mask': return a boolean array that is True for valid rows.
+        - 'report': return a `ValidationReport` with error codes for each row and variable.
+
+    Returns
+    -------
+    None, np.ndarray or ValidationReport
+        Nothing if `errors` is 'raise', the validity mask if `errors` is 'mask', and the full report if `errors`
+        is 'report'.
+    """
+    return validate_input_columns(data, errors=errors)
+
+
+def validate_input_columns(
+    columns: Union[pd.DataFrame, Mapping[str, np.ndarray]], errors: str = 'raise'
+) -> Union[None, np.ndarray, ValidationReport]:
+    """
+    Validate columns of input rows for the ADNEX model.
+
+    This is the same as `validate_input_frame`, but also accepts a mapping of column names to arrays.
+
+    Parameters
+    ----------
+    columns : pd.DataFrame or Mapping[str, np.ndarray]
+        A DataFrame or a mapping of column names to one-dimensional arrays of equal length.
+    errors : str
+        How to handle invalid rows, see `validate_input_frame` (default is 'raise').
+
+    Raises
+    ------
+    MissingVariableError
+        If required columns are missing.
+    ValidationError
+        If `errors` is 'raise' and input validation fails for at least one row.
+    ValueError
+        If `errors` is not one of 'raise', 'mask' or 'report'.
+
+    Returns
+    -------
+    None, np.ndarray or ValidationReport
+        Nothing if `errors` is 'raise', the validity mask if `errors` is 'mask', and the full report if `errors`
+        is 'report'.
+    """
+    if errors not in ('raise', 'mask', 'report'):
+        raise ValueError(f"errors must be 'raise', 'mask' or 'report', got {errors!r}.")
+
+    missing_columns = REQUIRED_VARIABLES - set(columns.keys())
+    if missing_columns:
+        raise MissingVariableError(missing_columns)
+
+    report = validate_columns(columns)
+
+    if errors == 'mask':
+        return report.valid
+    if errors == 'report':
+        return report
+
+    invalid_rows = np.flatnonzero(~report.valid)
+    if invalid_rows.size > 0:
+        _raise_for_row(columns, report, invalid_rows[0], report.index[invalid_rows[0]])
+
+    return None
+
+
+def _raise_for_row(
+    columns: Union[pd.DataFrame, Mapping[str, np.ndarray]], report: ValidationReport, position: int, label: object
+) -> None:
+    # Raise for a row that the report marks invalid, with the message of the scalar validation of the row
+    values = {}
+    for name in ADNEX_MODEL_VARIABLES.values():
+        if name in columns:
+            column = columns[name]
+            values[name] = column.iloc[position] if isinstance(column, pd.Series) else column[position]
+
+    if pd.isna(values.get('s_ca_125')):
+        values.pop('s_ca_125', None)
+
+    try:
+        validate_input_values(values)
+    except ValidationError as e:
+        raise ValidationError(f'Invalid input in row {label!r}: {e}') from e
+
+    # The scalar validation accepts the row, so the vectorized checks are stricter: raise with their error codes
+    # rather than letting the row through
+    failures = ', '.join(
+        f'{variable} is {ErrorCode(code).name}'
+        for variable, code in zip(report.variables, report.error_codes[position])
+        if code
+    )
+    raise ValidationError(f'Invalid input in row {label!r}: {failures}')
@@ -0,0 +1,206 @@
+""" Declarative schema of the ADNEX input variables and its vectorized validation. """
+
+from enum import IntEnum
+from typing import Dict, FrozenSet, List, Mapping, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from adnex.constraints import MAX_AGE, MAX_CA_125, MAXIMAL_LESION_DIAMETER, MIN_AGE, VALID_PAPILLARY_PROJECTIONS
+from adnex.validation.utils import _integer_valued_column
+from adnex.variables import BINARY_VARIABLES
+
+
+class ErrorCode(IntEnum):
+    """Error codes for a single variable of a single row. Only the first failing check of a variable is reported."""
+
+    VALID = 0
+    MISSING = 1
+    NOT_INTEGER = 2
+    NEGATIVE = 3
+    OUT_OF_RANGE = 4
+    INVALID_VALUE = 5
+    EXCEEDS_VARIABLE = 6
+
+
+class VariableRule(NamedTuple):
+    """
+    Validation rule for one input variable.
+
+    Attributes
+    ----------
+    name : str
+        Column name of the variable.
+    required : bool
+        Whether the variable must be present. Missing (NaN) values of optional variables are not errors.
+    non_negative : bool
+        Whether negative values are rejected before the other bounds are checked.
+    min_value : int, optional
+        Inclusive lower bound.
+    max_value : int, optional
+        Inclusive upper bound.
+    allowed_values : FrozenSet[int], optional
+        The only values that are accepted.
+    max_variable : str, optional
+        Name of another variable whose value is an inclusive upper bound for this variable.
+    """
+
+    name: str
+    required: bool = True
+    non_negative: bool = True
+    min_value: Optional[int] = None
+    max_value: Optional[int] = None
+    allowed_values: Optional[FrozenSet[int]] = None
+    max_variable: Optional[str] = None
+
+
+ADNEX_INPUT_SCHEMA: Tuple[VariableRule, ...] = (
+    VariableRule('age', min_value=MIN_AGE, max_value=MAX_AGE),
+    VariableRule('s_ca_125', required=False, max_value=MAX_CA_125),
+    VariableRule('max_lesion_diameter', max_value=MAXIMAL_LESION_DIAMETER),
+    VariableRule('max_solid_component', max_variable='max_lesion_diameter'),
+    VariableRule('number_of_papillary_projections', allowed_values=frozenset(VALID_PAPILLARY_PROJECTIONS)),
+    *(VariableRule(name, non_negative=False, allowed_values=frozenset({0, 1})) for name in BINARY_VARIABLES),
+)
+
+
+class ValidationReport(NamedTuple):
+    """
+    Result of validating a batch of input rows.
+
+    Attributes
+    ----------
+    valid : np.ndarray
+        Boolean array of shape (n_rows,) that is True for rows that pass all checks.
+    error_codes : np.ndarray
+        Array of shape (n_rows, n_variables) with one `ErrorCode` per row and variable.
+    variables : Tuple[str, ...]
+        Variable names corresponding to the columns of `error_codes`.
+    index : pd.Index
+        Row labels of the validated data.
+    """
+
+    valid: np.ndarray
+    error_codes: np.ndarray
+    variables: Tuple[str, ...]
+    index: pd.Index
+
+    def errors(self) -> pd.DataFrame:
+        """
+        List every failing check in long format.
+
+        Returns
+        -------
+        pd.DataFrame
+            A pandas DataFrame with the columns 'row', 'variable' and 'error', with one line per failing variable
+            of each invalid row, in row order.
+        """
+        rows, variables = np.nonzero(self.error_codes)
+        return pd.DataFrame(
+            {
+                'row': self.index[rows],
+                'variable': np.asarray(self.variables, dtype=object)[variables],
+                'error': [ErrorCode(code).name for code in self.error_codes[rows, variables]],
+            }
+        )
+
+    def error_counts(self) -> Dict[str, int]:
+        """
+        Count the invalid rows for each variable.
+
+        Returns
+        -------
+        Dict[str, int]
+            Number of rows failing a check, for each variable with at least one failure.
+        """
+        counts = np.count_nonzero(self.error_codes, axis=0)
+        return {name: int(count) for name, count in zip(self.variables, counts) if count}
+
+
+def validate_columns(
+    columns: Union[pd.DataFrame, Mapping[str, np.ndarray]],
+    schema: Tuple[VariableRule, ...] = ADNEX_INPUT_SCHEMA,
+) -> ValidationReport:
+    """
+    Validate columns of input variables against a schema, for all rows at once.
+
+    Every rule is evaluated as vectorized column operations, and every failure is recorded instead of raised.
+    Columns of required variables must be present; absent optional variables are treated as missing values.
+
+    Parameters
+    ----------
+    columns : pd.DataFrame or Mapping[str, np.ndarray]
+        A DataFrame or a mapping of column names to one-dimensional arrays of equal length.
+    schema : Tuple[VariableRule, ...]
+        The rules to check (default is `ADNEX_INPUT_SCHEMA`). A rule with `max_variable` must come after the rule
+        of that variable.
+
+    Returns
+    -------
+    ValidationReport
+        The validity mask and the error codes for each row and variable.
+    """
+    if isinstance(columns, pd.DataFrame):
+        index = columns.index
+    else:
+        index = pd.RangeIndex(len(next(iter(columns.values()), ())))
+    n_rows = len(index)
+
+    values: Dict[str, np.ndarray] = {}
+    error_codes = np.zeros((n_rows, len(schema)), dtype=np.uint8)
+
+    for position, rule in enumerate(schema):
+        if rule.name not in columns:
+            values[rule.name] = np.full(n_rows, np.nan)
+            if rule.required:
+                error_codes[:, position] = ErrorCode.MISSING
+            continue
+
+        column = columns[rule.name]
+        values[rule.name], is_integer = _integer_valued_column(column)
+        missing = np.asarray(pd.isna(column), dtype=bool)
+
+        error_codes[:, position] = _first_error_codes(_rule_checks(rule, values, is_integer, missing), n_rows)
+
+    return ValidationReport(
+        valid=~error_codes.any(axis=1),
+        error_codes=error_codes,
+        variables=tuple(rule.name for rule in schema),
+        index=index,
+    )
+
+
+def _rule_checks(
+    rule: VariableRule, values: Dict[str, np.ndarray], is_integer: np.ndarray, missing: np.ndarray
+) -> List[Tuple[np.ndarray, ErrorCode]]:
+    # The checks are listed in the same order as in the scalar validators. A missing value of an optional variable
+    # is recorded as VALID, which also skips the remaining checks for that row.
+    value = values[rule.name]
+    checks = [
+        (missing, ErrorCode.MISSING if rule.required else ErrorCode.VALID),
+        (~is_integer, ErrorCode.NOT_INTEGER),
+    ]
+
+    with np.errstate(invalid='ignore'):
+        if rule.non_negative:
+            checks.append((value < 0, ErrorCode.NEGATIVE))
+        if rule.min_value is not None:
+            checks.append((value < rule.min_value, ErrorCode.OUT_OF_RANGE))
+        if rule.max_value is not None:
+            checks.append((value > rule.max_value, ErrorCode.OUT_OF_RANGE))
+        if rule.allowed_values is not None:
+            checks.append((~np.isin(value, list(rule.allowed_values)), ErrorCode.INVALID_VALUE))
+        if rule.max_variable is not None:
+            checks.append((value > values[rule.max_variable], ErrorCode.EXCEEDS_VARIABLE))
+
+    return checks
+
+
+def _first_error_codes(checks: List[Tuple[np.ndarray, ErrorCode]], n_rows: int) -> np.ndarray:
+    codes = np.zeros(n_rows, dtype=np.uint8)
+    undecided = np.ones(n_rows, dtype=bool)
+    for failed, code in checks:
+        failed = failed & undecided
+        codes[failed] = code
+        undecided &= ~failed
+    return codes
@@ -0,0 +1,131 @@
+""" Validated batches of input rows that the scoring functions accept without validating them again. """
+
+from typing import Any, Dict, Iterator, Mapping, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from adnex.validation.core import validate_input_columns
+from adnex.validation.variables import _is_missing
+from adnex.variables import ADNEX_MODEL_VARIABLES
+
+_VARIABLE_NAMES = tuple(ADNEX_MODEL_VARIABLES.values())
+
+# Passed by `ValidatedAdnexFrame.validate` to the constructor, so that instances only come from validated data
+_TOKEN = object()
+
+
+class ValidatedAdnexFrame(Mapping[str, np.ndarray]):
+    """
+    A batch of input rows that passed validation, as read-only columns.
+
+    Create it with `ValidatedAdnexFrame.validate`. The scoring functions (`predict_risks_frame`,
+    `predict_cancer_risk_frame`, `adnex.columnar.predict_arrays` and the methods of `adnex.engine.AdnexModel`)
+    accept it in place of a DataFrame and skip validation, so validating once at ingest makes every later scoring
+    call free of validation.
+
+    The columns are read-only copies of the input, so that changes to the input after validation cannot make them
+    invalid. It is a mapping of variable names to the columns, so it can also be passed wherever a mapping of column
+    arrays is accepted, e.g. `predict_batch`.
+
+    Unlike for a DataFrame, `len()` therefore counts the columns, not the rows. Use `n_rows` for the number of
+    patients.
+
+    Attributes
+    ----------
+    index : pd.Index
+        Row labels of the validated rows.
+    n_rows : int
+        Number of rows.
+    """
+
+    __slots__ = ('_columns', 'index')
+
+    def __init__(self, columns: Dict[str, np.ndarray], index: pd.Index, token: object) -> None:
+        if token is not _TOKEN:
+            raise TypeError('Use ValidatedAdnexFrame.validate to create a ValidatedAdnexFrame.')
+        self._columns = columns
+        self.index = index
+
+    @classmethod
+    def validate(
+        cls, data: Union[pd.DataFrame, Mapping[str, Any], np.ndarray], errors: str = 'raise'
+    ) -> 'ValidatedAdnexFrame':
+        """
+        Validate a batch of input rows once.
+
+        Parameters
+        ----------
+        data : pd.DataFrame, Mapping[str, np.ndarray] or np.ndarray
+            A DataFrame, a mapping of column names to one-dimensional arrays of equal length, or a structured array.
+            Columns that are not model variables are dropped.
+        errors : str
+            How to handle invalid rows (default is 'raise'):
+            - 'raise': raise a ValidationError for the first invalid row.
+            - 'drop': leave out the invalid rows; `index` holds the labels of the remaining rows.
+
+        Raises
+        ------
+        MissingVariableError
+            If required columns are missing.
+        ValidationError
+            If `errors` is 'raise' and input validation fails for at least one row.
+        ValueError
+            If `errors` is not one of 'raise' or 'drop'.
+
+        Returns
+        -------
+        ValidatedAdnexFrame
+            The validated rows.
+        """
+        if errors not in ('raise', 'drop'):
+            raise ValueError(f"errors must be 'raise' or 'drop', got {errors!r}.")
+
+        if isinstance(data, np.ndarray):
+            data = {name: data[name] for name in data.dtype.names or ()}
+
+        valid = validate_input_columns(data, errors='raise' if errors == 'raise' else 'mask')
+        keep = None if valid is None or valid.all() else valid
+
+        columns = {name: _read_only_column(data[name], keep) for name in _VARIABLE_NAMES if name in data}
+        index = data.index if isinstance(data, pd.DataFrame) else pd.RangeIndex(len(data['age']))
+        return cls(columns, index if keep is None else index[keep], _TOKEN)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self._columns[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._columns)
+
+    def __len__(self) -> int:
+        # The number of columns, as for any mapping; see `n_rows` for the number of rows
+        return len(self._columns)
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}(n_rows={self.n_rows}, columns={list(self._columns)})'
+
+    @property
+    def n_rows(self) -> int:
+        """Number of rows."""
+        return len(self.index)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Convert the validated rows to a DataFrame.
+
+        Returns
+        -------
+        pd.DataFrame
+            A pandas DataFrame with the model variables as columns, indexed by `index`.
+        """
+        return pd.DataFrame(dict(self._columns), index=self.index)
+
+
+def _read_only_column(values: Any, keep: Optional[np.ndarray]) -> np.ndarray:
+    # Validated column as a read-only numeric copy; missing CA-125 values become NaN
+    array = values.to_numpy() if isinstance(values, pd.Series) else np.asarray(values)
+    if array.dtype.kind not in 'biuf':
+        array = np.array([np.nan if _is_missing(value) else float(value) for value in array], dtype=np.float64)
+    array = array[keep] if keep is not None else array.copy()
+    array.flags.writeable = False
+    return array
@@ -1,7 +1,12 @@
 """ Helper functions for validation of input values. """
 
+from typing import Tuple, Union
+
+import numpy as np
 import pandas as pd
 
+from utils.validation import _is_integer
+
 
 def has_ca125(row: pd.Series) -> bool:
     """
@@ -21,3 +26,37 @@ def has_ca125(row: pd.Series) -> bool:
         return False
 
     return True
+
+
+def _integer_valued_column(values: Union[pd.Series, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convert a column to float64 and flag the entries that are integer-valued numbers.
+
+    Parameters
+    ----------
+    values : pd.Series or np.ndarray
+        Input data column.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        The column as a float64 array (NaN where not numeric) and a boolean mask that is True where the
+        entry is an integer-valued number, following the same rules as `utils.validation._is_integer`.
+    """
+    if not isinstance(values, pd.Series):
+        values = np.asarray(values)
+
+    if pd.api.types.is_numeric_dtype(values.dtype):
+        if isinstance(values, pd.Series):
+            floats = values.to_numpy(dtype=np.float64, na_value=np.nan)
+        else:
+            floats = values.astype(np.float64, copy=False)
+        with np.errstate(invalid='ignore'):
+            is_integer = np.isfinite(floats) & (floats == np.floor(floats))
+        return floats, is_integer
+
+    # Object columns may mix types, so fall back to the scalar check
+    is_integer = np.fromiter((_is_integer(value) for value in values), dtype=bool, count=len(values))
+    floats = np.full(len(values), np.nan)
+    floats[is_integer] = np.asarray(values[is_integer], dtype=np.float64)
+    return floats, is_integer
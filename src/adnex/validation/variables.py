@@ -1,10 +1,10 @@
 """ Functions for validation of input variables. """
 
 import typing
-
-import pandas as pd
+from typing import Any, Mapping
 
 from adnex.constraints import MAX_AGE, MAX_CA_125, MAXIMAL_LESION_DIAMETER, MIN_AGE, VALID_PAPILLARY_PROJECTIONS
+from adnex.variables import BINARY_VARIABLES, REQUIRED_VARIABLES
 from utils.asserts import (
     _ensure_binary,
     _ensure_in_range,
@@ -12,7 +12,7 @@ from utils.asserts import (
     _ensure_less_than_or_equal_to_max,
     _ensure_non_negative,
 )
-from utils.exceptions import ValidationError
+from utils.exceptions import MissingVariableError, ValidationError
 from utils.validation import _is_less_than_or_equal_to_max
 
 
@@ -64,7 +64,72 @@ def _validate_number_of_papillary_projections(number_of_papillary_projections: o
         )
 
 
-def _validate_binary_predictors(row: pd.Series) -> None:
-    binary_vars = ['more_than_10_locules', 'acoustic_shadows_present', 'ascites_present', 'is_oncology_center']
-    for var in binary_vars:
+def _validate_binary_predictors(row: Mapping[str, object]) -> None:
+    for var in BINARY_VARIABLES:
         _ensure_binary(row[var], var)
+
+
+def validate_input_values(values: Mapping[str, Any]) -> None:
+    """
+    Validate the input values of a single patient without pandas.
+
+    The checks and error messages are the same as in `adnex.validation.core.validate_input`. Plain integers within
+    bounds, the most common input, are accepted without going through the individual validators.
+
+    Parameters
+    ----------
+    values : Mapping[str, Any]
+        Input values keyed by variable name. Leave out 's_ca_125' if the value is not available.
+
+    Raises
+    ------
+    MissingVariableError
+        If required variables are missing.
+    ValidationError
+        If input validation fails.
+    """
+    if _passes_fast_checks(values):
+        return
+
+    missing_variables = REQUIRED_VARIABLES - set(values)
+    if missing_variables:
+        raise MissingVariableError(missing_variables)
+
+    nan_variables = [name for name, value in values.items() if _is_missing(value)]
+    if nan_variables:
+        raise ValidationError(f'The following variables are missing (NaN): {nan_variables}')
+
+    _validate_age(values['age'])
+    _validate_max_lesion_diameter(values['max_lesion_diameter'])
+    _validate_max_solid_component(values['max_solid_component'], max_lesion_diameter=values['max_lesion_diameter'])
+    _validate_number_of_papillary_projections(values['number_of_papillary_projections'])
+    _validate_binary_predictors(values)
+    if 's_ca_125' in values:
+        _validate_s_ca_125(values['s_ca_125'])
+
+
+def _is_missing(value: Any) -> bool:
+    if value is None:
+        return True
+    try:
+        # NaN is the only value that is not equal to itself
+        return bool(value != value)  # pylint: disable=comparison-with-itself
+    except TypeError:
+        # pd.NA cannot be converted to bool
+        return True
+
+
+def _passes_fast_checks(values: Mapping[str, Any]) -> bool:
+    # Accept the common case of plain integers (but not bools) within bounds without going through the validators
+    exact_ints = all(type(value) is int for value in values.values())  # pylint: disable=unidiomatic-typecheck
+    if not exact_ints or not values.keys() >= REQUIRED_VARIABLES:
+        return False
+
+    s_ca_125 = values.get('s_ca_125', 0)
+    return (
+        MIN_AGE <= values['age'] <= MAX_AGE
+        and 0 <= values['max_solid_component'] <= values['max_lesion_diameter'] <= MAXIMAL_LESION_DIAMETER
+        and values['number_of_papillary_projections'] in VALID_PAPILLARY_PROJECTIONS
+        and all(values[name] in (0, 1) for name in BINARY_VARIABLES)
+        and 0 <= s_ca_125 <= MAX_CA_125
+    )
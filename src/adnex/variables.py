@@ -5,7 +5,13 @@
 This module defines the ADNEX model variables and constants.
 """
 
-import pandas as pd
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 ADNEX_MODEL_VARIABLES = {
     'A': 'age',
@@ -21,34 +27,39 @@ ADNEX_MODEL_VARIABLES = {
 
 REQUIRED_VARIABLES = set(ADNEX_MODEL_VARIABLES.values()) - {'s_ca_125'}
 
+BINARY_VARIABLES = ['more_than_10_locules', 'acoustic_shadows_present', 'ascites_present', 'is_oncology_center']
+
+
+ADNEX_MODEL_PREDICTORS_WITH_CA125: Tuple[str, ...] = ('constant', 'A', 'Log2(B)', 'Log2(C)', 'D/C', 'D/C^2', 'E', 'F', 'G', 'H', 'I')
+
+ADNEX_MODEL_PREDICTORS_WITHOUT_CA125: Tuple[str, ...] = ('constant', 'A', 'Log2(C)', 'D/C', 'D/C^2', 'E', 'F', 'G', 'H', 'I')
+
+# Coefficients for each non-benign category, ordered as the predictors above. The pandas DataFrames
+# ADNEX_MODEL_CONSTANTS_WITH_CA125 and ADNEX_MODEL_CONSTANTS_WITHOUT_CA125 are built from these on first access.
+ADNEX_MODEL_COEFFICIENTS_WITH_CA125: Dict[str, Tuple[float, ...]] = {
+    'z_1': (-7.577663, 0.004506, 0.111642, 0.372046, 6.967853, -5.65588, 1.375079, 0.604238, -2.04157, 0.971061, 0.953043),
+    'z_2': (-12.276041, 0.017260, 0.197249, 0.873530, 9.583053, -5.83319, 0.791873, 0.400369, -1.87763, 0.452731, 0.452484),
+    'z_3': (-14.915830, 0.051239, 0.765456, 0.430477, 10.37696, -5.70975, 0.273692, 0.389874, -2.35516, 1.348408, 0.459021),
+    'z_4': (-11.909267, 0.033601, 0.276166, 0.449025, 6.644939, -2.30330, 0.899980, 0.215645, -2.49845, 1.636407, 0.808887),
+}
 
-ADNEX_MODEL_CONSTANTS_WITH_CA125 = pd.DataFrame(
-    {
-        'z_1': [-7.577663, 0.004506, 0.111642, 0.372046, 6.967853, -5.65588, 1.375079, 0.604238, -2.04157, 0.971061, 0.953043],
-        'z_2': [-12.276041, 0.017260, 0.197249, 0.873530, 9.583053, -5.83319, 0.791873, 0.400369, -1.87763, 0.452731, 0.452484],
-        'z_3': [-14.915830, 0.051239, 0.765456, 0.430477, 10.37696, -5.70975, 0.273692, 0.389874, -2.35516, 1.348408, 0.459021],
-        'z_4': [-11.909267, 0.033601, 0.276166, 0.449025, 6.644939, -2.30330, 0.899980, 0.215645, -2.49845, 1.636407, 0.808887],
-    },
-    index=['constant', 'A', 'Log2(B)', 'Log2(C)', 'D/C', 'D/C^2', 'E', 'F', 'G', 'H', 'I']
-)
-
-ADNEX_MODEL_CONSTANTS_WITHOUT_CA125 = pd.DataFrame(
-    {
-        'z_1': [-7.412534, 0.003489, 0.430701, 7.117925, -5.74135, 1.343699, 0.607211, -2.11885, 1.167767, 0.983227],
-        'z_2': [-12.201607, 0.017607, 0.98728, 10.07145, -6.17742, 0.763081, 0.410449, -1.98073, 0.77054, 0.543677],
-        'z_3': [-12.826207, 0.045172, 0.759002, 11.83296, -6.64336, 0.316444, 0.390959, -2.94082, 2.691276, 0.929483],
-        'z_4': [-11.424379, 0.033407, 0.560396, 7.264105, -2.77392, 0.983394, 0.199164, -2.63702, 2.185574, 0.906249],
-    },
-    index=['constant', 'A', 'Log2(C)', 'D/C', 'D/C^2', 'E', 'F', 'G', 'H', 'I']
-)
+ADNEX_MODEL_COEFFICIENTS_WITHOUT_CA125: Dict[str, Tuple[float, ...]] = {
+    'z_1': (-7.412534, 0.003489, 0.430701, 7.117925, -5.74135, 1.343699, 0.607211, -2.11885, 1.167767, 0.983227),
+    'z_2': (-12.201607, 0.017607, 0.98728, 10.07145, -6.17742, 0.763081, 0.410449, -1.98073, 0.77054, 0.543677),
+    'z_3': (-12.826207, 0.045172, 0.759002, 11.83296, -6.64336, 0.316444, 0.390959, -2.94082, 2.691276, 0.929483),
+    'z_4': (-11.424379, 0.033407, 0.560396, 7.264105, -2.77392, 0.983394, 0.199164, -2.63702, 2.185574, 0.906249),
+}
 
 ADNEX_MODEL_OUTPUT_CATEGORIES = ['Benign', 'Borderline', 'Stage I cancer', 'Stage II-IV cancer', 'Metastatic cancer']
 
 
-def get_adnex_model_constants(with_ca125: bool) -> pd.DataFrame:
+@lru_cache(maxsize=None)
+def get_adnex_model_constants(with_ca125: bool) -> 'pd.DataFrame':
     """
     Retrieve the ADNEX model coefficients for categories other than benign.
 
+    pandas is imported, and the DataFrame built, on the first call for each model variant.
+
     Parameters
     ----------
     with_ca125 : bool
@@ -59,4 +70,45 @@ def get_adnex_model_constants(with_ca125: bool) -> pd.DataFrame:
     pd.DataFrame
         The constants DataFrame for the selected model variant.
     """
-    return ADNEX_MODEL_CONSTANTS_WITH_CA125 if with_ca125 else ADNEX_MODEL_CONSTANTS_WITHOUT_CA125
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
+    if with_ca125:
+        return pd.DataFrame(ADNEX_MODEL_COEFFICIENTS_WITH_CA125, index=list(ADNEX_MODEL_PREDICTORS_WITH_CA125))
+    return pd.DataFrame(ADNEX_MODEL_COEFFICIENTS_WITHOUT_CA125, index=list(ADNEX_MODEL_PREDICTORS_WITHOUT_CA125))
+
+
+def __getattr__(name: str) -> Any:
+    # Build the pandas constants lazily, so that importing this module does not import pandas
+    if name == 'ADNEX_MODEL_CONSTANTS_WITH_CA125':
+        return get_adnex_model_constants(with_ca125=True)
+    if name == 'ADNEX_MODEL_CONSTANTS_WITHOUT_CA125':
+        return get_adnex_model_constants(with_ca125=False)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def _as_read_only_array(coefficients: Dict[str, Tuple[float, ...]]) -> np.ndarray:
+    array = np.column_stack([np.asarray(values, dtype=np.float64) for values in coefficients.values()])
+    array.flags.writeable = False
+    return array
+
+
+_ADNEX_MODEL_COEFFICIENTS_WITH_CA125 = _as_read_only_array(ADNEX_MODEL_COEFFICIENTS_WITH_CA125)
+_ADNEX_MODEL_COEFFICIENTS_WITHOUT_CA125 = _as_read_only_array(ADNEX_MODEL_COEFFICIENTS_WITHOUT_CA125)
+
+
+def get_adnex_model_coefficients(with_ca125: bool) -> np.ndarray:
+    """
+    Retrieve the ADNEX model coefficients for categories other than benign as a precomputed array.
+
+    Parameters
+    ----------
+    with_ca125 : bool
+        Whether to use the model including CA-125.
+
+    Returns
+    -------
+    np.ndarray
+        A read-only, C-contiguous float64 array of shape (n_predictors, 4), with rows ordered as
+        `ADNEX_MODEL_PREDICTORS_WITH_CA125` or `ADNEX_MODEL_PREDICTORS_WITHOUT_CA125`.
+    """
+    return _ADNEX_MODEL_COEFFICIENTS_WITH_CA125 if with_ca125 else _ADNEX_MODEL_COEFFICIENTS_WITHOUT_CA125
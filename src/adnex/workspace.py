@@ -0,0 +1,96 @@
+""" Reusable buffers for scoring batches of a bounded size without allocating. """
+
+import numpy as np
+
+from adnex.variables import ADNEX_MODEL_OUTPUT_CATEGORIES, ADNEX_MODEL_PREDICTORS_WITHOUT_CA125
+
+_N_Z_VALUES = len(ADNEX_MODEL_OUTPUT_CATEGORIES) - 1
+
+
+class Workspace:  # pylint: disable=too-many-instance-attributes
+    """
+    Preallocated intermediate arrays of the batch scoring path, reused from call to call.
+
+    Every call of `adnex.batch.predict_batch` allocates the transformed predictors, the z-values, the CA-125 masks
+    and the temporaries of the softmax. Passing the same workspace (and an `out` array) to repeated calls instead
+    writes all of them into these buffers, so that scoring a stream of fixed-size chunks of float or integer NumPy
+    columns allocates no new arrays once the workspace exists. A workspace holds about 180 bytes per row.
+
+    A workspace is not thread-safe: use one per thread. The arrays returned by a call with a workspace, other than
+    `out`, are views of its buffers and are overwritten by the next call.
+
+    Parameters
+    ----------
+    max_rows : int
+        The largest number of rows that can be scored with the workspace.
+
+    Attributes
+    ----------
+    max_rows : int
+        The largest number of rows that can be scored with the workspace.
+    transformed : np.ndarray
+        Fortran-ordered array of shape (max_rows, 10) for the shared predictors, ordered as
+        `ADNEX_MODEL_PREDICTORS_WITHOUT_CA125`.
+    log2_ca125 : np.ndarray
+        Array of shape (max_rows,) for the Log2(B) predictor, 0 where CA-125 is missing.
+    with_ca125, without_ca125 : np.ndarray
+        Boolean arrays of shape (max_rows,) for the model variant of each row.
+    z_values, z_values_without_ca125 : np.ndarray
+        Arrays of shape (max_rows, 4) for the z-values, and for the z-values of the model without CA-125 when a batch
+        mixes both variants.
+    shift, denominator, scratch : np.ndarray
+        Arrays of shape (max_rows,) for the temporaries of the softmax.
+    """
+
+    __slots__ = (
+        'max_rows',
+        'transformed',
+        'log2_ca125',
+        'with_ca125',
+        'without_ca125',
+        'z_values',
+        'z_values_without_ca125',
+        'shift',
+        'denominator',
+        'scratch',
+    )
+
+    def __init__(self, max_rows: int) -> None:
+        if max_rows < 0:
+            raise ValueError(f'max_rows must be non-negative, got {max_rows}.')
+
+        self.max_rows = max_rows
+        self.transformed = np.empty((max_rows, len(ADNEX_MODEL_PREDICTORS_WITHOUT_CA125)), order='F')
+        self.log2_ca125 = np.empty(max_rows)
+        self.with_ca125 = np.empty(max_rows, dtype=bool)
+        self.without_ca125 = np.empty(max_rows, dtype=bool)
+        self.z_values = np.empty((max_rows, _N_Z_VALUES))
+        self.z_values_without_ca125 = np.empty((max_rows, _N_Z_VALUES))
+        self.shift = np.empty(max_rows)
+        self.denominator = np.empty(max_rows)
+        self.scratch = np.empty(max_rows)
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}(max_rows={self.max_rows}, nbytes={self.nbytes})'
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of the buffers in bytes."""
+        return sum(getattr(self, name).nbytes for name in self.__slots__[1:])
+
+    def check_size(self, n_rows: int) -> None:
+        """
+        Check that a batch fits in the workspace.
+
+        Parameters
+        ----------
+        n_rows : int
+            The number of rows of the batch.
+
+        Raises
+        ------
+        ValueError
+            If `n_rows` is larger than `max_rows`.
+        """
+        if n_rows > self.max_rows:
+            raise ValueError(f'The batch has {n_rows} rows, but the workspace holds at most {self.max_rows}.')
@@ -1,9 +1,26 @@
 """ Pytest fixtures for the tests. """
 
+from typing import NamedTuple
+
+import numpy as np
 import pandas as pd
 import pytest
 
 
+class Patient(NamedTuple):
+    """Predictors of a single patient."""
+
+    age: int
+    s_ca_125: float
+    max_lesion_diameter: int
+    max_solid_component: int
+    more_than_10_locules: int
+    number_of_papillary_projections: int
+    acoustic_shadows_present: int
+    ascites_present: int
+    is_oncology_center: int
+
+
 @pytest.fixture
 def sample_input():
     """
@@ -50,3 +67,51 @@ def expected_output():
             'Metastatic cancer': 0.025,
         }
     )
+
+
+@pytest.fixture
+def sample_frame():
+    """
+    Fixture to provide a valid cohort with and without CA-125 values.
+
+    Returns
+    -------
+    pd.DataFrame
+        A pandas DataFrame with one row per patient and the necessary predictors for the ADNEX model.
+    """
+    return pd.DataFrame(
+        {
+            'age': [46, 52, 38, 29, 60, 45, 50, 33, 61, 40],
+            's_ca_125': [68, np.nan, 120, np.nan, 85, 90, 55, np.nan, 100, 75],
+            'max_lesion_diameter': [88, 45, 70, 100, 55, 60, 72, 80, 65, 50],
+            'max_solid_component': [50, 25, 35, 60, 30, 40, 25, 50, 35, 20],
+            'more_than_10_locules': [0, 1, 0, 1, 0, 1, 0, 1, 0, 1],
+            'number_of_papillary_projections': [2, 4, 1, 3, 0, 1, 2, 3, 4, 0],
+            'acoustic_shadows_present': [1, 0, 1, 0, 1, 1, 0, 1, 0, 1],
+            'ascites_present': [1, 1, 0, 1, 0, 1, 0, 1, 0, 1],
+            'is_oncology_center': [0, 1, 0, 1, 0, 1, 0, 1, 0, 1],
+        }
+    )
+
+
+@pytest.fixture
+def sample_namedtuple():
+    """
+    Fixture to provide the valid sample input as a NamedTuple.
+
+    Returns
+    -------
+    Patient
+        A NamedTuple with the necessary predictors for the ADNEX model.
+    """
+    return Patient(
+        age=46,
+        s_ca_125=68,
+        max_lesion_diameter=88,
+        max_solid_component=50,
+        more_than_10_locules=0,
+        number_of_papillary_projections=2,
+        acoustic_shadows_present=1,
+        ascites_present=1,
+        is_oncology_center=0,
+    )
@@ -0,0 +1,169 @@
+""" Test cases for the asyncio micro-batching scorer. """
+
+import asyncio
+
+import numpy as np
+import pytest
+
+import adnex
+from adnex.aio import AsyncAdnexScorer
+from adnex.exceptions import ScorerOverloadedError
+from utils.exceptions import MissingVariableError, ValidationError
+
+
+@pytest.fixture(name='rows')
+def fixture_rows(sample_frame):
+    return [row.to_dict() for _, row in sample_frame.iterrows()] * 20
+
+
+def test_results_match_predict_patient(rows):
+    async def score():
+        async with AsyncAdnexScorer(max_batch_size=64) as scorer:
+            results = await asyncio.gather(*(scorer.predict(row) for row in rows))
+            return results, scorer.stats()
+
+    results, stats = asyncio.run(score())
+
+    for row, result in zip(rows, results):
+        expected = adnex.predict_patient(row)
+        np.testing.assert_allclose(list(result), list(expected), rtol=1e-12)
+        assert result.with_ca125 == expected.with_ca125
+    assert stats.n_requests == len(rows)
+    assert stats.n_batches == -(-len(rows) // 64)
+    assert stats.mean_batch_size == pytest.approx(len(rows) / stats.n_batches)
+    assert 0 <= stats.latency_p50 <= stats.latency_p99
+
+
+@pytest.mark.parametrize('engine', ['arithmetic', 'lookup'])
+def test_input_forms(sample_input, sample_namedtuple, engine):
+    async def score():
+        async with AsyncAdnexScorer(engine=engine) as scorer:
+            return await asyncio.gather(
+                scorer.predict(sample_input),
+                scorer.predict(sample_namedtuple),
+                scorer.predict(**sample_input),
+                scorer.predict(sample_input, s_ca_125=None),
+                scorer.predict_cancer_risk(sample_input),
+            )
+
+    from_series, from_namedtuple, from_keywords, without_ca125, risk = asyncio.run(score())
+
+    expected = adnex.predict_patient(sample_input)
+    for result in (from_series, from_namedtuple, from_keywords):
+        np.testing.assert_allclose(list(result), list(expected), rtol=1e-12)
+    assert not without_ca125.with_ca125
+    assert without_ca125.cancer_risk == pytest.approx(adnex.predict_patient(sample_input, s_ca_125=None).cancer_risk)
+    assert risk == pytest.approx(expected.cancer_risk)
+
+
+def test_errors_are_delivered_to_their_callers(sample_input):
+    invalid = {**sample_input, 'age': 200}
+    missing = sample_input.drop('age')
+
+    async def score():
+        async with AsyncAdnexScorer() as scorer:
+            outcomes = await asyncio.gather(
+                scorer.predict(sample_input),
+                scorer.predict(invalid),
+                scorer.predict(missing),
+                scorer.predict(sample_input),
+                return_exceptions=True,
+            )
+            return outcomes, scorer.stats()
+
+    (first, invalid_error, missing_error, last), stats = asyncio.run(score())
+
+    assert first.cancer_risk == pytest.approx(adnex.predict_patient(sample_input).cancer_risk)
+    assert last.cancer_risk == first.cancer_risk
+    assert isinstance(invalid_error, ValidationError)
+    with pytest.raises(ValidationError) as expected:
+        adnex.predict_patient(invalid)
+    assert str(invalid_error) == str(expected.value)
+    assert isinstance(missing_error, MissingVariableError)
+    assert (stats.n_requests, stats.n_errors, stats.n_batches) == (4, 2, 1)
+
+
+def test_reject_when_full(sample_input):
+    async def score():
+        async with AsyncAdnexScorer(max_pending=2, overflow='reject') as scorer:
+            outcomes = await asyncio.gather(*(scorer.predict(sample_input) for _ in range(10)), return_exceptions=True)
+            return outcomes, scorer.stats()
+
+    outcomes, stats = asyncio.run(score())
+
+    rejected = [outcome for outcome in outcomes if isinstance(outcome, ScorerOverloadedError)]
+    assert rejected
+    assert stats.n_rejected == len(rejected)
+    assert stats.n_requests == len(outcomes) - len(rejected)
+
+
+def test_wait_when_full(sample_input):
+    async def score():
+        async with AsyncAdnexScorer(max_batch_size=3, max_pending=2) as scorer:
+            results = await asyncio.gather(*(scorer.predict(sample_input) for _ in range(20)))
+            return results, scorer.stats()
+
+    results, stats = asyncio.run(score())
+
+    assert len(results) == 20
+    assert stats.n_rejected == 0
+    assert stats.n_batches >= 7
+
+
+def test_cancelled_caller_does_not_affect_others(sample_input):
+    async def score():
+        async with AsyncAdnexScorer(max_wait=0.05) as scorer:
+            cancelled = asyncio.ensure_future(scorer.predict(sample_input))
+            other = asyncio.ensure_future(scorer.predict(sample_input))
+            await asyncio.sleep(0)
+            cancelled.cancel()
+            return await other, cancelled.cancelled()
+
+    result, cancelled = asyncio.run(score())
+
+    assert cancelled
+    assert result.cancer_risk == pytest.approx(adnex.predict_patient(sample_input).cancer_risk)
+
+
+def test_close(sample_input):
+    async def score():
+        scorer = AsyncAdnexScorer(max_wait=0.05)
+        pending = asyncio.ensure_future(scorer.predict(sample_input))
+        await asyncio.sleep(0)
+        await scorer.close()
+        assert pending.done()
+        with pytest.raises(RuntimeError, match='closed'):
+            await scorer.predict(sample_input)
+        return scorer.stats()
+
+    assert asyncio.run(score()).n_requests == 1
+
+
+def test_concurrent_batches(rows):
+    async def score():
+        async with AsyncAdnexScorer(max_batch_size=16, max_concurrent_batches=3) as scorer:
+            results = await asyncio.gather(*(scorer.predict(row) for row in rows))
+            return results, scorer.batch_size_counts()
+
+    results, batch_sizes = asyncio.run(score())
+
+    expected = [adnex.predict_patient(row).cancer_risk for row in rows]
+    np.testing.assert_allclose([result.cancer_risk for result in results], expected, rtol=1e-12)
+    assert sum(size * n for size, n in batch_sizes.items()) == len(rows)
+    assert max(batch_sizes) == 16
+
+
+@pytest.mark.parametrize(
+    'kwargs',
+    [
+        {'max_batch_size': 0},
+        {'max_wait': -1},
+        {'max_pending': 0},
+        {'overflow': 'drop'},
+        {'engine': 'gpu'},
+        {'max_concurrent_batches': 0},
+    ],
+)
+def test_invalid_arguments(kwargs):
+    with pytest.raises(ValueError):
+        AsyncAdnexScorer(**kwargs)
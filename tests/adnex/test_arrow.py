@@ -0,0 +1,128 @@
+""" Test cases for scoring Arrow tables and record batches. """
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+import adnex
+from adnex.arrow import arrow_columns, predict_arrow, predict_record_batches
+from adnex.variables import ADNEX_MODEL_OUTPUT_CATEGORIES
+from utils.exceptions import MissingVariableError, ValidationError
+
+
+@pytest.fixture(name='table')
+def fixture_table(sample_frame):
+    # Integer columns, with CA-125 as a nullable integer column instead of NaN
+    frame = sample_frame.astype('int64', errors='ignore').astype({'s_ca_125': 'Int64'})
+    return pa.Table.from_pandas(frame.assign(patient_id=range(10)), preserve_index=False)
+
+
+def test_predict_arrow_table(table, sample_frame):
+    result = predict_arrow(table, include_variant=True)
+
+    assert result.column_names == [*table.column_names, *ADNEX_MODEL_OUTPUT_CATEGORIES, 'with_ca125']
+    assert table.column('s_ca_125').null_count == 3
+    np.testing.assert_allclose(
+        np.column_stack([result.column(name).to_numpy() for name in ADNEX_MODEL_OUTPUT_CATEGORIES]),
+        adnex.predict_risks_frame(sample_frame),
+        rtol=1e-12,
+    )
+    assert result.column('with_ca125').to_pylist() == sample_frame['s_ca_125'].notna().tolist()
+
+
+def test_predict_arrow_keeps_chunks(table, sample_frame):
+    chunked = pa.Table.from_batches(table.to_batches(max_chunksize=4))
+
+    result = predict_arrow(chunked, append=False)
+
+    assert result.column_names == ADNEX_MODEL_OUTPUT_CATEGORIES
+    assert result.column('Benign').num_chunks == 3
+    np.testing.assert_allclose(result.to_pandas(), adnex.predict_risks_frame(sample_frame), rtol=1e-12)
+
+
+def test_predict_arrow_record_batch(table):
+    batch = table.to_batches()[0]
+
+    result = predict_arrow(batch, append=False)
+
+    assert isinstance(result, pa.RecordBatch)
+    assert result.num_rows == 10
+
+
+def test_predict_arrow_empty_table(table):
+    result = predict_arrow(table.slice(0, 0))
+
+    assert result.num_rows == 0
+    assert result.column_names == [*table.column_names, *ADNEX_MODEL_OUTPUT_CATEGORIES]
+
+
+def test_predict_arrow_errors(table):
+    ages = table.column('age').to_numpy().copy()
+    ages[[2, 7]] = 200
+    invalid = table.set_column(table.column_names.index('age'), 'age', pa.array(ages))
+    chunked = pa.Table.from_batches(invalid.to_batches(max_chunksize=4))
+
+    with pytest.raises(ValidationError, match='Invalid input in row 2: age=200 is out of range'):
+        predict_arrow(chunked)
+
+    result = predict_arrow(chunked, errors='mask', include_variant=True)
+
+    assert result.column('Benign').null_count == 2
+    assert result.column('with_ca125').null_count == 2
+    assert result.column('Benign')[7].as_py() is None
+
+    with pytest.raises(ValueError, match="errors must be 'raise' or 'mask'"):
+        predict_arrow(chunked, errors='report')
+
+
+def test_predict_arrow_missing_column(table):
+    with pytest.raises(MissingVariableError):
+        predict_arrow(table.drop_columns(['age']))
+    with pytest.raises(MissingVariableError):
+        predict_arrow(table.to_batches()[0].drop_columns(['age']))
+
+
+def test_arrow_columns_are_zero_copy(table):
+    batch = table.to_batches()[0]
+
+    columns = arrow_columns(batch)
+
+    assert np.shares_memory(columns['age'], batch.column('age').to_numpy())
+    assert np.isnan(columns['s_ca_125'][[1, 3, 7]]).all()
+
+
+def test_predict_record_batches_from_ipc_stream(tmp_path, table, sample_frame):
+    path = tmp_path / 'cohort.arrows'
+    with pa.OSFile(str(path), 'wb') as sink, pa.ipc.new_stream(sink, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=3):
+            writer.write_batch(batch)
+
+    with pa.memory_map(str(path)) as source:
+        scored = list(predict_record_batches(pa.ipc.open_stream(source), append=False))
+
+    assert [batch.num_rows for batch in scored] == [3, 3, 3, 1]
+    np.testing.assert_allclose(
+        pa.Table.from_batches(scored).to_pandas(), adnex.predict_risks_frame(sample_frame), rtol=1e-12
+    )
+
+
+def test_predict_record_batches_row_numbers(table):
+    ages = table.column('age').to_numpy().copy()
+    ages[8] = 5
+    batches = pa.table({**table.to_pydict(), 'age': ages}).to_batches(max_chunksize=3)
+
+    with pytest.raises(ValidationError, match='Invalid input in row 8'):
+        list(predict_record_batches(batches))
+
+
+def test_boolean_columns(table, sample_frame):
+    binary = ['more_than_10_locules', 'acoustic_shadows_present', 'ascites_present', 'is_oncology_center']
+    frame = pd.DataFrame({name: table.column(name).to_numpy().astype(bool) for name in binary})
+    boolean_table = table.drop_columns(binary)
+    for name in binary:
+        boolean_table = boolean_table.append_column(name, pa.array(frame[name]))
+
+    result = predict_arrow(boolean_table, append=False)
+
+    np.testing.assert_allclose(result.to_pandas(), adnex.predict_risks_frame(sample_frame), rtol=1e-12)
@@ -0,0 +1,67 @@
+""" Tests for the batch engine. """
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from adnex.batch import BatchPrediction, predict_batch
+from adnex.computation import compute_probabilities_array
+from adnex.transformation import transform_input_columns
+
+
+def test_predict_batch_matches_single_variant_computation(sample_frame):
+    prediction = predict_batch(sample_frame)
+    with_ca125 = sample_frame['s_ca_125'].notna().to_numpy()
+
+    assert isinstance(prediction, BatchPrediction)
+    np.testing.assert_array_equal(prediction.with_ca125, with_ca125)
+
+    for variant, mask in ((True, with_ca125), (False, ~with_ca125)):
+        subset = sample_frame[mask]
+        expected = compute_probabilities_array(transform_input_columns(subset, with_ca125=variant), with_ca125=variant)
+        np.testing.assert_allclose(prediction.probabilities[mask], expected, rtol=1e-12)
+
+
+@pytest.mark.parametrize('fraction_with_ca125', [0.0, 0.4, 1.0])
+def test_predict_batch_keeps_row_order(sample_frame, fraction_with_ca125):
+    """Test that rows scored per variant are scattered back in the original order."""
+    rng = np.random.default_rng(0)
+    data = sample_frame.sample(200, replace=True, random_state=0).reset_index(drop=True)
+    data['s_ca_125'] = np.where(rng.random(len(data)) < fraction_with_ca125, 35.0, np.nan)
+
+    prediction = predict_batch(data)
+
+    expected = np.vstack([predict_batch(data.iloc[[i]]).probabilities for i in range(len(data))])
+    np.testing.assert_allclose(prediction.probabilities, expected, rtol=1e-12)
+    assert prediction.with_ca125.mean() == pytest.approx(data['s_ca_125'].notna().mean())
+
+
+def test_predict_batch_from_dict_of_arrays(sample_frame):
+    columns = {name: sample_frame[name].to_numpy() for name in sample_frame.columns}
+
+    np.testing.assert_array_equal(predict_batch(columns).probabilities, predict_batch(sample_frame).probabilities)
+
+
+def test_predict_batch_empty(sample_frame):
+    prediction = predict_batch(sample_frame.iloc[:0])
+
+    assert prediction.probabilities.shape == (0, 5)
+    assert prediction.with_ca125.shape == (0,)
+
+
+def test_predict_batch_nullable_ca125(sample_frame):
+    data = sample_frame.astype({'s_ca_125': pd.Float64Dtype()})
+
+    prediction = predict_batch(data)
+
+    np.testing.assert_array_equal(prediction.probabilities, predict_batch(sample_frame).probabilities)
+
+
+def test_predict_batch_object_ca125_with_none(sample_frame):
+    data = sample_frame.astype({'s_ca_125': object})
+    data.loc[sample_frame['s_ca_125'].isna(), 's_ca_125'] = None
+
+    prediction = predict_batch(data)
+
+    np.testing.assert_array_equal(prediction.with_ca125, sample_frame['s_ca_125'].notna())
+    np.testing.assert_allclose(prediction.probabilities, predict_batch(sample_frame).probabilities, rtol=1e-15)
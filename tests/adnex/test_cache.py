@@ -0,0 +1,106 @@
+""" Test cases for the opt-in risk cache of the single-row functions. """
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import adnex
+from adnex.cache import clear_risk_cache, disable_risk_cache, enable_risk_cache, make_cache_key, risk_cache_info
+from utils.exceptions import MissingVariableError, ValidationError
+
+
+@pytest.fixture(name='risk_cache', autouse=True)
+def fixture_risk_cache():
+    enable_risk_cache(maxsize=4)
+    yield
+    disable_risk_cache()
+
+
+def test_cached_results_match(sample_frame):
+    for _ in range(2):
+        for _, row in sample_frame.iterrows():
+            cached = adnex.predict_risks(row)
+            disable_risk_cache()
+            expected = adnex.predict_risks(row)
+            enable_risk_cache(maxsize=4)
+
+            pd.testing.assert_series_equal(cached, expected)
+
+
+def test_hits_and_misses(sample_input):
+    risk = adnex.predict_cancer_risk(sample_input)
+    for _ in range(3):
+        assert adnex.predict_cancer_risk(sample_input) == risk
+    adnex.predict_risks(sample_input.drop('s_ca_125'))
+
+    info = risk_cache_info()
+
+    assert (info.hits, info.misses, info.maxsize, info.currsize) == (3, 2, 4, 2)
+    assert info.hit_rate == pytest.approx(0.6)
+
+
+def test_cache_is_bounded(sample_frame):
+    for _, row in sample_frame.iterrows():
+        adnex.predict_risks(row)
+
+    assert risk_cache_info().currsize == 4
+
+    clear_risk_cache()
+
+    assert risk_cache_info() == (0, 0, 4, 0)
+
+
+def test_missing_ca125_shares_key(sample_input):
+    sample_input = sample_input.astype(float)
+    adnex.predict_risks(sample_input.drop('s_ca_125'))
+    adnex.predict_risks(sample_input.replace({sample_input['s_ca_125']: np.nan}))
+
+    assert risk_cache_info().hits == 1
+
+
+def test_invalid_inputs_are_not_cached(sample_input):
+    invalid = sample_input.copy()
+    invalid['age'] = 200
+
+    for _ in range(2):
+        with pytest.raises(ValidationError):
+            adnex.predict_risks(invalid)
+    with pytest.raises(MissingVariableError):
+        adnex.predict_risks(sample_input.drop('age'))
+
+    assert risk_cache_info().currsize == 0
+
+
+def test_cache_key_distinguishes_types(sample_input):
+    as_float = sample_input.astype(float)
+    as_object = sample_input.astype(object)
+    as_object['ascites_present'] = bool(as_object['ascites_present'])
+
+    keys = {make_cache_key(row, with_ca125=True) for row in (sample_input, as_float, as_object)}
+
+    assert len(keys) == 3
+    assert make_cache_key(sample_input.drop('age'), with_ca125=True) is None
+    assert make_cache_key(pd.Series({**sample_input, 'age': [50]}), with_ca125=True) is None
+
+
+def test_disabled_cache(sample_input):
+    disable_risk_cache()
+
+    adnex.predict_risks(sample_input)
+
+    assert risk_cache_info() is None
+    clear_risk_cache()  # No-op when disabled
+
+    with pytest.raises(ValueError, match='maxsize must be positive'):
+        enable_risk_cache(maxsize=0)
+
+
+def test_cache_is_thread_safe(sample_frame):
+    rows = [row for _, row in sample_frame.iterrows()] * 20
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        risks = list(executor.map(adnex.predict_cancer_risk, rows))
+
+    np.testing.assert_allclose(risks, np.tile(adnex.predict_cancer_risk_frame(sample_frame), 20), rtol=1e-12)
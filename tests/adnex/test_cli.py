@@ -0,0 +1,66 @@
+""" Test cases for the command line interface. """
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import adnex
+from adnex.cli import main
+
+
+def test_score_command(tmp_path, sample_frame, capsys):
+    source, output = tmp_path / 'cohort.csv', tmp_path / 'scores.csv'
+    sample_frame.rename(columns={'age': 'age_years'}).assign(patient_id=range(10)).to_csv(source, index=False)
+
+    status = main(
+        [
+            'score',
+            str(source),
+            '-o',
+            str(output),
+            '--chunk-size',
+            '4',
+            '--id-columns',
+            'patient_id',
+            '--rename',
+            'age_years=age',
+            '--outputs',
+            'cancer_risk',
+        ]
+    )
+
+    assert status == 0
+    assert list(pd.read_csv(output).columns) == ['patient_id', 'cancer_risk']
+    assert 'Scored 10 of 10 rows in 3 chunks (0 quarantined).' in capsys.readouterr().err
+
+
+def test_score_command_reports_errors(tmp_path, sample_frame, capsys):
+    source = tmp_path / 'cohort.csv'
+    sample_frame.assign(age=200).to_csv(source, index=False)
+
+    assert main(['score', str(source), '-o', str(tmp_path / 'scores.csv')]) == 1
+    assert 'adnex: error: Invalid input in row 0' in capsys.readouterr().err
+
+    assert main(['score', str(source), '-o', str(tmp_path / 'scores.csv'), '--rename', 'age']) == 1
+    assert "Expected COLUMN=VARIABLE, got 'age'" in capsys.readouterr().err
+
+
+def test_score_command_requires_output(tmp_path):
+    with pytest.raises(SystemExit):
+        main(['score', str(tmp_path / 'cohort.csv')])
+
+
+def test_python_m_adnex(tmp_path, sample_frame):
+    source, output = tmp_path / 'cohort.csv', tmp_path / 'scores.csv'
+    sample_frame.to_csv(source, index=False)
+
+    subprocess.run(
+        [sys.executable, '-m', 'adnex', 'score', str(source), '-o', str(output)],
+        check=True,
+        cwd=Path(adnex.__file__).parents[1],
+    )
+
+    assert len(pd.read_csv(output)) == 10
@@ -0,0 +1,111 @@
+""" Test cases for blockwise scoring of NumPy and memory-mapped columns. """
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import adnex
+from adnex.columnar import as_column_arrays, load_columns, predict_arrays
+from adnex.variables import ADNEX_MODEL_VARIABLES
+from utils.exceptions import MissingVariableError, ValidationError
+
+VARIABLE_NAMES = list(ADNEX_MODEL_VARIABLES.values())
+
+
+@pytest.fixture(name='cohort')
+def fixture_cohort(sample_frame):
+    return pd.concat([sample_frame] * 7, ignore_index=True)
+
+
+@pytest.fixture(name='column_directory')
+def fixture_column_directory(tmp_path, cohort):
+    dtypes = {'s_ca_125': np.float32, 'age': np.uint8}
+    for name in VARIABLE_NAMES:
+        np.save(tmp_path / f'{name}.npy', cohort[name].to_numpy().astype(dtypes.get(name, np.int16)))
+    return tmp_path
+
+
+def test_predict_arrays_matches_predict_risks_frame(cohort):
+    columns = {name: cohort[name].to_numpy() for name in VARIABLE_NAMES}
+
+    result = predict_arrays(columns, block_size=8)
+
+    np.testing.assert_allclose(result, adnex.predict_risks_frame(cohort).to_numpy(), rtol=1e-12)
+
+
+def test_predict_arrays_memory_mapped(tmp_path, column_directory, cohort):
+    columns = load_columns(column_directory)
+    out = np.lib.format.open_memmap(tmp_path / 'risk.npy', mode='w+', dtype=np.float64, shape=(len(cohort),))
+
+    result = predict_arrays(columns, out=out, output='cancer_risk', block_size=16)
+    out.flush()
+
+    assert result is out
+    assert all(isinstance(column, np.memmap) for column in columns.values())
+    np.testing.assert_allclose(np.load(tmp_path / 'risk.npy'), adnex.predict_cancer_risk_frame(cohort), rtol=1e-12)
+
+
+def test_predict_arrays_structured_and_two_dimensional(cohort):
+    expected = predict_arrays({name: cohort[name].to_numpy() for name in VARIABLE_NAMES})
+    structured = cohort[VARIABLE_NAMES].to_records(index=False)
+
+    np.testing.assert_allclose(predict_arrays(structured, block_size=5), expected, rtol=1e-12)
+    np.testing.assert_allclose(predict_arrays(cohort[VARIABLE_NAMES].to_numpy(), block_size=5), expected, rtol=1e-12)
+
+
+def test_predict_arrays_without_ca125_column(cohort):
+    columns = {name: cohort[name].to_numpy() for name in VARIABLE_NAMES if name != 's_ca_125'}
+
+    result = predict_arrays(columns)
+
+    np.testing.assert_allclose(result, adnex.predict_risks_frame(cohort.drop(columns='s_ca_125')), rtol=1e-12)
+
+
+def test_predict_arrays_errors(cohort):
+    columns = {name: cohort[name].to_numpy().copy() for name in VARIABLE_NAMES}
+    columns['age'][[13, 40]] = 200
+
+    with pytest.raises(ValidationError, match='Invalid input in row 13: age=200 is out of range'):
+        predict_arrays(columns, block_size=8)
+
+    masked = predict_arrays(columns, output='cancer_risk', block_size=8, errors='mask')
+    expected = adnex.predict_cancer_risk_frame(pd.DataFrame(columns), errors='mask')
+
+    assert np.isnan(masked[[13, 40]]).all()
+    np.testing.assert_allclose(masked, expected, rtol=1e-12)
+
+
+def test_predict_arrays_invalid_arguments(cohort):
+    columns = {name: cohort[name].to_numpy() for name in VARIABLE_NAMES}
+
+    with pytest.raises(ValueError, match='out must have shape'):
+        predict_arrays(columns, out=np.empty(len(cohort)))
+    with pytest.raises(ValueError, match="output must be 'probabilities' or 'cancer_risk'"):
+        predict_arrays(columns, output='risk')
+    with pytest.raises(ValueError, match="errors must be 'raise' or 'mask'"):
+        predict_arrays(columns, errors='report')
+    with pytest.raises(ValueError, match='block_size must be positive'):
+        predict_arrays(columns, block_size=0)
+
+
+def test_as_column_arrays(cohort):
+    columns = {name: cohort[name].to_numpy() for name in VARIABLE_NAMES}
+
+    assert all(as_column_arrays(columns)[name] is columns[name] for name in VARIABLE_NAMES)
+
+    with pytest.raises(MissingVariableError):
+        as_column_arrays({'age': columns['age']})
+    with pytest.raises(ValueError, match='equal length'):
+        as_column_arrays({**columns, 'age': columns['age'][:5]})
+    with pytest.raises(ValueError, match='Expected an array with 9 columns'):
+        as_column_arrays(np.zeros((3, 4)))
+
+
+def test_load_columns_without_ca125(column_directory):
+    (column_directory / 's_ca_125.npy').unlink()
+    (column_directory / 'notes.npy').touch()
+
+    columns = load_columns(column_directory, mmap_mode=None)
+
+    assert set(columns) == set(VARIABLE_NAMES) - {'s_ca_125'}
+    assert not isinstance(columns['age'], np.memmap)
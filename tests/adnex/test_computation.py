@@ -0,0 +1,83 @@
+""" Tests for the probability kernel of the ADNEX model. """
+
+import numpy as np
+import pytest
+
+from adnex.batch import predict_batch
+from adnex.computation import compute_probabilities_from_z_values
+from adnex.engine import get_compiled_model
+
+
+@pytest.fixture(name='z_values')
+def fixture_z_values():
+    return np.random.default_rng(0).normal(scale=3.0, size=(1_000, 4))
+
+
+def _naive_softmax(z_values):
+    exp_z_values = np.exp(np.column_stack([np.zeros(len(z_values)), z_values]))
+    return exp_z_values / exp_z_values.sum(axis=1, keepdims=True)
+
+
+def test_matches_naive_softmax(z_values):
+    probabilities = compute_probabilities_from_z_values(z_values)
+
+    np.testing.assert_allclose(probabilities, _naive_softmax(z_values), rtol=1e-12)
+    np.testing.assert_allclose(probabilities.sum(axis=1), 1.0, rtol=1e-12)
+
+
+def test_log_probabilities(z_values):
+    log_probabilities = compute_probabilities_from_z_values(z_values, log=True)
+
+    np.testing.assert_allclose(log_probabilities, np.log(_naive_softmax(z_values)), rtol=1e-10, atol=1e-12)
+
+
+def test_extreme_z_values_do_not_overflow():
+    z_values = np.array([[1000.0, 0.0, -5.0, 2.0], [-1000.0, -2000.0, -800.0, -1e6], [710.0, 710.0, 710.0, 710.0]])
+
+    with np.errstate(over='raise', divide='raise', invalid='raise'):
+        probabilities = compute_probabilities_from_z_values(z_values)
+        log_probabilities = compute_probabilities_from_z_values(z_values, log=True)
+
+    np.testing.assert_allclose(probabilities.sum(axis=1), 1.0)
+    np.testing.assert_array_equal(probabilities[:2].argmax(axis=1), [1, 0])
+    np.testing.assert_allclose(probabilities[2], [0.0, 0.25, 0.25, 0.25, 0.25], atol=1e-300)
+    assert np.isfinite(log_probabilities).all()
+    np.testing.assert_allclose(log_probabilities[0], [-1000.0, 0.0, -1000.0, -1005.0, -998.0])
+
+
+def test_float32(z_values):
+    probabilities = compute_probabilities_from_z_values(z_values, dtype=np.float32)
+
+    assert probabilities.dtype == np.float32
+    np.testing.assert_allclose(probabilities, compute_probabilities_from_z_values(z_values), rtol=1e-5, atol=1e-7)
+
+
+def test_writes_into_out(z_values):
+    out = np.empty((len(z_values), 5), dtype=np.float32)
+
+    assert compute_probabilities_from_z_values(z_values, out=out) is out
+    np.testing.assert_allclose(out, compute_probabilities_from_z_values(z_values), rtol=1e-5, atol=1e-7)
+
+
+@pytest.mark.parametrize('out', [np.empty((1_000, 4)), np.empty((999, 5)), np.empty((1_000, 5), dtype=np.int64)])
+def test_invalid_out(z_values, out):
+    with pytest.raises(ValueError, match='out must be'):
+        compute_probabilities_from_z_values(z_values, out=out)
+
+
+def test_empty():
+    assert compute_probabilities_from_z_values(np.empty((0, 4)), log=True).shape == (0, 5)
+
+
+def test_predict_batch_float32(sample_frame):
+    prediction = predict_batch(sample_frame, dtype=np.float32)
+
+    assert prediction.probabilities.dtype == np.float32
+    np.testing.assert_allclose(prediction.probabilities, predict_batch(sample_frame).probabilities, rtol=1e-5)
+
+
+def test_predict_log_proba(sample_frame, sample_input):
+    model = get_compiled_model()
+
+    np.testing.assert_allclose(model.predict_log_proba(sample_frame), np.log(model.predict_proba(sample_frame)))
+    np.testing.assert_allclose(model.predict_log_proba(sample_input), np.log(model.predict_proba(sample_input)))
@@ -0,0 +1,73 @@
+""" Test cases for the deduplication of input rows. """
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from adnex.batch import predict_batch
+from adnex.dedup import pack_rows, take_rows, unique_rows
+
+
+@pytest.fixture(name='duplicated_frame')
+def fixture_duplicated_frame(sample_frame):
+    rng = np.random.default_rng(0)
+    return sample_frame.iloc[rng.integers(0, len(sample_frame), 500)].reset_index(drop=True)
+
+
+def test_pack_rows_identifies_equal_rows(duplicated_frame, sample_frame):
+    keys = pack_rows(duplicated_frame)
+    unique_keys = pack_rows(sample_frame)
+
+    assert keys.dtype == np.int64
+    assert len(set(unique_keys.tolist())) == len(sample_frame)
+    assert set(keys.tolist()) <= set(unique_keys.tolist())
+
+
+def test_pack_rows_distinguishes_every_variable(sample_input):
+    base = pd.DataFrame([sample_input] * 10)
+    for position, name in enumerate(base.columns):
+        base.loc[position, name] = (
+            1 - base.loc[position, name] if name.endswith(('_present', '_locules', '_center')) else 3
+        )
+    base.loc[9, 's_ca_125'] = np.nan
+
+    assert len(set(pack_rows(base).tolist())) == 10
+
+
+def test_pack_rows_without_ca125_column(sample_frame):
+    without = sample_frame.drop(columns='s_ca_125')
+    nan_ca125 = sample_frame.assign(s_ca_125=np.nan)
+
+    np.testing.assert_array_equal(pack_rows(without), pack_rows(nan_ca125))
+
+
+def test_pack_rows_rejects_out_of_range_values(sample_frame):
+    with pytest.raises(ValueError, match=r'age has values outside \[0, 110\]'):
+        pack_rows(sample_frame.assign(age=200))
+    with pytest.raises(ValueError, match='is_oncology_center'):
+        pack_rows(sample_frame.assign(is_oncology_center=-1))
+
+
+def test_unique_rows(duplicated_frame):
+    first, inverse = unique_rows(duplicated_frame)
+    unique = take_rows(duplicated_frame, first)
+
+    assert len(first) == 10
+    for name, column in unique.items():
+        np.testing.assert_array_equal(column[inverse], duplicated_frame[name].to_numpy())
+
+
+def test_predict_batch_deduplicate(duplicated_frame):
+    expected = predict_batch(duplicated_frame)
+
+    for engine in ('arithmetic', 'lookup'):
+        prediction = predict_batch(duplicated_frame, engine=engine, deduplicate=True)
+
+        np.testing.assert_allclose(prediction.probabilities, expected.probabilities, rtol=1e-12)
+        np.testing.assert_array_equal(prediction.with_ca125, expected.with_ca125)
+
+
+def test_predict_batch_deduplicate_empty(sample_frame):
+    prediction = predict_batch(sample_frame.iloc[:0], deduplicate=True)
+
+    assert prediction.probabilities.shape == (0, 5)
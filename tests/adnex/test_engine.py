@@ -0,0 +1,138 @@
+""" Tests for the compiled ADNEX model. """
+
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import adnex
+from adnex.engine import AdnexModel, get_compiled_model
+from adnex.variables import ADNEX_MODEL_VARIABLES, get_adnex_model_constants
+from utils.exceptions import MissingVariableError, ValidationError
+
+VARIABLE_NAMES = list(ADNEX_MODEL_VARIABLES.values())
+
+
+def test_get_compiled_model_is_shared():
+    assert get_compiled_model() is get_compiled_model()
+
+
+def test_coefficients_are_compiled_once():
+    model = get_compiled_model()
+
+    for array in (
+        model.coefficients_with_ca125,
+        model.coefficients_without_ca125,
+        model.shared_coefficients_with_ca125,
+        model.ca125_coefficients,
+    ):
+        assert array.dtype == np.float64
+        assert array.flags.c_contiguous
+        assert not array.flags.writeable
+
+    constants_with_ca125 = get_adnex_model_constants(with_ca125=True)
+    constants_without_ca125 = get_adnex_model_constants(with_ca125=False)
+
+    np.testing.assert_array_equal(model.coefficients_with_ca125, constants_with_ca125.to_numpy())
+    np.testing.assert_array_equal(model.coefficients_without_ca125, constants_without_ca125.to_numpy())
+    np.testing.assert_array_equal(model.ca125_coefficients, constants_with_ca125.loc['Log2(B)'])
+    assert model.predictors_with_ca125 == tuple(constants_with_ca125.index)
+
+
+def test_model_is_immutable():
+    model = get_compiled_model()
+
+    with pytest.raises(AttributeError, match='AdnexModel is immutable.'):
+        model.coefficients_with_ca125 = np.zeros((11, 4))
+    with pytest.raises(AttributeError, match='AdnexModel is immutable.'):
+        del model.ca125_coefficients
+    with pytest.raises(ValueError):
+        model.coefficients_without_ca125[0, 0] = 0.0
+
+
+def test_model_pickle_roundtrip(sample_frame):
+    model = pickle.loads(pickle.dumps(get_compiled_model()))
+
+    assert isinstance(model, AdnexModel)
+    assert repr(model).startswith('AdnexModel(predictors=')
+    np.testing.assert_array_equal(model.predict_proba(sample_frame), get_compiled_model().predict_proba(sample_frame))
+
+
+def test_predict_proba_frame_matches_predict_risks_frame(sample_frame):
+    expected = adnex.predict_risks_frame(sample_frame).to_numpy()
+
+    np.testing.assert_allclose(get_compiled_model().predict_proba(sample_frame), expected, rtol=1e-12)
+
+
+def test_predict_proba_single_patient_forms(sample_input, sample_namedtuple):
+    model = get_compiled_model()
+    expected = adnex.predict_risks(sample_input).to_numpy()
+    values = sample_input.to_dict()
+
+    for data in (values, sample_input, sample_namedtuple, sample_input[VARIABLE_NAMES].to_numpy(dtype=float)):
+        probabilities = model.predict_proba(data)
+        assert probabilities.shape == (5,)
+        np.testing.assert_allclose(probabilities, expected, rtol=1e-12)
+
+
+def test_predict_proba_single_patient_without_ca125(sample_input):
+    expected = adnex.predict_risks(sample_input.drop('s_ca_125')).to_numpy()
+
+    np.testing.assert_allclose(
+        get_compiled_model().predict_proba({**sample_input.to_dict(), 's_ca_125': None}), expected, rtol=1e-12
+    )
+
+
+def test_predict_proba_arrays(sample_frame):
+    model = get_compiled_model()
+    expected = model.predict_proba(sample_frame)
+
+    array = sample_frame[VARIABLE_NAMES].to_numpy(dtype=float)
+    structured = np.rec.fromarrays([sample_frame[name].to_numpy() for name in VARIABLE_NAMES], names=VARIABLE_NAMES)
+    columns = {name: sample_frame[name].to_numpy() for name in VARIABLE_NAMES}
+
+    np.testing.assert_array_equal(model.predict_proba(array), expected)
+    np.testing.assert_array_equal(model.predict_proba(np.asarray(structured)), expected)
+    np.testing.assert_array_equal(model.predict_proba(columns), expected)
+
+
+def test_predict_proba_invalid_array_shape():
+    with pytest.raises(ValueError, match='Expected an array with 9 columns'):
+        get_compiled_model().predict_proba(np.zeros((3, 8)))
+
+
+def test_decision_scores_and_predict_risk(sample_frame):
+    model = get_compiled_model()
+
+    z_values = model.decision_scores(sample_frame)
+    probabilities = model.predict_proba(sample_frame)
+
+    assert z_values.shape == (len(sample_frame), 4)
+    np.testing.assert_allclose(np.log(probabilities[:, 1:] / probabilities[:, [0]]), z_values, rtol=1e-10)
+    np.testing.assert_allclose(model.predict_risk(sample_frame), adnex.predict_cancer_risk_frame(sample_frame))
+    assert model.decision_scores(sample_frame.iloc[0]).shape == (4,)
+    assert isinstance(model.predict_risk(sample_frame.iloc[0]), float)
+
+
+def test_validation_errors(sample_frame):
+    model = get_compiled_model()
+    columns = {name: sample_frame[name].to_numpy() for name in VARIABLE_NAMES}
+    columns['age'] = columns['age'].copy()
+    columns['age'][6] = 120
+
+    with pytest.raises(ValidationError, match='Invalid input in row 6: age=120 is out of range.'):
+        model.predict_proba(columns)
+    with pytest.raises(MissingVariableError):
+        model.predict_proba(sample_frame.drop(columns='age'))
+
+
+def test_concurrent_predictions_are_consistent(sample_frame):
+    model = get_compiled_model()
+    expected = model.predict_proba(sample_frame)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: model.predict_proba(sample_frame), range(32)))
+
+    for result in results:
+        np.testing.assert_array_equal(result, expected)
@@ -0,0 +1,205 @@
+""" Tests for the evaluation of the predictions on a cohort with observed outcomes. """
+
+import itertools
+
+import numpy as np
+import pytest
+
+import adnex
+from adnex.evaluation import (
+    EvaluationAccumulator,
+    binary_auc,
+    calibration_curve,
+    discrimination,
+    net_benefit,
+    smoothed_calibration_curve,
+)
+from adnex.variables import ADNEX_MODEL_OUTPUT_CATEGORIES
+
+
+@pytest.fixture(name='cohort')
+def fixture_cohort():
+    # Probabilities rounded to two decimals, so that there are many ties
+    rng = np.random.default_rng(0)
+    probabilities = np.round(rng.dirichlet(np.ones(5), 400), 2)
+    outcomes = rng.integers(0, 5, 400)
+    return probabilities, outcomes
+
+
+def _pairwise_auc(scores, events):
+    positives, negatives = scores[events][:, np.newaxis], scores[~events]
+    return np.mean((positives > negatives) + 0.5 * (positives == negatives))
+
+
+def test_aucs_match_pairwise_comparisons(cohort):
+    probabilities, outcomes = cohort
+    result = discrimination(probabilities, outcomes)
+    risks = probabilities[:, 1:].sum(axis=1)
+
+    assert result.cancer_auc == pytest.approx(_pairwise_auc(risks, outcomes > 0), rel=1e-12)
+    assert binary_auc(risks, outcomes > 0) == pytest.approx(result.cancer_auc, rel=1e-12)
+    for category in range(5):
+        expected = _pairwise_auc(probabilities[:, category], outcomes == category)
+        assert result.one_vs_rest_auc[category] == pytest.approx(expected, rel=1e-12)
+
+
+def test_pdi_matches_all_sets_of_patients():
+    rng = np.random.default_rng(1)
+    probabilities = np.round(rng.dirichlet(np.ones(5), 40), 1)
+    outcomes = np.arange(40) % 5
+    result = discrimination(probabilities, outcomes)
+
+    # Every set of one patient per category, with ties for the highest probability shared
+    groups = [np.flatnonzero(outcomes == category) for category in range(5)]
+    expected = np.zeros(5)
+    for patients in itertools.product(*groups):
+        values = probabilities[list(patients)]
+        highest = values == values.max(axis=0)
+        expected += np.diag(highest) / highest.sum(axis=0)
+    expected /= np.prod([len(group) for group in groups])
+
+    np.testing.assert_allclose(result.pdi_per_category, expected, rtol=1e-12)
+    assert result.pdi == pytest.approx(expected.mean(), rel=1e-12)
+
+
+def test_perfect_and_missing_categories():
+    probabilities = np.eye(5)[[0, 1, 2, 3, 4, 0]]
+    result = discrimination(probabilities, [0, 1, 2, 3, 4, 0])
+
+    assert result.cancer_auc == 1.0 and result.pdi == pytest.approx(1.0)
+    np.testing.assert_array_equal(result.one_vs_rest_auc, 1.0)
+
+    without_metastatic = discrimination(probabilities[:4], [0, 1, 2, 3])
+    assert np.isnan(without_metastatic.one_vs_rest_auc[4]) and np.isnan(without_metastatic.pdi)
+
+
+def test_net_benefit_matches_counts(cohort):
+    probabilities, outcomes = cohort
+    risks, events = probabilities[:, 1:].sum(axis=1), outcomes > 0
+    thresholds = np.array([0.0, 0.25, 0.5, 0.75, 0.875])
+    result = net_benefit(risks, events, thresholds)
+
+    odds = thresholds / (1 - thresholds)
+    treated = risks[:, np.newaxis] >= thresholds
+    expected = (treated & events[:, np.newaxis]).sum(axis=0) - (treated & ~events[:, np.newaxis]).sum(axis=0) * odds
+    np.testing.assert_allclose(result.model, expected / len(risks), rtol=1e-12)
+    np.testing.assert_allclose(result.treat_all, events.mean() - (1 - events.mean()) * odds, rtol=1e-12)
+    assert result.model[0] == pytest.approx(result.treat_all[0])
+
+
+@pytest.mark.parametrize('strategy', ['quantile', 'uniform'])
+def test_calibration_curve(cohort, strategy):
+    probabilities, outcomes = cohort
+    risks, events = probabilities[:, 1:].sum(axis=1), outcomes > 0
+    curve = calibration_curve(risks, events, n_bins=4, strategy=strategy)
+
+    assert curve.counts.sum() == len(risks)
+    assert np.sum(curve.predicted * curve.counts) == pytest.approx(risks.sum())
+    assert np.sum(curve.observed * curve.counts) == pytest.approx(events.sum())
+    assert (np.diff(curve.predicted) > 0).all()
+    if strategy == 'uniform':
+        counts = np.bincount(np.minimum((risks * 4).astype(int), 3))
+        np.testing.assert_array_equal(curve.counts, counts[counts > 0])
+
+
+def test_smoothed_calibration_curve():
+    # Outcomes drawn from the predicted risks, so the model is calibrated
+    rng = np.random.default_rng(2)
+    risks = rng.uniform(0.05, 0.95, 200_000)
+    curve = smoothed_calibration_curve(risks, rng.random(len(risks)) < risks, points=[0.2, 0.5, 0.8], bandwidth=0.1)
+
+    np.testing.assert_allclose(curve.observed, [0.2, 0.5, 0.8], atol=0.02)
+    assert (curve.counts > 1000).all()
+    with pytest.raises(ValueError):
+        smoothed_calibration_curve(risks, risks > 0.5, points=[0.0, 0.5])
+
+
+def test_accumulator_merges_chunks(cohort):
+    probabilities, outcomes = cohort
+    whole, merged = EvaluationAccumulator(), EvaluationAccumulator()
+    whole.update(probabilities, outcomes)
+    for rows in np.array_split(np.arange(len(outcomes)), 3):
+        chunk = EvaluationAccumulator()
+        chunk.update(probabilities[rows], outcomes[rows])
+        merged.merge(chunk)
+
+    assert merged.n_rows == whole.n_rows == len(outcomes)
+    for expected, values in zip(whole.discrimination(), merged.discrimination()):
+        np.testing.assert_array_equal(values, expected)
+    with pytest.raises(ValueError, match='bins'):
+        merged.merge(EvaluationAccumulator(n_bins=10))
+
+
+def test_accumulator_matches_the_exact_metrics(cohort):
+    probabilities, outcomes = cohort
+    accumulator = EvaluationAccumulator()
+    accumulator.update(probabilities, outcomes)
+    risks, events = probabilities[:, 1:].sum(axis=1), outcomes > 0
+
+    # Only rows whose probabilities are closer than the bin width tie in the histograms
+    exact, binned = discrimination(probabilities, outcomes), accumulator.discrimination()
+    np.testing.assert_allclose(binned.one_vs_rest_auc, exact.one_vs_rest_auc, atol=1e-3)
+    assert binned.pdi == pytest.approx(exact.pdi, abs=1e-3)
+    assert binned.cancer_auc == pytest.approx(exact.cancer_auc, abs=1e-3)
+
+    # Thresholds at multiples of the bin width are exact
+    thresholds = np.array([0.25, 0.5, 0.75])
+    np.testing.assert_allclose(accumulator.net_benefit(thresholds).model, net_benefit(risks, events, thresholds).model)
+    curve = accumulator.calibration_curve(n_bins=4, strategy='uniform')
+    np.testing.assert_allclose(curve.predicted, calibration_curve(risks, events, 4, 'uniform').predicted, atol=1e-12)
+
+    benign = accumulator.calibration_curve('Benign', n_bins=1)
+    np.testing.assert_allclose(benign, [[probabilities[:, 0].mean()], [np.mean(outcomes == 0)], [400]])
+    assert accumulator.smoothed_calibration_curve(category=4).counts.shape == (99,)
+
+
+def test_predictions_of_the_package(sample_frame):
+    probabilities = adnex.predict_risks_frame(sample_frame)
+    outcomes = [ADNEX_MODEL_OUTPUT_CATEGORIES[code] for code in [0, 0, 1, 2, 3, 4, 0, 3, 0, 2]]
+    accumulator = EvaluationAccumulator()
+    accumulator.update(probabilities, outcomes)
+
+    exact = discrimination(probabilities, outcomes)
+    assert 0 <= exact.pdi <= 1 and accumulator.n_rows == 10
+    assert accumulator.discrimination().cancer_auc == pytest.approx(exact.cancer_auc, abs=0.05)
+
+
+def test_nan_rows_are_skipped(cohort):
+    probabilities, outcomes = cohort
+    with_nan = np.vstack([probabilities, np.full((1, 5), np.nan)])
+    result = discrimination(with_nan, np.append(outcomes, 0))
+
+    np.testing.assert_array_equal(result.one_vs_rest_auc, discrimination(probabilities, outcomes).one_vs_rest_auc)
+    assert binary_auc([0.2, np.nan, 0.8], [False, True, True]) == 1.0
+
+
+@pytest.mark.parametrize(
+    'probabilities, outcomes',
+    [
+        (np.full((2, 4), 0.25), [0, 1]),
+        (np.full((2, 5), 0.2), [0, 5]),
+        (np.full((2, 5), 0.2), ['Benign', 'Malignant']),
+        (np.full((2, 5), 0.2), [True, False]),
+        (np.full((2, 5), 0.2), [0, 1, 2]),
+    ],
+)
+def test_invalid_input(probabilities, outcomes):
+    with pytest.raises(ValueError):
+        discrimination(probabilities, outcomes)
+
+
+def test_invalid_arguments(cohort):
+    probabilities, outcomes = cohort
+    accumulator = EvaluationAccumulator()
+    accumulator.update(probabilities, outcomes)
+
+    with pytest.raises(ValueError):
+        EvaluationAccumulator(n_bins=0)
+    with pytest.raises(ValueError, match='category'):
+        accumulator.calibration_curve('Malignant')
+    with pytest.raises(ValueError, match='strategy'):
+        accumulator.calibration_curve(strategy='equal')
+    with pytest.raises(ValueError, match='thresholds'):
+        accumulator.net_benefit([0.5, 1.0])
+    with pytest.raises(ValueError, match='same length'):
+        binary_auc([0.1, 0.2], [True])
@@ -0,0 +1,136 @@
+""" Tests for the decomposition of the z-values into the contributions of the predictors. """
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import adnex
+from adnex.explain import DIFFERENTIABLE_VARIABLES, explain_contributions, iter_contributions, marginal_effects
+from adnex.transformation import transform_input_variables
+from adnex.variables import (
+    ADNEX_MODEL_PREDICTORS_WITH_CA125,
+    ADNEX_MODEL_PREDICTORS_WITHOUT_CA125,
+    get_adnex_model_coefficients,
+)
+from utils.exceptions import ValidationError
+
+
+def test_contributions_match_the_model(sample_frame):
+    result = explain_contributions(sample_frame)
+
+    assert result.contributions.shape == (10, 11, 4)
+    assert result.predictors == ADNEX_MODEL_PREDICTORS_WITH_CA125
+    np.testing.assert_array_equal(result.with_ca125, sample_frame['s_ca_125'].notna())
+    np.testing.assert_allclose(result.contributions.sum(axis=1), result.z_values, rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(result.probabilities, adnex.predict_risks_frame(sample_frame).to_numpy(), rtol=1e-12)
+
+
+def test_contributions_are_coefficient_times_transformed_value(sample_frame):
+    result = explain_contributions(sample_frame)
+
+    for row, (_, patient) in enumerate(sample_frame.iterrows()):
+        with_ca125 = not np.isnan(patient['s_ca_125'])
+        transformed = transform_input_variables(patient if with_ca125 else patient.drop('s_ca_125'))
+        predictors = ADNEX_MODEL_PREDICTORS_WITH_CA125 if with_ca125 else ADNEX_MODEL_PREDICTORS_WITHOUT_CA125
+        expected = transformed[list(predictors)].to_numpy()[:, np.newaxis] * get_adnex_model_coefficients(with_ca125)
+        positions = [ADNEX_MODEL_PREDICTORS_WITH_CA125.index(name) for name in predictors]
+
+        np.testing.assert_allclose(result.contributions[row, positions], expected, rtol=1e-12)
+        if not with_ca125:
+            assert not result.contributions[row, ADNEX_MODEL_PREDICTORS_WITH_CA125.index('Log2(B)')].any()
+
+
+def test_float32_and_chunks(sample_frame):
+    expected = explain_contributions(sample_frame)
+    chunked = explain_contributions(sample_frame, dtype=np.float32, chunk_size=3)
+
+    for values, expected_values in zip(chunked[:3], expected[:3]):
+        assert values.dtype == np.float32
+        np.testing.assert_allclose(values, expected_values, rtol=1e-6, atol=1e-6)
+    np.testing.assert_array_equal(chunked.with_ca125, expected.with_ca125)
+
+
+def test_iter_contributions(sample_frame):
+    expected = explain_contributions(sample_frame)
+    chunks = list(iter_contributions(sample_frame, chunk_size=4))
+
+    assert [len(chunk.z_values) for chunk in chunks] == [4, 4, 2]
+    np.testing.assert_array_equal(np.concatenate([chunk.contributions for chunk in chunks]), expected.contributions)
+
+
+@pytest.mark.parametrize('s_ca_125', [np.nan, 68.0])
+def test_single_variant_batches(sample_frame, s_ca_125):
+    data = sample_frame.assign(s_ca_125=s_ca_125)
+    result = explain_contributions(data)
+
+    assert result.with_ca125.all() == (not np.isnan(s_ca_125))
+    np.testing.assert_allclose(result.contributions.sum(axis=1), result.z_values, rtol=1e-12, atol=1e-12)
+
+
+def test_single_patient_and_empty_input(sample_input, sample_frame):
+    assert explain_contributions(sample_input).contributions.shape == (1, 11, 4)
+    assert explain_contributions(sample_frame.iloc[:0]).contributions.shape == (0, 11, 4)
+
+
+def test_validation(sample_frame):
+    invalid = sample_frame.copy()
+    invalid.loc[0, 'age'] = 200
+
+    with pytest.raises(ValidationError):
+        explain_contributions(invalid)
+    with pytest.raises(ValueError, match='chunk_size'):
+        explain_contributions(sample_frame, chunk_size=0)
+
+    assert explain_contributions(invalid, validate=False).contributions.shape == (10, 11, 4)
+
+
+def test_validated_frame(sample_frame):
+    validated = adnex.ValidatedAdnexFrame.validate(sample_frame)
+
+    np.testing.assert_array_equal(
+        explain_contributions(validated).contributions, explain_contributions(pd.DataFrame(sample_frame)).contributions
+    )
+
+
+def _finite_differences(data, variable, step):
+    # Central differences of the probabilities, with a step relative to the value of the variable
+    h = step * data[variable].to_numpy(dtype=float)
+    upper = adnex.predict_risks_frame(data.assign(**{variable: data[variable] + h}), validate=False).to_numpy()
+    lower = adnex.predict_risks_frame(data.assign(**{variable: data[variable] - h}), validate=False).to_numpy()
+    return (upper - lower) / (2 * h[:, np.newaxis])
+
+
+@pytest.mark.parametrize('variable', DIFFERENTIABLE_VARIABLES)
+def test_marginal_effects_match_finite_differences(sample_frame, variable):
+    effects = marginal_effects(sample_frame)
+    column = DIFFERENTIABLE_VARIABLES.index(variable)
+    expected = _finite_differences(sample_frame, variable, step=1e-5)
+
+    if variable == 's_ca_125':
+        assert np.isnan(effects.jacobian[~effects.with_ca125, :, column]).all()
+        rows = effects.with_ca125
+    else:
+        rows = slice(None)
+    np.testing.assert_allclose(effects.jacobian[rows, :, column], expected[rows], rtol=1e-6, atol=1e-10)
+    np.testing.assert_allclose(
+        effects.cancer_risk_gradient[rows, column], expected[rows, 1:].sum(axis=1), rtol=1e-6, atol=1e-10
+    )
+
+
+def test_marginal_effects_outputs(sample_frame):
+    effects = marginal_effects(sample_frame)
+
+    assert effects.jacobian.shape == (10, 5, 4)
+    assert effects.variables == DIFFERENTIABLE_VARIABLES
+    np.testing.assert_allclose(effects.probabilities, adnex.predict_risks_frame(sample_frame).to_numpy(), rtol=1e-12)
+    np.testing.assert_allclose(effects.cancer_risk, adnex.predict_cancer_risk_frame(sample_frame), rtol=1e-12)
+    # The probabilities sum to 1, so their derivatives sum to 0
+    np.testing.assert_allclose(np.nansum(effects.jacobian, axis=1), 0.0, atol=1e-15)
+
+
+def test_marginal_effects_of_a_single_patient_without_ca125(sample_input):
+    effects = marginal_effects(sample_input.drop('s_ca_125'))
+
+    assert effects.cancer_risk_gradient.shape == (1, 4)
+    assert np.isnan(effects.cancer_risk_gradient[0, 1])
+    assert np.isfinite(effects.cancer_risk_gradient[0, [0, 2, 3]]).all()
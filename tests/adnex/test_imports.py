@@ -0,0 +1,65 @@
+""" Test cases for the lazy imports of the package. """
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import adnex
+import adnex.variables
+from adnex.scalar import predict_patient
+
+
+def _run(code: str) -> str:
+    # Run in a fresh interpreter, so that the modules imported by the test session do not interfere
+    env = {**os.environ, 'PYTHONPATH': str(Path(adnex.__file__).parents[1])}
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True, env=env)
+    return result.stdout.strip()
+
+
+def test_import_does_not_import_pandas():
+    assert _run("import sys, adnex; print('pandas' in sys.modules)") == 'False'
+
+
+def test_predict_patient_does_not_import_pandas():
+    code = (
+        'import sys, adnex; '
+        "adnex.predict_patient(age=50, s_ca_125=100, max_lesion_diameter=50, max_solid_component=20, "
+        'more_than_10_locules=0, number_of_papillary_projections=0, acoustic_shadows_present=0, '
+        'ascites_present=0, is_oncology_center=1); '
+        "print('pandas' in sys.modules, 'adnex.model' in sys.modules)"
+    )
+    assert _run(code) == 'False False'
+
+
+def test_cli_help_does_not_import_pandas():
+    code = (
+        'import contextlib, io, sys\n'
+        'from adnex.cli import main\n'
+        'with contextlib.redirect_stdout(io.StringIO()), contextlib.suppress(SystemExit):\n'
+        "    main(['score', '--help'])\n"
+        "print('pandas' in sys.modules)"
+    )
+    assert _run(code) == 'False'
+
+
+def test_lazy_attributes():
+    assert adnex.predict_patient is predict_patient
+    assert set(adnex.__all__) <= set(dir(adnex))
+
+    with pytest.raises(AttributeError, match="no attribute 'not_a_function'"):
+        getattr(adnex, 'not_a_function')
+
+
+def test_lazy_model_constants():
+    constants = adnex.variables.ADNEX_MODEL_CONSTANTS_WITH_CA125
+
+    assert isinstance(constants, pd.DataFrame)
+    assert constants.shape == (11, 4)
+    assert adnex.variables.ADNEX_MODEL_CONSTANTS_WITHOUT_CA125.shape == (10, 4)
+
+    with pytest.raises(AttributeError, match="no attribute 'NOT_A_CONSTANT'"):
+        getattr(adnex.variables, 'NOT_A_CONSTANT')
@@ -0,0 +1,122 @@
+""" Test cases for the per-stage instrumentation of the prediction pipeline. """
+
+import cProfile
+import pstats
+
+import pytest
+
+import adnex
+from adnex.instrumentation import (
+    StageStats,
+    disable_instrumentation,
+    enable_instrumentation,
+    get_instrumentation,
+    instrument,
+    stage,
+)
+from utils.exceptions import ValidationError
+
+SCALAR_STAGES = [
+    'predict_risks',
+    'predict_risks.compute_probabilities',
+    'predict_risks.filter',
+    'predict_risks.transform_input_variables',
+    'predict_risks.validate_input',
+]
+
+
+def test_disabled_by_default(sample_input):
+    adnex.predict_risks(sample_input)
+
+    assert get_instrumentation() is None
+    assert stage('anything') is stage('anything else')
+
+
+def test_scalar_stages(sample_input):
+    invalid = sample_input.copy()
+    invalid['age'] = 200
+
+    with instrument() as instrumentation:
+        adnex.predict_risks(sample_input)
+        adnex.predict_cancer_risk(sample_input)
+        with pytest.raises(ValidationError):
+            adnex.predict_risks(invalid)
+
+    stats = instrumentation.stats()
+    assert list(stats) == SCALAR_STAGES
+    assert stats['predict_risks'].calls == 3
+    assert stats['predict_risks'].failures == 1
+    assert stats['predict_risks.validate_input'][:2] == (3, 1)
+    assert stats['predict_risks.compute_probabilities'].calls == 2
+    assert stats['predict_risks'].seconds >= stats['predict_risks.compute_probabilities'].seconds
+    assert get_instrumentation() is None
+
+
+def test_batch_stages(sample_frame):
+    invalid = sample_frame.copy()
+    invalid.loc[0, 'age'] = 200
+
+    with instrument() as instrumentation:
+        adnex.predict_risks_frame(sample_frame)
+        adnex.predict_risks_frame(invalid, errors='mask')
+
+    stats = instrumentation.stats()
+    n_rows = len(sample_frame)
+    assert stats['predict_risks_frame'] == StageStats(2, 0, 2 * n_rows, *stats['predict_risks_frame'][3:])
+    assert stats['predict_risks_frame.validate_input_frame'].rows == 2 * n_rows
+    assert stats['predict_risks_frame.score'].rows == 2 * n_rows - 1
+    assert stats['predict_batch.score_columns'].rows == 2 * n_rows - 1
+    assert stats['predict_batch.compute_probabilities_from_z_values'].calls == 2
+    assert stats['predict_risks_frame.assemble'].calls == 2
+
+
+def test_callbacks_and_exports(sample_frame):
+    events = []
+
+    with instrument(callbacks=[lambda *event: events.append(event)]) as instrumentation:
+        adnex.predict_risks_frame(sample_frame)
+
+    assert [name for name, *_ in events][-1] == 'predict_risks_frame'
+    assert all(seconds >= 0 and not failed for _, seconds, _, failed in events)
+
+    exported = instrumentation.as_dict()
+    assert exported['predict_risks_frame']['rows'] == len(sample_frame)
+    assert exported['predict_risks_frame']['mean_seconds'] == exported['predict_risks_frame']['seconds']
+
+    text = instrumentation.to_prometheus()
+    assert '# TYPE adnex_stage_seconds_total counter' in text
+    assert f'adnex_stage_rows_total{{stage="predict_risks_frame"}} {len(sample_frame)}' in text
+    assert 'adnex_stage_failures_total{stage="predict_batch.score_columns"} 0' in text
+
+    instrumentation.reset()
+    assert not instrumentation.stats()
+
+
+def test_profiler_only_covers_stages(sample_input):
+    def outside_the_pipeline():
+        return sum(range(1000))
+
+    profiler = cProfile.Profile()
+    with instrument(profiler=profiler):
+        outside_the_pipeline()
+        adnex.predict_risks(sample_input)
+
+    functions = {name for _, _, name in pstats.Stats(profiler).stats}
+    assert 'compute_probabilities' in functions
+    assert 'validate_input' in functions
+    assert 'outside_the_pipeline' not in functions
+
+
+def test_enable_and_disable(sample_input):
+    try:
+        instrumentation = enable_instrumentation()
+        with instrument() as inner:
+            adnex.predict_risks(sample_input)
+        assert get_instrumentation() is instrumentation
+        adnex.predict_risks(sample_input)
+    finally:
+        disable_instrumentation()
+
+    assert inner.stats()['predict_risks'].calls == 1
+    assert instrumentation.stats()['predict_risks'].calls == 1
+    assert get_instrumentation() is None
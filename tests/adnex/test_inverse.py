@@ -0,0 +1,108 @@
+""" Tests for the inverse threshold queries. """
+
+import numpy as np
+import pytest
+
+import adnex
+from adnex.inverse import SOLVABLE_VARIABLES, solve_risk_threshold
+from utils.exceptions import ValidationError
+
+
+@pytest.mark.parametrize('variable', SOLVABLE_VARIABLES)
+@pytest.mark.parametrize('threshold', [0.1, 0.5, 0.9])
+def test_risk_at_the_solution_equals_the_threshold(sample_frame, variable, threshold):
+    solution = solve_risk_threshold(sample_frame, variable, threshold)
+    reachable = solution.reachable
+
+    risks = adnex.predict_cancer_risk_frame(
+        sample_frame[reachable].assign(**{variable: solution.values[reachable]}), validate=False
+    )
+    np.testing.assert_allclose(risks, threshold, atol=1e-6)
+    assert np.isnan(solution.values[~reachable]).all()
+    assert (solution.direction[reachable] != 0).all() and not solution.direction[~reachable].any()
+
+
+def test_unreachable_rows_stay_on_one_side(sample_frame):
+    solution = solve_risk_threshold(sample_frame, 'age', 0.5)
+    below = solution.risk_at_bounds < 0.5
+
+    assert solution.reachable.any() and not solution.reachable.all()
+    np.testing.assert_array_equal(below[~solution.reachable, 0], below[~solution.reachable, 1])
+
+
+def test_crossing_direction_and_bounds(sample_frame):
+    solution = solve_risk_threshold(sample_frame, 's_ca_125', 0.5)
+    rows = np.flatnonzero(solution.reachable)
+
+    # The risk rises with CA-125 through the crossing, and the solution lies within the bounds
+    assert (solution.direction[rows] == 1).all()
+    assert ((solution.values[rows] >= 1) & (solution.values[rows] <= 10_000)).all()
+    np.testing.assert_allclose(
+        solution.risk_at_bounds[:, 1], adnex.predict_cancer_risk_frame(sample_frame.assign(s_ca_125=10_000)), rtol=1e-9
+    )
+
+
+def test_solid_component_stays_below_the_lesion_diameter(sample_frame):
+    solution = solve_risk_threshold(sample_frame, 'max_solid_component', 0.3)
+    reachable = solution.reachable
+
+    assert reachable.any()
+    assert (solution.values[reachable] <= sample_frame['max_lesion_diameter'][reachable]).all()
+
+
+@pytest.mark.parametrize(
+    'variable, bounds, empty',
+    [('max_solid_component', (250, 300), np.arange(10)), ('max_lesion_diameter', (1, 30), [0, 2, 3, 5, 7, 8])],
+)
+def test_rows_with_empty_bounds_are_unreachable(sample_frame, variable, bounds, empty):
+    # The solid component is at most the lesion diameter (below 250 in every row), and the lesion diameter at least the
+    # solid component (above 30 in the listed rows)
+    solution = solve_risk_threshold(sample_frame, variable, 0.5, bounds=bounds)
+
+    assert not solution.reachable[empty].any() and not solution.direction[empty].any()
+    assert np.isnan(solution.values[empty]).all() and np.isnan(solution.risk_at_bounds[empty]).all()
+    assert not np.isnan(np.delete(solution.risk_at_bounds, empty, axis=0)).any()
+
+
+def test_threshold_per_row_and_absent_variable(sample_frame):
+    thresholds = np.linspace(0.2, 0.6, len(sample_frame))
+    solution = solve_risk_threshold(sample_frame.drop(columns='age'), 'age', thresholds)
+    reachable = solution.reachable
+
+    risks = adnex.predict_cancer_risk_frame(
+        sample_frame[reachable].assign(age=solution.values[reachable]), validate=False
+    )
+    np.testing.assert_allclose(risks, thresholds[reachable], atol=1e-6)
+
+
+def test_custom_bounds_and_tolerance(sample_frame):
+    coarse = solve_risk_threshold(sample_frame, 'age', 0.5, tolerance=1.0)
+    narrow = solve_risk_threshold(sample_frame, 'age', 0.5, bounds=(55, 80))
+
+    np.testing.assert_array_equal(coarse.reachable, solve_risk_threshold(sample_frame, 'age', 0.5).reachable)
+    assert narrow.reachable.any()
+    assert np.nanmin(narrow.values) >= 55 and np.nanmax(narrow.values) <= 80
+
+
+@pytest.mark.parametrize(
+    'arguments',
+    [
+        {'variable': 'ascites_present', 'threshold': 0.5},
+        {'variable': 'age', 'threshold': 1.0},
+        {'variable': 'age', 'threshold': 0.5, 'grid_size': 1},
+        {'variable': 'age', 'threshold': 0.5, 'bounds': (50, 40)},
+        {'variable': 's_ca_125', 'threshold': 0.5, 'bounds': (0, 100)},
+    ],
+)
+def test_invalid_arguments(sample_frame, arguments):
+    with pytest.raises(ValueError):
+        solve_risk_threshold(sample_frame, **arguments)
+
+
+def test_validation(sample_frame):
+    invalid = sample_frame.copy()
+    invalid.loc[1, 'max_lesion_diameter'] = 500
+
+    with pytest.raises(ValidationError, match='Invalid input in row 1: max_lesion_diameter=500'):
+        solve_risk_threshold(invalid, 'age', 0.5)
+    assert solve_risk_threshold(invalid, 'max_lesion_diameter', 0.5).values.shape == (10,)
@@ -0,0 +1,98 @@
+""" Test cases for the lookup-table ADNEX engine. """
+
+import pickle
+
+import numpy as np
+import pytest
+
+from adnex.batch import predict_batch
+from adnex.constraints import MAX_AGE, MAX_CA_125, MAXIMAL_LESION_DIAMETER, MIN_AGE
+from adnex.engine import get_compiled_model
+from adnex.lookup import LookupTableModel, get_lookup_model
+
+
+@pytest.fixture(name='random_cohort')
+def fixture_random_cohort():
+    # Random valid patients, including the bounds of every variable
+    rng = np.random.default_rng(0)
+    n_rows = 20_000
+    lesion = rng.integers(1, MAXIMAL_LESION_DIAMETER + 1, n_rows)
+    lesion[:2] = (1, MAXIMAL_LESION_DIAMETER)
+    solid = rng.integers(0, lesion + 1)
+    solid[2:4] = (0, lesion[3])
+    age = rng.integers(MIN_AGE, MAX_AGE + 1, n_rows)
+    age[:2] = (MIN_AGE, MAX_AGE)
+    s_ca_125 = np.where(rng.random(n_rows) < 0.3, np.nan, rng.integers(1, MAX_CA_125 + 1, n_rows))
+    s_ca_125[:2] = (1, MAX_CA_125)
+
+    return {
+        'age': age,
+        's_ca_125': s_ca_125,
+        'max_lesion_diameter': lesion,
+        'max_solid_component': solid,
+        'more_than_10_locules': rng.integers(0, 2, n_rows),
+        'number_of_papillary_projections': rng.integers(0, 5, n_rows),
+        'acoustic_shadows_present': rng.integers(0, 2, n_rows),
+        'ascites_present': rng.integers(0, 2, n_rows),
+        'is_oncology_center': rng.integers(0, 2, n_rows),
+    }
+
+
+def test_lookup_matches_arithmetic(random_cohort):
+    expected_z_values, expected_with_ca125 = get_compiled_model().score_columns(random_cohort)
+
+    z_values, with_ca125 = get_lookup_model().score_columns(random_cohort)
+
+    np.testing.assert_allclose(z_values, expected_z_values, rtol=1e-12, atol=1e-12)
+    np.testing.assert_array_equal(with_ca125, expected_with_ca125)
+
+
+def test_lookup_input_types(random_cohort, sample_frame):
+    expected, _ = get_lookup_model().score_columns(random_cohort)
+    as_floats = {name: column.astype(np.float64) for name, column in random_cohort.items()}
+    as_objects = {name: column.astype(object) for name, column in random_cohort.items()}
+
+    np.testing.assert_array_equal(get_lookup_model().score_columns(as_floats)[0], expected)
+    np.testing.assert_array_equal(get_lookup_model().score_columns(as_objects)[0], expected)
+
+    # DataFrame with NaN CA-125, and no CA-125 column at all
+    for data in (sample_frame, sample_frame.drop(columns='s_ca_125')):
+        np.testing.assert_allclose(
+            get_lookup_model().score_columns(data)[0], get_compiled_model().score_columns(data)[0], rtol=1e-12
+        )
+
+
+def test_predict_batch_engine(sample_frame):
+    expected = predict_batch(sample_frame)
+
+    prediction = predict_batch(sample_frame, engine='lookup')
+
+    np.testing.assert_allclose(prediction.probabilities, expected.probabilities, rtol=1e-12)
+    np.testing.assert_array_equal(prediction.with_ca125, expected.with_ca125)
+
+    with pytest.raises(ValueError, match="engine must be 'arithmetic' or 'lookup'"):
+        predict_batch(sample_frame, engine='tables')
+
+
+def test_lookup_model_is_shared_and_immutable():
+    model = get_lookup_model()
+
+    assert model is get_lookup_model()
+    assert isinstance(pickle.loads(pickle.dumps(model)), LookupTableModel)
+    assert not model.diameter_table.flags.writeable
+    assert repr(model) == 'LookupTableModel(table_size=5.8 MiB)'
+
+    with pytest.raises(AttributeError, match='immutable'):
+        model.age_table = None
+    with pytest.raises(AttributeError, match='immutable'):
+        del model.age_table
+
+
+def test_lookup_tables_shapes():
+    model = get_lookup_model()
+
+    assert model.age_table.shape == (2, MAX_AGE + 1, 4)
+    assert model.diameter_table.shape == (2 * (MAXIMAL_LESION_DIAMETER + 1) ** 2, 4)
+    assert model.categorical_table.shape == (2, 80, 4)
+    assert model.ca125_table.shape == (MAX_CA_125 + 2, 4)
+    assert not model.ca125_table[-1].any()
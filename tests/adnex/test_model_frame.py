@@ -0,0 +1,118 @@
+""" Test cases for the vectorized DataFrame functions. """
+
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import adnex
+from adnex.exceptions import ADNEXModelError
+from adnex.variables import ADNEX_MODEL_OUTPUT_CATEGORIES
+from utils.exceptions import MissingVariableError, ValidationError
+
+
+def test_predict_risks_frame_matches_row_path(sample_frame):
+    """Test that the batch probabilities match the per-row probabilities."""
+    expected = sample_frame.apply(adnex.predict_risks, axis=1)
+
+    calculated = adnex.predict_risks_frame(sample_frame)
+
+    assert list(calculated.columns) == ADNEX_MODEL_OUTPUT_CATEGORIES
+    np.testing.assert_allclose(calculated.to_numpy(), expected.to_numpy(), rtol=1e-12)
+
+
+def test_predict_cancer_risk_frame_matches_row_path(sample_frame):
+    """Test that the batch risks of cancer match the per-row risks of cancer."""
+    expected = sample_frame.apply(adnex.predict_cancer_risk, axis=1)
+
+    calculated = adnex.predict_cancer_risk_frame(sample_frame)
+
+    assert isinstance(calculated, pd.Series)
+    np.testing.assert_allclose(calculated.to_numpy(), expected.to_numpy(), rtol=1e-12)
+
+
+def test_predict_risks_frame_keeps_index(sample_frame):
+    """Test that the output is aligned with the input index."""
+    data = sample_frame.set_index(pd.Index(list('abcdefghij'), name='patient'))
+
+    calculated = adnex.predict_risks_frame(data)
+
+    pd.testing.assert_index_equal(calculated.index, data.index)
+
+
+def test_predict_risks_frame_without_ca125_column(sample_frame):
+    """Test that all rows are scored without CA-125 when the column is absent."""
+    data = sample_frame.drop(columns='s_ca_125')
+    expected = data.apply(adnex.predict_risks, axis=1)
+
+    calculated = adnex.predict_risks_frame(data)
+
+    np.testing.assert_allclose(calculated.to_numpy(), expected.to_numpy(), rtol=1e-12)
+
+
+def test_predict_risks_frame_ignores_extra_columns(sample_frame):
+    data = sample_frame.assign(patient_id=range(len(sample_frame)), comment='text')
+
+    pd.testing.assert_frame_equal(adnex.predict_risks_frame(data), adnex.predict_risks_frame(sample_frame))
+
+
+def test_predict_risks_frame_empty(sample_frame):
+    calculated = adnex.predict_risks_frame(sample_frame.iloc[:0])
+
+    assert calculated.shape == (0, len(ADNEX_MODEL_OUTPUT_CATEGORIES))
+
+
+def test_predict_risks_frame_missing_columns(sample_frame):
+    with pytest.raises(MissingVariableError, match="'age'"):
+        adnex.predict_risks_frame(sample_frame.drop(columns='age'))
+
+
+def test_predict_risks_frame_invalid_row(sample_frame):
+    """Test that the first invalid row is reported with the per-row message."""
+    data = sample_frame.copy()
+    data.loc[7, 'max_solid_component'] = 81
+
+    with pytest.raises(
+        ValidationError,
+        match='Invalid input in row 7: max_solid_component=81 cannot exceed max_lesion_diameter=80.',
+    ):
+        adnex.predict_risks_frame(data)
+
+
+def test_predict_risks_frame_unexpected_error(sample_frame):
+    with patch('adnex.model.predict_batch') as mock_transform:
+        mock_transform.side_effect = Exception('Unexpected error during transformation')
+
+        with pytest.raises(ADNEXModelError, match='An unexpected error occurred while processing the ADNEX model.'):
+            adnex.predict_risks_frame(sample_frame)
+
+
+def test_predict_risks_frame_include_variant(sample_frame):
+    calculated = adnex.predict_risks_frame(sample_frame, include_variant=True)
+
+    assert list(calculated.columns) == ADNEX_MODEL_OUTPUT_CATEGORIES + ['with_ca125']
+    pd.testing.assert_series_equal(calculated['with_ca125'], sample_frame['s_ca_125'].notna(), check_names=False)
+
+
+def test_predict_risks_frame_mask_invalid_rows(sample_frame):
+    """Test that invalid rows are skipped with NaN probabilities instead of raising."""
+    data = sample_frame.astype({'age': object})
+    data.loc[2, 'age'] = 'invalid'
+    data.loc[5, 'age'] = 200
+
+    calculated = adnex.predict_risks_frame(data, include_variant=True, errors='mask')
+    risks = adnex.predict_cancer_risk_frame(data, errors='mask')
+
+    valid = ~data.index.isin([2, 5])
+    expected = adnex.predict_risks_frame(sample_frame[valid], include_variant=True)
+    assert calculated.loc[~valid, ADNEX_MODEL_OUTPUT_CATEGORIES].isna().all().all()
+    assert not calculated.loc[~valid, 'with_ca125'].any()
+    pd.testing.assert_frame_equal(calculated[valid], expected)
+    assert risks[~valid].isna().all()
+    assert risks[valid].notna().all()
+
+
+def test_predict_risks_frame_invalid_errors_argument(sample_frame):
+    with pytest.raises(ValueError, match="errors must be 'raise' or 'mask', got 'report'."):
+        adnex.predict_risks_frame(sample_frame, errors='report')
@@ -0,0 +1,95 @@
+""" Test cases for multi-core scoring with shared memory. """
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import adnex
+from adnex.batch import predict_batch
+from adnex.parallel import ParallelScorer, predict_batch_parallel, resolve_n_jobs
+
+
+@pytest.fixture(name='large_frame')
+def fixture_large_frame(sample_frame):
+    return pd.concat([sample_frame] * 30, ignore_index=True)
+
+
+def test_parallel_matches_serial(large_frame):
+    expected = predict_batch(large_frame)
+
+    with ParallelScorer(n_jobs=3, min_shard_size=50) as scorer:
+        for data in (large_frame, {name: large_frame[name].to_numpy() for name in large_frame.columns}):
+            prediction = scorer.predict_batch(data)
+
+            np.testing.assert_array_equal(prediction.probabilities, expected.probabilities)
+            np.testing.assert_array_equal(prediction.with_ca125, expected.with_ca125)
+
+
+def test_parallel_results_do_not_depend_on_n_jobs(large_frame):
+    results = [predict_batch_parallel(large_frame, n_jobs=n_jobs, min_shard_size=10) for n_jobs in (1, 2, 4)]
+
+    for prediction in results[1:]:
+        np.testing.assert_array_equal(prediction.probabilities, results[0].probabilities)
+
+
+def test_parallel_without_ca125_column(large_frame):
+    data = large_frame.drop(columns='s_ca_125')
+
+    prediction = predict_batch_parallel(data, n_jobs=2, min_shard_size=50)
+
+    np.testing.assert_array_equal(prediction.probabilities, predict_batch(data).probabilities)
+    assert not prediction.with_ca125.any()
+
+
+def test_shards():
+    scorer = ParallelScorer(n_jobs=4, min_shard_size=10)
+
+    assert scorer.shards(100) == [(0, 25), (25, 50), (50, 75), (75, 100)]
+    assert scorer.shards(25) == [(0, 12), (12, 25)]
+    assert scorer.shards(5) == [(0, 5)]
+    assert scorer.shards(0) == [(0, 0)]
+
+
+def test_small_batches_do_not_start_workers(sample_frame):
+    with ParallelScorer(n_jobs=4) as scorer:
+        scorer.predict_batch(sample_frame)
+
+        assert scorer._executor is None  # pylint: disable=protected-access
+
+
+def test_shared_memory_is_released(large_frame):
+    if not os.path.isdir('/dev/shm'):
+        pytest.skip('Shared memory blocks are not listed in /dev/shm on this platform.')
+    before = set(os.listdir('/dev/shm'))
+
+    predict_batch_parallel(large_frame, n_jobs=2, min_shard_size=50)
+
+    assert set(os.listdir('/dev/shm')) == before
+
+
+def test_resolve_n_jobs():
+    assert resolve_n_jobs(3) == 3
+    assert resolve_n_jobs(-1) == os.cpu_count()
+    assert resolve_n_jobs(-(os.cpu_count() + 10)) == 1
+
+    with pytest.raises(ValueError, match='n_jobs must not be zero'):
+        resolve_n_jobs(0)
+    with pytest.raises(ValueError, match='min_shard_size must be positive'):
+        ParallelScorer(min_shard_size=0)
+
+
+def test_frame_functions_with_n_jobs(large_frame):
+    large_frame.loc[5, 'age'] = 200
+
+    result = adnex.predict_risks_frame(large_frame, errors='mask', n_jobs=2)
+
+    pd.testing.assert_frame_equal(result, adnex.predict_risks_frame(large_frame, errors='mask'))
+    pd.testing.assert_series_equal(
+        adnex.predict_cancer_risk_frame(large_frame, errors='mask', n_jobs=-1),
+        adnex.predict_cancer_risk_frame(large_frame, errors='mask'),
+    )
+
+    with pytest.raises(ValueError, match='n_jobs must not be zero'):
+        adnex.predict_risks_frame(large_frame, n_jobs=0)
@@ -4,9 +4,9 @@ import numpy as np
 import pandas as pd
 import pytest
 
-from adnex.computation import compute_probabilities
-from adnex.transformation import transform_input_variables
-from adnex.variables import ADNEX_MODEL_OUTPUT_CATEGORIES
+from adnex.computation import compute_probabilities, compute_probabilities_array
+from adnex.transformation import transform_input_columns, transform_input_variables
+from adnex.variables import ADNEX_MODEL_OUTPUT_CATEGORIES, get_adnex_model_constants
 
 
 def test_transform_input_variables_with_ca125():
@@ -76,3 +76,37 @@ def test_compute_probabilities():
     assert pytest.approx(probabilities.sum()) == 1.0
     for category in ADNEX_MODEL_OUTPUT_CATEGORIES:
         assert category in probabilities.index
+
+
+@pytest.mark.parametrize('with_ca125', [True, False])
+def test_transform_input_columns_matches_row_transform(sample_frame, with_ca125):
+    data = sample_frame.dropna() if with_ca125 else sample_frame.drop(columns='s_ca_125')
+    predictors = get_adnex_model_constants(with_ca125).index
+
+    transformed = transform_input_columns(data, with_ca125=with_ca125)
+
+    expected = np.vstack([transform_input_variables(row).reindex(predictors) for _, row in data.iterrows()])
+    assert transformed.dtype == np.float64
+    np.testing.assert_allclose(transformed, expected)
+
+
+def test_transform_input_columns_from_dict_of_arrays(sample_frame):
+    columns = {name: sample_frame[name].to_numpy() for name in sample_frame.columns}
+
+    transformed = transform_input_columns(columns, with_ca125=False)
+
+    np.testing.assert_array_equal(transformed, transform_input_columns(sample_frame, with_ca125=False))
+
+
+@pytest.mark.parametrize('with_ca125', [True, False])
+def test_compute_probabilities_array_matches_series(sample_frame, with_ca125):
+    data = sample_frame.dropna() if with_ca125 else sample_frame.drop(columns='s_ca_125')
+    transformed = transform_input_columns(data, with_ca125=with_ca125)
+    predictors = get_adnex_model_constants(with_ca125).index
+
+    probabilities = compute_probabilities_array(transformed, with_ca125=with_ca125)
+
+    expected = [compute_probabilities(pd.Series(row, index=predictors), with_ca125=with_ca125) for row in transformed]
+    assert probabilities.shape == (len(data), len(ADNEX_MODEL_OUTPUT_CATEGORIES))
+    np.testing.assert_allclose(probabilities, np.vstack(expected), rtol=1e-12)
+    np.testing.assert_allclose(probabilities.sum(axis=1), 1.0)
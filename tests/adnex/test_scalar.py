@@ -0,0 +1,109 @@
+""" Test cases for the pandas-free single-patient fast path. """
+
+import re
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+import adnex
+from adnex.exceptions import ADNEXModelError
+from adnex.scalar import AdnexResult, predict_patient
+from adnex.variables import ADNEX_MODEL_OUTPUT_CATEGORIES
+from utils.exceptions import MissingVariableError, ValidationError
+
+
+def test_predict_patient_matches_predict_risks(sample_frame):
+    for _, row in sample_frame.iterrows():
+        result = predict_patient(row.to_dict())
+
+        np.testing.assert_allclose(list(result), adnex.predict_risks(row).to_numpy(), rtol=1e-12)
+        assert result.cancer_risk == pytest.approx(adnex.predict_cancer_risk(row), rel=1e-12)
+        assert result.with_ca125 == (not np.isnan(row['s_ca_125']))
+
+
+def test_predict_patient_input_forms(sample_input, sample_namedtuple):
+    values = sample_input.to_dict()
+    expected = list(predict_patient(values))
+
+    assert list(predict_patient(**values)) == expected
+    assert list(predict_patient(sample_namedtuple)) == expected
+    assert list(predict_patient({**values, 'age': 30}, age=46)) == expected
+    assert list(predict_patient({**values, 'extra': 'ignored'})) == expected
+
+
+@pytest.mark.parametrize('s_ca_125', [None, float('nan'), np.nan])
+def test_predict_patient_without_ca125(sample_input, s_ca_125):
+    values = sample_input.drop('s_ca_125').to_dict()
+
+    result = predict_patient(values, s_ca_125=s_ca_125)
+
+    assert not result.with_ca125
+    assert list(result) == list(predict_patient(values))
+    np.testing.assert_allclose(list(result), adnex.predict_risks(sample_input.drop('s_ca_125')), rtol=1e-12)
+
+
+def test_predict_patient_accepts_integer_floats_and_numpy_types(sample_input):
+    values = sample_input.to_dict()
+
+    result = predict_patient({name: float(value) for name, value in values.items()}, ascites_present=np.int64(1))
+
+    np.testing.assert_allclose(list(result), list(predict_patient(values)), rtol=1e-15)
+
+
+@pytest.mark.parametrize(
+    'var_name, value',
+    [
+        ('age', 9),
+        ('age', 'invalid'),
+        ('age', 46.5),
+        ('age', np.nan),
+        ('s_ca_125', -1),
+        ('s_ca_125', 10_001),
+        ('max_lesion_diameter', 301),
+        ('max_solid_component', 89),
+        ('number_of_papillary_projections', 5),
+        ('acoustic_shadows_present', 2),
+    ],
+)
+def test_predict_patient_validation_matches_predict_risks(sample_input, var_name, value):
+    row = sample_input.astype(object)
+    row[var_name] = value
+
+    with pytest.raises(ValidationError) as expected:
+        adnex.predict_risks(row)
+
+    with pytest.raises(ValidationError, match=re.escape(str(expected.value))):
+        predict_patient(row.to_dict())
+
+
+def test_predict_patient_missing_variables(sample_input):
+    with pytest.raises(MissingVariableError, match="{'age', 'max_lesion_diameter'}"):
+        predict_patient(sample_input.drop(['age', 'max_lesion_diameter']).to_dict())
+
+
+def test_predict_patient_zero_lesion_diameter_matches_predict_risks(sample_input):
+    row = sample_input.copy()
+    row[['max_lesion_diameter', 'max_solid_component']] = 0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expected = adnex.predict_risks(row)
+
+    np.testing.assert_array_equal(list(predict_patient(row.to_dict())), expected.to_numpy())
+
+
+def test_predict_patient_unexpected_error(sample_input):
+    with patch('adnex.scalar._compute_probabilities') as mock_compute:
+        mock_compute.side_effect = Exception('Unexpected error during computation')
+
+        with pytest.raises(ADNEXModelError, match='An unexpected error occurred while processing the ADNEX model.'):
+            predict_patient(sample_input.to_dict())
+
+
+def test_adnex_result():
+    result = AdnexResult((0.5, 0.1, 0.2, 0.15, 0.05), with_ca125=True)
+
+    assert result.cancer_risk == pytest.approx(0.5)
+    assert result.as_dict() == dict(zip(ADNEX_MODEL_OUTPUT_CATEGORIES, (0.5, 0.1, 0.2, 0.15, 0.05)))
+    assert repr(result) == 'AdnexResult((0.500000, 0.100000, 0.200000, 0.150000, 0.050000), with_ca125=True)'
+    assert not hasattr(result, '__dict__')
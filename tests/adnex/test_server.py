@@ -0,0 +1,162 @@
+""" Test cases for the HTTP scoring server. """
+
+import json
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import adnex
+from adnex.cli import build_parser
+from adnex.instrumentation import instrument, stage
+from adnex.server import AdnexServer, ServerMetrics
+
+
+@pytest.fixture(name='server')
+def fixture_server():
+    with AdnexServer(port=0, workers=2, max_wait=0.005) as server:
+        yield server
+
+
+@pytest.fixture(name='rows')
+def fixture_rows(sample_frame):
+    # JSON-serializable rows, with null for a missing CA-125
+    return [json.loads(row.to_json()) for _, row in sample_frame.iterrows()]
+
+
+def _request(server, path, body=None, content_type='application/json'):
+    request = urllib.request.Request(server.url + path, data=body, headers={'Content-Type': content_type})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, response.read().decode()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read().decode()
+
+
+def test_predict_single_row(server, rows):
+    status, body = _request(server, '/predict', json.dumps(rows[0]).encode())
+    result = json.loads(body)
+
+    expected = adnex.predict_patient(rows[0])
+    assert status == 200
+    assert result['cancer_risk'] == pytest.approx(expected.cancer_risk, rel=1e-12)
+    assert [result[name] for name in expected.as_dict()] == pytest.approx(list(expected), rel=1e-12)
+    assert result['with_ca125'] == expected.with_ca125
+
+
+def test_predict_invalid_row(server, rows):
+    status, body = _request(server, '/predict', json.dumps({**rows[0], 'age': 200}).encode())
+
+    assert status == 422
+    assert json.loads(body) == {
+        'error': 'age=200 is out of range. Must be between 10 and 110.',
+        'error_type': 'ValidationError',
+    }
+
+
+def test_predict_array_and_json_lines(server, rows):
+    data = [*rows, {**rows[0], 'ascites_present': 2}, {'age': 40}, 'not a row']
+    lines = ''.join(json.dumps(row) + '\n' for row in data).encode()
+
+    status, body = _request(server, '/predict', json.dumps(data).encode())
+    lines_status, lines_body = _request(server, '/predict', lines, 'application/x-ndjson')
+
+    results = json.loads(body)
+    assert status == lines_status == 200
+    assert [json.loads(line) for line in lines_body.splitlines()] == results
+    for row, result in zip(rows, results):
+        assert result['cancer_risk'] == pytest.approx(adnex.predict_patient(row).cancer_risk, rel=1e-12)
+    assert [result['error_type'] for result in results[len(rows) :]] == [
+        'ValidationError',
+        'MissingVariableError',
+        'ValidationError',
+    ]
+
+
+def test_bad_requests(server):
+    assert _request(server, '/predict', b'{"age": ')[0] == 400
+    assert _request(server, '/score', b'{}')[0] == 404
+    assert _request(server, '/unknown')[0] == 404
+    assert _request(server, '/health') == (200, '{"status": "ok"}')
+
+
+def test_concurrent_clients_are_batched(server, rows):
+    bodies = [json.dumps(row).encode() for row in rows] * 10
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        responses = list(executor.map(lambda body: _request(server, '/predict', body), bodies))
+
+    assert all(status == 200 for status, _ in responses)
+    risks = [json.loads(body)['cancer_risk'] for _, body in responses]
+    assert risks == pytest.approx([adnex.predict_patient(row).cancer_risk for row in rows] * 10, rel=1e-12)
+    assert server.scorer.stats().n_batches < len(bodies)
+
+
+def test_metrics(server, rows):
+    _request(server, '/predict', json.dumps(rows).encode())
+    _request(server, '/predict', json.dumps({**rows[0], 'age': 200, 'max_solid_component': 1000}).encode())
+
+    status, body = _request(server, '/metrics')
+    samples = dict(line.rsplit(' ', 1) for line in body.splitlines() if not line.startswith('#'))
+
+    assert status == 200
+    assert samples['adnex_http_requests_total{path="/predict",status="200"}'] == '1'
+    assert samples['adnex_http_requests_total{path="/predict",status="422"}'] == '1'
+    assert samples['adnex_rows_total{outcome="scored"}'] == str(len(rows))
+    assert samples['adnex_rows_total{outcome="invalid"}'] == '1'
+    assert samples['adnex_validation_failures_total{variable="age"}'] == '1'
+    assert samples['adnex_validation_failures_total{variable="max_solid_component"}'] == '1'
+    assert samples['adnex_batch_size_bucket{le="+Inf"}'] == samples['adnex_batch_size_count']
+    assert samples['adnex_batch_size_sum'] == str(len(rows) + 1)
+    assert float(samples['adnex_request_latency_seconds{quantile="0.99"}']) > 0
+    assert samples['adnex_queue_pending'] == '0'
+
+
+def test_metrics_label_unknown_paths_as_other(server):
+    for path in ('/health?client=1', '/unknown', '/predict?id=%22x%22'):
+        _request(server, path)
+
+    _, body = _request(server, '/metrics')
+    requests = [line for line in body.splitlines() if line.startswith('adnex_http_requests_total{')]
+    labels = {line.split('{', 1)[1].split('}')[0] for line in requests}
+
+    assert labels == {'path="other",status="404"'}
+
+
+def test_metric_labels_are_escaped():
+    metrics = ServerMetrics()
+    metrics.validation_failures['a"b\\c\nd'] += 1
+    body = metrics.render(adnex.AsyncAdnexScorer().stats(), {})
+
+    assert 'adnex_validation_failures_total{variable="a\\"b\\\\c\\nd"} 1' in body
+    with instrument() as instrumentation:
+        with stage('quoted "stage"\n'):
+            pass
+    assert 'stage="quoted \\"stage\\"\\n"' in instrumentation.to_prometheus()
+
+
+def test_metrics_include_stage_timings(server, rows):
+    with instrument():
+        _request(server, '/predict', json.dumps(rows).encode())
+        _, body = _request(server, '/metrics')
+
+    assert f'adnex_stage_rows_total{{stage="predict_batch.score_columns"}} {len(rows)}' in body
+    assert 'adnex_stage_' not in _request(server, '/metrics')[1]
+
+
+def test_overloaded_server_rejects_requests(rows):
+    with AdnexServer(port=0, max_pending=1, max_wait=0.05) as server:
+        status, body = _request(server, '/predict', json.dumps(rows * 5).encode())
+
+    errors = [result.get('error_type') for result in json.loads(body)]
+    assert status == 200
+    assert 'ScorerOverloadedError' in errors
+
+
+def test_serve_command_arguments():
+    args = build_parser().parse_args(['serve', '--port', '0', '--workers', '4', '--max-wait-ms', '5'])
+
+    assert (args.port, args.workers, args.max_wait_ms, args.max_batch_size) == (0, 4, 5.0, 512)
+    assert not args.instrument
+    assert build_parser().parse_args(['serve', '--instrument']).instrument
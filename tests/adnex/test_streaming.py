@@ -0,0 +1,177 @@
+""" Test cases for chunked scoring of files. """
+
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import adnex
+from adnex.streaming import infer_file_format, read_chunks, score_file
+from utils.exceptions import MissingVariableError, ValidationError
+
+
+@pytest.fixture(name='cohort_file')
+def fixture_cohort_file(tmp_path, sample_frame):
+    path = tmp_path / 'cohort.csv'
+    sample_frame.rename(columns={'s_ca_125': 'ca125'}).assign(patient_id=range(100, 110), notes='x').to_csv(
+        path, index=False
+    )
+    return path
+
+
+def test_score_file_matches_predict_risks_frame(tmp_path, cohort_file, sample_frame):
+    output = tmp_path / 'scores.csv'
+
+    summary = score_file(cohort_file, output, chunk_size=3, id_columns=['patient_id'], rename={'ca125': 's_ca_125'})
+    result = pd.read_csv(output)
+
+    assert summary == (10, 10, 0, 4)
+    assert list(result.columns) == ['patient_id', *adnex.predict_risks_frame(sample_frame).columns, 'cancer_risk']
+    assert result['patient_id'].tolist() == list(range(100, 110))
+    np.testing.assert_allclose(result.iloc[:, 1:6], adnex.predict_risks_frame(sample_frame), rtol=1e-12)
+    np.testing.assert_allclose(result['cancer_risk'], adnex.predict_cancer_risk_frame(sample_frame), rtol=1e-12)
+
+
+def test_score_file_output_columns(tmp_path, cohort_file):
+    output = tmp_path / 'scores.tsv'
+
+    score_file(cohort_file, output, rename={'ca125': 's_ca_125'}, output_columns=['cancer_risk', 'with_ca125'])
+    result = pd.read_csv(output, sep='\t')
+
+    assert list(result.columns) == ['cancer_risk', 'with_ca125']
+    assert result['with_ca125'].tolist() == [True, False, True, False, True, True, True, False, True, True]
+
+
+def test_score_file_quarantine(tmp_path, sample_frame):
+    source = tmp_path / 'cohort.csv'
+    sample_frame.assign(patient_id=range(10)).astype({'age': float}).assign(
+        age=lambda frame: frame['age'].where(frame.index != 2, 200.0)
+    ).to_csv(source, index=False)
+    output, quarantine = tmp_path / 'scores.csv', tmp_path / 'quarantine.csv'
+
+    summary = score_file(source, output, chunk_size=4, id_columns=['patient_id'], quarantine_path=quarantine)
+    scored, rejected = pd.read_csv(output), pd.read_csv(quarantine)
+
+    assert summary == (10, 9, 1, 3)
+    assert 2 not in scored['patient_id'].tolist()
+    assert rejected['patient_id'].tolist() == [2]
+    assert rejected['errors'].tolist() == ['age: OUT_OF_RANGE']
+
+
+def test_score_file_invalid_row_raises_without_quarantine(tmp_path, sample_frame):
+    source = tmp_path / 'cohort.csv'
+    sample_frame.assign(age=np.arange(1, 11) * 30).to_csv(source, index=False)
+
+    with pytest.raises(ValidationError, match='Invalid input in row 3'):
+        score_file(source, tmp_path / 'scores.csv', chunk_size=3)
+
+
+@pytest.mark.parametrize('chunk_size', [2, 10])
+def test_score_file_cell_that_is_not_a_number(tmp_path, sample_frame, chunk_size):
+    source = tmp_path / 'cohort.csv'
+    sample_frame.assign(patient_id=range(10)).astype({'age': object}).assign(
+        age=lambda frame: frame['age'].where(frame.index != 3, 'unknown')
+    ).to_csv(source, index=False)
+    output, quarantine = tmp_path / 'scores.csv', tmp_path / 'quarantine.csv'
+
+    with pytest.raises(ValidationError, match="Invalid input in row 3: Invalid type for 'age'.*got str"):
+        score_file(source, output, chunk_size=chunk_size)
+
+    summary = score_file(source, output, chunk_size=chunk_size, id_columns=['patient_id'], quarantine_path=quarantine)
+    scored, rejected = pd.read_csv(output), pd.read_csv(quarantine)
+
+    assert (summary.n_scored, summary.n_quarantined) == (9, 1)
+    assert scored['patient_id'].tolist() == [0, 1, 2, 4, 5, 6, 7, 8, 9]
+    np.testing.assert_allclose(scored.iloc[:, 1:6], adnex.predict_risks_frame(sample_frame.drop(index=3)), rtol=1e-12)
+    assert rejected[['patient_id', 'age', 'errors']].values.tolist() == [[3, 'unknown', 'age: NOT_INTEGER']]
+
+
+def test_score_file_missing_column(tmp_path, cohort_file):
+    with pytest.raises(MissingVariableError):
+        score_file(cohort_file.parent / 'cohort.csv', tmp_path / 'scores.csv', rename={'age': 'not_age'})
+
+
+def test_score_file_empty_quarantine_has_header(tmp_path, cohort_file):
+    quarantine = tmp_path / 'quarantine.csv'
+
+    score_file(cohort_file, tmp_path / 'scores.csv', rename={'ca125': 's_ca_125'}, quarantine_path=quarantine)
+
+    assert pd.read_csv(quarantine).empty
+    assert 'errors' in pd.read_csv(quarantine).columns
+
+
+def test_score_file_invalid_arguments(tmp_path, cohort_file):
+    with pytest.raises(ValueError, match='chunk_size must be positive'):
+        score_file(cohort_file, tmp_path / 'scores.csv', chunk_size=0)
+    with pytest.raises(ValueError, match='Unknown output columns'):
+        score_file(cohort_file, tmp_path / 'scores.csv', output_columns=['risk'])
+    with pytest.raises(ValueError, match='Cannot infer the file format'):
+        score_file(cohort_file, tmp_path / 'scores.xlsx')
+
+
+def test_infer_file_format():
+    assert infer_file_format('data.CSV') == 'csv'
+    assert infer_file_format('data.tab') == 'tsv'
+    assert infer_file_format('data.pq') == 'parquet'
+
+
+def test_read_chunks_selects_columns(cohort_file):
+    chunks = list(read_chunks(cohort_file, 'csv', chunk_size=4, columns={'age', 'patient_id', 'absent'}))
+
+    assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+    assert set(chunks[0].columns) == {'age', 'patient_id'}
+
+
+def test_score_file_parquet_round_trip(tmp_path, sample_frame):
+    pytest.importorskip('pyarrow')
+    source, output = tmp_path / 'cohort.parquet', tmp_path / 'scores.parquet'
+    sample_frame.to_parquet(source)
+
+    score_file(source, output, chunk_size=4)
+
+    np.testing.assert_allclose(pd.read_parquet(output)['cancer_risk'], adnex.predict_cancer_risk_frame(sample_frame))
+
+
+@pytest.mark.parametrize('output_name', ['scores.parquet', 'scores.csv'])
+def test_score_file_parquet_quarantine_across_chunks(tmp_path, sample_frame, output_name):
+    pytest.importorskip('pyarrow')
+    # CA-125 is read as integers in the chunks without a missing value, and the first chunk has no invalid row
+    source = tmp_path / 'cohort.csv'
+    invalid = sample_frame.assign(
+        patient_id=range(10), s_ca_125=sample_frame['s_ca_125'].fillna(50).astype(int).astype(object)
+    )
+    invalid.loc[[4, 7], 'max_lesion_diameter'] = [500, 400]
+    invalid.loc[[5, 8], 's_ca_125'] = [np.nan, 1_000_000]
+    invalid.to_csv(source, index=False)
+    output, quarantine = tmp_path / output_name, tmp_path / 'quarantine.parquet'
+
+    summary = score_file(source, output, chunk_size=3, id_columns=['patient_id'], quarantine_path=quarantine)
+    scored = pd.read_parquet(output) if output_name.endswith('.parquet') else pd.read_csv(output)
+    rejected = pd.read_parquet(quarantine)
+
+    assert summary == (10, 7, 3, 4)
+    assert scored['patient_id'].tolist() == [0, 1, 2, 3, 5, 6, 9]
+    assert rejected['patient_id'].tolist() == [4, 7, 8]
+    assert (
+        rejected['s_ca_125'].dtype == np.float64
+        and rejected['errors'].tolist()[0] == 'max_lesion_diameter: OUT_OF_RANGE'
+    )
+    np.testing.assert_allclose(
+        scored['cancer_risk'],
+        adnex.predict_cancer_risk_frame(invalid.drop(index=[4, 7, 8]).drop(columns='patient_id')),
+        rtol=1e-12,
+    )
+
+
+def test_score_file_memory_is_bounded(tmp_path, sample_frame):
+    def peak_memory(n_repeats):
+        source = tmp_path / f'cohort_{n_repeats}.csv'
+        pd.concat([sample_frame] * n_repeats, ignore_index=True).to_csv(source, index=False)
+        tracemalloc.start()
+        score_file(source, tmp_path / 'scores.csv', chunk_size=500)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak
+
+    assert peak_memory(1000) < 2 * peak_memory(100)
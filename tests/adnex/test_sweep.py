@@ -0,0 +1,114 @@
+""" Tests for risk sweeps over a grid of input values. """
+
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import adnex
+from adnex.sweep import sweep_risks
+from utils.exceptions import MissingVariableError, ValidationError
+
+
+def _expected_risks(data, grid):
+    # Score every (row, grid point) pair with predict_cancer_risk_frame, NaN where the pair is invalid
+    names = list(grid)
+    points = list(itertools.product(*grid.values()))
+    rows = data.loc[data.index.repeat(len(points))].reset_index(drop=True)
+    for position, name in enumerate(names):
+        rows[name] = np.tile([point[position] for point in points], len(data))
+    risks = adnex.predict_cancer_risk_frame(rows, errors='mask').to_numpy()
+    return risks.reshape((len(data),) + tuple(len(values) for values in grid.values()))
+
+
+@pytest.mark.parametrize(
+    'grid',
+    [
+        {'s_ca_125': [1, 35, 500, 10_000]},
+        {'max_solid_component': [0, 10, 50, 80, 120]},
+        {'max_lesion_diameter': [10, 45, 88, 300], 'max_solid_component': [0, 25, 50]},
+        {'age': [10, 40, 110], 'ascites_present': [0, 1]},
+    ],
+)
+def test_matches_pointwise_scoring(sample_frame, grid):
+    sweep = sweep_risks(sample_frame, grid)
+
+    np.testing.assert_allclose(sweep.risks, _expected_risks(sample_frame, grid), rtol=1e-12)
+    np.testing.assert_array_equal(sweep.valid, ~np.isnan(sweep.risks))
+    assert list(sweep.grid) == list(grid)
+
+
+def test_invalid_grid_points(sample_frame):
+    sweep = sweep_risks(sample_frame, {'max_solid_component': [10, 50, 70.5, -1], 'age': [5, 40]})
+
+    assert sweep.valid.shape == (10, 4, 2)
+    assert not sweep.valid[:, 2:].any()
+    assert not sweep.valid[:, :, 0].any()
+    np.testing.assert_array_equal(sweep.valid[:, 1, 1], sample_frame['max_lesion_diameter'] >= 50)
+
+
+def test_probabilities(sample_frame):
+    sweep = sweep_risks(sample_frame, {'s_ca_125': [20, 200]}, output='probabilities')
+    data = sample_frame.assign(s_ca_125=200)
+
+    assert sweep.risks.shape == (10, 2, 5)
+    np.testing.assert_allclose(sweep.risks[:, 1], adnex.predict_risks_frame(data).to_numpy(), rtol=1e-12)
+
+
+def test_single_patient_without_the_swept_variable(sample_input):
+    patient = sample_input.drop('max_solid_component')
+
+    sweep = sweep_risks(patient, {'max_solid_component': [0, 50]})
+    expected = adnex.predict_cancer_risk(sample_input)
+
+    assert sweep.risks.shape == (1, 2)
+    assert sweep.risks[0, 1] == pytest.approx(expected, rel=1e-12)
+
+
+def test_chunks(sample_frame, monkeypatch):
+    grid = {'max_lesion_diameter': np.arange(50, 301)}
+    expected = sweep_risks(sample_frame, grid).risks
+
+    monkeypatch.setattr('adnex.sweep.DEFAULT_CHUNK_SIZE', 1_000)
+
+    np.testing.assert_array_equal(sweep_risks(sample_frame, grid).risks, expected)
+
+
+def test_validation(sample_frame):
+    invalid = sample_frame.copy()
+    invalid.loc[2, 'age'] = 200
+    invalid.loc[4, 'max_solid_component'] = 1_000
+
+    with pytest.raises(ValidationError, match='Invalid input in row 2: age=200 is out of range'):
+        sweep_risks(invalid, {'s_ca_125': [35]})
+    with pytest.raises(ValidationError, match='Invalid input in row 2: age=200 is out of range'):
+        sweep_risks(invalid, {'max_lesion_diameter': [50], 'ascites_present': [1]})
+    assert sweep_risks(invalid, {'age': [50], 'max_solid_component': [0]}).valid.all()
+    assert sweep_risks(invalid, {'s_ca_125': [35]}, validate=False).risks.shape == (10, 1)
+
+    with pytest.raises(MissingVariableError):
+        sweep_risks(sample_frame.drop(columns='age'), {'s_ca_125': [35]})
+
+
+@pytest.mark.parametrize(
+    ('grid', 'output'),
+    [
+        ({}, 'cancer_risk'),
+        ({'height': [1]}, 'cancer_risk'),
+        ({'age': [[40]]}, 'cancer_risk'),
+        ({'age': [40]}, 'logit'),
+    ],
+)
+def test_invalid_arguments(sample_frame, grid, output):
+    with pytest.raises(ValueError):
+        sweep_risks(sample_frame, grid, output=output)
+
+
+def test_validated_frame(sample_frame):
+    validated = adnex.ValidatedAdnexFrame.validate(sample_frame)
+
+    np.testing.assert_array_equal(
+        sweep_risks(validated, {'age': [30, 60]}).risks,
+        sweep_risks(pd.DataFrame(sample_frame), {'age': [30, 60]}).risks,
+    )
@@ -0,0 +1,102 @@
+""" Tests for the propagation of measurement error to uncertainty intervals of the risks. """
+
+import numpy as np
+import pytest
+
+import adnex
+from adnex.uncertainty import GaussianNoise, LogNormalNoise, propagate_measurement_error
+from utils.exceptions import ValidationError
+
+NOISE = {'max_lesion_diameter': GaussianNoise(3.0), 's_ca_125': LogNormalNoise(0.2)}
+
+
+def test_intervals_contain_the_point_risk(sample_frame):
+    result = propagate_measurement_error(sample_frame, NOISE, n_samples=2000, seed=0)
+    risks = adnex.predict_cancer_risk_frame(sample_frame).to_numpy()
+
+    assert result.quantiles.shape == (10, 3) and result.mean.shape == result.std.shape == (10,)
+    assert result.levels == (0.025, 0.5, 0.975) and result.n_samples == 2000
+    assert (np.diff(result.quantiles, axis=1) >= 0).all()
+    assert ((result.quantiles[:, 0] <= risks) & (risks <= result.quantiles[:, 2])).all()
+    assert (result.std > 0).all()
+
+
+def test_small_noise_collapses_to_the_point_risk(sample_frame):
+    result = propagate_measurement_error(sample_frame, {'age': GaussianNoise(0.1)}, n_samples=50, seed=0)
+    risks = adnex.predict_cancer_risk_frame(sample_frame).to_numpy()
+
+    # Draws within 0.5 of the measured integer age round back to it
+    np.testing.assert_allclose(result.quantiles, np.repeat(risks[:, np.newaxis], 3, axis=1), rtol=1e-12)
+    np.testing.assert_allclose(result.std, 0.0, atol=1e-15)
+
+
+def test_reproducible_and_independent_of_chunk_size(sample_frame):
+    expected = propagate_measurement_error(sample_frame, NOISE, n_samples=100, seed=42)
+    chunked = propagate_measurement_error(sample_frame, NOISE, n_samples=100, seed=42, chunk_size=250)
+    generator = propagate_measurement_error(sample_frame, NOISE, n_samples=100, seed=np.random.default_rng(42))
+
+    for result in (chunked, generator):
+        np.testing.assert_array_equal(result.quantiles, expected.quantiles)
+        np.testing.assert_array_equal(result.std, expected.std)
+    assert not np.array_equal(
+        propagate_measurement_error(sample_frame, NOISE, n_samples=100, seed=43).quantiles, expected.quantiles
+    )
+
+
+def test_draws_stay_in_the_valid_domain(sample_frame):
+    # Large errors of the lesion diameter and the solid component, which are clipped before scoring
+    noise = {'max_lesion_diameter': GaussianNoise(1.0, relative=True), 'max_solid_component': GaussianNoise(50.0)}
+    result = propagate_measurement_error(sample_frame, noise, n_samples=500, seed=0)
+
+    assert np.isfinite(result.quantiles).all()
+    assert ((result.quantiles >= 0) & (result.quantiles <= 1)).all()
+
+
+def test_rows_without_ca125_keep_their_variant(sample_frame):
+    result = propagate_measurement_error(sample_frame, {'s_ca_125': LogNormalNoise(0.5)}, n_samples=100, seed=0)
+    without_ca125 = sample_frame['s_ca_125'].isna().to_numpy()
+    risks = adnex.predict_cancer_risk_frame(sample_frame).to_numpy()
+
+    np.testing.assert_allclose(result.quantiles[without_ca125, 1], risks[without_ca125], rtol=1e-12)
+    np.testing.assert_allclose(result.std[without_ca125], 0.0, atol=1e-15)
+    assert (result.std[~without_ca125] > 0).all()
+
+
+def test_probabilities(sample_frame):
+    result = propagate_measurement_error(
+        sample_frame, NOISE, n_samples=200, levels=(0.1, 0.9), seed=0, output='probabilities'
+    )
+
+    assert result.quantiles.shape == (10, 2, 5) and result.mean.shape == (10, 5)
+    np.testing.assert_allclose(result.mean.sum(axis=1), 1.0, rtol=1e-12)
+
+
+def test_single_patient(sample_input):
+    result = propagate_measurement_error(sample_input, NOISE, n_samples=100, seed=0)
+
+    assert result.quantiles.shape == (1, 3)
+
+
+@pytest.mark.parametrize(
+    'arguments',
+    [
+        {'noise': {}},
+        {'noise': {'ascites_present': GaussianNoise(1.0)}},
+        {'noise': NOISE, 'n_samples': 0},
+        {'noise': NOISE, 'levels': (0.5, 1.5)},
+        {'noise': NOISE, 'output': 'z_values'},
+        {'noise': NOISE, 'chunk_size': 0},
+    ],
+)
+def test_invalid_arguments(sample_frame, arguments):
+    with pytest.raises(ValueError):
+        propagate_measurement_error(sample_frame, **arguments)
+
+
+def test_validation(sample_frame):
+    invalid = sample_frame.copy()
+    invalid.loc[2, 'age'] = 200
+
+    with pytest.raises(ValidationError, match='Invalid input in row 2: age=200 is out of range'):
+        propagate_measurement_error(invalid, NOISE)
+    assert propagate_measurement_error(invalid, NOISE, n_samples=10, validate=False).quantiles.shape == (10, 3)
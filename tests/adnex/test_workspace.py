@@ -0,0 +1,118 @@
+""" Tests for scoring into caller-supplied output arrays and reusable workspaces. """
+
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from adnex.batch import predict_batch
+from adnex.computation import compute_probabilities_array, compute_probabilities_from_z_values
+from adnex.engine import get_compiled_model
+from adnex.transformation import transform_input_columns
+from adnex.workspace import Workspace
+
+
+@pytest.fixture(name='columns')
+def fixture_columns(sample_frame):
+    data = sample_frame.sample(5_000, replace=True, random_state=0)
+    return {name: data[name].to_numpy() for name in data.columns}
+
+
+@pytest.mark.parametrize('fraction_with_ca125', [0.0, 0.6, 1.0])
+def test_predict_batch_with_workspace(columns, fraction_with_ca125):
+    columns['s_ca_125'] = np.where(np.random.default_rng(0).random(5_000) < fraction_with_ca125, 35.0, np.nan)
+    expected = predict_batch(columns)
+    workspace = Workspace(6_000)
+    out = np.empty((5_000, 5))
+
+    for _ in range(2):
+        prediction = predict_batch(columns, out=out, workspace=workspace)
+
+    assert prediction.probabilities is out
+    np.testing.assert_allclose(out, expected.probabilities, rtol=1e-12)
+    np.testing.assert_array_equal(prediction.with_ca125, expected.with_ca125)
+    assert np.shares_memory(prediction.with_ca125, workspace.with_ca125)
+
+
+def test_smaller_batches_reuse_the_workspace(columns, sample_frame):
+    workspace = Workspace(5_000)
+    predict_batch(columns, workspace=workspace)
+
+    prediction = predict_batch(sample_frame, workspace=workspace)
+
+    np.testing.assert_allclose(prediction.probabilities, predict_batch(sample_frame).probabilities, rtol=1e-12)
+
+
+@pytest.mark.parametrize('engine', ['arithmetic', 'lookup'])
+@pytest.mark.parametrize('deduplicate', [False, True])
+def test_out_with_engines_and_deduplication(columns, engine, deduplicate):
+    out = np.empty((5_000, 5), dtype=np.float32)
+
+    prediction = predict_batch(columns, engine=engine, deduplicate=deduplicate, out=out, workspace=Workspace(5_000))
+
+    assert prediction.probabilities is out
+    np.testing.assert_allclose(out, predict_batch(columns).probabilities, rtol=1e-5)
+
+
+def test_repeated_scoring_is_allocation_flat(columns):
+    workspace = Workspace(5_000)
+    out = np.empty((5_000, 5))
+    predict_batch(columns, out=out, workspace=workspace)
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        for _ in range(10):
+            predict_batch(columns, out=out, workspace=workspace)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # Only NumPy's fixed-size casting buffers and small Python objects are allocated, far less than one row array
+    assert current - before < 1_024
+    assert peak - before < out.nbytes // 2
+    np.testing.assert_allclose(out, predict_batch(columns).probabilities, rtol=1e-12)
+
+
+def test_batch_larger_than_workspace(columns):
+    with pytest.raises(ValueError, match='holds at most 100'):
+        predict_batch(columns, workspace=Workspace(100))
+
+
+def test_transform_input_columns_out(sample_frame):
+    data = sample_frame.dropna()
+    out = np.empty((len(data), 11), order='F')
+
+    assert transform_input_columns(data, with_ca125=True, out=out) is out
+    np.testing.assert_array_equal(out, transform_input_columns(data, with_ca125=True))
+
+    with pytest.raises(ValueError, match='out must be a float64 array'):
+        transform_input_columns(data, with_ca125=False, out=out)
+
+
+def test_compute_probabilities_array_out(sample_frame):
+    transformed = transform_input_columns(sample_frame, with_ca125=False)
+    out = np.empty((len(sample_frame), 5))
+
+    assert compute_probabilities_array(transformed, with_ca125=False, out=out) is out
+    np.testing.assert_array_equal(out, compute_probabilities_array(transformed, with_ca125=False))
+
+
+def test_score_columns_and_kernel_with_workspace(columns):
+    model = get_compiled_model()
+    workspace = Workspace(5_000)
+
+    z_values, _ = model.score_columns(columns, workspace=workspace)
+    log_probabilities = compute_probabilities_from_z_values(z_values, log=True, workspace=workspace)
+
+    assert np.shares_memory(z_values, workspace.z_values)
+    np.testing.assert_allclose(log_probabilities, np.log(predict_batch(columns).probabilities), rtol=1e-10)
+
+
+def test_workspace_size():
+    workspace = Workspace(1_000)
+
+    assert workspace.nbytes == 1_000 * (10 * 8 + 8 + 2 + 2 * 4 * 8 + 3 * 8)
+    assert repr(workspace) == f'Workspace(max_rows=1000, nbytes={workspace.nbytes})'
+    with pytest.raises(ValueError, match='non-negative'):
+        Workspace(-1)
@@ -2,9 +2,10 @@
 
 import re
 
+import numpy as np
 import pytest
 
-from adnex.validation.core import validate_input
+from adnex.validation.core import validate_input, validate_input_frame
 from adnex.validation.variables import MAX_AGE, MIN_AGE
 from utils.exceptions import MissingVariableError, ValidationError
 
@@ -156,3 +157,82 @@ def test_validate_adnex_model_input_invalid_binary_cols(sample_input):
 
     with pytest.raises(ValidationError, match=f"Invalid value for '{var_name}': expected 0 or 1, got {value}."):
         validate_input(invalid_input)
+
+
+def test_validate_input_frame_valid(sample_frame):
+    validate_input_frame(sample_frame.assign(extra_col='text'))
+
+
+def test_validate_input_frame_missing_cols(sample_frame):
+    with pytest.raises(
+        MissingVariableError,
+        match="The input row is missing required variables: {'age', 'max_lesion_diameter'}.",
+    ):
+        validate_input_frame(sample_frame.drop(columns=['age', 'max_lesion_diameter']))
+
+
+@pytest.mark.parametrize(
+    'var_name, value, message',
+    [
+        ('age', MIN_AGE - 1, f'age={MIN_AGE - 1} is out of range. Must be between {MIN_AGE} and {MAX_AGE}.'),
+        ('age', 45.5, "Invalid type for 'age': expected integer, got float64."),
+        ('age', np.nan, "The following variables are missing (NaN): ['age']"),
+        ('s_ca_125', -1, 's_ca_125=-1 cannot be negative.'),
+        ('max_lesion_diameter', 301, 'max_lesion_diameter=301 is out of range. Must not exceed 300.'),
+        ('max_solid_component', -1, 'max_solid_component=-1 cannot be negative.'),
+        ('number_of_papillary_projections', 5, 'number_of_papillary_projections=5 is invalid.'),
+        ('ascites_present', 2, "Invalid value for 'ascites_present': expected 0 or 1, got 2."),
+    ],
+)
+def test_validate_input_frame_invalid_values(sample_frame, var_name, value, message):
+    invalid_input = sample_frame.astype({var_name: float})
+    invalid_input.loc[4, var_name] = value
+
+    with pytest.raises(ValidationError, match=re.escape(f'Invalid input in row 4: {message}')):
+        validate_input_frame(invalid_input)
+
+
+def test_validate_input_frame_object_column(sample_frame):
+    invalid_input = sample_frame.astype({'age': object})
+    invalid_input.loc[2, 'age'] = 'invalid'
+
+    with pytest.raises(
+        ValidationError, match="Invalid input in row 2: Invalid type for 'age': expected integer, got str."
+    ):
+        validate_input_frame(invalid_input)
+
+
+def test_validate_input_frame_nullable_dtypes(sample_frame):
+    validate_input_frame(sample_frame.astype({'age': 'Int64', 's_ca_125': 'Float64', 'ascites_present': object}))
+
+
+def test_validate_input_frame_mask_and_report(sample_frame):
+    invalid_input = sample_frame.copy()
+    invalid_input.loc[[1, 6], 'number_of_papillary_projections'] = 7
+
+    mask = validate_input_frame(invalid_input, errors='mask')
+    report = validate_input_frame(invalid_input, errors='report')
+
+    np.testing.assert_array_equal(mask, ~invalid_input.index.isin([1, 6]))
+    np.testing.assert_array_equal(report.valid, mask)
+    assert report.error_counts() == {'number_of_papillary_projections': 2}
+
+
+def test_validate_input_frame_invalid_errors_argument(sample_frame):
+    with pytest.raises(ValueError, match="errors must be 'raise', 'mask' or 'report', got 'ignore'."):
+        validate_input_frame(sample_frame, errors='ignore')
+
+
+def test_validate_input_frame_missing_cols_in_mask_mode(sample_frame):
+    with pytest.raises(MissingVariableError):
+        validate_input_frame(sample_frame.drop(columns='age'), errors='mask')
+
+
+def test_validate_input_frame_raises_when_only_the_vectorized_checks_fail(sample_frame, monkeypatch):
+    # If the scalar validation accepted a row that the vectorized checks reject, the row must still not pass
+    monkeypatch.setattr('adnex.validation.core.validate_input_values', lambda values: None)
+    invalid = sample_frame.copy()
+    invalid.loc[3, 'age'] = 200
+
+    with pytest.raises(ValidationError, match='row 3: age is OUT_OF_RANGE'):
+        validate_input_frame(invalid)
@@ -0,0 +1,131 @@
+""" Tests for the declarative validation schema. """
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from adnex.validation.core import validate_input
+from adnex.validation.schema import ADNEX_INPUT_SCHEMA, ErrorCode, VariableRule, validate_columns
+from adnex.validation.utils import has_ca125
+from utils.exceptions import ValidationError
+
+
+def test_validate_columns_valid(sample_frame):
+    report = validate_columns(sample_frame)
+
+    assert report.valid.all()
+    assert report.error_codes.shape == (len(sample_frame), len(ADNEX_INPUT_SCHEMA))
+    assert not report.error_codes.any()
+    assert report.errors().empty
+    assert not report.error_counts()
+
+
+@pytest.mark.parametrize(
+    'var_name, value, code',
+    [
+        ('age', np.nan, ErrorCode.MISSING),
+        ('age', 45.5, ErrorCode.NOT_INTEGER),
+        ('age', -1, ErrorCode.NEGATIVE),
+        ('age', 9, ErrorCode.OUT_OF_RANGE),
+        ('age', 111, ErrorCode.OUT_OF_RANGE),
+        ('s_ca_125', np.inf, ErrorCode.NOT_INTEGER),
+        ('s_ca_125', 10_001, ErrorCode.OUT_OF_RANGE),
+        ('max_lesion_diameter', 301, ErrorCode.OUT_OF_RANGE),
+        ('max_solid_component', 101, ErrorCode.EXCEEDS_VARIABLE),
+        ('number_of_papillary_projections', -1, ErrorCode.NEGATIVE),
+        ('number_of_papillary_projections', 5, ErrorCode.INVALID_VALUE),
+        ('is_oncology_center', -1, ErrorCode.INVALID_VALUE),
+    ],
+)
+def test_validate_columns_error_codes(sample_frame, var_name, value, code):
+    data = sample_frame.astype({var_name: float})
+    data.loc[3, var_name] = value
+
+    report = validate_columns(data)
+
+    position = report.variables.index(var_name)
+    assert report.error_codes[3, position] == code
+    np.testing.assert_array_equal(report.valid, data.index != 3)
+    assert report.error_counts() == {var_name: 1}
+
+
+def test_validate_columns_missing_optional_value_is_valid(sample_frame):
+    report = validate_columns(sample_frame)
+
+    assert sample_frame['s_ca_125'].isna().any()
+    assert report.valid.all()
+
+
+def test_validate_columns_missing_columns(sample_frame):
+    report = validate_columns(sample_frame.drop(columns=['age', 's_ca_125']))
+
+    assert (report.error_codes[:, report.variables.index('age')] == ErrorCode.MISSING).all()
+    assert not report.error_codes[:, report.variables.index('s_ca_125')].any()
+
+
+def test_validate_columns_from_dict_of_arrays(sample_frame):
+    columns = {name: sample_frame[name].to_numpy() for name in sample_frame.columns}
+    columns['age'] = columns['age'].astype(object)
+    columns['age'][0] = 'invalid'
+
+    report = validate_columns(columns)
+
+    pd.testing.assert_index_equal(report.index, pd.RangeIndex(len(sample_frame)))
+    assert report.error_codes[0, report.variables.index('age')] == ErrorCode.NOT_INTEGER
+    assert report.valid.sum() == len(sample_frame) - 1
+
+
+def test_validate_columns_custom_schema():
+    schema = (VariableRule('x', max_value=3), VariableRule('y', required=False, max_variable='x'))
+
+    report = validate_columns({'x': np.array([1, 4, 2]), 'y': np.array([1, 1, 3])}, schema=schema)
+
+    np.testing.assert_array_equal(report.error_codes, [[0, 0], [ErrorCode.OUT_OF_RANGE, 0], [0, 6]])
+
+
+def test_errors_long_format(sample_frame):
+    data = sample_frame.set_index(pd.Index(list('abcdefghij')))
+    data.loc['c', 'age'] = 200
+    data.loc['c', 'ascites_present'] = 3
+    data.loc['e', 'max_lesion_diameter'] = 1000
+
+    errors = validate_columns(data).errors()
+
+    assert errors.to_dict('records') == [
+        {'row': 'c', 'variable': 'age', 'error': 'OUT_OF_RANGE'},
+        {'row': 'c', 'variable': 'ascites_present', 'error': 'INVALID_VALUE'},
+        {'row': 'e', 'variable': 'max_lesion_diameter', 'error': 'OUT_OF_RANGE'},
+    ]
+
+
+def test_validate_columns_agrees_with_scalar_validation():
+    """Test that the vectorized checks accept exactly the rows accepted by the scalar validators."""
+    rng = np.random.default_rng(42)
+    n_rows = 500
+    data = pd.DataFrame(
+        {
+            'age': rng.integers(0, 120, n_rows),
+            's_ca_125': np.where(rng.random(n_rows) < 0.3, np.nan, rng.integers(-5, 10_010, n_rows)),
+            'max_lesion_diameter': rng.integers(-2, 310, n_rows),
+            'max_solid_component': rng.integers(-2, 310, n_rows),
+            'more_than_10_locules': rng.integers(0, 3, n_rows),
+            'number_of_papillary_projections': rng.integers(-1, 6, n_rows),
+            'acoustic_shadows_present': rng.integers(0, 2, n_rows),
+            'ascites_present': rng.integers(0, 2, n_rows),
+            'is_oncology_center': rng.choice([0, 1, 0.5], n_rows),
+        }
+    )
+
+    report = validate_columns(data)
+
+    expected = []
+    for _, row in data.iterrows():
+        if not has_ca125(row):
+            row = row.drop('s_ca_125')
+        try:
+            validate_input(row)
+            expected.append(True)
+        except ValidationError:
+            expected.append(False)
+
+    np.testing.assert_array_equal(report.valid, expected)
@@ -0,0 +1,123 @@
+""" Tests for validated frames and the trusted-input mode of the scoring functions. """
+
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import adnex
+from adnex.batch import predict_batch
+from adnex.columnar import predict_arrays
+from adnex.engine import get_compiled_model
+from adnex.validation.trusted import ValidatedAdnexFrame
+from utils.exceptions import MissingVariableError, ValidationError
+
+
+@pytest.fixture(name='invalid_frame')
+def fixture_invalid_frame(sample_frame):
+    data = sample_frame.copy()
+    data.loc[3, 'age'] = 200
+    return data
+
+
+def test_validate(sample_frame):
+    validated = ValidatedAdnexFrame.validate(sample_frame.assign(patient_id=range(10)))
+
+    assert validated.n_rows == len(sample_frame)
+    assert list(validated) == list(sample_frame.columns)
+    assert validated.index.equals(sample_frame.index)
+    assert not any(column.flags.writeable for column in validated.values())
+    pd.testing.assert_frame_equal(validated.to_frame(), sample_frame, check_dtype=False)
+    assert repr(validated).startswith('ValidatedAdnexFrame(n_rows=10,')
+
+
+def test_len_counts_columns_and_n_rows_counts_rows(sample_frame):
+    # A mapping of columns: len() is the number of variables, whatever the number of rows
+    validated = ValidatedAdnexFrame.validate(sample_frame.iloc[:3])
+
+    assert len(validated) == len(sample_frame.columns) == 9
+    assert validated.n_rows == 3
+
+
+def test_validate_raises(invalid_frame):
+    with pytest.raises(ValidationError, match='Invalid input in row 3'):
+        ValidatedAdnexFrame.validate(invalid_frame)
+    with pytest.raises(MissingVariableError):
+        ValidatedAdnexFrame.validate(invalid_frame.drop(columns='age'))
+    with pytest.raises(ValueError, match="errors must be 'raise' or 'drop'"):
+        ValidatedAdnexFrame.validate(invalid_frame, errors='mask')
+
+
+def test_validate_drops_invalid_rows(invalid_frame):
+    validated = ValidatedAdnexFrame.validate(invalid_frame, errors='drop')
+
+    assert list(validated.index) == [0, 1, 2, 4, 5, 6, 7, 8, 9]
+    pd.testing.assert_frame_equal(
+        adnex.predict_risks_frame(validated), adnex.predict_risks_frame(invalid_frame.drop(3))
+    )
+
+
+def test_validated_columns_do_not_change(sample_frame):
+    data = sample_frame.copy()
+    validated = ValidatedAdnexFrame.validate(data)
+
+    data.loc[0, 'age'] = 200
+    columns = {name: sample_frame[name].to_numpy().copy() for name in sample_frame.columns}
+    validated_columns = ValidatedAdnexFrame.validate(columns)
+    columns['age'][0] = 200
+
+    assert validated['age'][0] == validated_columns['age'][0] == 46
+
+
+def test_validate_nullable_and_structured_input(sample_frame):
+    nullable = ValidatedAdnexFrame.validate(sample_frame.astype({'s_ca_125': pd.Float64Dtype()}))
+    structured = ValidatedAdnexFrame.validate(sample_frame.to_records(index=False))
+
+    for validated in (nullable, structured):
+        assert validated['s_ca_125'].dtype == np.float64
+        np.testing.assert_array_equal(validated['s_ca_125'], sample_frame['s_ca_125'])
+
+
+def test_validated_frame_is_not_validated_again(sample_frame):
+    validated = ValidatedAdnexFrame.validate(sample_frame)
+    expected = adnex.predict_risks_frame(sample_frame)
+
+    with mock.patch('adnex.validation.core.validate_columns', side_effect=AssertionError):
+        pd.testing.assert_frame_equal(adnex.predict_risks_frame(validated), expected)
+        pd.testing.assert_series_equal(
+            adnex.predict_cancer_risk_frame(validated), adnex.predict_cancer_risk_frame(sample_frame, validate=False)
+        )
+        np.testing.assert_array_equal(predict_arrays(validated), expected.to_numpy())
+        np.testing.assert_array_equal(get_compiled_model().predict_proba(validated), expected.to_numpy())
+        np.testing.assert_array_equal(predict_batch(validated).probabilities, expected.to_numpy())
+
+
+def test_validate_false(sample_frame, sample_input, invalid_frame):
+    expected = adnex.predict_risks_frame(sample_frame)
+
+    pd.testing.assert_frame_equal(adnex.predict_risks_frame(sample_frame, validate=False), expected)
+    assert adnex.predict_risks_frame(invalid_frame, validate=False).notna().all(axis=None)
+    np.testing.assert_array_equal(predict_arrays(invalid_frame.to_dict('list'), validate=False)[0], expected.iloc[0])
+    np.testing.assert_array_equal(get_compiled_model().predict_proba(sample_input, validate=False), expected.iloc[0])
+
+    risks = adnex.predict_risks(sample_input)
+    with mock.patch('adnex.model.validate_input', side_effect=AssertionError):
+        pd.testing.assert_series_equal(adnex.predict_risks(sample_input, validate=False), risks)
+        assert adnex.predict_cancer_risk(sample_input, validate=False) == pytest.approx(expected.iloc[0, 1:].sum())
+
+
+def test_predict_patient_validate_false(sample_input):
+    invalid = dict(sample_input, age=200)
+
+    with pytest.raises(ValidationError):
+        adnex.predict_patient(invalid)
+    assert adnex.predict_patient(invalid, validate=False).with_ca125
+    assert tuple(adnex.predict_patient(dict(sample_input), validate=False)) == tuple(
+        adnex.predict_patient(dict(sample_input))
+    )
+
+
+def test_cannot_be_created_without_validation(sample_frame):
+    with pytest.raises(TypeError, match='Use ValidatedAdnexFrame.validate'):
+        ValidatedAdnexFrame(dict(sample_frame), sample_frame.index, object())